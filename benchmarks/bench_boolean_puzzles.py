@@ -0,0 +1,77 @@
+# benchmarks/bench_boolean_puzzles.py
+#
+# Логические задачи с сотнями участников: Z3 (по одной модели на check с блокирующей
+# клаузой) против DPLL в процессе (logos.sat) на той же КНФ. Каждая задача проверяется
+# на единственность решения — это вторая модель или доказательство, что ее нет.
+#
+# Запуск из корня репозитория: python -m benchmarks.bench_boolean_puzzles
+
+import random
+import time
+from logos.client import Client
+from logos.delegator import Delegator
+from logos.scanner import PromptScan
+
+SYLLABLES = ["ан", "бо", "ве", "гу", "да", "ел", "жо", "зи", "ка", "ло", "ми", "ну", "ор", "пе", "ра", "су"]
+
+
+def person_names(n):
+    names = []
+    for first in SYLLABLES:
+        for second in SYLLABLES:
+            for third in SYLLABLES:
+                names.append((first + second + third).capitalize())
+    return names[:n]
+
+
+def make_puzzle(n, unique=True, extra=2, seed=0):
+    """
+    Задача на n участников: цепочка импликаций от факта 'A точно не идет.' задает
+    всех однозначно; extra * n случайных импликаций согласованы с тем же решением.
+    Без факта у задачи несколько решений.
+    """
+    rng = random.Random(seed)
+    names = person_names(n)
+    truth = {name: rng.random() < 0.5 for name in names}
+    truth[names[0]] = False
+
+    def phrase(name, value):
+        return f"{name} идет" if value else f"{name} не идет"
+
+    sentences = [f"Если {phrase(a, truth[a])}, то {phrase(b, truth[b])}." for a, b in zip(names, names[1:])]
+    for _ in range(extra * n):
+        a, b = rng.sample(names, 2)
+        # Импликация верна при truth: либо условие ложно, либо следствие истинно
+        cond = rng.random() < 0.5
+        conclusion = truth[b] if cond == truth[a] else rng.random() < 0.5
+        sentences.append(f"Если {phrase(a, cond)}, то {phrase(b, conclusion)}.")
+    rng.shuffle(sentences)
+    if unique:
+        sentences.append(f"{names[0]} точно не идет.")
+    return " ".join(sentences)
+
+
+def measure(delegator, prompt, repeats):
+    scan = PromptScan(prompt)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        answer = delegator._handle_boolean_logic(prompt, scan=scan)
+    return (time.perf_counter() - start) / repeats * 1000, answer
+
+
+def main():
+    z3_path = Delegator(Client(), fast_path=False)
+    dpll_path = Delegator(Client())
+    print(f"{'участников':>10} | {'решение':>12} | {'Z3, мс':>9} | {'DPLL, мс':>9} | {'ускорение':>9}")
+    for n in (100, 300, 600):
+        for unique in (True, False):
+            prompt = make_puzzle(n, unique=unique, seed=n)
+            z3_ms, z3_answer = measure(z3_path, prompt, 3)
+            dpll_ms, dpll_answer = measure(dpll_path, prompt, 3)
+            assert ("единственно." in z3_answer) == ("единственно." in dpll_answer)
+            label = "единственное" if unique else "не единств."
+            print(f"{n:>10} | {label:>12} | {z3_ms:>9.1f} | {dpll_ms:>9.1f} | {z3_ms / dpll_ms:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# benchmarks/bench_forensic_batch.py
+#
+# Проверка всех сделок файла улик: ForensicSolver.verify по одной сделке (новый
+# решатель на каждую) против verify_batch (фильтр NumPy, Z3 только для нарушений
+# и пограничных сделок). Доля нарушений задается долей сделок вне допуска.
+#
+# Запуск из корня репозитория: python -m benchmarks.bench_forensic_batch
+
+import contextlib
+import io
+import time
+import numpy as np
+import pandas as pd
+from logos.solvers.forensic_solver import ForensicSolver
+
+ORDERBOOK = {"asks": pd.DataFrame({"price": [100.5]}), "bids": pd.DataFrame({"price": [100.0]})}
+
+
+def make_trades(n, void_share, seed=0):
+    rng = np.random.default_rng(seed)
+    price = rng.uniform(99.0, 101.5, n)
+    voids = rng.random(n) < void_share
+    price[voids] = rng.uniform(80.0, 95.0, voids.sum())
+    return pd.DataFrame({"price": np.round(price, 2), "side": rng.choice(["BUY", "SELL"], n)})
+
+
+def main():
+    solver = ForensicSolver()
+    print(f"{'сделок':>7} | {'нарушений':>9} | {'по одной, мс/сделку':>19} | {'пакет, мс':>9} | {'Z3 проверок':>11} | {'ускорение':>9}")
+    for n in (1000, 10000, 50000):
+        for void_share in (0.001, 0.05):
+            trades = make_trades(n, void_share, seed=n)
+            sample = trades.iloc[:200]
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                single = [solver.verify(trade, None, ORDERBOOK)["verdict"] for trade in sample.to_dict(orient="records")]
+            per_trade = (time.perf_counter() - start) / len(sample)
+
+            start = time.perf_counter()
+            table = solver.verify_batch(trades, ORDERBOOK)
+            batch = time.perf_counter() - start
+            assert list(table["verdict"].iloc[:200]) == single
+            summary = ForensicSolver.summarize(table)
+            print(f"{n:>7} | {void_share:>9.1%} | {per_trade * 1000:>19.3f} | {batch * 1000:>9.1f} | "
+                  f"{summary['z3_checks']:>11} | {per_trade * n / batch:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
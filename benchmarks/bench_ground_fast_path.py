@@ -0,0 +1,57 @@
+# benchmarks/bench_ground_fast_path.py
+#
+# Пропускная способность проверок с полностью заданными переменными:
+# точная арифметика без Z3 против решателя Z3.
+#
+# Запуск из корня репозитория: python -m benchmarks.bench_ground_fast_path
+
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+from logos.delegator import Delegator
+from logos.rules import CompiledRuleset
+
+
+def throughput(fn, seconds=1.0):
+    """Число вызовов fn в секунду."""
+    calls = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            fn()
+            calls += 1
+    return calls / (time.perf_counter() - start)
+
+
+def main():
+    rules = ["amount < 10000", "risk_score <= 0.85", "transaction_hour >= 9", "transaction_hour <= 18"]
+    bindings = {"amount": 9500.0, "risk_score": 0.7, "transaction_hour": 15.0}
+    ruleset = CompiledRuleset("bench", rules)
+
+    print("CompiledRuleset.check (Client.run)")
+    z3_rate = throughput(lambda: ruleset.check(bindings, fast_path=False))
+    fast_rate = throughput(lambda: ruleset.check(bindings))
+    print(f"  Z3:           {z3_rate:>12.0f} проверок/с")
+    print(f"  без Z3:       {fast_rate:>12.0f} проверок/с  ({fast_rate / z3_rate:.0f}x)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.json")
+        with open(path, "w") as f:
+            json.dump({"rules": rules}, f)
+
+        class _Client:
+            rulesets = {"bench": path}
+
+        prompt = "Проверь транзакцию с amount=12000 risk_score=0.7 час 15 по набору правил 'bench'"
+        print("Delegator._handle_rule_engine")
+        z3_rate = throughput(lambda: Delegator(_Client(), fast_path=False)._handle_rule_engine(prompt))
+        fast_rate = throughput(lambda: Delegator(_Client())._handle_rule_engine(prompt))
+        print(f"  Z3:           {z3_rate:>12.0f} запросов/с")
+        print(f"  без Z3:       {fast_rate:>12.0f} запросов/с  ({fast_rate / z3_rate:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# benchmarks/bench_linear_algebra.py
+#
+# Алгебраические задачи Delegator: прежний путь (eval() фрагментов в Z3 + общий решатель)
+# против линейной формы с точным исключением Гаусса (logos.linear), где Z3 не нужен,
+# если равенства задают все переменные. Разбор линейной формы кэшируется по тексту
+# ограничения, поэтому повторяющиеся уравнения разбираются один раз.
+#
+# Запуск из корня репозитория: python -m benchmarks.bench_linear_algebra
+
+import time
+from logos.client import Client
+from logos.delegator import Delegator
+from logos.linear import _parse
+
+PROMPTS = {
+    "2x2, целые": "Реши систему x + y == {n} и x - y == 2, где x > 0.",
+    "3x3, целые": "Реши систему x + y + z == {n} и x - y == 2 и 2*z - x == 1.",
+    "2x2, дроби": "Реши систему 2.5*a + b == {n}.5 и a - b == 1, где a > 0.",
+    "5x5, дроби": "Реши систему a + b + x + y + z == {n}.5 и a - b == 1.5 и x - y == 0.5 и y + z == 3 и 2*z - a == 1.",
+}
+REPEATS = 300
+
+
+def measure(delegator, template):
+    start = time.perf_counter()
+    for i in range(REPEATS):
+        delegator.analyze_and_translate(template.format(n=10 + i % 40 * 2))
+    return (time.perf_counter() - start) / REPEATS * 1e6
+
+
+def main():
+    z3_path = Delegator(Client(), fast_path=False)
+    linear_path = Delegator(Client())
+    print(f"{'система':>12} | {'eval+Z3, мкс':>13} | {'линейная, мкс':>13} | {'ускорение':>9}")
+    for label, template in PROMPTS.items():
+        z3_us = measure(z3_path, template)
+        linear_us = measure(linear_path, template)
+        print(f"{label:>12} | {z3_us:>13.1f} | {linear_us:>13.1f} | {z3_us / linear_us:>8.1f}x")
+    print(f"Кэш разбора: {_parse.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
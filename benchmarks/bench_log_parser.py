@@ -0,0 +1,108 @@
+# benchmarks/bench_log_parser.py
+#
+# Пропускная способность LogParser на сгенерированных выгрузках сделок: время в мс
+# (числа) и строками ISO 8601. Прежний разбор (python-движок с sep=None и построчный
+# apply времени) меряется на первых SAMPLE_MB файла — целиком он идет минуты.
+# Для потокового режима показан пик памяти процесса (ru_maxrss), он меряется первым.
+#
+# Запуск из корня репозитория: python -m benchmarks.bench_log_parser [размер файла, МБ; по умолчанию 1024]
+
+import os
+import resource
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from logos.log_parser import LogParser
+
+SAMPLE_MB = 20
+BLOCK_ROWS = 500_000
+
+
+def legacy_normalize(filepath):
+    """LogParser.normalize до векторизации (колонки уже стандартные)."""
+    df = pd.read_csv(filepath, sep=None, engine='python')
+    df.columns = [c.lower().strip() for c in df.columns]
+
+    def parse_time(val):
+        try:
+            val_float = float(val)
+            if val_float > 10**12:
+                return int(val_float)
+            if val_float > 10**9:
+                return int(val_float * 1000)
+        except (TypeError, ValueError):
+            pass
+        return int(pd.to_datetime(val).timestamp() * 1000)
+
+    df['timestamp_ms'] = df['timestamp'].apply(parse_time)
+    df['price'] = df['price'].astype(float)
+    df['qty'] = df['qty'].astype(float)
+    df['side'] = df['side'].astype(str).str.upper()
+    return df
+
+
+def generate(path, size_mb, iso, seed=0):
+    """Выгрузка ~size_mb МБ: timestamp;symbol;side;price;qty (разделитель ';', как у части бирж)."""
+    rng = np.random.default_rng(seed)
+    start = 1_700_000_000_000
+    with open(path, "w") as f:
+        f.write("timestamp;symbol;side;price;qty\n")
+        while f.tell() < size_mb * 1024 * 1024:
+            times = start + np.cumsum(rng.integers(0, 50, BLOCK_ROWS))
+            start = int(times[-1])
+            block = pd.DataFrame({
+                "timestamp": pd.to_datetime(times, unit="ms").strftime("%Y-%m-%dT%H:%M:%S.%f").str[:-3] if iso else times,
+                "symbol": rng.choice(["BTCUSDT", "ETHUSDT", "SOLUSDT"], BLOCK_ROWS),
+                "side": rng.choice(["buy", "sell"], BLOCK_ROWS),
+                "price": np.round(rng.uniform(90, 110, BLOCK_ROWS), 2),
+                "qty": np.round(rng.exponential(0.5, BLOCK_ROWS), 4),
+            })
+            block.to_csv(f, sep=";", header=False, index=False)
+
+
+def head(path, size_mb, out):
+    """Первые size_mb МБ файла целыми строками."""
+    with open(path) as src, open(out, "w") as dst:
+        for line in src:
+            dst.write(line)
+            if dst.tell() >= size_mb * 1024 * 1024:
+                break
+
+
+def rate(path, seconds, rows):
+    size = os.path.getsize(path) / 1024 / 1024
+    return f"{size / seconds:>8.1f} МБ/с {rows / seconds:>12,.0f} строк/с"
+
+
+def main():
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+    parser = LogParser()
+    with tempfile.TemporaryDirectory() as root:
+        for iso in (False, True):
+            path = os.path.join(root, "export.csv")
+            generate(path, size_mb, iso)
+            print(f"--- время {'ISO 8601' if iso else 'в мс'}, файл {os.path.getsize(path) / 1024 / 1024:,.0f} МБ")
+
+            start = time.perf_counter()
+            rows = sum(len(chunk) for chunk in parser.iter_normalized(path))
+            streaming = time.perf_counter() - start
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+            print(f"iter_normalized:  {rate(path, streaming, rows)}   пик памяти {peak:,.0f} МБ")
+
+            start = time.perf_counter()
+            full = parser.normalize(path)
+            print(f"normalize:        {rate(path, time.perf_counter() - start, len(full))}")
+            del full
+
+            sample = os.path.join(root, "sample.csv")
+            head(path, SAMPLE_MB, sample)
+            start = time.perf_counter()
+            legacy = legacy_normalize(sample)
+            print(f"прежний разбор:   {rate(sample, time.perf_counter() - start, len(legacy))}   (первые {SAMPLE_MB} МБ)")
+            assert legacy["timestamp_ms"].tolist() == parser.normalize(sample)["timestamp_ms"].tolist()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# benchmarks/bench_prompt_scanner.py
+#
+# Разбор 100k разнообразных промптов: прежние регулярные выражения Client и
+# Delegator (часть из них собиралась динамически на каждый промпт) против
+# одного прохода предкомпилированного сканера logos.scanner.
+# Замеряется только разбор, без вызова решателя.
+#
+# Запуск из корня репозитория: python -m benchmarks.bench_prompt_scanner
+
+import random
+import re
+import time
+from logos.scanner import PromptScan
+
+NAMES = ["Алиса", "Боб", "Клара", "Иван", "Мария", "Петр", "Олег", "Анна", "Денис", "Ефим", "Жанна", "Зоя"]
+ALIAS_MAP = {
+    'amount': ['amount', 'сумма', 'на сумму'],
+    'risk_score': ['risk_score', 'риск', 'с оценкой риска'],
+    'transaction_hour': ['transaction_hour', 'час', 'в час'],
+}
+
+
+def make_prompts(n, seed=0):
+    rng = random.Random(seed)
+    prompts = []
+    for _ in range(n):
+        kind = rng.randrange(4)
+        if kind == 0:
+            prompts.append(
+                f"Проверь транзакцию на сумму {rng.randint(1, 20000)} с оценкой риска {rng.random():.2f} "
+                f"и в час {rng.randint(0, 23)} по набору правил 'compliance'"
+            )
+        elif kind == 1:
+            prompts.append(f"amount={rng.randint(1, 20000)} risk_score={rng.random():.2f} hour={rng.randint(0, 23)}")
+        elif kind == 2:
+            a, b = rng.sample("abcdxyz", 2)
+            prompts.append(f"Реши уравнение {rng.randint(1, 9)}*{a} + {b} == {rng.randint(10, 99)}, где {a} > 0 и {b} >= 1.")
+        else:
+            p, q, r = rng.sample(NAMES, 3)
+            prompts.append(f"Если {p} идет, то {q} не идет. Если {r} не идет, то {p} идет. {r} точно не пойдет.")
+    return prompts
+
+
+def legacy_parse(prompt):
+    """Разбор прежними регулярными выражениями (копии из Client и Delegator до сканера)."""
+    result = {}
+    result["assignments"] = re.compile(r"(\w+)\s*=\s*([0-9.]+)").findall(prompt)
+    match_ruleset = re.search(r"по набору правил '(\w+)'", prompt)
+    if match_ruleset:
+        for canonical_name, aliases in ALIAS_MAP.items():
+            match = re.search(f"({'|'.join(aliases)})\\s*[:=]?\\s*([\\d\\.]+)", prompt, flags=re.IGNORECASE)
+            if match:
+                result[canonical_name] = match.group(2)
+    elif "реши" in prompt.lower():
+        result["vars"] = set(re.findall(r'\b([a-zA-Z])\b', prompt))
+        result["reals"] = bool(re.findall(r'-?\d+\.\d+', prompt))
+        result["constraints"] = re.findall(
+            r'([a-zA-Z0-9\s\.\+\-\*\/()]+==[a-zA-Z0-9\s\.\+\-\*\/()]+|[a-zA-Z]+\s*(?:>|<|>=|<=)\s*-?\d+\.?\d*)', prompt
+        )
+    elif "если" in prompt.lower():
+        candidates = set(re.findall(r'\b([А-ЯЁ][а-яё]+)\b', prompt))
+        var_names = {name for name in candidates if name.lower() not in ["если", "то", "не"]}
+        var_pattern = f"({'|'.join(var_names)})"
+        processed = re.sub(f"{var_pattern}\\s+не\\s+\\w+", r"Not(\1)", prompt)
+        processed = re.sub(f"{var_pattern}\\s+точно\\s+не\\s+\\w+", r"Not(\1)", processed)
+        processed = re.sub(f"{var_pattern}\\s+\\w+(\\s+.*?)?(?=[,.]|\\bто\\b)", r"\1", processed)
+        result["implications"] = re.findall(r'Если\s+(.*?),\s*то\s+(.*?)\.', processed, flags=re.IGNORECASE)
+        remaining = re.sub(r'Если\s+(.*?),\s*то\s+(.*?)\.', '', processed, flags=re.IGNORECASE)
+        result["facts"] = [f.strip() for f in remaining.split('.') if f.strip().startswith("Not(")]
+    return result
+
+
+def scanner_parse(prompt):
+    scan = PromptScan(prompt)
+    result = {"assignments": [(name, value) for name, op, value in scan.assignments if op == '=']}
+    if scan.ruleset_name:
+        for canonical_name, aliases in ALIAS_MAP.items():
+            value = scan.value_after(aliases)
+            if value is not None:
+                result[canonical_name] = value
+    elif "реши" in prompt.lower():
+        result["vars"] = scan.letter_variables()
+        result["reals"] = scan.has_decimals()
+        result["constraints"] = scan.constraint_texts()
+    elif "если" in prompt.lower():
+        names = scan.person_names()
+        result["implications"] = scan.implications(names)
+        result["facts"] = scan.facts(names)
+    return result
+
+
+def measure(fn, prompts):
+    start = time.perf_counter()
+    for prompt in prompts:
+        fn(prompt)
+    return time.perf_counter() - start
+
+
+def main():
+    prompts = make_prompts(100_000)
+    # Сверка на выборке: одинаковые данные для движка правил и Client
+    for prompt in prompts[:2000]:
+        legacy, scanned = legacy_parse(prompt), scanner_parse(prompt)
+        for key in ("assignments", "amount", "risk_score", "transaction_hour", "vars", "reals"):
+            assert legacy.get(key) == scanned.get(key), (prompt, key)
+
+    re.purge()
+    legacy_s = measure(legacy_parse, prompts)
+    scanner_s = measure(scanner_parse, prompts)
+    n = len(prompts)
+    print(f"{'парсер':>16} | {'всего, с':>9} | {'мкс/промпт':>11} | {'промптов/с':>11}")
+    for label, seconds in (("прежние regex", legacy_s), ("сканер", scanner_s)):
+        print(f"{label:>16} | {seconds:>9.2f} | {seconds / n * 1e6:>11.1f} | {n / seconds:>11.0f}")
+    print(f"ускорение: {legacy_s / scanner_s:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
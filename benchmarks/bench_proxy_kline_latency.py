@@ -0,0 +1,99 @@
+# benchmarks/bench_proxy_kline_latency.py
+#
+# Нагрузочный тест прокси Magnum: задержка /api/v3/klines, пока идут расследования.
+# Три фазы на одном цикле событий:
+#   1. без расследований (базовая линия);
+#   2. расследования прямо в цикле событий, как раньше делал upload_evidence;
+#   3. расследования через очередь forensic_jobs (пул процессов).
+# Binance подменен httpx.MockTransport, расследование — CPU-нагрузкой той же длительности,
+# что Z3 + matplotlib + FPDF на типичном деле, поэтому сеть не нужна.
+#
+# Запуск в контейнере прокси (нужны fastapi, httpx и каталоги /data, /app/vendor):
+#   python -m benchmarks.bench_proxy_kline_latency
+
+import asyncio
+import statistics
+import time
+import httpx
+from logos.proxies import binance_proxy
+from logos.proxies.forensic_jobs import ForensicJobQueue
+
+INVESTIGATION_SECONDS = 1.5
+KLINE_REQUESTS = 200
+KLINE_INTERVAL = 0.02
+
+
+def busy_investigation(csv_path):
+    deadline = time.perf_counter() + INVESTIGATION_SECONDS
+    while time.perf_counter() < deadline:
+        pass
+    return {"error": "synthetic investigation"}
+
+
+def fake_binance(request):
+    now = int(time.time() * 1000)
+    klines = [[now - i * 60000, "100.0", "101.0", "99.0", "100.5", "12.5"] for i in range(500, 0, -1)]
+    return httpx.Response(200, json=klines)
+
+
+async def kline_latencies(client):
+    latencies = []
+    for _ in range(KLINE_REQUESTS):
+        start = time.perf_counter()
+        response = await client.get("/api/v3/klines", params={"symbol": "BTCUSDT", "interval": "1m", "limit": 500})
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(KLINE_INTERVAL)
+    return latencies
+
+
+async def inline_investigations(stop):
+    # Прежнее поведение: блокирующий вызов внутри async-обработчика
+    while not stop.is_set():
+        busy_investigation("evidence.csv")
+        await asyncio.sleep(0)
+
+
+async def queued_investigations(stop):
+    while not stop.is_set():
+        job = binance_proxy.forensic_jobs.submit("evidence.csv")
+        await asyncio.wrap_future(job.future)
+
+
+async def phase(client, background):
+    stop = asyncio.Event()
+    tasks = [asyncio.create_task(background(stop)) for _ in range(2)] if background else []
+    try:
+        return await kline_latencies(client)
+    finally:
+        stop.set()
+        await asyncio.gather(*tasks)
+
+
+def summary(label, latencies):
+    ordered = sorted(latencies)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(f"{label:>26} | {statistics.median(ordered):>8.1f} | {p95:>8.1f} | {ordered[-1]:>8.1f}")
+
+
+async def main():
+    binance_proxy.CLIENT = httpx.AsyncClient(transport=httpx.MockTransport(fake_binance))
+    binance_proxy.forensic_jobs = ForensicJobQueue(
+        max_workers=2, target=busy_investigation, initializer=None, on_result=binance_proxy.investigation_response
+    )
+    # Прогрев пула: запуск spawn-процессов не должен попасть в замер
+    await asyncio.wrap_future(binance_proxy.forensic_jobs.submit("warmup.csv").future)
+
+    transport = httpx.ASGITransport(app=binance_proxy.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://proxy") as client:
+        print(f"{'фаза':>26} | {'p50, мс':>8} | {'p95, мс':>8} | {'max, мс':>8}")
+        summary("без расследований", await phase(client, None))
+        summary("расследования в цикле", await phase(client, inline_investigations))
+        summary("расследования в очереди", await phase(client, queued_investigations))
+
+    binance_proxy.forensic_jobs.shutdown()
+    await binance_proxy.CLIENT.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
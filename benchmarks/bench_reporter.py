@@ -0,0 +1,102 @@
+# benchmarks/bench_reporter.py
+#
+# Отчетов в секунду на рядах 1k / 100k / 1M тиков:
+#   прежний путь — pyplot, все тики на графике, PNG на диск и обратно в FPDF;
+#   create_verdict — Agg в памяти, ряд прорежен LTTB до ширины графика;
+#   пул — create_verdict в процессах spawn, как в рабочих ForensicJobQueue
+#   (REPORTS отчетов сразу; ряд каждый процесс строит один раз, как расследование —
+#   свои сделки, в процесс уходит только номер дела).
+#
+# Запуск из корня репозитория: python -m benchmarks.bench_reporter
+
+import contextlib
+import io
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from logos.reporter import Reporter, VerdictReport
+
+REPORTS = 8
+SIZES = (1_000, 100_000, 1_000_000)
+TRADE = {"symbol": "BTCUSDT", "side": "SELL", "price": 98.5, "timestamp": 1_700_000_000_000, "timestamp_ms": 1_700_000_000_000}
+VERDICT = {"verdict": "LIQUIDITY_VOID_DETECTED", "details": "UNSAT: benchmark"}
+
+
+def make_ticks(n, seed=0):
+    rng = np.random.default_rng(seed)
+    times = pd.to_datetime(1_700_000_000_000 - 5 * n + np.arange(n) * 5, unit="ms")
+    return pd.DataFrame({"timestamp": times, "price": 100 + np.cumsum(rng.normal(0, 0.01, n))})
+
+
+def legacy_verdict(output_dir, case_id, trades_df):
+    """Прежний Reporter: глобальный pyplot, все тики, PNG через диск (разделы без графика опущены)."""
+    plt.figure(figsize=(10, 4))
+    plt.style.use('ggplot')
+    plt.plot(trades_df['timestamp'], trades_df['price'], color='#333333', linewidth=1.5, label='Price Action')
+    plt.scatter([pd.to_datetime(TRADE['timestamp'], unit='ms')], [TRADE['price']], color='red', s=150, marker='x', zorder=5)
+    plt.tight_layout()
+    chart_path = os.path.join(output_dir, f"chart_{case_id}.png")
+    plt.savefig(chart_path, dpi=100)
+    plt.close()
+    pdf = VerdictReport()
+    pdf.add_page()
+    pdf.image(chart_path, x=10, w=190)
+    path = os.path.join(output_dir, f"VERDICT_{case_id}.pdf")
+    pdf.output(path)
+    return path
+
+
+_ticks = None
+
+
+def _init_worker():
+    global _ticks
+    _ticks = {n: make_ticks(n, seed=n) for n in SIZES}
+
+
+def _pooled_verdict(output_dir, case_id, n):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return Reporter(output_dir=output_dir).create_verdict(case_id, TRADE, VERDICT, _ticks[n])
+
+
+def main():
+    workers = min(REPORTS, os.cpu_count() or 1)
+    with tempfile.TemporaryDirectory() as root, contextlib.redirect_stdout(io.StringIO()):
+        local = Reporter(output_dir=root)
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"), initializer=_init_worker)
+        wait([pool.submit(_pooled_verdict, root, f"WARMUP-{i}", SIZES[0]) for i in range(workers)])
+        rows = []
+        for n in SIZES:
+            ticks = make_ticks(n, seed=n)
+            legacy_runs = 1 if n == 1_000_000 else 3
+            start = time.perf_counter()
+            for i in range(legacy_runs):
+                legacy_verdict(root, f"L{n}-{i}", ticks)
+            legacy = legacy_runs / (time.perf_counter() - start)
+
+            start = time.perf_counter()
+            for i in range(REPORTS):
+                local.create_verdict(f"C{n}-{i}", TRADE, VERDICT, ticks)
+            in_memory = REPORTS / (time.perf_counter() - start)
+
+            start = time.perf_counter()
+            for future in [pool.submit(_pooled_verdict, root, f"P{n}-{i}", n) for i in range(REPORTS)]:
+                future.result()
+            pooled = REPORTS / (time.perf_counter() - start)
+            rows.append((n, legacy, in_memory, pooled))
+        pool.shutdown()
+
+    print(f"{'тиков':>9} | {'прежний, отч/с':>14} | {'create_verdict':>14} | {'пул ' + str(workers) + ' проц.':>12} | {'ускорение':>9}")
+    for n, legacy, in_memory, pooled in rows:
+        print(f"{n:>9,} | {legacy:>14.2f} | {in_memory:>14.2f} | {pooled:>12.2f} | {pooled / legacy:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# benchmarks/bench_rule_audit.py
+#
+# Масштабирование аудита Delegator._handle_rule_engine с ростом числа правил:
+# прежний путь (push / Not(rule) / check / pop на каждое правило) против одного
+# решателя с литералами-индикаторами нарушений.
+#
+# Запуск из корня репозитория: python -m benchmarks.bench_rule_audit
+
+import time
+from z3 import Solver, Int, Real, Not, sat
+from logos.client import Client
+from logos.delegator import Delegator
+
+
+def legacy_audit(delegator, rules, data_values):
+    """Прежний аудит: одна проверка решателя на каждое правило."""
+    solver = Solver()
+    z3_vars = {key: Real(key) if isinstance(val, float) else Int(key) for key, val in data_values.items()}
+    for key, val in data_values.items():
+        solver.add(z3_vars[key] == val)
+    violations = 0
+    for rule in rules:
+        rule_expr = delegator._build_rule_expr(rule, z3_vars)
+        if rule_expr is None:
+            continue
+        solver.push()
+        solver.add(Not(rule_expr))
+        if solver.check() == sat:
+            violations += 1
+        solver.pop()
+    return violations
+
+
+def make_rules(n):
+    ops = ["<", "<=", ">", ">="]
+    return [f"{('amount', 'risk_score', 'transaction_hour')[i % 3]} {ops[i % 4]} {i % 50}" for i in range(n)]
+
+
+def timed(fn, repeats=3):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def main():
+    client = Client()
+    delegator = Delegator(client, fast_path=False)
+    data_values = {"amount": 25, "risk_score": 0.5, "transaction_hour": 30}
+
+    print(f"{'правил':>8} | {'по правилу, мс':>15} | {'один решатель, мс':>18} | {'ускорение':>10}")
+    for n in (10, 100, 1000, 5000):
+        rules = make_rules(n)
+        legacy_ms, legacy_violations = timed(lambda: legacy_audit(delegator, rules, data_values))
+        single_ms, (_, violations) = timed(lambda: delegator._audit_z3(rules, data_values))
+        assert legacy_violations == violations
+        print(f"{n:>8} | {legacy_ms:>15.1f} | {single_ms:>18.1f} | {legacy_ms / single_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
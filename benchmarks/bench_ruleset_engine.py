@@ -0,0 +1,71 @@
+# benchmarks/bench_ruleset_engine.py
+#
+# Сравнение задержки Client.run: прежний путь (новый Solver + eval() каждого правила
+# на каждый запрос) против скомпилированного набора правил (только привязка значений).
+#
+# Запуск из корня репозитория: python -m benchmarks.bench_ruleset_engine
+
+import contextlib
+import io
+import time
+from z3 import Solver, Real, sat
+from logos.cache import VerdictCache
+from logos.client import Client
+from logos.rules import CompiledRuleset
+
+
+def make_rules(n):
+    """Генерирует набор из n пороговых правил по нескольким переменным."""
+    rules = ["amount < 10000", "risk_score <= 0.85"]
+    for i in range(n - len(rules)):
+        rules.append(f"amount + {i} * risk_score < {20000 + i}")
+    return rules[:n]
+
+
+def legacy_run(rules, constraints):
+    """Прежняя реализация тела Client.run, сохраненная для сравнения."""
+    s = Solver()
+    variables = {name: Real(name) for name in constraints.keys()}
+    for name, value in constraints.items():
+        s.add(variables[name] == value)
+    for rule_str in rules:
+        s.add(eval(rule_str, {"__builtins__": None}, variables))
+    return s.check() == sat
+
+
+def measure(fn, repeats):
+    # Client.run печатает каждый промпт, глушим вывод на время замера
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            fn()
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def main():
+    # Кэш вердиктов отключен: замеряется сама проверка, а не повторные попадания
+    client = Client(verdict_cache=VerdictCache(maxsize=0))
+    prompt = "amount=9500 risk_score=0.7"
+    constraints = client._parse_prompt(prompt)
+
+    print(f"{'правил':>8} | {'прежний путь, мс':>18} | {'компиляция, мс':>16} | {'запрос, мс':>12} | {'ускорение':>10}")
+    for n in (2, 100, 1000):
+        rules = make_rules(n)
+        repeats = 200 if n < 1000 else 20
+
+        start = time.perf_counter()
+        ruleset = CompiledRuleset("bench", rules)
+        compile_ms = (time.perf_counter() - start) * 1000
+        client.rulesets["bench"] = rules
+        client.compiled_rulesets["bench"] = ruleset
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            assert legacy_run(rules, constraints) == (client.run(prompt, ruleset_name="bench")["result"] == "approved")
+
+        legacy_ms = measure(lambda: legacy_run(rules, constraints), repeats)
+        compiled_ms = measure(lambda: client.run(prompt, ruleset_name="bench"), repeats)
+        print(f"{n:>8} | {legacy_ms:>18.3f} | {compile_ms:>16.3f} | {compiled_ms:>12.3f} | {legacy_ms / compiled_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+# benchmarks/bench_run_batch.py
+#
+# Пакетная проверка Client.run_batch над колонками против построчного Client.run.
+#
+# Запуск из корня репозитория: python -m benchmarks.bench_run_batch
+
+import contextlib
+import io
+import time
+import numpy as np
+from logos.client import Client
+
+
+def main():
+    client = Client()
+    client.load_ruleset("rulesets")
+    rng = np.random.default_rng(0)
+
+    # Построчный путь: промпт на каждую запись
+    prompts = [f"amount={a} risk_score={r}" for a, r in zip(rng.integers(0, 20000, 1000), rng.random(1000).round(2))]
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for prompt in prompts:
+            client.run(prompt)
+        per_row = (time.perf_counter() - start) / len(prompts)
+    print(f"Client.run:        {1 / per_row:>14,.0f} записей/с")
+
+    for n in (10_000, 1_000_000, 5_000_000):
+        columns = {
+            "amount": rng.integers(0, 20000, n).astype(float),
+            "risk_score": rng.random(n).round(2),
+        }
+        start = time.perf_counter()
+        response = client.run_batch(columns)
+        elapsed = time.perf_counter() - start
+        print(f"run_batch {n:>9,}: {n / elapsed:>14,.0f} записей/с  ({elapsed:.3f} с, {response['details']})")
+
+
+if __name__ == "__main__":
+    main()
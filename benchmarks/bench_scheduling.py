@@ -0,0 +1,54 @@
+# benchmarks/bench_scheduling.py
+#
+# Планирование 10 / 100 / 500 встреч с участниками, окнами доступности и комнатами:
+# время разбора и жадного решения, время Z3 в рамках бюджета и выигрыш по цели
+# относительно жадного расписания (окончание в минутах от начала горизонта).
+#
+# Запуск из корня репозитория: python -m benchmarks.bench_scheduling [timeout_s]
+
+import random
+import sys
+import time
+from logos.scheduling import SchedulingProblem, _Model, schedule
+from logos.solving import SolveBudget
+
+
+def make_problem(n, seed=0, objective="earliest_finish"):
+    rng = random.Random(seed)
+    people = [f"p{i}" for i in range(n // 2 + 4)]
+    days = n // 10 + 1
+    windows = [window for day in range(days) for window in ([day * 1440 + 540, day * 1440 + 780], [day * 1440 + 840, day * 1440 + 1080])]
+    return SchedulingProblem.from_dict({
+        "meetings": [
+            {"name": f"M{i}", "duration": rng.choice([30, 60, 90]), "attendees": rng.sample(people, rng.randint(2, 4))}
+            for i in range(n)
+        ],
+        "rooms": [{"name": f"R{k}", "capacity": capacity} for k, capacity in enumerate([4, 6, 8, 10])],
+        "availability": {person: windows for person in people},
+        "horizon": [0, days * 1440],
+        "objective": objective,
+    })
+
+
+def main():
+    timeout = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    print(f"{'встреч':>6} {'цель':>16} {'подготовка, с':>14} {'всего, с':>9} {'статус':>9} {'жадно':>7} {'итог':>7}")
+    for n in (10, 100, 500):
+        for objective in ("earliest_finish", "fewest_conflicts"):
+            problem = make_problem(n, seed=n, objective=objective)
+            start = time.perf_counter()
+            model = _Model(problem)
+            greedy = model.greedy()
+            prepared = time.perf_counter() - start
+            scale = model.unit if objective == "earliest_finish" else 1
+            baseline = model.objective(greedy[0]) * scale if greedy else None
+
+            start = time.perf_counter()
+            result = schedule(problem, SolveBudget(timeout=timeout))
+            total = time.perf_counter() - start
+            final = result.get("finish") if objective == "earliest_finish" else result.get("conflicts")
+            print(f"{n:>6} {objective:>16} {prepared:>14.2f} {total:>9.2f} {result['status']:>9} {str(baseline):>7} {str(final):>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# benchmarks/bench_solver_farm.py
+#
+# Пропускная способность фермы решателей против проверок в процессе вызывающего.
+# Нагрузка — алгебраические задачи Delegator (Z3 на каждый запрос) и Client.run
+# по набору правил из rulesets/. Ферма прогревается до замера: импорт Z3 и компиляция
+# правил в ее рабочих процессах уже оплачены. Первая строка показывает, во сколько
+# обходится холодный старт (импорт + загрузка правил), который ферма снимает с запроса.
+#
+# Запуск из корня репозитория: python -m benchmarks.bench_solver_farm
+
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from logos.client import Client
+from logos.delegator import Delegator
+from logos.farm import SolverFarm
+
+SECONDS = 5.0
+COLD_START = (
+    "from logos.client import Client; from logos.delegator import Delegator; "
+    "c = Client(); c.load_ruleset('rulesets'); Delegator(c).analyze_and_translate('Реши уравнение x == 1, где x > 0.')"
+)
+
+
+def prompts(i):
+    return f"Реши уравнение x * y == {12 + i % 50}, где x > 1 и y > 1 и x < y."
+
+
+def throughput(call, threads):
+    deadline = time.perf_counter() + SECONDS
+
+    def worker(offset):
+        done = 0
+        while time.perf_counter() < deadline:
+            call(prompts(offset + done))
+            done += 1
+        return done
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        total = sum(pool.map(worker, range(0, threads * 10**6, 10**6)))
+    return total / (time.perf_counter() - start)
+
+
+def main():
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", COLD_START], check=True, capture_output=True)
+    print(f"Холодный старт процесса с первой проверкой: {(time.perf_counter() - start) * 1000:.0f} мс")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        client = Client()
+        client.load_ruleset("rulesets")
+    delegator = Delegator(client)
+    workers = os.cpu_count() or 1
+    farm = SolverFarm("rulesets", workers=workers).start()
+    try:
+        print(f"Рабочих процессов фермы: {workers}, здоровье: {farm.health()['status']}")
+        print(f"{'режим':>32} | {'пров/с':>10}")
+        with contextlib.redirect_stdout(io.StringIO()):
+            local_rate = throughput(delegator.analyze_and_translate, 1)
+        print(f"{'в процессе, 1 поток':>32} | {local_rate:>10.1f}")
+        for threads in sorted({workers, workers * 2}):
+            rate = throughput(farm.analyze_and_translate, threads)
+            print(f"{f'ферма, {threads} отправителей':>32} | {rate:>10.1f}")
+        start = time.perf_counter()
+        farm.analyze_and_translate(prompts(0))
+        print(f"Задержка одной проверки в прогретой ферме: {(time.perf_counter() - start) * 1000:.1f} мс")
+    finally:
+        farm.shutdown()
+
+
+if __name__ == "__main__":
+    main()
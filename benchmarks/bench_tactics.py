@@ -0,0 +1,131 @@
+# benchmarks/bench_tactics.py
+#
+# Корпус задач Z3 от каждого обработчика: класс, который назначает logos.tactics,
+# и время решателя по умолчанию (LOGOS_Z3_TACTICS=0) против выбранного конвейера.
+# Задачи строят сами обработчики (Client.run / CompiledRuleset, ForensicSolver,
+# алгебра и логика Delegator с fast_path=False, аудит правил, StopLossHunter).
+#
+# Запуск из корня репозитория: python -m benchmarks.bench_tactics [повторов]
+
+import contextlib
+import io
+import os
+import sys
+import time
+import pandas as pd
+from benchmarks.bench_boolean_puzzles import make_puzzle
+from benchmarks.bench_rule_audit import make_rules
+from logos.client import Client
+from logos.delegator import Delegator
+from logos.profiling import HandlerMetrics, profile_request
+from logos.rules import CompiledRuleset
+from logos.scanner import PromptScan
+from logos.solvers.forensic_solver import ForensicSolver
+from logos.solvers.stop_loss_hunter import StopLossHunter
+
+
+def rules_case():
+    ruleset = CompiledRuleset("compliance", ["amount < 10000", "risk_score <= 0.85", "amount + 10000 * risk_score <= 18000"])
+    bindings = [{"amount": 9000 + 100 * i, "risk_score": 0.05 * (i % 20)} for i in range(20)]
+    return lambda: [ruleset._solve_z3(row).status for row in bindings]
+
+
+def forensic_case():
+    solver = ForensicSolver()
+    orderbook = {
+        "asks": pd.DataFrame({"price": [100.5, 100.7, 101.0]}),
+        "bids": pd.DataFrame({"price": [100.0, 99.8, 99.5]}),
+    }
+    trades = [{"price": 100.5 + 0.4 * i, "side": "BUY" if i % 2 else "SELL"} for i in range(10)]
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return [solver.verify(trade, None, orderbook)["verdict"] for trade in trades]
+    return run
+
+
+def algebra_case(prompt):
+    delegator = Delegator(Client(), fast_path=False)
+    scan = PromptScan(prompt)
+    return lambda: delegator._handle_algebra(prompt, scan=scan)
+
+
+def boolean_case():
+    delegator = Delegator(Client(), fast_path=False)
+    prompt = make_puzzle(200, seed=200)
+    scan = PromptScan(prompt)
+    return lambda: delegator._handle_boolean_logic(prompt, scan=scan)
+
+
+def audit_case():
+    delegator = Delegator(Client(), fast_path=False)
+    rules = make_rules(300)
+    return lambda: delegator._audit_z3(rules, {"amount": 25, "risk_score": 0.5, "transaction_hour": 30})[1]
+
+
+def hunter_case():
+    hunter = StopLossHunter()
+    return lambda: [hunter.find_minimal_crash(price) for price in (64210.0, 3150.5, 101.07)]
+
+
+# (обработчик, фабрика задачи): фабрика вызывается заново для каждого режима,
+# чтобы решатели потока строились в этом режиме. Задачи с единственным решением —
+# ответы обоих режимов сравниваются дословно.
+CORPUS = [
+    ("Client.run (правила)", rules_case),
+    ("ForensicSolver.verify", forensic_case),
+    ("алгебра, целые", lambda: algebra_case("Реши уравнение 3*x - y == 5, где x + y > 2 и x - 2*y < 7 и x < 3 и y > 0")),
+    ("алгебра, дробные", lambda: algebra_case("Реши уравнение 1.5*x + y == 4.25, где x - y == 0.5 и x <= 3.5 и y >= 0")),
+    ("логика, 200 участников", boolean_case),
+    ("аудит, 300 правил", audit_case),
+    ("StopLossHunter (Optimize)", hunter_case),
+]
+
+
+def set_mode(tactics_on):
+    os.environ["LOGOS_Z3_TACTICS"] = "1" if tactics_on else "0"
+
+
+def measure(factory, repeats):
+    """
+    Лучшее время задачи в каждом режиме, ответы и классы задач. Режимы чередуются
+    на каждом повторе, чтобы дрейф процесса (память Z3, кэши) не попадал в разницу.
+    """
+    cases, results = {}, {}
+    for tactics_on in (False, True):
+        set_mode(tactics_on)
+        cases[tactics_on] = factory()
+        results[tactics_on] = cases[tactics_on]()  # прогрев: потоковые решатели, разбор
+    best = {False: float("inf"), True: float("inf")}
+    metrics = HandlerMetrics()
+    for _ in range(repeats):
+        for tactics_on in (False, True):
+            set_mode(tactics_on)
+            with profile_request(f"bench.{tactics_on}", metrics):
+                start = time.perf_counter()
+                again = cases[tactics_on]()
+                best[tactics_on] = min(best[tactics_on], time.perf_counter() - start)
+            assert again == results[tactics_on], (again, results[tactics_on])
+    classes = metrics.snapshot().get("bench.True", {}).get("solver_classes", {})
+    return best[False] * 1000, best[True] * 1000, results, classes
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    previous = os.environ.get("LOGOS_Z3_TACTICS")
+    print(f"{'обработчик':>28} | {'класс':>14} | {'по умолчанию, мс':>16} | {'выбранный, мс':>13} | {'ускорение':>9}")
+    try:
+        for name, factory in CORPUS:
+            default_ms, selected_ms, results, classes = measure(factory, repeats)
+            assert results[False] == results[True], name
+            label = ",".join(sorted(classes)) or "Optimize"
+            print(f"{name:>28} | {label:>14} | {default_ms:>16.2f} | {selected_ms:>13.2f} | {default_ms / selected_ms:>8.2f}x")
+    finally:
+        if previous is None:
+            os.environ.pop("LOGOS_Z3_TACTICS", None)
+        else:
+            os.environ["LOGOS_Z3_TACTICS"] = previous
+
+
+if __name__ == "__main__":
+    main()
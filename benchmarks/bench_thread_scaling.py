@@ -0,0 +1,73 @@
+# benchmarks/bench_thread_scaling.py
+#
+# Масштабирование проверок по потокам: один общий CompiledRuleset и один Delegator
+# вызываются из 1, 2, 4 и 8 потоков. Каждый поток решает в собственном z3.Context,
+# а ctypes отпускает GIL на время вызовов Z3, поэтому проверки идут параллельно.
+#
+# Запуск из корня репозитория: python -m benchmarks.bench_thread_scaling
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from logos.client import Client
+from logos.delegator import Delegator
+from logos.rules import CompiledRuleset
+
+THREADS = (1, 2, 4, 8)
+SECONDS = 3.0
+
+
+def make_rules(n):
+    rules = ["amount < 10000", "risk_score <= 0.85"]
+    for i in range(n - len(rules)):
+        rules.append(f"amount * risk_score + {i} * amount < {20000 + i}")
+    return rules[:n]
+
+
+def ruleset_verification(ruleset):
+    def verify(i):
+        # fast_path=False: меряем именно Z3, а не точную арифметику
+        return ruleset.solve({"amount": 1000 + i % 97, "risk_score": 0.5}, fast_path=False).status
+    return verify
+
+
+def algebra_verification(delegator):
+    def verify(i):
+        return delegator.analyze_and_translate(f"Реши уравнение x * y == {12 + i % 50}, где x > 1 и y > 1 и x < y.")
+    return verify
+
+
+def throughput(verify, threads):
+    deadline = time.perf_counter() + SECONDS
+
+    def worker(offset):
+        done = 0
+        while time.perf_counter() < deadline:
+            verify(offset + done)
+            done += 1
+        return done
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        # Прогрев: z3.Context и шаблон набора правил создаются в каждом потоке один раз
+        list(pool.map(verify, range(threads * 4)))
+        start = time.perf_counter()
+        total = sum(pool.map(worker, range(0, threads * 10**6, 10**6)))
+        return total / (time.perf_counter() - start)
+
+
+def main():
+    ruleset = CompiledRuleset("bench", make_rules(100))
+    delegator = Delegator(Client())
+    print(f"Ядер: {os.cpu_count()}")
+    print(f"{'потоков':>8} | {'правила, пров/с':>16} | {'x':>5} | {'алгебра, пров/с':>16} | {'x':>5}")
+    base = None
+    for threads in THREADS:
+        rules_rate = throughput(ruleset_verification(ruleset), threads)
+        algebra_rate = throughput(algebra_verification(delegator), threads)
+        base = base or (rules_rate, algebra_rate)
+        print(f"{threads:>8} | {rules_rate:>16.1f} | {rules_rate / base[0]:>5.2f} | "
+              f"{algebra_rate:>16.1f} | {algebra_rate / base[1]:>5.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# benchmarks/bench_upload_ingest.py
+#
+# Прием большой улики до момента, когда известна сделка смерти (с нее начинается
+# запрос истории на бирже). Загрузка — куски по 64 КБ, как их отдает сервер.
+#   прежний путь — тело в SpooledTemporaryFile (так multipart принимает Starlette),
+#     копия в EvidenceStore с хэшем, затем LogParser.last_trade перечитывает файл;
+#   поток — EvidenceStream: хэш, запись и проверки на каждом куске, последняя строка в памяти.
+# «после последнего байта» — задержка от конца загрузки до сделки смерти: по сети
+# загрузка идет долго, и у потокового приема к ее концу остается только close().
+#
+# Запуск из корня репозитория: python -m benchmarks.bench_upload_ingest [размер, МБ; по умолчанию 1024]
+
+import os
+import sys
+import tempfile
+import time
+from logos.evidence_store import EvidenceStore
+from logos.evidence_stream import EvidenceStream
+from logos.log_parser import LogParser
+from benchmarks.bench_log_parser import generate
+
+CHUNK = 64 * 1024
+
+
+def chunks(path):
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK), b""):
+            yield chunk
+
+
+def legacy(store, path):
+    body = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    for chunk in chunks(path):
+        body.write(chunk)
+    uploaded = time.perf_counter()
+    body.seek(0)
+    _, location = store.put(body)
+    return uploaded, LogParser().last_trade(location)
+
+
+def streaming(store, path):
+    stream = EvidenceStream(store)
+    for chunk in chunks(path):
+        stream.feed(chunk)
+    uploaded = time.perf_counter()
+    return uploaded, stream.close()[2]
+
+
+def main():
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+    with tempfile.TemporaryDirectory() as root:
+        for iso in (False, True):
+            source = os.path.join(root, "upload.csv")
+            generate(source, size_mb, iso)
+            print(f"--- время {'ISO 8601' if iso else 'в мс'}, файл {os.path.getsize(source) / 1024 / 1024:,.0f} МБ")
+            trades = []
+            for name, ingest in (("прежний путь", legacy), ("поток", streaming)):
+                store = EvidenceStore(os.path.join(root, name))
+                start = time.perf_counter()
+                uploaded, trade = ingest(store, source)
+                done = time.perf_counter()
+                trades.append(trade)
+                print(f"{name:<13} всего {done - start:>7.2f} с   после последнего байта {(done - uploaded) * 1000:>9.1f} мс")
+                for file in os.listdir(store.root):
+                    os.remove(os.path.join(store.root, file))
+            keys = ("symbol", "side", "price", "timestamp_ms")
+            assert [trades[0][key] for key in keys] == [trades[1][key] for key in keys]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+# logos/async_time_machine.py
+
+import asyncio
+import email.utils
+import logging
+import math
+import random
+import threading
+import time
+from collections import deque
+from datetime import timezone
+from logos.depth_store import book_from_depth
+from logos.trade_history import TradeHistory
+
+logger = logging.getLogger("logos.time_machine")
+
+# Ответы, после которых запрос повторяется: бан/лимит (418, 429) и сбои биржи (5xx)
+RETRY_STATUSES = (418, 429, 500, 502, 503, 504)
+
+
+def request_weight(endpoint: str, params: dict) -> int:
+    """Вес запроса в лимите REQUEST_WEIGHT спота Binance (за минуту, по IP)."""
+    if endpoint == "/api/v3/depth":
+        limit = int(params.get("limit", 100))
+        return 5 if limit <= 100 else 25 if limit <= 500 else 50 if limit <= 1000 else 250
+    if endpoint == "/api/v3/aggTrades":
+        return 4
+    return 1
+
+
+class WeightLimiter:
+    """
+    Учет веса запросов в скользящем окне: по умолчанию limit=6000 за 60 с (лимит
+    REQUEST_WEIGHT Binance), из которых расходуется не больше доли safety.
+    acquire() ждет, пока вес запроса не уложится в окно. observe() сверяет счет
+    с заголовком X-MBX-USED-WEIGHT-1M: биржа считает вес по IP, включая другие
+    процессы. block() — пауза для всех запросов после 429 / 418 с Retry-After.
+    Один лимитер на процесс (DEFAULT_LIMITER) делят все экземпляры и циклы событий.
+    """
+    def __init__(self, limit: int = 6000, window: float = 60.0, safety: float = 0.8):
+        self.limit = limit
+        self.window = window
+        self.safety = safety
+        self.waited = 0.0  # суммарное ожидание, секунды
+        self._lock = threading.Lock()
+        self._spent = deque()  # (время, вес) собственных запросов
+        self._server = (0, 0.0)  # (вес по заголовку биржи, когда получен)
+        self._blocked_until = 0.0
+
+    @property
+    def budget(self) -> float:
+        return self.limit * self.safety
+
+    def used(self) -> int:
+        with self._lock:
+            return self._used(time.monotonic())
+
+    def _used(self, now):
+        while self._spent and self._spent[0][0] <= now - self.window:
+            self._spent.popleft()
+        local = sum(weight for _, weight in self._spent)
+        server, seen = self._server
+        return max(local, server) if seen > now - self.window else local
+
+    def _delay(self, weight, now):
+        """0 — вес записан, иначе сколько ждать до следующей попытки."""
+        if now < self._blocked_until:
+            return self._blocked_until - now
+        used = self._used(now)
+        if used == 0 or used + weight <= self.budget:
+            self._spent.append((now, weight))
+            return 0.0
+        server, seen = self._server
+        if server >= used or not self._spent:
+            # Счет ограничен весом по заголовку биржи: ждем, пока он устареет
+            return max(seen + self.window - now, 0.001)
+        # Иначе — пока из окна не уйдет самый старый собственный запрос
+        return max(self._spent[0][0] + self.window - now, 0.001)
+
+    async def acquire(self, weight: int) -> float:
+        """Резервирует вес запроса; возвращает время ожидания в секундах."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                delay = self._delay(weight, time.monotonic())
+            if not delay:
+                self.waited += waited
+                return waited
+            await asyncio.sleep(delay)
+            waited += delay
+
+    def observe(self, used_weight):
+        if used_weight is None:
+            return
+        with self._lock:
+            self._server = (int(used_weight), time.monotonic())
+
+    def block(self, seconds: float):
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+
+DEFAULT_LIMITER = WeightLimiter()
+
+
+def retry_after_seconds(value, now: float = None):
+    """
+    Пауза из заголовка Retry-After в секундах: число секунд или HTTP-дата (RFC 9110).
+    None — заголовка нет или он не разбирается; тогда действует своя пауза с разбросом.
+    """
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            moment = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError, IndexError):
+            return None
+        if moment.tzinfo is None:
+            # "-0000" в дате — время UTC без указания пояса
+            moment = moment.replace(tzinfo=timezone.utc)
+        seconds = moment.timestamp() - (time.time() if now is None else now)
+    return max(0.0, seconds) if math.isfinite(seconds) else None
+
+
+class AsyncTimeMachine(TradeHistory):
+    """
+    Асинхронный TimeMachine на httpx: все запросы расследования идут параллельно
+    через один пул соединений, сбои повторяются с экспоненциальной паузой со
+    случайным разбросом (full jitter, Retry-After биржи в приоритете), вес запросов
+    учитывается в WeightLimiter. Время каждого запроса — в request_log и latency().
+
+    Пул соединений живет внутри async with; один экземпляр можно открывать повторно,
+    лимитер и журнал запросов сохраняются. call() для синхронного кода держит свой
+    цикл событий и пул соединений между вызовами, до close().
+    """
+    def __init__(self, depth_store=None, tick_store=None, base_url: str = None, max_connections: int = 8,
+                 retries: int = 3, backoff: float = 0.25, timeout: float = 10.0, limiter: WeightLimiter = None,
+                 log_size: int = 1000):
+        super().__init__(depth_store=depth_store, tick_store=tick_store, base_url=base_url)
+        self.max_connections = max_connections
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.limiter = limiter or DEFAULT_LIMITER
+        # Последние запросы: endpoint, status, elapsed_ms, attempt, weight, waited_ms
+        self.request_log = deque(maxlen=log_size)
+        self._client = None
+        # Цикл событий и пул соединений call(): живут между расследованиями рабочего процесса
+        self._loop = None
+        self._loop_client = None
+        self._loop_lock = threading.Lock()
+
+    def _open_client(self):
+        import httpx
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+            timeout=self.timeout,
+            headers={"User-Agent": "Logos-Pathologist/0.5"},
+        )
+
+    async def __aenter__(self):
+        self._client = self._open_client()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+    def call(self, coroutine):
+        """
+        Выполняет корутину этого экземпляра из синхронного кода. Цикл событий и пул
+        соединений создаются при первом вызове и переиспользуются следующими: рабочий
+        процесс не открывает соединения с биржей заново на каждое расследование.
+        """
+        async def scoped():
+            if self._loop_client is None:
+                self._loop_client = self._open_client()
+            self._client = self._loop_client
+            try:
+                return await coroutine
+            finally:
+                self._client = None
+
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+            return self._loop.run_until_complete(scoped())
+
+    def close(self):
+        """Закрывает пул соединений и цикл событий call(); следующий call() откроет новые."""
+        with self._loop_lock:
+            loop, self._loop = self._loop, None
+            client, self._loop_client = self._loop_client, None
+            if loop is None:
+                return
+            if client is not None:
+                loop.run_until_complete(client.aclose())
+            loop.close()
+
+    async def _get(self, endpoint, params):
+        """JSON ответа или None: после retries повторов или при ошибке запроса (4xx кроме 418 / 429)."""
+        import httpx
+        weight = request_weight(endpoint, params)
+        for attempt in range(self.retries + 1):
+            waited = await self.limiter.acquire(weight)
+            start = time.perf_counter()
+            response, status = None, None
+            try:
+                response = await self._client.get(endpoint, params=params)
+                status = response.status_code
+            except httpx.HTTPError as e:
+                logger.warning("%s %s: %s", endpoint, params, e)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if response is not None:
+                self.limiter.observe(response.headers.get("x-mbx-used-weight-1m"))
+            self.request_log.append({
+                "endpoint": endpoint, "status": status, "elapsed_ms": round(elapsed_ms, 3),
+                "attempt": attempt, "weight": weight, "waited_ms": round(waited * 1000, 3),
+            })
+            if status == 200:
+                return response.json()
+            if status is not None and status not in RETRY_STATUSES:
+                logger.error("%s %s: HTTP %s %s", endpoint, params, status, response.text[:200])
+                return None
+            if attempt == self.retries:
+                break
+            retry_after = retry_after_seconds(response.headers.get("retry-after")) if response is not None else None
+            delay = retry_after if retry_after is not None else random.uniform(0, self.backoff * 2 ** attempt)
+            if status in (418, 429):
+                self.limiter.block(delay)
+            await asyncio.sleep(delay)
+        logger.error("%s %s: no answer after %d attempts", endpoint, params, self.retries + 1)
+        return None
+
+    def latency(self) -> dict:
+        """Сводка request_log по endpoint: запросы, повторы, ошибки, вес и время (p50 / p95 / max, мс)."""
+        grouped = {}
+        for entry in self.request_log:
+            grouped.setdefault(entry["endpoint"], []).append(entry)
+        summary = {}
+        for endpoint, entries in grouped.items():
+            times = sorted(entry["elapsed_ms"] for entry in entries)
+            summary[endpoint] = {
+                "requests": len(entries),
+                "retries": sum(1 for entry in entries if entry["attempt"] > 0),
+                "errors": sum(1 for entry in entries if entry["status"] != 200),
+                "weight": sum(entry["weight"] for entry in entries),
+                "waited_ms": round(sum(entry["waited_ms"] for entry in entries), 3),
+                "mean_ms": round(sum(times) / len(times), 3),
+                "p50_ms": times[len(times) // 2],
+                "p95_ms": times[min(len(times) - 1, int(len(times) * 0.95))],
+                "max_ms": times[-1],
+            }
+        return summary
+
+    async def get_orderbook_snapshot(self, symbol: str, limit: int = 1000):
+        data = await self._get("/api/v3/depth", {"symbol": symbol.upper(), "limit": limit})
+        return book_from_depth(data) if data else None
+
+    async def get_historical_agg_trades(self, symbol: str, start_time_ms: int, end_time_ms: int):
+        """
+        Все aggTrades окна, как TimeMachine.get_historical_agg_trades: куски окна
+        загружаются одновременно, каждый листается по fromId; с tick_store из сети
+        идут только непокрытые отрезки. При ошибке сети — пустой DataFrame.
+        """
+        symbol = symbol.upper()
+        start_time_ms, end_time_ms = int(start_time_ms), int(end_time_ms)
+        missing, chunks = self._plan(symbol, start_time_ms, end_time_ms, self.max_connections)
+        pages = await asyncio.gather(*(self._fetch_window(symbol, *chunk) for _, chunk in chunks))
+        return self._assemble(symbol, start_time_ms, end_time_ms, missing, chunks, pages)
+
+    async def _fetch_window(self, symbol, start_ms, end_ms):
+        pager = self._window_requests(symbol, start_ms, end_ms)
+        try:
+            request = next(pager)
+            while True:
+                request = pager.send(await self._get(*request))
+        except StopIteration as done:
+            return done.value
+
+    async def fetch_context(self, symbol: str, timestamp_ms: int, before_ms: int = 5000, after_ms: int = 1000,
+                            depth_limit: int = 100) -> dict:
+        """
+        Контекст расследования одной сделки одновременно: сделки окна
+        [timestamp - before_ms, timestamp + after_ms] и стакан — на момент сделки
+        из DepthStore, а без записи — текущий снимок. orderbook_source: "depth_store" / "snapshot".
+        """
+        recorded = self.get_orderbook_at(symbol, timestamp_ms, limit=depth_limit)
+
+        async def orderbook():
+            return recorded if recorded is not None else await self.get_orderbook_snapshot(symbol, limit=depth_limit)
+
+        trades, book = await asyncio.gather(
+            self.get_historical_agg_trades(symbol, timestamp_ms - before_ms, timestamp_ms + after_ms),
+            orderbook(),
+        )
+        return {"trades": trades, "orderbook": book, "orderbook_source": "depth_store" if recorded is not None else "snapshot"}
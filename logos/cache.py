@@ -0,0 +1,185 @@
+# logos/cache.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from logos.rules import exact
+
+
+def canonical_bindings(bindings: dict, typed: bool = False) -> list:
+    """
+    Нормализованные привязки: имена по алфавиту, значения — точные дроби в семантике Z3,
+    поэтому 9500, 9500.0 и 9500.00 дают один ключ. С typed=True в ключ входит и тип
+    значения (Int / Real), если от него зависит текст ответа.
+    """
+    result = []
+    for name in sorted(bindings):
+        value = bindings[name]
+        entry = [name, str(exact(value))]
+        if typed:
+            entry.append('Real' if isinstance(value, float) else 'Int')
+        result.append(entry)
+    return result
+
+
+class VerdictCache:
+    """
+    Кэш вердиктов проверки. Ключ — вид запроса, имя и хэш содержимого набора правил
+    и нормализованные привязки, поэтому изменение набора правил само по себе дает
+    новые ключи, а invalidate() освобождает устаревшие записи.
+
+    Память: LRU на maxsize записей (0 — без памяти) с необязательным TTL в секундах.
+    Диск (path): общий для процессов SQLite-файл; промах в памяти проверяется на диске,
+    найденная там запись поднимается в память.
+    """
+    def __init__(self, maxsize: int = 4096, ttl: float = None, path: str = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = path
+        self._entries = OrderedDict()  # key -> (expires_at, ruleset_name, payload)
+        self._lock = threading.Lock()
+        self._db = None
+        self._db_pid = None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.disk_hits = 0
+        self.disk_errors = 0
+
+    @staticmethod
+    def make_key(kind: str, ruleset_name: str, digest: str, bindings: dict, typed: bool = False) -> str:
+        canonical = json.dumps([kind, ruleset_name, digest, canonical_bindings(bindings, typed)], ensure_ascii=False)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        """Значение по ключу (новая копия) или None при промахе."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] is not None and entry[0] <= now:
+                    del self._entries[key]
+                    self.expirations += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return json.loads(entry[2])
+
+        if self.path is not None:
+            row = self._disk_get(key, now)
+            if row is not None:
+                expires_at, ruleset_name, payload = row
+                with self._lock:
+                    self.hits += 1
+                    self.disk_hits += 1
+                    self._remember(key, (expires_at, ruleset_name, payload))
+                return json.loads(payload)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, ruleset_name: str, value):
+        """Сохраняет JSON-сериализуемое значение в памяти и, если задан path, на диске."""
+        payload = json.dumps(value, ensure_ascii=False)
+        expires_at = time.time() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._remember(key, (expires_at, ruleset_name, payload))
+        if self.path is not None:
+            self._disk_execute(
+                "INSERT OR REPLACE INTO verdicts (key, ruleset, expires_at, payload) VALUES (?, ?, ?, ?)",
+                (key, ruleset_name, expires_at, payload),
+            )
+
+    def invalidate(self, ruleset_name: str = None):
+        """Удаляет записи набора правил (или все записи, если имя не задано)."""
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if ruleset_name is None or entry[1] == ruleset_name]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+        if self.path is not None:
+            if ruleset_name is None:
+                self._disk_execute("DELETE FROM verdicts", ())
+            else:
+                self._disk_execute("DELETE FROM verdicts WHERE ruleset = ?", (ruleset_name,))
+
+    def clear(self):
+        self.invalidate()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "disk_hits": self.disk_hits,
+                "disk_errors": self.disk_errors,
+                "size": len(self._entries),
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remember(self, key, entry):
+        # Вызывается под self._lock
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    # --- Дисковый уровень ---
+
+    def _connection(self):
+        # После fork соединение SQLite нельзя переиспользовать: открываем свое в каждом процессе
+        if self._db is None or self._db_pid != os.getpid():
+            self._db = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS verdicts "
+                "(key TEXT PRIMARY KEY, ruleset TEXT NOT NULL, expires_at REAL, payload TEXT NOT NULL)"
+            )
+            self._db_pid = os.getpid()
+        return self._db
+
+    def _disk_get(self, key, now):
+        try:
+            with self._lock:
+                row = self._connection().execute(
+                    "SELECT expires_at, ruleset, payload FROM verdicts WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[0] is not None and row[0] <= now:
+                    self._db.execute("DELETE FROM verdicts WHERE key = ?", (key,))
+                    self.expirations += 1
+                    return None
+                return row
+        except sqlite3.Error as e:
+            self._disk_failed(e)
+            return None
+
+    def _disk_execute(self, sql, params):
+        try:
+            with self._lock:
+                self._connection().execute(sql, params)
+        except sqlite3.Error as e:
+            self._disk_failed(e)
+
+    def _disk_failed(self, error):
+        # Ошибка дискового уровня не должна ломать проверку: работаем как с промахом
+        with self._lock:
+            self.disk_errors += 1
+            first = self.disk_errors == 1
+        if first:
+            print(f"[Logos] Дисковый кэш вердиктов недоступен ({self.path}): {error}")
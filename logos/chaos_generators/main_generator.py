@@ -1,7 +1,3 @@
-import random
-import numpy as np
-from logos.solvers.stop_loss_hunter import StopLossHunter
-
 class ChaosGenerator:
     """
     Генератор Хаоса v0.3 (Aggressive).
@@ -9,7 +5,15 @@ class ChaosGenerator:
     """
     
     def __init__(self):
-        self.sniper = StopLossHunter()
+        self._sniper = None
+
+    @property
+    def sniper(self):
+        # Z3 импортируется при первой атаке, а не при создании генератора
+        if self._sniper is None:
+            from logos.solvers.stop_loss_hunter import StopLossHunter
+            self._sniper = StopLossHunter()
+        return self._sniper
 
     def inject_flash_crash(self, klines: list):
         """
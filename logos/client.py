@@ -1,40 +1,82 @@
 # logos/logos/client.py
 import os
 import json
-import re 
-from z3 import Solver, Real, And, Or, sat
+from logos.cache import VerdictCache
+from logos.profiling import profile_request, stage
+from logos.rules import CompiledRuleset
+from logos.scanner import PromptScan
+from logos.solving import SAT, SolveBudget
 
 class Client:
-    def __init__(self, llm_provider="offline", api_key="DUMMY"):
+    def __init__(self, llm_provider="offline", api_key="DUMMY", verdict_cache=None):
         self.rulesets = {}
+        # Наборы правил, скомпилированные один раз при загрузке (AST + Z3-шаблон)
+        self.compiled_rulesets = {}
+        # Файлы наборов правил: name -> (path, mtime) для перезагрузки при изменении
+        self.ruleset_files = {}
+        # Кэш вердиктов; LOGOS_VERDICT_CACHE задает общий для процессов файл на диске
+        if verdict_cache is None:
+            verdict_cache = VerdictCache(path=os.environ.get("LOGOS_VERDICT_CACHE"))
+        self.verdict_cache = verdict_cache
 
     def load_ruleset(self, directory="rulesets"):
         for filename in os.listdir(directory):
             if filename.endswith(".json"):
                 ruleset_name = filename.split(".")[0]
-                with open(os.path.join(directory, filename), "r") as f:
-                    self.rulesets[ruleset_name] = json.load(f)["rules"]
+                self._load_ruleset_file(ruleset_name, os.path.join(directory, filename))
+
+    def _load_ruleset_file(self, ruleset_name, path):
+        mtime = os.stat(path).st_mtime_ns
+        with open(path, "r") as f:
+            self.rulesets[ruleset_name] = json.load(f)["rules"]
+        self.compiled_rulesets[ruleset_name] = CompiledRuleset(ruleset_name, self.rulesets[ruleset_name])
+        self.ruleset_files[ruleset_name] = (path, mtime)
+        for problem in self.compiled_rulesets[ruleset_name].problems():
+            print(f"[Logos] Набор правил '{ruleset_name}': {problem}")
+
+    def refresh_ruleset(self, ruleset_name):
+        """
+        Перекомпилирует набор правил, если его файл изменился после загрузки,
+        и сбрасывает закэшированные вердикты этого набора.
+        """
+        source = self.ruleset_files.get(ruleset_name)
+        if source is None:
+            return
+        path, mtime = source
+        try:
+            changed = os.stat(path).st_mtime_ns != mtime
+        except OSError:
+            return
+        if changed:
+            self._load_ruleset_file(ruleset_name, path)
+            self.verdict_cache.invalidate(ruleset_name)
 
     def _parse_prompt(self, prompt: str):
         """
-        Используем надежный парсинг с помощью регулярных выражений.
+        Используем надежный парсинг общим сканером промптов (logos.scanner).
         Это будет находить все пары 'переменная=значение'.
         """
         constraints = {}
-        pattern = re.compile(r"(\w+)\s*=\s*([0-9.]+)")
-        matches = pattern.findall(prompt)
-
-        for name, value in matches:
+        for name, op, value in PromptScan(prompt).assignments:
+            if op != '=':
+                continue
             try:
                 constraints[name] = float(value)
             except ValueError:
                 pass
         return constraints
 
-    def run(self, prompt: str, ruleset_name="compliance"):
+    def run(self, prompt: str, ruleset_name="compliance", budget: SolveBudget = None):
         print(f"Получен промпт: '{prompt}'") 
+        # Профиль запроса (logos.profiling) под именем "client.run"; итог — поле result ответа
+        with profile_request("client.run") as profile:
+            response = self._run(prompt, ruleset_name, budget)
+            profile.result = response["result"]
+        return response
 
-        constraints = self._parse_prompt(prompt)
+    def _run(self, prompt, ruleset_name, budget):
+        with stage("parse"):
+            constraints = self._parse_prompt(prompt)
 
         # ИЗМЕНЕНИЕ 1: Всегда возвращаем словарь для консистентности API
         if not constraints:
@@ -44,37 +86,46 @@ class Client:
                 "triggered_rules": []
             }
 
-        s = Solver()
-        variables = {name: Real(name) for name in constraints.keys()}
-
-        for name, value in constraints.items():
-            s.add(variables[name] == value)
-
-        rules_to_check = self.rulesets.get(ruleset_name, [])
-        if not rules_to_check:
+        self.refresh_ruleset(ruleset_name)
+        ruleset = self.compiled_rulesets.get(ruleset_name)
+        if ruleset is None or not ruleset.rules:
             return {
                 "result": "error",
                 "details": f"Набор правил '{ruleset_name}' не найден.",
                 "triggered_rules": []
             }
 
-        # ИЗМЕНЕНИЕ 2: Создаем список для хранения успешно примененных правил
-        triggered_rules = []
-        try:
-            for rule_str in rules_to_check:
-                rule_expr = eval(rule_str, {"__builtins__": None}, variables)
-                s.add(rule_expr)
-                # Если правило успешно добавлено, фиксируем его
-                triggered_rules.append(rule_str)
-        except Exception as e:
+        # Повторный вопрос с теми же значениями по той же версии набора не идет в решатель
+        key = self.verdict_cache.make_key("run", ruleset_name, ruleset.digest, constraints)
+        response = self.verdict_cache.get(key)
+        if response is None:
+            with stage("solve"):
+                response = self._verify(ruleset, constraints, budget or SolveBudget.default())
+            # "unknown" зависит от бюджета запроса, а не только от входных данных — не кэшируем
+            if response["result"] != "unknown":
+                self.verdict_cache.put(key, ruleset_name, response)
+        return response
+
+    def _verify(self, ruleset, constraints, budget):
+        # ИЗМЕНЕНИЕ 2: Правила уже скомпилированы, здесь только привязываем значения
+        triggered_rules, error = ruleset.bind(constraints)
+        if error is not None:
             return {
                 "result": "error",
-                "details": f"Ошибка при парсинге правила: {e}.",
+                "details": f"Ошибка при парсинге правила: {error}.",
                 "triggered_rules": triggered_rules # Возвращаем даже частично сработавшие
             }
 
         # ИЗМЕНЕНИЕ 3: Возвращаем структурированный ответ
-        if s.check() == sat:
+        outcome = ruleset.solve(constraints, budget, handler="client.run")
+        if outcome.unknown:
+            return {
+                "result": "unknown",
+                "details": f"Решатель не дал ответа в рамках бюджета ({outcome.reason}).",
+                "reason": outcome.reason,
+                "triggered_rules": triggered_rules
+            }
+        if outcome.status == SAT:
             return {
                 "result": "approved",
                 "details": "Все правила успешно верифицированы.",
@@ -86,3 +137,72 @@ class Client:
                 "details": "Одно или несколько правил не были выполнены.",
                 "triggered_rules": triggered_rules
             }
+
+    def _collect_columns(self, records, names):
+        """
+        Приводит записи к колонкам float64 (как float() в _parse_prompt).
+        Принимает список словарей, словарь колонок (имя -> массив) или DataFrame.
+        Отсутствующие значения становятся NaN.
+        """
+        import numpy as np
+        if isinstance(records, dict) or hasattr(records, "columns"):
+            available = records.columns if hasattr(records, "columns") else records.keys()
+            columns = {name: np.asarray(records[name], dtype=float) for name in names if name in available}
+        else:
+            records = list(records)
+            columns = {
+                name: np.fromiter((record.get(name, np.nan) for record in records), dtype=float, count=len(records))
+                for name in names
+                if any(name in record for record in records)
+            }
+        lengths = {len(column) for column in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"Колонки разной длины: {sorted(lengths)}")
+        return columns
+
+    def run_batch(self, records, ruleset_name="compliance"):
+        """
+        Пакетная проверка записей по набору правил без разбора промптов.
+        Каждое правило вычисляется векторно по целым колонкам. Возвращает общий результат,
+        вердикт по каждой записи ("approved" / "denied" / "error") и матрицу нарушений
+        записи x правила (столбцы в порядке triggered_rules).
+        """
+        self.refresh_ruleset(ruleset_name)
+        ruleset = self.compiled_rulesets.get(ruleset_name)
+        if ruleset is None or not ruleset.rules:
+            return {
+                "result": "error",
+                "details": f"Набор правил '{ruleset_name}' не найден.",
+                "triggered_rules": []
+            }
+
+        try:
+            columns = self._collect_columns(records, ruleset.variables)
+        except (TypeError, ValueError) as e:
+            return {
+                "result": "error",
+                "details": f"Ошибка при разборе записей: {e}.",
+                "triggered_rules": []
+            }
+
+        triggered_rules, error = ruleset.bind(columns)
+        if error is not None:
+            return {
+                "result": "error",
+                "details": f"Ошибка при парсинге правила: {error}.",
+                "triggered_rules": triggered_rules
+            }
+
+        import numpy as np
+        approved, violations, missing = ruleset.check_columns(columns)
+        verdicts = np.where(approved, "approved", "denied")
+        verdicts[missing] = "error"
+        denied = int((~approved & ~missing).sum())
+
+        return {
+            "result": "approved" if approved.all() else "denied",
+            "details": f"Проверено записей: {len(verdicts)}. Отклонено: {denied}. Без данных: {int(missing.sum())}.",
+            "triggered_rules": triggered_rules,
+            "verdicts": verdicts,
+            "violations": violations
+        }
@@ -1,211 +1,504 @@
 # logos/delegator.py
 
-import re
+import math
+import os
 import json
-from z3 import Solver, Int, Real, Bool, And, Or, Not, Implies, sat, is_rational_value, is_int_value
+from logos import tactics
+from logos.linear import NonLinear, affine_solution, format_decimal, parse_constraint, solve_linear
+from logos.profiling import profile_request, stage
+from logos.routing import Answer, HandlerRegistry, Route, result_status
+from logos.rules import RULE_OPERATORS, CompiledRule, exact, ruleset_digest
+from logos.sat import SatSolver, compile_cnf
+from logos.scanner import PromptScan
+from logos.scheduling import SchedulingError, SchedulingProblem, format_time, parse_scheduling_prompt, schedule
+from logos.solving import SAT, SolveBudget, SolveUnknown, thread_context
+
+_SMT_OPERATORS = {'<': '<', '>': '>', '<=': '<=', '>=': '>=', '==': '=', '!=': 'distinct'}
+
+
+_NO_SOLVER = Answer("Задача не содержит формализуемых ограничений и не была передана решателю. [Проверка Логос: не выполнялась]", "skipped")
+
+
+def _unknown_verdict(outcome):
+    return Answer(f"Решатель не уложился в бюджет ({outcome.reason}). [Проверка Логос: результат неизвестен.]", "unknown")
+
+
+def _smt_number(value, is_real):
+    """Число в записи SMT-LIB с той же точной семантикой, что и exact() (float через str())."""
+    q = exact(value)
+    if is_real:
+        text = f"{abs(q.numerator)}.0" if q.denominator == 1 else f"(/ {abs(q.numerator)}.0 {q.denominator}.0)"
+    else:
+        text = str(abs(q.numerator))
+    return f"(- {text})" if q < 0 else text
+
+
+def _z3_affine(terms, constant, variables, use_reals, ctx):
+    """constant + sum(coeff * var) в Z3 с точными коэффициентами; для целых — только целые коэффициенты."""
+    from z3 import IntVal, RealVal
+    number = (lambda value: RealVal(value, ctx)) if use_reals else (lambda value: IntVal(value.numerator, ctx))
+    expression = number(constant)
+    for name, coeff in terms:
+        expression = expression + number(coeff) * variables[name]
+    return expression
+
+
+def _z3_linear(terms, constant, op, variables, use_reals, ctx):
+    """Линейное ограничение sum(coeff * var) + constant op 0; для целых переменных — умноженное на НОК знаменателей."""
+    if not use_reals:
+        scale = 1
+        for value in (constant, *(coeff for _, coeff in terms)):
+            scale = scale * value.denominator // math.gcd(scale, value.denominator)
+        terms = [(name, coeff * scale) for name, coeff in terms]
+        constant = constant * scale
+    return RULE_OPERATORS[op](_z3_affine(terms, constant, variables, use_reals, ctx), 0)
+
 
 class Delegator:
-    def __init__(self, client):
+    # Сколько решений логической задачи перечислять, чтобы сообщить их число
+    BOOLEAN_MODEL_LIMIT = 16
+
+    def __init__(self, client, fast_path=True, ctx=None, registry: HandlerRegistry = None):
         self.client = client
+        # Маршрутизация промптов по обработчикам; по умолчанию — копия DEFAULT_ROUTES,
+        # так что register() на экземпляре не меняет другие Delegator
+        self.registry = registry if registry is not None else DEFAULT_ROUTES.copy()
+        # Явный z3.Context; по умолчанию каждый поток работает в своем (thread_context),
+        # поэтому один Delegator можно вызывать из нескольких потоков одновременно
+        self.ctx = ctx
+        # Полностью заданные (ground) проверки решаются точной арифметикой без Z3,
+        # а решенные линейные равенства подставляются до передачи задачи Z3
+        self.fast_path = fast_path
+        # Кэш наборов правил, заданных путем к файлу: path -> (mtime, rules, digest)
+        self._ruleset_files = {}
+
+    def _context(self):
+        return self.ctx or thread_context()
     
-    def _handle_scheduling(self, prompt: str) -> str:
+    def _handle_scheduling(self, prompt: str, budget: SolveBudget = None) -> str:
         try:
-            A, B, C = Int('A'), Int('B'), Int('C')
-            solver = Solver()
-            solver.add(A < B)
-            solver.add(C != A)
-            solver.add(A >= 9, A <= 11)
-            solver.add(B >= 9, B <= 11)
-            solver.add(C >= 9, C <= 11)
-            if solver.check() == sat:
-                model = solver.model()
-                schedule = f"A в {model[A]}:00, B в {model[B]}:00, C в {model[C]}:00."
-                return f"Возможное расписание: {schedule} [Проверено Логос: Данное расписание удовлетворяет всем ограничениям.]"
-            else:
-                return "Не удалось найти расписание, удовлетворяющее всем ограничениям. [Проверено Логос: Конфликт в условиях.]"
+            with stage("parse"):
+                problem = parse_scheduling_prompt(prompt)
+            if problem is None:
+                return Answer("Не найдено описание встреч для планирования. [Проверка Логос: не выполнялась]", "skipped")
+            result = self.schedule(problem, budget=budget)
+            if result["status"] == "unknown":
+                return Answer(f"Решатель не уложился в бюджет ({result['reason']}). [Проверка Логос: результат неизвестен.]", "unknown")
+            if result["status"] == "infeasible":
+                details = result.get("details", "ограничения несовместны")
+                return Answer(f"Не удалось найти расписание, удовлетворяющее всем ограничениям ({details}). [Проверено Логос: Конфликт в условиях.]", "verified")
+            with stage("format"):
+                items = []
+                for name, slot in result["assignments"].items():
+                    room = f" ({slot['room']})" if slot["room"] else ""
+                    items.append(f"{name} в {format_time(slot['start'])}{room}")
+                verdict = "Данное расписание удовлетворяет всем ограничениям"
+                if result["conflicts"]:
+                    verdict = f"Ограничения доступности и комнат соблюдены, пересечений участников: {result['conflicts']}"
+                if result["status"] == "feasible":
+                    verdict += "; оптимальность не доказана в рамках бюджета"
+                return Answer(f"Возможное расписание: {', '.join(items)}. [Проверено Логос: {verdict}.]", "verified")
+        except SchedulingError as e:
+            return Answer(f"Ошибка в описании задачи планирования: {e}. [Проверка Логос: прервана.]", "error")
         except Exception as e:
-            return f"Ошибка при решении задачи планирования с Z3: {e}. [Проверка Логос: прервана.]"
+            return Answer(f"Ошибка при решении задачи планирования с Z3: {e}. [Проверка Логос: прервана.]", "error")
+
+    def schedule(self, problem, budget: SolveBudget = None) -> dict:
+        """
+        Составляет расписание по SchedulingProblem или словарю того же формата
+        (см. logos.scheduling); возвращает структурированный результат schedule().
+        """
+        if isinstance(problem, dict):
+            problem = SchedulingProblem.from_dict(problem)
+        return schedule(problem, budget or SolveBudget.default(), ctx=self._context(), handler="delegator.scheduling")
 
     def _format_model_value(self, val):
+        from z3 import is_int_value, is_rational_value
         if is_rational_value(val) and not is_int_value(val):
             return f"{val.as_decimal(4).replace('?', '')}"
         else:
             return f"{val}"
 
-    def _handle_algebra(self, prompt: str) -> str:
+    def _handle_algebra(self, prompt: str, scan: PromptScan = None, budget: SolveBudget = None) -> str:
         try:
-            solver = Solver()
-            var_names = set(re.findall(r'\b([a-zA-Z])\b', prompt))
-            if not var_names: return "Не удалось найти переменные в уравнении. [Проверка Логос: ошибка парсинга.]"
-            all_numbers = re.findall(r'-?\d+\.\d+', prompt)
-            use_reals = len(all_numbers) > 0
-            VarType = Real if use_reals else Int
-            z3_vars = {name: VarType(name) for name in var_names}
-            safe_scope = z3_vars.copy()
-            safe_scope["__builtins__"] = None
-            constraints = re.findall(r'([a-zA-Z0-9\s\.\+\-\*\/()]+==[a-zA-Z0-9\s\.\+\-\*\/()]+|[a-zA-Z]+\s*(?:>|<|>=|<=)\s*-?\d+\.?\d*)', prompt)
-            if not constraints: return "Не удалось найти математические ограничения в промпте. [Проверка Логос: ошибка парсинга.]"
-            for c in constraints: solver.add(eval(c.strip(), safe_scope))
-            if solver.check() == sat:
-                model = solver.model()
-                solution_parts = []
-                for var in sorted(z3_vars.keys()):
-                    val = model[z3_vars[var]]
-                    if val is not None: solution_parts.append(f"{var} = {self._format_model_value(val)}")
-                solution = ", ".join(solution_parts)
-                return f"Решение найдено: {solution}. [Проверено Логос: Решение удовлетворяет всем условиям.]"
-            else:
-                return "Не удалось найти решение для данного уравнения и ограничений. [Проверено Логос: Конфликт в условиях.]"
+            budget = budget or SolveBudget.default()
+            with stage("parse"):
+                scan = scan or PromptScan(prompt)
+                var_names = scan.letter_variables()
+                use_reals = scan.has_decimals()
+                constraints = scan.constraint_texts() if var_names else []
+            if not var_names: return Answer("Не удалось найти переменные в уравнении. [Проверка Логос: ошибка парсинга.]", "error")
+            if not constraints: return Answer("Не удалось найти математические ограничения в промпте. [Проверка Логос: ошибка парсинга.]", "error")
+            if self.fast_path:
+                answer = self._algebra_exact(constraints, var_names, use_reals)
+                if answer is not None: return answer
+            with stage("encode"):
+                ctx = self._context()
+                encoded = self._algebra_encode(constraints, var_names, use_reals, ctx)
+                if encoded is None:
+                    return Answer("Не удалось найти решение для данного уравнения и ограничений. [Проверено Логос: Конфликт в условиях.]", "verified")
+                assertions, values = encoded
+                solver = tactics.make_solver(ctx, assertions)
+            with stage("solve"):
+                outcome, solver = tactics.check(budget, solver, "delegator.algebra")
+            if outcome.unknown: return _unknown_verdict(outcome)
+            with stage("format"):
+                if outcome.status == SAT:
+                    model = solver.model()
+                    solution = ", ".join(
+                        f"{var} = {self._format_model_value(model.eval(values[var], model_completion=True))}" for var in sorted(values)
+                    )
+                    return Answer(f"Решение найдено: {solution}. [Проверено Логос: Решение удовлетворяет всем условиям.]", "verified")
+                else:
+                    return Answer("Не удалось найти решение для данного уравнения и ограничений. [Проверено Логос: Конфликт в условиях.]", "verified")
         except Exception as e:
-            return f"Ошибка при решении алгебраической задачи с Z3: {e}. [Проверка Логос: прервана.]"
+            return Answer(f"Ошибка при решении алгебраической задачи с Z3: {e}. [Проверка Логос: прервана.]", "error")
+
+    def _algebra_encode(self, constraints, var_names, use_reals, ctx):
+        """
+        Ограничения для Z3 без eval(): каждое разбирается как правило (CompiledRule).
+        На быстром пути линейные равенства решаются точно (affine_solution): переменные,
+        которые они выражают через свободные, подставляются в остальные ограничения, и Z3
+        получает только неравенства и нелинейные ограничения. Целая переменная с дробным
+        выражением не подставляется — ее равенство (в целых коэффициентах) проверяет Z3.
+        Возвращает (assertions, {имя: Z3-выражение ее значения}) или None при конфликте.
+        """
+        from z3 import Int, Real
+        linear, rules = [], []
+        for text in constraints:
+            if self.fast_path:
+                try:
+                    linear.append(parse_constraint(text, var_names, use_reals))
+                    continue
+                except NonLinear:
+                    pass
+            rule = CompiledRule(text)
+            unknown = sorted(set(rule.variables) - set(var_names))
+            if unknown:
+                raise ValueError(f"неизвестная переменная '{unknown[0]}'")
+            rules.append(rule)
+        VarType = Real if use_reals else Int
+        names = {name for constraint in linear for name in constraint.variables}
+        names.update(name for rule in rules for name in rule.variables)
+        values = {name: VarType(name, ctx) for name in sorted(names)}
+
+        solution = affine_solution([constraint for constraint in linear if constraint.op == "=="])
+        if solution is False:
+            return None
+        assertions, substituted = [], {}
+        for name, (constant, terms) in solution.items():
+            if use_reals or all(value.denominator == 1 for value in (constant, *(coeff for _, coeff in terms))):
+                substituted[name] = (constant, terms)
+                values[name] = _z3_affine(terms, constant, values, use_reals, ctx)
+            else:
+                terms = ((name, 1),) + tuple((other, -coeff) for other, coeff in terms)
+                assertions.append(_z3_linear(terms, -constant, "==", values, use_reals, ctx))
+        for constraint in linear:
+            if constraint.op == "==":
+                continue
+            constraint = constraint.substitute(substituted)
+            if not constraint.coeffs:
+                if not constraint.holds({}):
+                    return None
+                continue
+            assertions.append(_z3_linear(constraint.coeffs, constraint.constant, constraint.op, values, use_reals, ctx))
+        # values уже несут подстановку: нелинейные ограничения строятся над свободными переменными
+        assertions.extend(rule.to_z3(values) for rule in rules)
+        return assertions, values
+
+    def _algebra_exact(self, constraints, var_names, use_reals):
+        """
+        Линейные системы без Z3: ограничения разбираются в линейную форму (logos.linear),
+        равенства решаются точным исключением Гаусса. Если они задают все переменные,
+        неравенства и целочисленность проверяются подстановкой. None — нужен Z3.
+        """
+        try:
+            with stage("encode"):
+                linear = [parse_constraint(text, var_names, use_reals) for text in constraints]
+        except NonLinear:
+            return None
+        with stage("solve"):
+            status, values = solve_linear(linear, integer=not use_reals)
+        if status is None:
+            return None
+        with stage("format"):
+            if status == SAT:
+                solution = ", ".join(
+                    f"{name} = {format_decimal(value) if use_reals else value.numerator}" for name, value in sorted(values.items())
+                )
+                return Answer(f"Решение найдено: {solution}. [Проверено Логос: Решение удовлетворяет всем условиям.]", "verified")
+            return Answer("Не удалось найти решение для данного уравнения и ограничений. [Проверено Логос: Конфликт в условиях.]", "verified")
 
-    def _handle_boolean_logic(self, prompt: str) -> str:
+    def _handle_boolean_logic(self, prompt: str, scan: PromptScan = None, budget: SolveBudget = None) -> str:
         try:
-            var_candidates = set(re.findall(r'\b([А-ЯЁ][а-яё]+)\b', prompt))
-            var_names = {name for name in var_candidates if name.lower() not in ["если", "то", "не"]}
-            
+            budget = budget or SolveBudget.default()
+            with stage("parse"):
+                scan = scan or PromptScan(prompt)
+                var_names = scan.person_names()
+                if var_names:
+                    implications = scan.implications(var_names)
+                    facts = scan.facts(var_names)
+
             if not var_names:
-                return "Не удалось найти переменные (имена) в задаче. [Проверка Логос: ошибка парсинга.]"
-
-            solver = Solver()
-            z3_vars = {name: Bool(name) for name in var_names}
-            
-            processed_prompt = prompt
-            var_pattern = f"({'|'.join(var_names)})"
-
-            processed_prompt = re.sub(f"{var_pattern}\\s+не\\s+\\w+", r"Not(\1)", processed_prompt)
-            processed_prompt = re.sub(f"{var_pattern}\\s+точно\\s+не\\s+\\w+", r"Not(\1)", processed_prompt)
-            processed_prompt = re.sub(f"{var_pattern}\\s+\\w+(\\s+.*?)?(?=[,.]|\\bто\\b)", r"\1", processed_prompt)
-
-            safe_scope = z3_vars.copy()
-            safe_scope.update({'Implies': Implies, 'Not': Not})
-            safe_scope["__builtins__"] = None
-
-            found_constraints = False
-            implications = re.findall(r'Если\s+(.*?),\s*то\s+(.*?)\.', processed_prompt, flags=re.IGNORECASE)
-            for cond, conclusion in implications:
-                solver.add(Implies(eval(cond.strip(), safe_scope), eval(conclusion.strip(), safe_scope)))
-                found_constraints = True
-
-            remaining_text = re.sub(r'Если\s+(.*?),\s*то\s+(.*?)\.', '', processed_prompt, flags=re.IGNORECASE)
-            facts = [f.strip() for f in remaining_text.split('.') if f.strip()]
-            for fact in facts:
-                if fact.startswith("Not(") and fact.endswith(")"):
-                    solver.add(eval(fact, safe_scope))
-                    found_constraints = True
-            
-            if not found_constraints:
-                return "Не удалось найти логические ограничения в промпте. [Проверка Логос: ошибка парсинга.]"
-
-            if solver.check() == sat:
-                model = solver.model()
-                solution_parts = []
-                sorted_decls = sorted(model.decls(), key=lambda d: d.name())
-                for d in sorted_decls:
-                    solution_parts.append(f"{d.name()} = {model[d]}")
-
-                solution = ", ".join(solution_parts)
-                return f"Решение найдено: {solution}. [Проверено Логос: Вывод логически корректен.]"
-            else:
-                return "Условия задачи противоречивы, решения не существует. [Проверено Логос: Обнаружено противоречие.]"
+                return Answer("Не удалось найти переменные (имена) в задаче. [Проверка Логос: ошибка парсинга.]", "error")
+
+            with stage("encode"):
+                names, clauses = compile_cnf(implications, facts)
+            if not clauses:
+                return Answer("Не удалось найти логические ограничения в промпте. [Проверка Логос: ошибка парсинга.]", "error")
+
+            # Двух моделей достаточно, чтобы доказать или опровергнуть единственность;
+            # остальные перечисляются до предела, чтобы назвать число вариантов
+            try:
+                with stage("solve"):
+                    models = self._boolean_models(names, clauses, budget, self.BOOLEAN_MODEL_LIMIT)
+            except SolveUnknown as e:
+                return _unknown_verdict(e.outcome)
+            if not models:
+                return Answer("Условия задачи противоречивы, решения не существует. [Проверено Логос: Обнаружено противоречие.]", "verified")
+
+            with stage("format"):
+                solution = ", ".join(f"{name} = {value}" for name, value in zip(names, models[0]))
+                if len(models) == 1:
+                    return Answer(f"Решение найдено: {solution}. [Проверено Логос: Вывод логически корректен, решение единственно.]", "verified")
+                count = f"не менее {len(models)}" if len(models) == self.BOOLEAN_MODEL_LIMIT else str(len(models))
+                return Answer(f"Решение найдено: {solution}. [Проверено Логос: Вывод логически корректен, но решение не единственно (вариантов: {count}).]", "verified")
         except Exception as e:
-            return f"Ошибка при решении логической задачи с Z3: {e}. [Проверка Логос: прервана.]"
+            return Answer(f"Ошибка при решении логической задачи с Z3: {e}. [Проверка Логос: прервана.]", "error")
 
-    def _build_rule_expr(self, rule_str, z3_vars):
+    def _boolean_models(self, names, clauses, budget, limit):
+        """
+        Модели КНФ (списки bool в порядке names), каждая следующая исключается
+        блокирующей клаузой. Основной путь — DPLL в процессе (logos.sat);
+        при fast_path=False те же клаузы решает Z3.
+        """
+        if self.fast_path:
+            return [[value > 0 for value in values[1:]] for values in SatSolver(len(names), clauses).models(limit)]
+
+        with stage("encode"):
+            from z3 import Bool, Not, Or, is_true
+            ctx = self._context()
+            z3_vars = [Bool(name, ctx) for name in names]
+            # КНФ пропозициональна по построению — классификация не нужна
+            clauses = [Or([z3_vars[lit - 1] if lit > 0 else Not(z3_vars[-lit - 1]) for lit in clause]) for clause in clauses]
+            solver = tactics.make_solver(ctx, clauses, problem_class="propositional")
+        models = []
+        while limit is None or len(models) < limit:
+            outcome, solver = tactics.check(budget, solver, "delegator.boolean")
+            if outcome.unknown:
+                raise SolveUnknown(outcome)
+            if outcome.status != SAT:
+                break
+            model = solver.model()
+            values = [is_true(model.eval(var, model_completion=True)) for var in z3_vars]
+            models.append(values)
+            solver.add(Or([Not(var) if value else var for var, value in zip(z3_vars, values)]))
+        return models
+
+    def enumerate_boolean(self, prompt: str, limit: int = None, budget: SolveBudget = None) -> list:
+        """Все решения логической задачи (не более limit) как словари имя -> bool."""
+        scan = PromptScan(prompt)
+        var_names = scan.person_names()
+        names, clauses = compile_cnf(scan.implications(var_names), scan.facts(var_names))
+        models = self._boolean_models(names, clauses, budget or SolveBudget.default(), limit)
+        return [dict(zip(names, values)) for values in models]
+
+    def _parse_rule(self, rule_str, bound_vars):
         parts = rule_str.split()
         if len(parts) != 3: return None
         var_name, op, value_str = parts
-        if var_name not in z3_vars: return None
-        z3_var = z3_vars[var_name]
+        if var_name not in bound_vars: return None
         value = float(value_str) if '.' in value_str else int(value_str)
-        if op == '<': return z3_var < value
-        if op == '>': return z3_var > value
-        if op == '<=': return z3_var <= value
-        if op == '>=': return z3_var >= value
-        if op == '==': return z3_var == value
-        if op == '!=': return z3_var != value
-        return None
-
-    def _handle_rule_engine(self, prompt: str) -> str:
-        try:
-            match_ruleset = re.search(r"по набору правил '(\w+)'", prompt)
-            if not match_ruleset: return "Не удалось найти имя набора правил."
-            ruleset_name = match_ruleset.group(1)
-
-            filepath = self.client.rulesets.get(ruleset_name)
-            if not filepath: return f"Ошибка: набор правил '{ruleset_name}' не загружен."
-
-            data_map = {}
-            alias_map = {
-                'amount': ['amount', 'сумма', 'на сумму'],
-                'risk_score': ['risk_score', 'риск', 'с оценкой риска'],
-                'transaction_hour': ['transaction_hour', 'час', 'в час']
-            }
-
-            for canonical_name, aliases in alias_map.items():
-                alias_pattern = '|'.join(aliases)
-                match = re.search(f"({alias_pattern})\\s*[:=]?\\s*([\\d\\.]+)", prompt, flags=re.IGNORECASE)
-                if match:
-                    data_map[canonical_name] = match.group(2)
-            
-            if not data_map: return "Не удалось найти данные для проверки в промпте."
-            
-            with open(filepath, 'r') as f:
-                rules = json.load(f).get("rules", [])
-            
-            solver = Solver()
-            z3_vars = {key: Real(key) if '.' in val else Int(key) for key, val in data_map.items()}
-            for key, val in data_map.items():
-                solver.add(z3_vars[key] == (float(val) if '.' in val else int(val)))
-
-            # --- НОВАЯ ЛОГИКА: ПОЛНЫЙ АУДИТ ---
-            audit_results = []
-            violations = 0
-
-            for rule in rules:
-                rule_expr = self._build_rule_expr(rule, z3_vars)
-                if rule_expr is None:
+        if op not in RULE_OPERATORS: return None
+        return var_name, op, value
+
+    def _build_rule_expr(self, rule_str, z3_vars):
+        parsed = self._parse_rule(rule_str, z3_vars)
+        if parsed is None: return None
+        var_name, op, value = parsed
+        return RULE_OPERATORS[op](z3_vars[var_name], value)
+
+    def _audit_exact(self, rules, data_values):
+        """Аудит без Z3: все переменные заданы числами, сравниваем точные дроби."""
+        audit_results = []
+        violations = 0
+        for rule in rules:
+            parsed = self._parse_rule(rule, data_values)
+            if parsed is None:
+                continue
+            var_name, op, value = parsed
+            actual = data_values[var_name]
+            if RULE_OPERATORS[op](exact(actual), exact(value)):
+                audit_results.append(f"  - Правило '{rule}': ВЫПОЛНЕНО")
+            else:
+                violations += 1
+                from z3 import IntVal, RealVal
+                actual_value = RealVal(actual, self._context()) if isinstance(actual, float) else IntVal(actual, self._context())
+                audit_results.append(
+                    f"  - Правило '{rule}': ПРОВАЛЕНО (фактическое значение: {var_name} = {self._format_model_value(actual_value)})"
+                )
+        return audit_results, violations
+
+    def _audit_z3(self, rules, data_values, budget: SolveBudget = None):
+        """
+        Аудит одним вызовом решателя. Каждое правило получает литерал-индикатор
+        нарушения violated_i = not(rule_i); все данные закреплены равенствами,
+        поэтому одна модель однозначно определяет значения всех индикаторов.
+        Задача собирается одним SMT-LIB текстом, а индикаторы читаются из модели
+        через model.eval, вместо push / Not(rule) / check / pop на каждое правило.
+        """
+        with stage("encode"):
+            script = []
+            for key, val in data_values.items():
+                is_real = isinstance(val, float)
+                script.append(f"(declare-const {key} {'Real' if is_real else 'Int'})")
+                script.append(f"(assert (= {key} {_smt_number(val, is_real)}))")
+
+            tracked = []
+            for index, rule in enumerate(rules):
+                parsed = self._parse_rule(rule, data_values)
+                if parsed is None:
                     continue
+                var_name, op, value = parsed
+                # Как и в Z3 Python API: сравнение Int с дробным числом идет в вещественных
+                var_is_real = isinstance(data_values[var_name], float)
+                is_real = var_is_real or isinstance(value, float)
+                var_term = var_name if var_is_real == is_real else f"(to_real {var_name})"
+                literal = f"__violated_{index}"
+                script.append(f"(declare-const {literal} Bool)")
+                script.append(f"(assert (= {literal} (not ({_SMT_OPERATORS[op]} {var_term} {_smt_number(value, is_real)}))))")
+                tracked.append((rule, var_name, literal))
 
-                solver.push()
-                solver.add(Not(rule_expr))
+            from z3 import Bool, Int, Real, is_true, parse_smt2_string
+            ctx = self._context()
+            solver = tactics.make_solver(ctx, parse_smt2_string("\n".join(script), ctx=ctx))
+            # Константа с тем же именем и сортом в том же контексте — та же, что объявлена в скрипте
+            indicators = {literal: Bool(literal, ctx) for _, _, literal in tracked}
+        outcome, solver = tactics.check(budget or SolveBudget(), solver, "delegator.rule_engine")
+        if outcome.unknown:
+            raise SolveUnknown(outcome)
+        model = solver.model() if outcome.status == SAT else None
 
-                if solver.check() == sat:
-                    violations += 1
-                    model = solver.model()
-                    violated_var_name = rule.split()[0]
-                    actual_value = model.eval(z3_vars[violated_var_name], model_completion=True)
-                    audit_results.append(
-                        f"  - Правило '{rule}': ПРОВАЛЕНО (фактическое значение: {violated_var_name} = {self._format_model_value(actual_value)})"
-                    )
-                else:
-                    audit_results.append(f"  - Правило '{rule}': ВЫПОЛНЕНО")
-                
-                solver.pop()
+        audit_results = []
+        violations = 0
+        actual_values = {}
+        for rule, var_name, literal in tracked:
+            is_violated = model is not None and is_true(model.eval(indicators[literal], model_completion=True))
+            if is_violated:
+                violations += 1
+                if var_name not in actual_values:
+                    var = Real(var_name, ctx) if isinstance(data_values[var_name], float) else Int(var_name, ctx)
+                    actual_values[var_name] = self._format_model_value(model.eval(var, model_completion=True))
+                audit_results.append(
+                    f"  - Правило '{rule}': ПРОВАЛЕНО (фактическое значение: {var_name} = {actual_values[var_name]})"
+                )
+            else:
+                audit_results.append(f"  - Правило '{rule}': ВЫПОЛНЕНО")
+        return audit_results, violations
+
+    def _get_rules(self, ruleset_name):
+        """
+        Правила набора и хэш их содержимого без повторного чтения JSON на каждый запрос:
+        берутся из скомпилированного набора клиента, а если клиент хранит путь к файлу —
+        из кэша, который обновляется только при изменении файла.
+        """
+        if hasattr(self.client, "refresh_ruleset"):
+            self.client.refresh_ruleset(ruleset_name)
+        compiled = getattr(self.client, "compiled_rulesets", {}).get(ruleset_name)
+        if compiled is not None:
+            return compiled.sources, compiled.digest
+        source = self.client.rulesets.get(ruleset_name)
+        if not source:
+            return source, None
+        if isinstance(source, list):
+            return source, ruleset_digest(source)
+        mtime = os.stat(source).st_mtime_ns
+        cached = self._ruleset_files.get(source)
+        if cached is None or cached[0] != mtime:
+            with open(source, 'r') as f:
+                rules = json.load(f).get("rules", [])
+            cached = (mtime, rules, ruleset_digest(rules))
+            self._ruleset_files[source] = cached
+        return cached[1], cached[2]
 
+    def _handle_rule_engine(self, prompt: str, scan: PromptScan = None, budget: SolveBudget = None) -> str:
+        try:
+            budget = budget or SolveBudget.default()
+            with stage("parse"):
+                scan = scan or PromptScan(prompt)
+                ruleset_name = scan.ruleset_name
+            if not ruleset_name: return Answer("Не удалось найти имя набора правил.", "error")
+
+            rules, digest = self._get_rules(ruleset_name)
+            if not rules: return Answer(f"Ошибка: набор правил '{ruleset_name}' не загружен.", "error")
+
+            with stage("parse"):
+                data_map = {}
+                alias_map = {
+                    'amount': ['amount', 'сумма', 'на сумму'],
+                    'risk_score': ['risk_score', 'риск', 'с оценкой риска'],
+                    'transaction_hour': ['transaction_hour', 'час', 'в час']
+                }
+
+                for canonical_name, aliases in alias_map.items():
+                    value = scan.value_after(aliases)
+                    if value is not None:
+                        data_map[canonical_name] = value
+
+            if not data_map: return Answer("Не удалось найти данные для проверки в промпте.", "error")
+
+            data_values = {key: float(val) if '.' in val else int(val) for key, val in data_map.items()}
+
+            # Тот же аудит по той же версии набора уже выполнялся — отдаем готовый отчет
+            cache = getattr(self.client, "verdict_cache", None)
+            if cache is not None:
+                key = cache.make_key("audit", ruleset_name, digest, data_values, typed=True)
+                report = cache.get(key)
+                if report is None:
+                    report = self._audit_report(ruleset_name, rules, data_values, budget)
+                    cache.put(key, ruleset_name, report)
+                # В кэше только завершенные аудиты (unknown не кэшируется)
+                return Answer(report, "verified")
+            return self._audit_report(ruleset_name, rules, data_values, budget)
+
+        except SolveUnknown as e:
+            # Не кэшируется: ответ зависит от бюджета запроса
+            return _unknown_verdict(e.outcome)
+        except Exception as e:
+            return Answer(f"Ошибка при работе движка правил: {e}. [Проверка Логос: прервана.]", "error")
+
+    def _audit_report(self, ruleset_name, rules, data_values, budget=None):
+        # --- НОВАЯ ЛОГИКА: ПОЛНЫЙ АУДИТ ---
+        with stage("solve"):
+            if self.fast_path:
+                audit_results, violations = self._audit_exact(rules, data_values)
+            else:
+                audit_results, violations = self._audit_z3(rules, data_values, budget)
+
+        with stage("format"):
             if violations > 0:
                 header = f"Проверка провалена. Обнаружено нарушений: {violations}. [Проверено Логос: Обнаружено несоответствие.]"
-                report = "\n".join([header] + audit_results)
-                return report
+                return Answer("\n".join([header] + audit_results), "verified")
             else:
-                return f"Проверка пройдена. Все {len(audit_results)} правила из набора '{ruleset_name}' выполнены. [Проверено Логос: Соответствие подтверждено.]"
+                return Answer(f"Проверка пройдена. Все {len(audit_results)} правила из набора '{ruleset_name}' выполнены. [Проверено Логос: Соответствие подтверждено.]", "verified")
 
-        except Exception as e:
-            return f"Ошибка при работе движка правил: {e}. [Проверка Логос: прервана.]"
-
-    def analyze_and_translate(self, prompt: str) -> str:
-        prompt_lower = prompt.lower()
-        rule_engine_keywords = ["проверь", "транзакцию", "правил"]
-        scheduling_keywords = ["запланировать", "встречи", "расписание"]
-        algebra_keywords = ["реши", "уравнение", "где"]
-        boolean_keywords = ["если", "то"]
-        if all(keyword in prompt_lower for keyword in rule_engine_keywords):
-            return self._handle_rule_engine(prompt)
-        elif any(keyword in prompt_lower for keyword in scheduling_keywords):
-            return self._handle_scheduling(prompt)
-        elif any(keyword in prompt_lower for keyword in algebra_keywords):
-            return self._handle_algebra(prompt)
-        elif all(keyword in prompt_lower for keyword in boolean_keywords):
-            return self._handle_boolean_logic(prompt)
-        else:
-            return "Задача не содержит формализуемых ограничений и не была передана решателю. [Проверка Логос: не выполнялась]"
+    def analyze_and_translate(self, prompt: str, budget: SolveBudget = None) -> str:
+        """
+        Передает промпт первому подходящему обработчику из self.registry. Каждый запрос
+        профилируется (logos.profiling): время стадий parse / encode / solve / format,
+        вызовы решателя со статистикой Z3 и итог попадают в HANDLER_METRICS под именем маршрута.
+        """
+        route = self.registry.match(prompt)
+        with profile_request(route.name if route is not None else "none") as profile:
+            answer = route.call(self, prompt, budget=budget) if route is not None else _NO_SOLVER
+            profile.result = result_status(answer)
+        return answer
+
+
+# Маршруты по умолчанию, в порядке приоритета
+DEFAULT_ROUTES = HandlerRegistry([
+    Route("rule_engine", "_handle_rule_engine", all_of=("проверь", "транзакцию", "правил")),
+    Route("scheduling", "_handle_scheduling", any_of=("запланировать", "встречи", "расписание")),
+    Route("algebra", "_handle_algebra", any_of=("реши", "уравнение", "где")),
+    Route("boolean", "_handle_boolean_logic", all_of=("если", "то")),
+])
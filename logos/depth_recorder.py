@@ -0,0 +1,227 @@
+# logos/depth_recorder.py
+#
+# Запись глубины Binance в DepthStore — отдельный процесс, один на каталог хранилища:
+#   LOGOS_DEPTH_STORE=/data/depth python -m logos.depth_recorder BTCUSDT ETHUSDT
+# Рабочие расследований (ForensicDelegator) только читают то же хранилище.
+
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+from collections import deque
+from logos.async_time_machine import AsyncTimeMachine
+from logos.depth_store import DepthStore
+
+logger = logging.getLogger("logos.depth_recorder")
+
+
+class DepthRecorder:
+    """
+    Поток <symbol>@depth и снимки /api/v3/depth в DepthStore по правилам Binance
+    для локального стакана: события до lastUpdateId снимка отбрасываются, первое
+    записанное событие покрывает lastUpdateId + 1, дальше U каждого события равен
+    u предыдущего + 1. Разрыв (потерянное событие, переподключение) — новый снимок.
+
+    Снимок записывается с временем первого непокрытого им события минус 1 мс: по
+    часам биржи, как и диффы, а не по часам машины. Кроме того, снимок берется
+    каждые snapshot_interval секунд — восстановление стакана на момент сделки не
+    проигрывает диффы за многие часы. Буфер диффов сбрасывается на диск каждые
+    flush_interval секунд: раньше его не видят другие процессы.
+    """
+    STREAM_URL = "wss://stream.binance.com:9443"
+    # Сколько последних событий символа помнится для привязки планового снимка ко времени
+    RECENT_EVENTS = 10_000
+
+    def __init__(self, store: DepthStore, symbols, time_machine: AsyncTimeMachine = None, stream_url: str = None,
+                 depth_limit: int = 1000, snapshot_interval: float = 300.0, flush_interval: float = 60.0,
+                 update_speed: str = "100ms", reconnect_backoff: float = 1.0):
+        self.store = store
+        self.symbols = [symbol.upper() for symbol in symbols]
+        self.tm = time_machine or AsyncTimeMachine()
+        self.stream_url = stream_url or self.STREAM_URL
+        self.depth_limit = depth_limit
+        self.snapshot_interval = snapshot_interval
+        self.flush_interval = flush_interval
+        self.update_speed = update_speed
+        self.reconnect_backoff = reconnect_backoff
+        self.events = 0
+        self.snapshots = 0
+        self.resyncs = 0
+        self._state = {}
+        self._tasks = set()
+        self._stopping = None
+
+    # --- синхронизация потока и снимков ---
+
+    def _reset(self):
+        self._state = {
+            symbol: {"last_u": None, "buffer": [], "snapshot": None, "fetching": False, "recent": deque(maxlen=self.RECENT_EVENTS)}
+            for symbol in self.symbols
+        }
+
+    def _on_event(self, event):
+        state = self._state.get(event["s"])
+        if state is None:
+            return
+        pending = state["snapshot"]
+        if pending is not None and event["u"] > pending[0]:
+            last_update_id = pending[0]
+            if state["last_u"] is None and event["U"] > last_update_id + 1:
+                # Снимок старше первого события буфера: между ними есть непринятые события
+                state["snapshot"] = None
+                state["buffer"] = [event]
+                self._resync(event["s"])
+                return
+            self._write_snapshot(event["s"], event["E"] - 1, pending)
+            state["snapshot"] = None
+            if state["last_u"] is None:
+                state["last_u"] = last_update_id
+        if state["last_u"] is None:
+            # Снимка еще нет (или событие уже учтено в ожидаемом снимке): ждем снимок
+            if pending is None:
+                state["buffer"].append(event)
+            return
+        if event["u"] <= state["last_u"]:
+            return
+        if event["U"] != state["last_u"] + 1:
+            logger.warning("%s: gap in depth stream (U=%s after u=%s), resyncing", event["s"], event["U"], state["last_u"])
+            state["last_u"], state["snapshot"], state["buffer"] = None, None, [event]
+            self._resync(event["s"])
+            return
+        self.store.record_depth_event(event)
+        state["last_u"] = event["u"]
+        state["recent"].append((event["E"], event["u"]))
+        self.events += 1
+
+    def _on_snapshot(self, symbol, book):
+        state = self._state.get(symbol)
+        if state is None or book is None:
+            return
+        snapshot = (int(book["lastUpdateId"]), book["bids"][["price", "qty"]].to_numpy(), book["asks"][["price", "qty"]].to_numpy())
+        if state["last_u"] is not None and state["last_u"] > snapshot[0]:
+            # Плановый снимок: поток уже ушел дальше, время — по первому событию после снимка
+            following = next((ts for ts, update_id in state["recent"] if update_id > snapshot[0]), None)
+            if following is not None and state["recent"][0][1] <= snapshot[0]:
+                self._write_snapshot(symbol, following - 1, snapshot)
+            return
+        state["snapshot"] = snapshot
+        buffered, state["buffer"] = state["buffer"], []
+        for event in buffered:
+            self._on_event(event)
+
+    def _write_snapshot(self, symbol, timestamp_ms, snapshot):
+        last_update_id, bids, asks = snapshot
+        self.store.record_snapshot(symbol, timestamp_ms, bids, asks, last_update_id)
+        self.snapshots += 1
+
+    def _resync(self, symbol):
+        state = self._state[symbol]
+        if state["fetching"]:
+            return
+        state["fetching"] = True
+        self.resyncs += 1
+        self._spawn(self._fetch_snapshot(symbol, state))
+
+    async def _fetch_snapshot(self, symbol, state):
+        try:
+            book = None
+            while book is None:
+                book = await self.tm.get_orderbook_snapshot(symbol, limit=self.depth_limit)
+                if book is None:
+                    await asyncio.sleep(self.reconnect_backoff)
+        finally:
+            state["fetching"] = False
+        if self._state.get(symbol) is state:
+            self._on_snapshot(symbol, book)
+
+    # --- фоновые задачи ---
+
+    def _spawn(self, coroutine):
+        task = asyncio.get_running_loop().create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _periodic_snapshots(self):
+        while True:
+            await asyncio.sleep(self.snapshot_interval)
+            for symbol, state in self._state.items():
+                if state["last_u"] is not None and not state["fetching"]:
+                    state["fetching"] = True
+                    self._spawn(self._fetch_snapshot(symbol, state))
+
+    async def _periodic_flush(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await loop.run_in_executor(None, self.store.flush)
+
+    # --- соединение ---
+
+    def stream_path(self) -> str:
+        return "/stream?streams=" + "/".join(f"{symbol.lower()}@depth@{self.update_speed}" for symbol in self.symbols)
+
+    async def run(self):
+        """Пишет глубину до stop(); обрыв соединения — переподключение и новые снимки."""
+        import websockets
+        self._stopping = asyncio.Event()
+        background = [self._spawn(self._periodic_snapshots()), self._spawn(self._periodic_flush())]
+        attempt = 0
+        try:
+            async with self.tm:
+                while not self._stopping.is_set():
+                    self._reset()
+                    try:
+                        async with websockets.connect(self.stream_url + self.stream_path()) as ws:
+                            attempt = 0
+                            for symbol in self.symbols:
+                                self._resync(symbol)
+                            await self._receive(ws)
+                    except (OSError, asyncio.TimeoutError, websockets.WebSocketException) as e:
+                        logger.warning("depth stream disconnected: %s", e)
+                    if not self._stopping.is_set():
+                        attempt += 1
+                        await asyncio.sleep(random.uniform(0, self.reconnect_backoff * 2 ** min(attempt, 6)))
+        finally:
+            for task in list(self._tasks):
+                task.cancel()
+            await asyncio.gather(*background, return_exceptions=True)
+            await asyncio.get_running_loop().run_in_executor(None, self.store.flush)
+
+    async def _receive(self, ws):
+        stopping = self._spawn(self._stopping.wait())
+        try:
+            while True:
+                message = self._spawn(ws.recv())
+                await asyncio.wait({message, stopping}, return_when=asyncio.FIRST_COMPLETED)
+                if not message.done():
+                    message.cancel()
+                    return
+                payload = json.loads(message.result())
+                self._on_event(payload.get("data", payload))
+        finally:
+            stopping.cancel()
+
+    def stop(self):
+        if self._stopping is not None:
+            self._stopping.set()
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO)
+    symbols = (argv if argv is not None else sys.argv[1:]) or os.environ.get("LOGOS_DEPTH_SYMBOLS", "BTCUSDT").split(",")
+    root = os.environ.get("LOGOS_DEPTH_STORE", "/data/depth")
+    recorder = DepthRecorder(
+        DepthStore(root),
+        symbols,
+        snapshot_interval=float(os.environ.get("LOGOS_DEPTH_SNAPSHOT_INTERVAL", "300")),
+        flush_interval=float(os.environ.get("LOGOS_DEPTH_FLUSH_INTERVAL", "60")),
+    )
+    logger.info("recording depth of %s into %s", ", ".join(recorder.symbols), root)
+    asyncio.run(recorder.run())
+
+
+if __name__ == "__main__":
+    main()
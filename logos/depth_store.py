@@ -0,0 +1,324 @@
+# logos/depth_store.py
+
+import os
+import tempfile
+import threading
+from bisect import bisect_right
+import numpy as np
+import pandas as pd
+
+# Колонки сегмента диффов: время события (мс), финальный updateId события (u),
+# сторона (0 — bid, 1 — ask), цена и новый объем уровня (0 — уровень удален)
+DIFF_COLUMNS = (("ts", np.int64), ("update_id", np.int64), ("side", np.int8), ("price", np.float64), ("qty", np.float64))
+BID, ASK = 0, 1
+
+
+def book_from_depth(data: dict) -> dict:
+    """Ответ /api/v3/depth в формате TimeMachine.get_orderbook_snapshot: lastUpdateId, bids и asks."""
+    bids = pd.DataFrame(data['bids'], columns=['price', 'qty'], dtype=float)
+    asks = pd.DataFrame(data['asks'], columns=['price', 'qty'], dtype=float)
+    bids['side'] = 'bid'
+    asks['side'] = 'ask'
+    return {"lastUpdateId": data['lastUpdateId'], "bids": bids, "asks": asks}
+
+
+class DepthStore:
+    """
+    Локальное хранилище стакана: снимки (/api/v3/depth) и диффы (depthUpdate)
+    в колоночном виде на диске, упорядоченные по времени.
+
+    Раскладка для каждого символа:
+        <root>/<SYMBOL>/snapshots/<ts>-<lastUpdateId>.npz — bid/ask цены и объемы;
+        <root>/<SYMBOL>/diffs/<first_ts>-<seq>/<колонка>.npy — сегмент диффов, по файлу
+        на колонку DIFF_COLUMNS, читается через mmap.
+
+    Стакан на миллисекунду ts восстанавливается без сети: последний снимок
+    не позже ts (бинарный поиск), затем диффы из интервала (снимок, ts] —
+    их границы в сегментах тоже ищутся бинарным поиском. Итого O(log n + диффы).
+    Диффы записываются в порядке времени; буфер сбрасывается в новый сегмент
+    каждые segment_rows строк, при flush() и перед чтением.
+
+    Писать и читать могут разные процессы (запись потока глубины и рабочие
+    расследований): снимки и сегменты появляются на диске атомарно (os.replace
+    готового файла или каталога), а индекс символа пересканируется, когда меняются
+    каталоги snapshots / diffs.
+    """
+    def __init__(self, root: str, segment_rows: int = 100_000):
+        self.root = root
+        self.segment_rows = segment_rows
+        self._lock = threading.RLock()
+        self._symbols = {}  # SYMBOL -> {"snapshots": [(ts, update_id, path)], "segments": [...], ...}
+
+    # --- запись ---
+
+    def record_snapshot(self, symbol: str, timestamp_ms: int, bids, asks, last_update_id: int = 0):
+        """Снимок стакана: bids / asks — пары [цена, объем] (строки или числа, как в ответе Binance)."""
+        bids = np.asarray(bids, dtype=np.float64).reshape(-1, 2)
+        asks = np.asarray(asks, dtype=np.float64).reshape(-1, 2)
+        with self._lock:
+            index = self._write_index(symbol)
+            directory = os.path.join(self._symbol_dir(symbol), "snapshots")
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"{int(timestamp_ms):013d}-{int(last_update_id)}.npz")
+            fd, tmp = tempfile.mkstemp(dir=directory, prefix=".", suffix=".part")
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, bid_price=bids[:, 0], bid_qty=bids[:, 1], ask_price=asks[:, 0], ask_qty=asks[:, 1])
+            os.replace(tmp, path)
+            entry = (int(timestamp_ms), int(last_update_id), path)
+            if entry not in index["snapshots"]:
+                index["snapshots"].insert(bisect_right(index["snapshots"], entry), entry)
+
+    def record_diff(self, symbol: str, timestamp_ms: int, bids=(), asks=(), final_update_id: int = 0):
+        """Дифф стакана: новые объемы уровней bids / asks на момент timestamp_ms (0 — уровень удален)."""
+        bids = np.asarray(bids, dtype=np.float64).reshape(-1, 2)
+        asks = np.asarray(asks, dtype=np.float64).reshape(-1, 2)
+        timestamp_ms = int(timestamp_ms)
+        with self._lock:
+            index = self._write_index(symbol)
+            if timestamp_ms < index["last_ts"]:
+                raise ValueError(f"{symbol}: дифф {timestamp_ms} раньше уже записанного {index['last_ts']}")
+            index["last_ts"] = timestamp_ms
+            pending = index["pending"]
+            for side, levels in ((BID, bids), (ASK, asks)):
+                for price, qty in levels:
+                    pending.append((timestamp_ms, int(final_update_id), side, price, qty))
+            if len(pending) >= self.segment_rows:
+                self._flush_symbol(symbol, index)
+
+    def record_depth_event(self, event: dict):
+        """Событие depthUpdate из потока <symbol>@depth (поля s, E, u, b, a)."""
+        self.record_diff(event["s"], event["E"], event.get("b", ()), event.get("a", ()), event.get("u", 0))
+
+    def flush(self, symbol: str = None):
+        with self._lock:
+            for name in ([symbol.upper()] if symbol else list(self._symbols)):
+                self._flush_symbol(name, self._write_index(name))
+
+    def _flush_symbol(self, symbol, index):
+        pending = index["pending"]
+        if not pending:
+            return
+        rows = list(zip(*pending))
+        parent = os.path.join(self._symbol_dir(symbol), "diffs")
+        os.makedirs(parent, exist_ok=True)
+        name = f"{pending[0][0]:013d}-{len(index['segments']):06d}"
+        # Сегмент пишется во временный каталог и появляется целиком: читатель не увидит половину колонок
+        tmp = tempfile.mkdtemp(dir=parent, prefix=".")
+        for (column, dtype), values in zip(DIFF_COLUMNS, rows):
+            np.save(os.path.join(tmp, f"{column}.npy"), np.asarray(values, dtype=dtype))
+        os.replace(tmp, os.path.join(parent, name))
+        index["pending"] = []
+        index["segment_names"].append(name)
+        index["segments"].append(self._open_segment(os.path.join(parent, name)))
+
+    # --- чтение ---
+
+    def symbols(self):
+        names = set(self._symbols)
+        if os.path.isdir(self.root):
+            names.update(name for name in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, name)))
+        return sorted(names)
+
+    def coverage(self, symbol: str):
+        """(первая, последняя) миллисекунда, на которую восстанавливается стакан, или None."""
+        self.flush(symbol)
+        with self._lock:
+            index = self._index(symbol)
+            if not index["snapshots"]:
+                return None
+            last = max([index["snapshots"][-1][0]] + [int(segment["ts"][-1]) for segment in index["segments"]])
+            return index["snapshots"][0][0], last
+
+    def book_at(self, symbol: str, timestamp_ms: int, limit: int = None):
+        """
+        Стакан на момент timestamp_ms в формате TimeMachine.get_orderbook_snapshot
+        (lastUpdateId, bids по убыванию цены, asks по возрастанию) плюс timestamp_ms.
+        None — до первого снимка символа.
+        """
+        self.flush(symbol)
+        with self._lock:
+            index = self._index(symbol)
+            position = bisect_right(index["snapshots"], (int(timestamp_ms), float("inf"), ""))
+            if position == 0:
+                return None
+            snapshot_ts, snapshot_id, path = index["snapshots"][position - 1]
+            segments = list(index["segments"])
+        diffs = _diff_rows(segments, snapshot_ts, int(timestamp_ms), snapshot_id)
+        with np.load(path) as snapshot:
+            bids = _apply(snapshot["bid_price"], snapshot["bid_qty"], diffs, BID, descending=True)
+            asks = _apply(snapshot["ask_price"], snapshot["ask_qty"], diffs, ASK, descending=False)
+        last_update_id = max(snapshot_id, int(diffs["update_id"].max())) if len(diffs["ts"]) else snapshot_id
+        return {
+            "lastUpdateId": last_update_id,
+            "timestamp_ms": int(timestamp_ms),
+            "bids": _frame(bids, "bid", limit),
+            "asks": _frame(asks, "ask", limit),
+        }
+
+    def quotes_at(self, symbol: str, timestamps) -> pd.DataFrame:
+        """
+        Лучшие bid / ask на каждый момент timestamps (мс) одним проходом по диффам:
+        стакан строится от снимка и продвигается по времени, а не заново для каждого
+        момента. Индекс результата совпадает с порядком timestamps; NaN — нет снимка.
+        """
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        best_bid = np.full(len(timestamps), np.nan)
+        best_ask = np.full(len(timestamps), np.nan)
+        self.flush(symbol)
+        with self._lock:
+            index = self._index(symbol)
+            snapshots = list(index["snapshots"])
+            segments = list(index["segments"])
+        snapshot_times = [entry[0] for entry in snapshots]
+        order = np.argsort(timestamps, kind="stable")
+        current, bids, asks, diffs, cursor = None, None, None, None, 0
+        for position in order:
+            ts = int(timestamps[position])
+            governing = bisect_right(snapshot_times, ts) - 1
+            if governing < 0:
+                continue
+            if governing != current:
+                current = governing
+                snapshot_ts, snapshot_id, path = snapshots[governing]
+                with np.load(path) as snapshot:
+                    bids = _BookSide(snapshot["bid_price"].tolist(), snapshot["bid_qty"].tolist(), max)
+                    asks = _BookSide(snapshot["ask_price"].tolist(), snapshot["ask_qty"].tolist(), min)
+                end = snapshot_times[governing + 1] - 1 if governing + 1 < len(snapshots) else int(timestamps[order[-1]])
+                diffs = _diff_rows(segments, snapshot_ts, end, snapshot_id)
+                diffs = (diffs["ts"].tolist(), diffs["side"].tolist(), diffs["price"].tolist(), diffs["qty"].tolist())
+                cursor = 0
+            times, sides, prices, quantities = diffs
+            while cursor < len(times) and times[cursor] <= ts:
+                (bids if sides[cursor] == BID else asks).set(prices[cursor], quantities[cursor])
+                cursor += 1
+            best_bid[position] = bids.best
+            best_ask[position] = asks.best
+        return pd.DataFrame({"timestamp_ms": timestamps, "best_bid": best_bid, "best_ask": best_ask})
+
+    # --- индекс на диске ---
+
+    def _symbol_dir(self, symbol):
+        return os.path.join(self.root, symbol.upper())
+
+    def _index(self, symbol):
+        """
+        Индекс символа. Пересканируется, когда изменились каталоги snapshots / diffs
+        (их пишет и другой процесс); уже открытые сегменты не перечитываются.
+        """
+        symbol = symbol.upper()
+        index = self._symbols.get(symbol)
+        signature = self._signature(symbol)
+        if index is not None and index["signature"] == signature:
+            return index
+        if index is None:
+            index = self._symbols[symbol] = {
+                "snapshots": [], "segments": [], "segment_names": [], "pending": [], "last_ts": -1, "signature": None,
+            }
+        snapshots = []
+        directory = os.path.join(self._symbol_dir(symbol), "snapshots")
+        if os.path.isdir(directory):
+            for name in os.listdir(directory):
+                if name.endswith(".npz") and not name.startswith("."):
+                    ts, update_id = name[:-4].split("-")
+                    snapshots.append((int(ts), int(update_id), os.path.join(directory, name)))
+        directory = os.path.join(self._symbol_dir(symbol), "diffs")
+        if os.path.isdir(directory):
+            # Имя сегмента <first_ts>-<seq>: лексикографический порядок совпадает с порядком записи
+            names = sorted(name for name in os.listdir(directory) if not name.startswith("."))
+            opened = dict(zip(index["segment_names"], index["segments"]))
+            index["segments"] = [opened.get(name) or self._open_segment(os.path.join(directory, name)) for name in names]
+            index["segment_names"] = names
+        index["snapshots"] = sorted(snapshots)
+        if index["segments"]:
+            index["last_ts"] = max(index["last_ts"], int(index["segments"][-1]["ts"][-1]))
+        index["signature"] = signature
+        return index
+
+    def _write_index(self, symbol):
+        """
+        Индекс для записи: загружается с диска один раз, дальше ведется самим писателем.
+        Каталоги не проверяются на каждое событие потока — это делают только чтения.
+        """
+        index = self._symbols.get(symbol.upper())
+        return index if index is not None else self._index(symbol)
+
+    def _signature(self, symbol):
+        signature = []
+        for part in ("snapshots", "diffs"):
+            try:
+                stat = os.stat(os.path.join(self._symbol_dir(symbol), part))
+                signature.append((stat.st_mtime_ns, stat.st_nlink, stat.st_ino))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    @staticmethod
+    def _open_segment(directory):
+        return {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r") for name, _ in DIFF_COLUMNS}
+
+
+class _BookSide:
+    """
+    Уровни одной стороны стакана и лучшая цена (pick — max для bid, min для ask).
+    Лучшая цена поддерживается по ходу диффов; уровни пересматриваются целиком,
+    только когда удален сам лучший уровень.
+    """
+    __slots__ = ("levels", "pick", "best")
+
+    def __init__(self, prices, quantities, pick):
+        self.levels = {price: qty for price, qty in zip(prices, quantities) if qty > 0}
+        self.pick = pick
+        self.best = pick(self.levels) if self.levels else np.nan
+
+    def set(self, price, qty):
+        if qty > 0:
+            self.levels[price] = qty
+            if np.isnan(self.best) or self.pick(self.best, price) == price:
+                self.best = price
+        elif self.levels.pop(price, None) is not None and price == self.best:
+            self.best = self.pick(self.levels) if self.levels else np.nan
+
+
+def _diff_rows(segments, after_ts, until_ts, after_update_id) -> dict:
+    """
+    Строки диффов с after_ts < ts <= until_ts по всем сегментам; события, уже учтенные
+    снимком (u <= lastUpdateId снимка), отбрасываются, как требует протокол Binance.
+    """
+    parts = {name: [] for name, _ in DIFF_COLUMNS}
+    for segment in segments:
+        times = segment["ts"]
+        if not len(times) or times[-1] <= after_ts or times[0] > until_ts:
+            continue
+        lo = np.searchsorted(times, after_ts, side="right")
+        hi = np.searchsorted(times, until_ts, side="right")
+        for name, _ in DIFF_COLUMNS:
+            parts[name].append(np.asarray(segment[name][lo:hi]))
+    rows = {name: np.concatenate(parts[name]) if parts[name] else np.empty(0, dtype=dtype) for name, dtype in DIFF_COLUMNS}
+    if after_update_id and len(rows["ts"]):
+        keep = (rows["update_id"] > after_update_id) | (rows["update_id"] == 0)
+        rows = {name: values[keep] for name, values in rows.items()}
+    return rows
+
+
+def _apply(prices, quantities, diffs, side, descending):
+    """Уровни снимка, затем диффы стороны по порядку: для цены действует последняя запись."""
+    selected = diffs["side"] == side
+    prices = np.concatenate([prices, diffs["price"][selected]])
+    quantities = np.concatenate([quantities, diffs["qty"][selected]])
+    # np.unique берет первое вхождение — по перевернутому массиву это последняя запись уровня
+    levels, first = np.unique(prices[::-1], return_index=True)
+    quantities = quantities[::-1][first]
+    alive = quantities > 0
+    levels, quantities = levels[alive], quantities[alive]
+    if descending:
+        levels, quantities = levels[::-1], quantities[::-1]
+    return levels, quantities
+
+
+def _frame(levels, side, limit):
+    prices, quantities = levels
+    if limit is not None:
+        prices, quantities = prices[:limit], quantities[:limit]
+    frame = pd.DataFrame({"price": prices, "qty": quantities})
+    frame["side"] = side
+    return frame
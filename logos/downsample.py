@@ -0,0 +1,38 @@
+# logos/downsample.py
+
+import numpy as np
+
+
+def lttb(x, y, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: индексы threshold точек ряда (x по возрастанию),
+    сохраняющих его форму на графике — пики и провалы не срезаются, как при
+    прореживании через шаг. Первая и последняя точки остаются всегда. Короткие ряды
+    (не длиннее threshold) возвращаются целиком.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # threshold - 2 корзины между первой и последней точкой; суммы — для средних соседней корзины
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    sum_x = np.concatenate(([0.0], np.cumsum(x)))
+    sum_y = np.concatenate(([0.0], np.cumsum(y)))
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    anchor = 0
+    for bucket in range(threshold - 2):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            next_lo, next_hi = hi, edges[bucket + 2]
+            mean_x = (sum_x[next_hi] - sum_x[next_lo]) / (next_hi - next_lo)
+            mean_y = (sum_y[next_hi] - sum_y[next_lo]) / (next_hi - next_lo)
+        else:
+            mean_x, mean_y = x[-1], y[-1]
+        # Удвоенная площадь треугольника (выбранная точка, кандидат, среднее следующей корзины)
+        area = np.abs((x[anchor] - mean_x) * (y[lo:hi] - y[anchor]) - (x[anchor] - x[lo:hi]) * (mean_y - y[anchor]))
+        anchor = lo + int(np.argmax(area))
+        selected[bucket + 1] = anchor
+    return selected
@@ -0,0 +1,208 @@
+# logos/evidence_store.py
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from functools import lru_cache
+
+# Модули, от которых зависит вердикт расследования: их изменение дает новую версию кэша
+PIPELINE_SOURCES = (
+    "forensic_delegator.py", "log_parser.py", "evidence_stream.py", "async_time_machine.py", "trade_history.py",
+    "depth_store.py", "tick_store.py", "reporter.py", os.path.join("solvers", "forensic_solver.py"),
+)
+CHUNK_BYTES = 1 << 20
+
+
+@lru_cache(maxsize=None)
+def pipeline_version() -> str:
+    """Хэш исходников конвейера расследования (12 hex): новый решатель или отчет — новые ключи вердиктов."""
+    digest = hashlib.sha256()
+    root = os.path.dirname(os.path.abspath(__file__))
+    for name in PIPELINE_SOURCES:
+        with open(os.path.join(root, name), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class EvidenceStore:
+    """
+    Улики по содержимому: <root>/<sha256>.csv, повторная загрузка того же файла
+    копию не создает. Вердикты: <root>/verdicts/<sha256>.<версия>.json — результат
+    ForensicDelegator.run_investigation (вердикт, данные графика, путь к PDF) для
+    версии конвейера pipeline_version().
+
+    Хранилище общее для прокси и рабочих процессов: файлы пишутся через временный
+    файл и os.replace. Время изменения файла вердикта — время последнего чтения;
+    сверх max_verdicts записей давно не читанные удаляются (0 — без предела).
+    """
+    def __init__(self, root: str, max_verdicts: int = 1000):
+        self.root = root
+        self.max_verdicts = max_verdicts
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Число вердиктов после последнего просмотра каталога плюс свои новые записи:
+        # каталог перечитывается, только когда оно выходит за max_verdicts
+        self._count = None
+
+    def evidence_path(self, digest: str) -> str:
+        return os.path.join(self.root, f"{digest}.csv")
+
+    def _verdicts_dir(self):
+        return os.path.join(self.root, "verdicts")
+
+    def _verdict_path(self, digest, version):
+        return os.path.join(self._verdicts_dir(), f"{digest}.{version or pipeline_version()}.json")
+
+    def put(self, source) -> tuple:
+        """Сохраняет улику из двоичного файлового объекта, хэшируя по ходу записи; (sha256, путь)."""
+        os.makedirs(self.root, exist_ok=True)
+        digest = hashlib.sha256()
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for chunk in iter(lambda: source.read(CHUNK_BYTES), b""):
+                    digest.update(chunk)
+                    out.write(chunk)
+            key = digest.hexdigest()
+            path = self.evidence_path(key)
+            if os.path.exists(path):
+                os.remove(tmp)
+            else:
+                os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        return key, path
+
+    def get_verdict(self, digest: str, version: str = None):
+        """Сохраненный результат расследования или None; запись без PDF на диске считается промахом."""
+        path = self._verdict_path(digest, version)
+        try:
+            with open(path) as f:
+                result = json.load(f)["result"]
+        except (OSError, ValueError, KeyError):
+            result = None
+        if result is not None and result.get("report_path") and not os.path.exists(result["report_path"]):
+            result = None
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return result
+
+    def put_verdict(self, digest: str, result: dict, version: str = None):
+        version = version or pipeline_version()
+        directory = self._verdicts_dir()
+        os.makedirs(directory, exist_ok=True)
+        entry = {"evidence_id": digest, "version": version, "created_at": time.time(), "result": result}
+        path = self._verdict_path(digest, version)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".part")
+        with os.fdopen(fd, "w") as f:
+            # Скаляры NumPy (цены из DataFrame) пишутся числами
+            json.dump(entry, f, ensure_ascii=False, default=lambda value: value.item() if hasattr(value, "item") else str(value))
+        added = not os.path.exists(path)
+        os.replace(tmp, path)
+        if not self.max_verdicts:
+            return
+        with self._lock:
+            if self._count is None:
+                self._count = len(self._entries())
+            elif added:
+                self._count += 1
+            over = self._count > self.max_verdicts
+        if over:
+            self.evict(max_entries=self.max_verdicts)
+
+    def _entries(self):
+        """(время последнего чтения, путь, sha256, версия) всех вердиктов."""
+        directory = self._verdicts_dir()
+        if not os.path.isdir(directory):
+            return []
+        entries = []
+        for name in os.listdir(directory):
+            if not name.endswith(".json"):
+                continue
+            digest, version, _ = name.split(".")
+            path = os.path.join(directory, name)
+            try:
+                entries.append((os.path.getmtime(path), path, digest, version))
+            except OSError:
+                continue
+        return entries
+
+    def evict(self, digest: str = None, max_age: float = None, max_entries: int = None, stale: bool = False) -> int:
+        """
+        Удаляет вердикты: улики digest (вместе с самой уликой), не читанные дольше
+        max_age секунд, сверх max_entries (давно не читанные первыми), прежних версий
+        конвейера (stale). Улика, на которую не ссылается ни один оставшийся вердикт,
+        удаляется вместе с последним. Возвращает число удаленных вердиктов.
+        """
+        entries = sorted(self._entries())
+        now, current = time.time(), pipeline_version()
+        doomed = set()
+        for mtime, path, key, version in entries:
+            if (digest is not None and key == digest) or (max_age is not None and now - mtime > max_age) \
+                    or (stale and version != current):
+                doomed.add(path)
+        if max_entries is not None:
+            alive = [path for _, path, _, _ in entries if path not in doomed]
+            doomed.update(alive[:max(0, len(alive) - max_entries)])
+        removed = 0
+        for path in doomed:
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+        kept = {key for _, path, key, _ in entries if path not in doomed}
+        orphans = {key for _, path, key, _ in entries if path in doomed} - kept
+        if digest is not None:
+            orphans.add(digest)
+        for key in orphans:
+            try:
+                os.remove(self.evidence_path(key))
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            self.evictions += removed
+            self._count = len(entries) - len(doomed)
+        return removed
+
+    def stats(self) -> dict:
+        entries = self._entries()
+        names = [name for name in os.listdir(self.root) if name.endswith(".csv")] if os.path.isdir(self.root) else []
+        sizes = []
+        for name in names:
+            try:
+                sizes.append(os.path.getsize(os.path.join(self.root, name)))
+            except FileNotFoundError:
+                continue  # удалена вытеснением после listdir
+        return {
+            "version": pipeline_version(),
+            "verdicts": len(entries),
+            "stale_verdicts": sum(1 for entry in entries if entry[3] != pipeline_version()),
+            "evidence_files": len(sizes),
+            "evidence_bytes": sum(sizes),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,245 @@
+# logos/evidence_stream.py
+
+import csv
+import hashlib
+import os
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+
+# Синонимы колонок бирж и ботов -> стандартное имя (timestamp: time важнее date)
+COLUMN_ALIASES = {
+    'time': 'timestamp', 'date': 'timestamp',
+    'pair': 'symbol',
+    'type': 'side',
+    'amount': 'qty', 'size': 'qty', 'quantity': 'qty',
+    'avg_price': 'price', 'exec_price': 'price',
+}
+REQUIRED_COLUMNS = ['timestamp', 'symbol', 'side', 'price', 'qty']
+# Сколько байт начала файла смотрит определение разделителя
+SAMPLE_BYTES = 64 * 1024
+# Строка длиннее — не CSV сделок (двоичный файл, файл без переводов строк)
+MAX_LINE_BYTES = 64 * 1024
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MS = timedelta(milliseconds=1)
+
+
+def standard_columns(header) -> dict:
+    """
+    Исходное имя колонки -> стандартное: нижний регистр без пробелов по краям,
+    синонимы COLUMN_ALIASES, если стандартной колонки еще нет. ValueError без
+    обязательных колонок.
+    """
+    names = {column: column.lower().strip() for column in header}
+    present = set(names.values())
+    for column, name in names.items():
+        standard = COLUMN_ALIASES.get(name)
+        if standard == 'timestamp' and name == 'date' and 'time' in present:
+            continue
+        if standard and standard not in present:
+            names[column] = standard
+            present.add(standard)
+    found = list(names.values())
+    missing = [col for col in REQUIRED_COLUMNS if col not in found]
+    if missing:
+        raise ValueError(f"Missing columns: {missing}. Found: {found}")
+    return names
+
+
+def sniff_delimiter(sample: str) -> str:
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=',;\t|').delimiter
+    except csv.Error:
+        return ','
+
+
+def parse_timestamp_ms(value):
+    """
+    Время одной сделки в мс по правилам LogParser: числа больше 10^12 — мс, больше
+    10^9 — секунды, строки ISO 8601 (без пояса — UTC). None — формат, который
+    разберет только LogParser.
+    """
+    value = str(value).strip()
+    try:
+        number = float(value)
+    except ValueError:
+        number = None
+    if number is not None:
+        if number > 10**12:
+            return int(number)
+        if number > 10**9:
+            return int(number * 1000)
+        return None
+    try:
+        moment = datetime.fromisoformat(value[:-1] + '+00:00' if value.endswith('Z') else value)
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return (moment - _EPOCH) // _MS
+
+
+def _number(value):
+    try:
+        return int(value)
+    except ValueError:
+        try:
+            return float(value)
+        except ValueError:
+            return value
+
+
+class EvidenceRejected(ValueError):
+    """Загрузка отклонена; status — код ответа HTTP: 413 — превышен предел, 400 — файл испорчен."""
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class EvidenceStream:
+    """
+    Прием файла улик по мере поступления байт: каждый кусок сразу хэшируется и
+    пишется во временный файл EvidenceStore, строки считаются без разбора. Пределы
+    max_bytes / max_rows проверяются на каждом куске, заголовок и первые
+    VALIDATE_ROWS строк разбираются, как только пришли, — испорченный файл
+    отклоняется в начале загрузки, а не после нее.
+
+    Из всего файла в памяти держится только последняя строка: сделка смерти
+    (последняя в файле) готова сразу после последнего куска, и запрос истории на
+    бирже начинается без повторного чтения файла с диска.
+    """
+    VALIDATE_ROWS = 1000
+
+    def __init__(self, store, max_bytes: int = None, max_rows: int = None):
+        self.store = store
+        self.max_bytes = max_bytes
+        self.max_rows = max_rows
+        self.bytes = 0
+        self.rows = 0
+        self.sep = None
+        self.header = None
+        self.names = None
+        self._digest = hashlib.sha256()
+        self._pending = b""
+        self._tail = b""
+        self._checked = 0
+        # feed() может идти в потоке пула, а abort() — из отмененного запроса: не одновременно
+        self._lock = threading.Lock()
+        os.makedirs(store.root, exist_ok=True)
+        fd, self._tmp = tempfile.mkstemp(dir=store.root, suffix=".part")
+        self._out = os.fdopen(fd, "wb")
+
+    def feed(self, chunk: bytes):
+        with self._lock:
+            self._feed(chunk)
+
+    def _feed(self, chunk):
+        if not chunk:
+            return
+        self.bytes += len(chunk)
+        if self.max_bytes is not None and self.bytes > self.max_bytes:
+            raise EvidenceRejected(f"Evidence file is larger than {self.max_bytes} bytes", status=413)
+        self._digest.update(chunk)
+        self._out.write(chunk)
+
+        data = self._pending + chunk
+        cut = data.rfind(b"\n")
+        # Для заголовка и определения разделителя ждем хотя бы одну строку данных
+        if self.header is None and data.count(b"\n") < 2 and len(data) < SAMPLE_BYTES:
+            cut = -1
+        if cut < 0:
+            self._pending = data
+            if len(data) > MAX_LINE_BYTES:
+                raise EvidenceRejected(f"No line break in the first {MAX_LINE_BYTES} bytes: not a CSV trade log")
+            return
+        complete, self._pending = data[:cut + 1], data[cut + 1:]
+        if self.header is None:
+            complete = self._read_header(complete)
+        self._lines(complete)
+
+    def _read_header(self, block):
+        first, rest = block.split(b"\n", 1)
+        try:
+            self.sep = sniff_delimiter(self._decode(block[:SAMPLE_BYTES].rsplit(b"\n", 1)[0]))
+            self.header = next(csv.reader([self._decode(first).rstrip("\r")], delimiter=self.sep))
+            self.names = standard_columns(self.header)
+        except ValueError as e:
+            raise EvidenceRejected(str(e))
+        return rest
+
+    def _lines(self, block):
+        self.rows += block.count(b"\n")
+        if self.max_rows is not None and self.rows > self.max_rows:
+            raise EvidenceRejected(f"Evidence file has more than {self.max_rows} rows", status=413)
+        if self._checked < self.VALIDATE_ROWS:
+            lines = block.split(b"\n", self.VALIDATE_ROWS - self._checked)[:self.VALIDATE_ROWS - self._checked]
+            for line in lines:
+                if line.strip():
+                    self._row(line, self._checked + 2)
+                    self._checked += 1
+        tail = block.rstrip(b"\r\n").rsplit(b"\n", 1)[-1]
+        if tail.strip():
+            self._tail = tail
+
+    def _row(self, line, number=None) -> dict:
+        """Строка как словарь стандартных колонок; EvidenceRejected, если она испорчена."""
+        where = f"line {number}" if number else "last line"
+        values = next(csv.reader([self._decode(line).rstrip("\r")], delimiter=self.sep))
+        if len(values) != len(self.header):
+            raise EvidenceRejected(f"{where}: {len(values)} fields, header has {len(self.header)}")
+        row = {self.names[column]: value for column, value in zip(self.header, values)}
+        for name in ('price', 'qty'):
+            try:
+                row[name] = float(row[name])
+            except ValueError:
+                raise EvidenceRejected(f"{where}: {name} is not a number: {row[name]!r}")
+        return row
+
+    @staticmethod
+    def _decode(data):
+        try:
+            return data.decode("utf-8-sig")
+        except UnicodeDecodeError as e:
+            raise EvidenceRejected(f"Evidence file is not UTF-8 text: {e}")
+
+    def close(self) -> tuple:
+        """
+        Завершает прием: (sha256, путь улики в EvidenceStore, сделка смерти). Сделка —
+        словарь как у LogParser.last_trade, либо None, если время в формате, который
+        разбирает только LogParser.
+        """
+        if self._pending.strip():
+            if self.header is None:
+                self._lines(self._read_header(self._pending + b"\n"))
+            else:
+                self._lines(self._pending + b"\n")
+            self._pending = b""
+        if self.header is None:
+            raise EvidenceRejected("Evidence file is empty")
+        if not self._tail:
+            raise EvidenceRejected("Evidence file contains no trades.")
+        row = self._row(self._tail)
+
+        self._out.close()
+        digest = self._digest.hexdigest()
+        path = self.store.evidence_path(digest)
+        if os.path.exists(path):
+            os.remove(self._tmp)
+        else:
+            os.replace(self._tmp, path)
+
+        timestamp_ms = parse_timestamp_ms(row['timestamp'])
+        if timestamp_ms is None:
+            return digest, path, None
+        trade = {name: value if name in ('symbol', 'side', 'price', 'qty') else _number(value) for name, value in row.items()}
+        trade['side'] = str(trade['side']).upper()
+        trade['timestamp_ms'] = timestamp_ms
+        return digest, path, trade
+
+    def abort(self):
+        """Удаляет недописанную улику (отклоненная или оборванная загрузка)."""
+        with self._lock:
+            if not self._out.closed:
+                self._out.close()
+            if os.path.exists(self._tmp):
+                os.remove(self._tmp)
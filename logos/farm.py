@@ -0,0 +1,260 @@
+# logos/farm.py
+
+import multiprocessing
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+# Состояние рабочего процесса фермы: клиент и делегатор с уже загруженными
+# и скомпилированными наборами правил. Создается один раз, в initializer пула.
+_worker = None
+
+
+def _init_worker(ruleset_dir):
+    global _worker
+    from logos.client import Client
+    from logos.delegator import Delegator
+    client = Client(llm_provider="offline", api_key="FARM")
+    if ruleset_dir and os.path.isdir(ruleset_dir):
+        client.load_ruleset(ruleset_dir)
+    _worker = {
+        "client": client,
+        "delegator": Delegator(client),
+        "jobs": 0,
+        "started_at": time.time(),
+    }
+
+
+def _run_job(kind, args, timeout):
+    from logos.solving import SolveBudget
+    _worker["jobs"] += 1
+    budget = SolveBudget(timeout) if timeout is not None else None
+    if kind == "run":
+        prompt, ruleset_name = args
+        return _worker["client"].run(prompt, ruleset_name=ruleset_name, budget=budget)
+    if kind == "analyze":
+        (prompt,) = args
+        return _worker["delegator"].analyze_and_translate(prompt, budget=budget)
+    if kind == "batch":
+        records, ruleset_name = args
+        return _worker["client"].run_batch(records, ruleset_name=ruleset_name)
+    raise ValueError(f"неизвестный тип задачи фермы: {kind}")
+
+
+def _ping():
+    try:
+        import resource
+        max_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    except ImportError:
+        max_rss_kb = None
+    return {
+        "pid": os.getpid(),
+        "jobs": _worker["jobs"],
+        "uptime": round(time.time() - _worker["started_at"], 3),
+        "rulesets": sorted(_worker["client"].compiled_rulesets),
+        "max_rss_kb": max_rss_kb,
+    }
+
+
+def _split_records(records, parts):
+    """Делит записи в любом формате Client.run_batch (DataFrame, колонки, список) на части."""
+    if hasattr(records, "iloc"):
+        length = len(records)
+        take = lambda start, stop: records.iloc[start:stop]
+    elif isinstance(records, dict):
+        length = len(next(iter(records.values()), ()))
+        take = lambda start, stop: {name: column[start:stop] for name, column in records.items()}
+    else:
+        records = list(records)
+        length = len(records)
+        take = lambda start, stop: records[start:stop]
+    if length == 0:
+        return [records]
+    size = -(-length // parts)
+    return [take(start, start + size) for start in range(0, length, size)]
+
+
+def _merge_batches(parts):
+    """Склеивает ответы run_batch по частям записей в один ответ, как от Client.run_batch."""
+    import numpy as np
+    for part in parts:
+        if part["result"] == "error":
+            return part
+    verdicts = np.concatenate([part["verdicts"] for part in parts])
+    violations = np.vstack([part["violations"] for part in parts])
+    denied = int((verdicts == "denied").sum())
+    missing = int((verdicts == "error").sum())
+    return {
+        "result": "approved" if all(part["result"] == "approved" for part in parts) else "denied",
+        "details": f"Проверено записей: {len(verdicts)}. Отклонено: {denied}. Без данных: {missing}.",
+        "triggered_rules": parts[0]["triggered_rules"],
+        "verdicts": verdicts,
+        "violations": violations,
+    }
+
+
+class SolverFarm:
+    """
+    Ферма решателей: пул заранее прогретых рабочих процессов. Каждый процесс один раз
+    импортирует Z3, загружает и компилирует наборы правил из ruleset_dir, а затем
+    принимает задачи проверки по IPC пула процессов. Интерфейс повторяет Client и
+    Delegator (run, run_batch, analyze_and_translate), поэтому ферму можно подставить
+    вместо них и занять все ядра.
+
+    Память ограничивается сменой поколений: после max_jobs_per_worker задач на процесс
+    в среднем пул заменяется новым, а старый дорабатывает принятые задачи и завершается.
+    """
+    def __init__(self, ruleset_dir="rulesets", workers=None, max_jobs_per_worker=None):
+        self.ruleset_dir = ruleset_dir
+        self.workers = workers or int(os.environ.get("LOGOS_FARM_WORKERS") or os.cpu_count() or 1)
+        self.max_jobs_per_worker = max_jobs_per_worker or int(os.environ.get("LOGOS_FARM_MAX_JOBS", "1000"))
+        self.generation = 0
+        self.jobs_submitted = 0
+        self.failures = 0
+        self._generation_jobs = 0
+        self._executor = None
+        # Future -> пул, в котором она выполняется: сбой старой задачи не трогает новый пул
+        self._sources = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Поднимает и прогревает рабочие процессы сейчас, а не на первом запросе."""
+        with self._lock:
+            pool = self._pool()
+        wait([pool.submit(_ping) for _ in range(self.workers)])
+        return self
+
+    def _pool(self):
+        # Вызывается под self._lock
+        if self._executor is not None and self._generation_jobs < self.workers * self.max_jobs_per_worker:
+            return self._executor
+        if self._executor is not None:
+            # Принятые старым пулом задачи доработают, затем его процессы завершатся
+            self._executor.shutdown(wait=False)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.ruleset_dir,),
+        )
+        self.generation += 1
+        self._generation_jobs = 0
+        # Прогрев: процессы стартуют и загружают правила сразу, а не под первой задачей
+        for _ in range(self.workers):
+            self._executor.submit(_ping)
+        return self._executor
+
+    def _discard_pool(self, executor):
+        # Вызывается под self._lock. Закрывает сломанный пул (управляющий поток и уцелевшие
+        # процессы), если он все еще текущий; следующий _pool() создаст новый
+        if executor is not None and self._executor is executor:
+            self._executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, kind, *args, timeout=None):
+        """Ставит задачу в ферму; возвращает concurrent.futures.Future."""
+        return self._submit(_run_job, kind, args, timeout)
+
+    def _submit(self, fn, *args):
+        with self._lock:
+            executor = self._pool()
+            try:
+                future = executor.submit(fn, *args)
+            except BrokenProcessPool:
+                # Рабочий процесс упал (например, OOM) — пересоздаем пул один раз
+                self._discard_pool(executor)
+                executor = self._pool()
+                future = executor.submit(fn, *args)
+            self._sources[future] = executor
+            self._generation_jobs += 1
+            self.jobs_submitted += 1
+            return future
+
+    def _result(self, future):
+        try:
+            return future.result(), None
+        except BrokenProcessPool as e:
+            with self._lock:
+                self.failures += 1
+                self._discard_pool(self._sources.get(future))
+            return None, f"Рабочий процесс фермы аварийно завершился: {e}"
+
+    def run(self, prompt: str, ruleset_name="compliance", timeout: float = None):
+        """Client.run в рабочем процессе; timeout — бюджет решателя в секундах."""
+        response, error = self._result(self.submit("run", prompt, ruleset_name, timeout=timeout))
+        if error is not None:
+            return {"result": "error", "details": error, "triggered_rules": []}
+        return response
+
+    def analyze_and_translate(self, prompt: str, timeout: float = None) -> str:
+        """Delegator.analyze_and_translate в рабочем процессе."""
+        response, error = self._result(self.submit("analyze", prompt, timeout=timeout))
+        if error is not None:
+            return f"{error}. [Проверка Логос: прервана.]"
+        return response
+
+    def run_batch(self, records, ruleset_name="compliance"):
+        """Client.run_batch, разделенный на части по числу рабочих процессов."""
+        futures = [self.submit("batch", part, ruleset_name) for part in _split_records(records, self.workers)]
+        parts = []
+        for future in futures:
+            part, error = self._result(future)
+            if error is not None:
+                return {"result": "error", "details": error, "triggered_rules": []}
+            parts.append(part)
+        return _merge_batches(parts)
+
+    def health(self, timeout: float = 5.0) -> dict:
+        """
+        Проверка живости: ping через очередь пула. status — "ok", если ответили все
+        ping-задачи, "degraded" — часть, "down" — ни одной.
+        """
+        with self._lock:
+            pool = self._pool()
+        start = time.perf_counter()
+        futures = [pool.submit(_ping) for _ in range(self.workers)]
+        done, _ = wait(futures, timeout=timeout)
+        pings = [future.result() for future in done if future.exception() is None]
+        status = "ok" if len(pings) == len(futures) else "degraded" if pings else "down"
+        return {
+            "status": status,
+            "workers": self.workers,
+            "generation": self.generation,
+            "jobs_submitted": self.jobs_submitted,
+            "failures": self.failures,
+            "max_jobs_per_worker": self.max_jobs_per_worker,
+            "latency_ms": round((time.perf_counter() - start) * 1000, 3),
+            "processes": {ping["pid"]: ping for ping in pings},
+            "rulesets": sorted({name for ping in pings for name in ping["rulesets"]}),
+        }
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+_default_backend = None
+_default_lock = threading.Lock()
+
+
+def default_backend(ruleset_dir="rulesets"):
+    """
+    Общий решатель для интеграций, создается при первом вызове, а не при импорте.
+    При LOGOS_SOLVER_FARM=1 — прогретая ферма, иначе локальный Client (потокобезопасен).
+    """
+    global _default_backend
+    with _default_lock:
+        if _default_backend is None:
+            if os.environ.get("LOGOS_SOLVER_FARM", "").lower() in ("1", "true", "yes"):
+                _default_backend = SolverFarm(ruleset_dir).start()
+            else:
+                from logos.client import Client
+                client = Client(llm_provider="offline", api_key="DUMMY")
+                client.load_ruleset(ruleset_dir)
+                _default_backend = client
+        return _default_backend
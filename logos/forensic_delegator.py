@@ -1,45 +1,77 @@
+from logos.depth_store import DepthStore
+from logos.evidence_store import EvidenceStore, file_digest
 from logos.log_parser import LogParser
-from logos.time_machine import TimeMachine
+from logos.async_time_machine import AsyncTimeMachine
 from logos.solvers.forensic_solver import ForensicSolver
 from logos.reporter import Reporter
+from logos.tick_store import TickStore
+import asyncio
 import sys
 import os
-import time
 import pandas as pd
 
 class ForensicDelegator:
     def __init__(self):
         self.parser = LogParser()
-        self.tm = TimeMachine()
+        # LOGOS_DEPTH_STORE — каталог DepthStore: стакан берется на момент сделки, а не текущий
+        # (пишет отдельный процесс python -m logos.depth_recorder, без него хранилище пусто);
+        # LOGOS_TICK_CACHE — каталог TickStore: скачанные aggTrades не качаются повторно;
+        # LOGOS_EVIDENCE_STORE — каталог EvidenceStore: вердикты сохраняются по хэшу улики
+        depth_root = os.environ.get("LOGOS_DEPTH_STORE")
+        tick_root = os.environ.get("LOGOS_TICK_CACHE")
+        evidence_root = os.environ.get("LOGOS_EVIDENCE_STORE")
+        self.evidence = EvidenceStore(evidence_root) if evidence_root else None
+        self.tm = AsyncTimeMachine(
+            depth_store=DepthStore(depth_root) if depth_root else None,
+            tick_store=TickStore(tick_root) if tick_root else None,
+        )
         self.solver = ForensicSolver()
+        # Делегатор сам работает в процессе ForensicJobQueue: PDF рисуется здесь же
         self.reporter = Reporter(output_dir="/data/reports")
 
-    def run_investigation(self, csv_path: str):
+    def run_investigation(self, csv_path: str, use_cache: bool = False, evidence_id: str = None, death_trade: dict = None):
+        """
+        Расследование последней сделки файла улик. Номер дела — хэш содержимого
+        файла: одна улика — одно дело и один PDF. С EvidenceStore успешный результат
+        с окончательным вердиктом (не UNKNOWN) сохраняется по хэшу, а use_cache=True
+        сначала ищет его там.
+
+        evidence_id и death_trade передает прием загрузки (EvidenceStream): хэш и
+        последняя сделка уже известны, файл не читается заново.
+        """
         if not os.path.exists(csv_path):
              return {"error": f"File not found: {csv_path}"}
 
+        evidence_id = evidence_id or file_digest(csv_path)
+        if use_cache and self.evidence is not None:
+            cached = self.evidence.get_verdict(evidence_id)
+            if cached is not None:
+                return cached
+
         print(f"[Delegator] Starting investigation on case file: {csv_path}")
         
         try:
-            evidence_df = self.parser.normalize(csv_path)
-            death_trade = self.parser.get_death_trade(evidence_df)
+            # Нужна только последняя сделка: файл читается потоком, без загрузки целиком
+            death_trade = death_trade or self.parser.last_trade(csv_path)
         except Exception as e:
             return {"error": f"Failed to parse evidence. {e}"}
+        if death_trade is None:
+            return {"error": "Evidence file contains no trades."}
 
         symbol = death_trade['symbol']
         timestamp = death_trade['timestamp_ms']
-        start_time = timestamp - 5000 
-        end_time = timestamp + 1000
-        
-        historical_trades = self.tm.get_historical_agg_trades(symbol, start_time, end_time)
-        orderbook = self.tm.get_orderbook_snapshot(symbol, limit=100)
+        # Сделки окна [-5 с, +1 с] и стакан запрашиваются одновременно
+        context = self.tm.call(self.tm.fetch_context(symbol, timestamp, before_ms=5000, after_ms=1000, depth_limit=100))
+        historical_trades, orderbook = context["trades"], context["orderbook"]
+        if context["orderbook_source"] == "snapshot":
+            print(f"[Delegator] No recorded depth for {symbol} at {timestamp}, using the current order book")
         
         if historical_trades.empty or orderbook is None:
             return {"error": "Time Machine failed to retrieve historical context."}
 
         z3_result = self.solver.verify(death_trade, historical_trades, orderbook)
         
-        case_id = f"CASE-{int(time.time())}"
+        case_id = f"CASE-{evidence_id[:16]}"
         pdf_path = self.reporter.create_verdict(case_id, death_trade, z3_result, historical_trades)
         
         # Подготовка данных для Фронтенда (JSON)
@@ -49,8 +81,9 @@ class ForensicDelegator:
         history_json['time'] = history_json['timestamp'].astype(int) / 10**9 
         history_list = history_json[['time', 'price']].to_dict(orient='records')
         
-        return {
+        result = {
             "status": "success",
+            "evidence_id": evidence_id,
             "verdict": z3_result['verdict'],
             "z3_details": z3_result.get('details', ''),
             "report_path": pdf_path,
@@ -60,3 +93,65 @@ class ForensicDelegator:
                 "price": death_trade['price']
             }
         }
+        # UNKNOWN (Z3 не ответил в срок) не сохраняется: повторное расследование может дать ответ
+        if self.evidence is not None and result["verdict"] != "UNKNOWN":
+            self.evidence.put_verdict(evidence_id, result)
+        return result
+
+    def run_batch_investigation(self, csv_path: str, budget=None):
+        """
+        Проверяет все сделки файла улик, а не только последнюю: вердикт по каждой
+        сделке (ForensicSolver.verify_batch) и сводка. Лучшие цены берутся из колонок
+        best_bid / best_ask улики, затем из DepthStore на момент каждой сделки (сделки
+        вне записанной глубины получают UNKNOWN); текущий снимок стакана запрашивается
+        по разу на символ, только если глубина символа не записана вовсе.
+        """
+        if not os.path.exists(csv_path):
+             return {"error": f"File not found: {csv_path}"}
+
+        print(f"[Delegator] Starting batch investigation on case file: {csv_path}")
+
+        try:
+            evidence_df = self.parser.normalize(csv_path)
+        except Exception as e:
+            return {"error": f"Failed to parse evidence. {e}"}
+        if evidence_df.empty:
+            return {"error": "Evidence file contains no trades."}
+
+        has_quotes = 'best_bid' in evidence_df.columns and 'best_ask' in evidence_df.columns
+        groups = []
+        for symbol, trades in evidence_df.groupby('symbol', sort=False):
+            store = self.tm.depth_store
+            if not has_quotes and store is not None and store.coverage(symbol) is not None:
+                # Лучшие цены на момент каждой сделки из записанной глубины; NaN до первого снимка.
+                # Текущий стакан таким сделкам не подставляется — он не относится к их моменту
+                quotes = store.quotes_at(symbol, trades['timestamp_ms'].to_numpy())
+                trades = trades.assign(best_bid=quotes['best_bid'].to_numpy(), best_ask=quotes['best_ask'].to_numpy())
+            groups.append((symbol, trades))
+
+        # Снимки стаканов для символов без лучших цен — одновременно
+        missing = [symbol for symbol, trades in groups if 'best_bid' not in trades.columns]
+        books = dict(zip(missing, self.tm.call(self._snapshots(missing)))) if missing else {}
+        tables = []
+        for symbol, trades in groups:
+            orderbook = books.get(symbol)
+            if symbol in books and orderbook is None:
+                return {"error": f"Time Machine failed to retrieve the order book for {symbol}."}
+            table = self.solver.verify_batch(trades, orderbook, budget)
+            table.insert(0, 'symbol', symbol)
+            table.insert(1, 'timestamp_ms', trades['timestamp_ms'])
+            tables.append(table)
+
+        verdicts = pd.concat(tables).sort_index()
+        summary = self.solver.summarize(verdicts)
+        # Итог дела: хотя бы одно доказанное нарушение; без него — неизвестно, если Z3 не ответил или не хватило котировок
+        verdict = next((v for v in ("LIQUIDITY_VOID_DETECTED", "UNKNOWN") if summary["verdicts"].get(v)), "CLEAN")
+        return {
+            "status": "success",
+            "verdict": verdict,
+            "summary": summary,
+            "trades": verdicts.rename_axis('row').reset_index().to_dict(orient='records'),
+        }
+
+    async def _snapshots(self, symbols):
+        return await asyncio.gather(*(self.tm.get_orderbook_snapshot(symbol, limit=100) for symbol in symbols))
@@ -1,13 +1,10 @@
 # logos/integrations/langchain.py
 
 from langchain.tools import tool
-from logos.client import Client
+from logos.farm import default_backend
 
-# Мы создаем один глобальный экземпляр клиента, чтобы не инициализировать его при каждом вызове.
-# В более сложных приложениях здесь может использоваться более продвинутый паттерн.
-_logos_client = Client(llm_provider="offline", api_key="DUMMY")
-# ИЗМЕНЕНИЕ: Загружаем все наборы правил из директории
-_logos_client.load_ruleset("rulesets")
+# Общий решатель (клиент или ферма решателей при LOGOS_SOLVER_FARM=1) создается
+# при первом вызове инструмента: импорт модуля не загружает наборы правил.
 
 @tool
 def logos_solver_tool(query: str) -> str:
@@ -17,4 +14,4 @@ def logos_solver_tool(query: str) -> str:
     данных по набору правил. Этот инструмент обеспечивает математически
     доказуемую точность.
     """
-    return _logos_client.run(query)
+    return default_backend().run(query)
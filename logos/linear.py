@@ -0,0 +1,239 @@
+# logos/linear.py
+
+import ast
+from fractions import Fraction
+from functools import lru_cache
+from logos.rules import exact
+from logos.solving import SAT, UNSAT
+
+# Сравнения ограничений: форма op 0, где форма = левая часть - правая часть
+_COMPARE = {
+    ast.Eq: "==",
+    ast.Lt: "<",
+    ast.LtE: "<=",
+    ast.Gt: ">",
+    ast.GtE: ">=",
+    ast.NotEq: "!=",
+}
+_HOLDS = {
+    "==": lambda value: value == 0,
+    "<": lambda value: value < 0,
+    "<=": lambda value: value <= 0,
+    ">": lambda value: value > 0,
+    ">=": lambda value: value >= 0,
+    "!=": lambda value: value != 0,
+}
+
+
+class NonLinear(Exception):
+    """Ограничение не сводится к линейной форме (произведение переменных, целочисленное деление и т. п.)."""
+
+
+class LinearConstraint:
+    """
+    Ограничение в линейной форме: sum(coeff * var) + constant op 0.
+    coeffs — кортеж пар (имя, Fraction) без нулевых коэффициентов, упорядоченный по имени.
+    """
+    __slots__ = ("coeffs", "constant", "op")
+
+    def __init__(self, coeffs, constant, op):
+        self.coeffs = coeffs
+        self.constant = constant
+        self.op = op
+
+    @property
+    def variables(self):
+        return tuple(name for name, _ in self.coeffs)
+
+    def value(self, values: dict) -> Fraction:
+        return self.constant + sum(coeff * values[name] for name, coeff in self.coeffs)
+
+    def holds(self, values: dict) -> bool:
+        return _HOLDS[self.op](self.value(values))
+
+    def substitute(self, solution: dict) -> "LinearConstraint":
+        """Ограничение после подстановки выраженных переменных: solution — {имя: (свободный член, коэффициенты)}."""
+        coeffs, constant = {}, self.constant
+        for name, coeff in self.coeffs:
+            if name not in solution:
+                coeffs[name] = coeffs.get(name, 0) + coeff
+                continue
+            base, terms = solution[name]
+            constant += coeff * base
+            for other, factor in terms:
+                coeffs[other] = coeffs.get(other, 0) + coeff * factor
+        return LinearConstraint(tuple(sorted((name, coeff) for name, coeff in coeffs.items() if coeff != 0)), constant, self.op)
+
+    def __repr__(self):
+        terms = " + ".join(f"{coeff}*{name}" for name, coeff in self.coeffs) or "0"
+        return f"LinearConstraint({terms} + {self.constant} {self.op} 0)"
+
+
+def _constant(node):
+    # Подвыражение без переменных считается арифметикой Python, как и при eval() в Z3-пути
+    value = eval(compile(ast.Expression(node), "<constraint>", "eval"), {"__builtins__": None})
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise NonLinear(f"недопустимая константа {value!r}")
+    return exact(value), isinstance(value, float)
+
+
+def _linear(node, names, use_reals):
+    """(коэффициенты, свободный член, вещественное ли выражение в семантике Z3) для узла AST."""
+    if not any(isinstance(child, ast.Name) for child in ast.walk(node)):
+        value, is_real = _constant(node)
+        return {}, value, is_real
+    if isinstance(node, ast.Name):
+        if node.id not in names:
+            raise NonLinear(f"неизвестная переменная '{node.id}'")
+        return {node.id: Fraction(1)}, Fraction(0), use_reals
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        coeffs, constant, is_real = _linear(node.operand, names, use_reals)
+        if isinstance(node.op, ast.UAdd):
+            return coeffs, constant, is_real
+        return {name: -coeff for name, coeff in coeffs.items()}, -constant, is_real
+    if isinstance(node, ast.BinOp):
+        left, left_constant, left_real = _linear(node.left, names, use_reals)
+        right, right_constant, right_real = _linear(node.right, names, use_reals)
+        is_real = left_real or right_real
+        if isinstance(node.op, (ast.Add, ast.Sub)):
+            sign = 1 if isinstance(node.op, ast.Add) else -1
+            coeffs = dict(left)
+            for name, coeff in right.items():
+                coeffs[name] = coeffs.get(name, 0) + sign * coeff
+            return coeffs, left_constant + sign * right_constant, is_real
+        if isinstance(node.op, ast.Mult):
+            if left and right:
+                raise NonLinear("произведение переменных")
+            coeffs, constant, factor = (left, left_constant, right_constant) if left else (right, right_constant, left_constant)
+            return {name: coeff * factor for name, coeff in coeffs.items()}, constant * factor, is_real
+        if isinstance(node.op, ast.Div):
+            # Int / Int в Z3 — целочисленное деление, его оставляем решателю
+            if right or not is_real or right_constant == 0:
+                raise NonLinear("деление не на ненулевую вещественную константу")
+            return {name: coeff / right_constant for name, coeff in left.items()}, left_constant / right_constant, is_real
+    raise NonLinear(f"нелинейная конструкция '{type(node).__name__}'")
+
+
+@lru_cache(maxsize=4096)
+def _parse(text, names, use_reals):
+    try:
+        tree = ast.parse(text, mode="eval").body
+    except SyntaxError as e:
+        raise NonLinear(str(e))
+    if not isinstance(tree, ast.Compare) or len(tree.ops) != 1 or type(tree.ops[0]) not in _COMPARE:
+        raise NonLinear("ожидалось одно сравнение")
+    left, left_constant, _ = _linear(tree.left, names, use_reals)
+    right, right_constant, _ = _linear(tree.comparators[0], names, use_reals)
+    coeffs = dict(left)
+    for name, coeff in right.items():
+        coeffs[name] = coeffs.get(name, 0) - coeff
+    # Переменная, сокращенная до нуля, все равно попадает в модель Z3 — такое ограничение не упрощаем
+    if any(coeff == 0 for coeff in coeffs.values()):
+        raise NonLinear("сокращающаяся переменная")
+    return LinearConstraint(tuple(sorted(coeffs.items())), left_constant - right_constant, _COMPARE[type(tree.ops[0])])
+
+
+def parse_constraint(text: str, names, use_reals: bool) -> LinearConstraint:
+    """
+    Разбирает текст ограничения ('3*x - y == 5', 'x > 0.') в линейную форму.
+    Результат кэшируется по нормализованному тексту (без пробелов). NonLinear — если
+    ограничение нелинейно или его семантика в Z3 отличается от рациональной.
+    """
+    return _parse("".join(text.split()), frozenset(names), use_reals)
+
+
+def _reduce(equations, names):
+    """
+    Точное исключение Гаусса — Жордана над Fraction. Ведущая переменная строки —
+    первая с коэффициентом ±1, иначе первая ненулевая: так целые системы чаще дают
+    выражения с целыми коэффициентами. Возвращает [(индекс ведущей переменной, строка)]
+    или False, если система несовместна; строка — коэффициенты по names и правая часть.
+    """
+    index = {name: i for i, name in enumerate(names)}
+    rows = []
+    for equation in equations:
+        row = [Fraction(0)] * (len(names) + 1)
+        for name, coeff in equation.coeffs:
+            row[index[name]] = coeff
+        row[-1] = -equation.constant
+        rows.append(row)
+
+    pivots = []
+    for i in range(len(rows)):
+        columns = [col for col in range(len(names)) if rows[i][col] != 0]
+        if not columns:
+            if rows[i][-1] != 0:
+                return False
+            continue
+        col = next((col for col in columns if abs(rows[i][col]) == 1), columns[0])
+        lead = rows[i][col]
+        rows[i] = [value / lead for value in rows[i]]
+        for r in range(len(rows)):
+            if r != i and rows[r][col] != 0:
+                factor = rows[r][col]
+                rows[r] = [value - factor * pivot_value for value, pivot_value in zip(rows[r], rows[i])]
+        pivots.append((col, i))
+    return [(col, rows[i]) for col, i in pivots]
+
+
+def _eliminate(equations, names):
+    """
+    Значения переменных, если система равенств совместна и определяет их однозначно,
+    False — если несовместна, None — если остаются свободные переменные.
+    """
+    reduced = _reduce(equations, names)
+    if reduced is False:
+        return False
+    if len(reduced) < len(names):
+        return None
+    return {names[col]: row[-1] for col, row in reduced}
+
+
+def affine_solution(equations):
+    """
+    Решение системы линейных равенств как аффинное подпространство: ведущие
+    переменные выражены через свободные, {имя: (свободный член, ((свободная
+    переменная, коэффициент), ...))}. False — система несовместна.
+    """
+    names = sorted({name for equation in equations for name in equation.variables})
+    reduced = _reduce(equations, names)
+    if reduced is False:
+        return False
+    pivots = {col for col, _ in reduced}
+    return {
+        names[col]: (row[-1], tuple((names[j], -row[j]) for j in range(len(names)) if j not in pivots and row[j] != 0))
+        for col, row in reduced
+    }
+
+
+def solve_linear(constraints, integer: bool):
+    """
+    Решает систему линейных ограничений без Z3, если равенства однозначно задают
+    все переменные: остальные ограничения и целочисленность проверяются точно.
+    Возвращает (SAT, значения), (UNSAT, None) или (None, None), если нужен решатель.
+    """
+    names = sorted({name for constraint in constraints for name in constraint.variables})
+    equations = [constraint for constraint in constraints if constraint.op == "=="]
+    values = _eliminate(equations, names)
+    if values is False:
+        return UNSAT, None
+    if values is None:
+        return None, None
+    if integer and any(value.denominator != 1 for value in values.values()):
+        return UNSAT, None
+    if all(constraint.holds(values) for constraint in constraints):
+        return SAT, values
+    return UNSAT, None
+
+
+def format_decimal(value: Fraction, precision: int = 4) -> str:
+    """Десятичная запись как у Z3 as_decimal(precision) без '?': усечение до precision знаков."""
+    sign = "-" if value < 0 else ""
+    whole, rest = divmod(abs(value.numerator), value.denominator)
+    if rest == 0:
+        return f"{sign}{whole}"
+    digits, remainder = divmod(rest * 10 ** precision, value.denominator)
+    text = str(digits).rjust(precision, "0")
+    if remainder == 0:
+        text = text.rstrip("0")
+    return f"{sign}{whole}.{text}"
@@ -1,67 +1,124 @@
+import importlib.util
+import numpy as np
 import pandas as pd
 import os
+from logos.evidence_stream import REQUIRED_COLUMNS, SAMPLE_BYTES, sniff_delimiter, standard_columns
+
+# Строк в одном куске потокового чтения
+CHUNK_ROWS = 1_000_000
+
 
 class LogParser:
-    REQUIRED_COLUMNS = ['timestamp', 'symbol', 'side', 'price', 'qty']
+    REQUIRED_COLUMNS = REQUIRED_COLUMNS
 
     def normalize(self, filepath: str) -> pd.DataFrame:
+        """
+        Читает файл улик целиком: разделитель определяется по первым SAMPLE_BYTES,
+        сам файл разбирает C-движок pandas (pyarrow, если установлен) с заданными
+        типами колонок, время переводится в timestamp_ms одним векторным проходом.
+        Для файлов больше памяти — iter_normalized().
+        """
+        sep, names, dtype = self._layout(filepath)
+        engine = 'pyarrow' if importlib.util.find_spec('pyarrow') else 'c'
+        df = self._read(filepath, sep, dtype, engine=engine)
+        return self._normalize_frame(df, names)
+
+    def iter_normalized(self, filepath: str, chunksize: int = CHUNK_ROWS):
+        """Потоковый разбор: нормализованные куски по chunksize строк, память не зависит от размера файла."""
+        sep, names, dtype = self._layout(filepath)
+        for chunk in self._read(filepath, sep, dtype, chunksize=chunksize):
+            yield self._normalize_frame(chunk, names)
+
+    def last_trade(self, filepath: str, chunksize: int = CHUNK_ROWS) -> dict:
+        """get_death_trade без загрузки всего файла: нормализуется только последний кусок."""
+        sep, names, dtype = self._layout(filepath)
+        last = None
+        for chunk in self._read(filepath, sep, dtype, chunksize=chunksize):
+            if not chunk.empty:
+                last = chunk
+        if last is None:
+            return None
+        return self.get_death_trade(self._normalize_frame(last.iloc[-1:], names))
+
+    def _layout(self, filepath):
+        """Разделитель, переименование колонок и типы для read_csv по заголовку файла."""
         if not os.path.exists(filepath):
             raise FileNotFoundError(f"Evidence file not found: {filepath}")
+        with open(filepath, newline='') as f:
+            sample = f.read(SAMPLE_BYTES)
+        # Последняя строка образца может быть обрезана
+        if len(sample) == SAMPLE_BYTES and '\n' in sample:
+            sample = sample[:sample.rindex('\n')]
+        sep = sniff_delimiter(sample)
 
         try:
-            df = pd.read_csv(filepath, sep=None, engine='python')
+            header = pd.read_csv(filepath, sep=sep, nrows=0).columns
         except Exception as e:
             raise ValueError(f"Failed to read CSV: {e}")
+        # Нормализация имен колонок и маппинг синонимов
+        names = standard_columns(header)
 
-        # Нормализация имен колонок
-        df.columns = [c.lower().strip() for c in df.columns]
-        
-        # Маппинг колонок (стандартный)
-        column_map = {}
-        if 'time' in df.columns: column_map['time'] = 'timestamp'
-        elif 'date' in df.columns: column_map['date'] = 'timestamp'
-        
-        if 'pair' in df.columns: column_map['pair'] = 'symbol'
-        if 'type' in df.columns: column_map['type'] = 'side'
-        if 'amount' in df.columns: column_map['amount'] = 'qty'
-        if 'size' in df.columns: column_map['size'] = 'qty'
-        if 'quantity' in df.columns: column_map['quantity'] = 'qty' # ДОБАВИЛИ quantity
-        
-        if 'avg_price' in df.columns: column_map['avg_price'] = 'price'
-        if 'exec_price' in df.columns: column_map['exec_price'] = 'price'
-
-        df = df.rename(columns=column_map)
-
-        # Проверка
-        missing = [col for col in self.REQUIRED_COLUMNS if col not in df.columns]
-        if missing:
-            raise ValueError(f"Missing columns: {missing}. Found: {list(df.columns)}")
-
-        # --- FIX ВРЕМЕНИ ---
-        # Если число большое (13 цифр) - это уже миллисекунды. Не трогаем.
-        # Если строка - парсим.
-        
-        def parse_time(val):
-            try:
-                # Если это число и оно больше 2000 года в секундах (946684800), но меньше 3000 года
-                val_float = float(val)
-                if val_float > 10**12: # Уже миллисекунды (13 знаков)
-                    return int(val_float)
-                if val_float > 10**9: # Секунды (10 знаков) -> переводим в мс
-                    return int(val_float * 1000)
-            except:
-                pass
-            # Иначе пробуем как строку даты
-            return int(pd.to_datetime(val).timestamp() * 1000)
-
-        df['timestamp_ms'] = df['timestamp'].apply(parse_time)
-        
+        types = {'price': np.float64, 'qty': np.float64, 'symbol': str, 'side': str}
+        dtype = {column: types[name] for column, name in names.items() if name in types}
+        return sep, names, dtype
+
+    @staticmethod
+    def _read(filepath, sep, dtype, engine='c', chunksize=None):
+        try:
+            return pd.read_csv(filepath, sep=sep, dtype=dtype, engine=engine, chunksize=chunksize)
+        except Exception as e:
+            raise ValueError(f"Failed to read CSV: {e}")
+
+    @staticmethod
+    def _normalize_frame(df, names):
+        df = df.rename(columns=names)
+        df['timestamp_ms'] = timestamps_to_ms(df['timestamp'])
         df['price'] = df['price'].astype(float)
         df['qty'] = df['qty'].astype(float)
         df['side'] = df['side'].astype(str).str.upper()
-
         return df
-    
+
     def get_death_trade(self, df: pd.DataFrame) -> dict:
         if df.empty: return None
         return df.iloc[-1].to_dict()
+
+
+def timestamps_to_ms(values: pd.Series) -> pd.Series:
+    """
+    Время сделок в мс (int64) одним проходом по колонке: числа больше 10^12 — уже
+    миллисекунды, больше 10^9 — секунды, остальное разбирается как дата
+    (ISO 8601 или другой формат; без пояса — UTC).
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return _datetimes_to_ms(values)
+    if pd.api.types.is_numeric_dtype(values) or pd.to_numeric(values.head(100), errors='coerce').notna().any():
+        numbers = pd.to_numeric(values, errors='coerce')
+    else:
+        # Колонка дат строками: полный проход to_numeric не нужен
+        numbers = pd.Series(np.nan, index=values.index)
+    is_ms = numbers > 10**12
+    if is_ms.all():
+        return np.trunc(numbers).astype(np.int64)
+    ms = pd.Series(np.zeros(len(values), dtype=np.int64), index=values.index)
+    is_s = (numbers > 10**9) & ~is_ms
+    ms[is_ms] = np.trunc(numbers[is_ms]).astype(np.int64)
+    ms[is_s] = np.trunc(numbers[is_s] * 1000).astype(np.int64)
+    rest = ~(is_ms | is_s)
+    if rest.any():
+        others = values[rest]
+        if pd.api.types.is_numeric_dtype(others):
+            # Малые числа pandas считает наносекундами от эпохи, как и раньше
+            ms[rest] = _datetimes_to_ms(pd.to_datetime(others, utc=True))
+        else:
+            try:
+                parsed = pd.to_datetime(others, utc=True, format='ISO8601')
+            except (ValueError, TypeError):
+                parsed = pd.to_datetime(others, utc=True, format='mixed')
+            ms[rest] = _datetimes_to_ms(parsed)
+    return ms
+
+
+def _datetimes_to_ms(values):
+    if values.dt.tz is None:
+        values = values.dt.tz_localize('UTC')
+    return (values - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(1, 'ms')
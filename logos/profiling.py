@@ -0,0 +1,200 @@
+# logos/profiling.py
+
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+# Структурированные строки по каждому запросу (JSON в сообщении) — уровень INFO
+logger = logging.getLogger("logos.profiling")
+
+# Профиль запроса, который сейчас обрабатывает поток
+_current = threading.local()
+
+# Счетчики Z3, которые не складываются между вызовами, а берутся по максимуму
+_PEAK_STATISTICS = ("memory", "max memory")
+
+
+class RequestProfile:
+    """
+    Профиль одного запроса: время по стадиям (мс, без вложенных стадий), число
+    и время вызовов решателя, классы задач (logos.tactics), сумма solver.statistics()
+    Z3 по всем вызовам и итог обработки (result).
+    """
+    def __init__(self, handler):
+        self.handler = handler
+        self.stages = {}
+        self.solver_calls = 0
+        self.solver_ms = 0.0
+        self.statuses = {}
+        self.classes = {}
+        self.z3 = {}
+        self.total_ms = 0.0
+        self.result = None
+        self._open = []  # [имя, время начала, время вложенных стадий]
+        # Статистика инкрементального решателя накопительная: id(solver) -> (solver, прошлые значения);
+        # ссылка на solver не дает id достаться другому решателю до конца запроса
+        self._seen = {}
+
+    def enter(self, name):
+        self._open.append([name, time.perf_counter(), 0.0])
+
+    def leave(self):
+        name, start, nested = self._open.pop()
+        elapsed = time.perf_counter() - start
+        if self._open:
+            self._open[-1][2] += elapsed
+        self.stages[name] = self.stages.get(name, 0.0) + (elapsed - nested) * 1000
+
+    def add_solver_call(self, outcome, statistics: dict, solver=None):
+        self.solver_calls += 1
+        self.solver_ms += outcome.elapsed * 1000
+        key = outcome.status if not outcome.unknown else f"{outcome.status}:{outcome.reason}"
+        self.statuses[key] = self.statuses.get(key, 0) + 1
+        problem_class = getattr(solver, "logos_class", "default")
+        self.classes[problem_class] = self.classes.get(problem_class, 0) + 1
+        previous = self._seen.get(id(solver), (None, {}))[1] if solver is not None else {}
+        if solver is not None:
+            self._seen[id(solver)] = (solver, statistics)
+        for name, value in statistics.items():
+            if name in _PEAK_STATISTICS:
+                self.z3[name] = max(self.z3.get(name, 0), value)
+            else:
+                self.z3[name] = self.z3.get(name, 0) + value - previous.get(name, 0)
+
+    def to_dict(self) -> dict:
+        return {
+            "handler": self.handler,
+            "result": self.result,
+            "total_ms": round(self.total_ms, 3),
+            "stages_ms": {name: round(value, 3) for name, value in self.stages.items()},
+            "solver_calls": self.solver_calls,
+            "solver_ms": round(self.solver_ms, 3),
+            "solver_statuses": dict(self.statuses),
+            "solver_classes": dict(self.classes),
+            "z3": {name: round(value, 3) if isinstance(value, float) else value for name, value in self.z3.items()},
+        }
+
+
+class HandlerMetrics:
+    """Агрегаты профилей запросов по обработчикам: какой класс промптов сколько стоит."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._handlers = {}
+
+    def record(self, profile: RequestProfile):
+        with self._lock:
+            stats = self._handlers.get(profile.handler)
+            if stats is None:
+                stats = self._handlers[profile.handler] = {
+                    "requests": 0, "total_ms": 0.0, "max_ms": 0.0, "stages": {},
+                    "solver_calls": 0, "solver_ms": 0.0, "solver_classes": {}, "results": {}, "z3": {},
+                }
+            stats["requests"] += 1
+            stats["total_ms"] += profile.total_ms
+            stats["max_ms"] = max(stats["max_ms"], profile.total_ms)
+            for name, elapsed in profile.stages.items():
+                stage = stats["stages"].setdefault(name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+                stage["count"] += 1
+                stage["total_ms"] += elapsed
+                stage["max_ms"] = max(stage["max_ms"], elapsed)
+            stats["solver_calls"] += profile.solver_calls
+            stats["solver_ms"] += profile.solver_ms
+            for name, count in profile.classes.items():
+                stats["solver_classes"][name] = stats["solver_classes"].get(name, 0) + count
+            stats["results"][profile.result] = stats["results"].get(profile.result, 0) + 1
+            for name, value in profile.z3.items():
+                if name in _PEAK_STATISTICS:
+                    stats["z3"][name] = max(stats["z3"].get(name, 0), value)
+                else:
+                    stats["z3"][name] = stats["z3"].get(name, 0) + value
+
+    def snapshot(self) -> dict:
+        """
+        Копия агрегатов; solver_share — доля обработчика во всем времени решателя
+        процесса, по ней видно, какой класс промптов занимает CPU решателя.
+        """
+        with self._lock:
+            solver_total = sum(stats["solver_ms"] for stats in self._handlers.values())
+            return {
+                handler: {
+                    "requests": stats["requests"],
+                    "total_ms": round(stats["total_ms"], 3),
+                    "mean_ms": round(stats["total_ms"] / stats["requests"], 3),
+                    "max_ms": round(stats["max_ms"], 3),
+                    "stages": {
+                        name: {key: round(value, 3) if isinstance(value, float) else value for key, value in stage.items()}
+                        for name, stage in stats["stages"].items()
+                    },
+                    "solver_calls": stats["solver_calls"],
+                    "solver_ms": round(stats["solver_ms"], 3),
+                    "solver_share": round(stats["solver_ms"] / solver_total, 4) if solver_total else 0.0,
+                    "solver_classes": dict(stats["solver_classes"]),
+                    "results": dict(stats["results"]),
+                    "z3": {name: round(value, 3) if isinstance(value, float) else value for name, value in stats["z3"].items()},
+                }
+                for handler, stats in self._handlers.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._handlers.clear()
+
+
+# Общий реестр метрик обработчиков процесса
+HANDLER_METRICS = HandlerMetrics()
+
+
+def current_profile():
+    return getattr(_current, "profile", None)
+
+
+@contextmanager
+def profile_request(handler: str, metrics: HandlerMetrics = HANDLER_METRICS):
+    """
+    Профилирует запрос в текущем потоке: стадии (stage) и вызовы решателя внутри
+    блока попадают в профиль, по выходе он записывается в metrics и, если логгер
+    logos.profiling включен на INFO, — одной JSON-строкой в лог.
+    """
+    parent = current_profile()
+    profile = _current.profile = RequestProfile(handler)
+    start = time.perf_counter()
+    try:
+        yield profile
+    finally:
+        profile.total_ms = (time.perf_counter() - start) * 1000
+        _current.profile = parent
+        metrics.record(profile)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(profile.to_dict(), ensure_ascii=False, sort_keys=True))
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Отмечает стадию обработчика (parse / encode / solve / format); время вложенной
+    стадии не входит во время внешней. Вне profile_request ничего не делает.
+    """
+    profile = current_profile()
+    if profile is None:
+        yield
+        return
+    profile.enter(name)
+    try:
+        yield
+    finally:
+        profile.leave()
+
+
+def record_solver_call(solver, outcome):
+    """Добавляет вызов решателя и его solver.statistics() в профиль текущего запроса, если он есть."""
+    profile = current_profile()
+    if profile is None:
+        return
+    try:
+        statistics = solver.statistics()
+        values = {key: statistics.get_key_value(key) for key in statistics.keys()}
+    except Exception:
+        values = {}
+    profile.add_solver_call(outcome, values, solver)
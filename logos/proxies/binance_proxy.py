@@ -1,30 +1,38 @@
 from fastapi import FastAPI, Request, HTTPException, WebSocket, WebSocketDisconnect, UploadFile, File
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, FileResponse
-import httpx
+from fastapi.responses import HTMLResponse, FileResponse, JSONResponse
+import asyncio
 import logging
 import json
 import os
-import shutil
 from glob import glob
 
-from logos.chaos_generators.main_generator import ChaosGenerator
-from logos.recorder import BlackBox
-from logos.forensic_delegator import ForensicDelegator
+from logos.evidence_store import EvidenceStore
+from logos.evidence_stream import EvidenceRejected, EvidenceStream
+from logos.proxies.forensic_jobs import ForensicJobQueue, QueueFull
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("MagnumCockpit")
 
 app = FastAPI(title="Magnum Control Center")
-chaos = ChaosGenerator()
-recorder = BlackBox()
-forensics = ForensicDelegator()
-CLIENT = httpx.AsyncClient()
+# Генератор хаоса (Z3), самописец (pandas) и HTTP-клиент создаются при первом обращении:
+# импорт модуля и холодный старт контейнера их не оплачивают
+_chaos = None
+_recorder = None
+CLIENT = None
 REAL_BINANCE_URL = "https://api.binance.com"
 REPORTS_DIR = "/data/reports"
 EVIDENCE_DIR = "/data/evidence"
 os.makedirs(REPORTS_DIR, exist_ok=True)
 os.makedirs(EVIDENCE_DIR, exist_ok=True)
+# Улики и вердикты по хэшу содержимого; рабочие процессы расследований пишут в тот же каталог
+os.environ.setdefault("LOGOS_EVIDENCE_STORE", EVIDENCE_DIR)
+evidence = EvidenceStore(os.environ["LOGOS_EVIDENCE_STORE"], max_verdicts=int(os.environ.get("LOGOS_EVIDENCE_CACHE_MAX", "1000")))
+# Пределы одной загрузки улик: байты и строки (0 — без предела)
+UPLOAD_MAX_BYTES = int(os.environ.get("LOGOS_UPLOAD_MAX_BYTES", str(2 * 1024 ** 3)))
+UPLOAD_MAX_ROWS = int(os.environ.get("LOGOS_UPLOAD_MAX_ROWS", "50000000"))
+# Потоковая загрузка разбирается в пуле потоков кусками не меньше этого, а не по каждому пакету сети
+STREAM_BATCH_BYTES = 1 << 20
 
 CHAOS_STATE = {"active": False, "intensity": 1.0, "mode": "MERTON"}
 
@@ -42,28 +50,172 @@ class ConnectionManager:
             except: pass
 manager = ConnectionManager()
 
+def chaos():
+    global _chaos
+    if _chaos is None:
+        from logos.chaos_generators.main_generator import ChaosGenerator
+        _chaos = ChaosGenerator()
+    return _chaos
+
+def recorder():
+    global _recorder
+    if _recorder is None:
+        from logos.recorder import BlackBox
+        _recorder = BlackBox()
+    return _recorder
+
+def http_client():
+    global CLIENT
+    if CLIENT is None:
+        import httpx
+        CLIENT = httpx.AsyncClient()
+    return CLIENT
+
+def investigation_response(result: dict) -> dict:
+    """Результат ForensicDelegator.run_investigation в формате ответа API."""
+    if "error" in result: return {"status": "error", "message": result["error"]}
+    pdf_filename = os.path.basename(result["report_path"])
+    return {
+        "status": "success", "evidence_id": result.get("evidence_id"), "verdict": result["verdict"], "z3_details": result["z3_details"],
+        "report_url": f"/api/reports/{pdf_filename}",
+        "chart_data": result["chart_data"], "death_point": result["death_point"]
+    }
+
+# Расследования идут в пуле процессов: обработчики не блокируют свечи и /ws
+forensic_jobs = ForensicJobQueue(on_result=investigation_response)
+
+async def announce_job(job):
+    await manager.broadcast({"type": "FORENSIC_JOB_DONE", "job": job.to_dict()})
+    if job.error is not None:
+        logger.error(f"Forensic job {job.job_id} failed: {job.error}")
+    elif job.kind == "chaos_report" and job.result.get("status") == "success":
+        logger.info(f"Report ready: {job.result['report_url']}")
+forensic_jobs.listeners.append(announce_job)
+
+def job_links(job) -> dict:
+    return {
+        "job_id": job.job_id,
+        "status_url": f"/api/v1/forensics/jobs/{job.job_id}",
+        "result_url": f"/api/v1/forensics/jobs/{job.job_id}/result",
+    }
+
 @app.on_event("shutdown")
-async def shutdown_event(): await CLIENT.aclose()
+async def shutdown_event():
+    forensic_jobs.shutdown()
+    if CLIENT is not None: await CLIENT.aclose()
 
 # --- API ---
 
+def evidence_stream() -> EvidenceStream:
+    return EvidenceStream(evidence, max_bytes=UPLOAD_MAX_BYTES or None, max_rows=UPLOAD_MAX_ROWS or None)
+
+def ingest_file(fileobj) -> tuple:
+    """Принятый FastAPI файл multipart через EvidenceStream: те же пределы, проверки и сделка смерти."""
+    stream = evidence_stream()
+    try:
+        for chunk in iter(lambda: fileobj.read(1 << 20), b""):
+            stream.feed(chunk)
+        return stream.close()
+    except BaseException:
+        stream.abort()
+        raise
+
+async def investigate(evidence_id: str, file_location: str, death_trade, refresh: bool) -> dict:
+    """
+    Для уже расследованной улики (та же версия конвейера) результат возвращается сразу,
+    без очереди; refresh=true — расследовать заново. Иначе задача получает хэш и сделку
+    смерти из приема загрузки и не перечитывает файл.
+    """
+    if not refresh:
+        # Чтение JSON и проверка PDF на диске — в пуле потоков
+        cached = await asyncio.get_running_loop().run_in_executor(None, evidence.get_verdict, evidence_id)
+        if cached is not None:
+            return {"status": "done", "cached": True, "evidence_id": evidence_id, "result": investigation_response(cached)}
+    payload = {"csv_path": file_location, "evidence_id": evidence_id, "death_trade": death_trade}
+    job = forensic_jobs.submit(payload, kind="upload")
+    return {"status": "queued", "cached": False, "evidence_id": evidence_id, **job_links(job)}
+
+def rejected(e: EvidenceRejected) -> JSONResponse:
+    return JSONResponse(status_code=e.status, content={"status": "error", "message": str(e)})
+
 @app.post("/api/v1/forensics/upload")
-async def upload_evidence(file: UploadFile = File(...)):
+async def upload_evidence(file: UploadFile = File(...), refresh: bool = False):
     try:
-        file_location = os.path.join(EVIDENCE_DIR, file.filename)
-        with open(file_location, "wb") as buffer: shutil.copyfileobj(file.file, buffer)
-        result = forensics.run_investigation(file_location)
-        if "error" in result: return {"status": "error", "message": result["error"]}
-        pdf_filename = os.path.basename(result["report_path"])
-        return {
-            "status": "success", "verdict": result["verdict"], "z3_details": result["z3_details"],
-            "report_url": f"/api/reports/{pdf_filename}",
-            "chart_data": result["chart_data"], "death_point": result["death_point"]
-        }
+        evidence_id, file_location, death_trade = await asyncio.get_running_loop().run_in_executor(None, ingest_file, file.file)
+        return await investigate(evidence_id, file_location, death_trade, refresh)
+    except EvidenceRejected as e:
+        return rejected(e)
+    except QueueFull as e:
+        return JSONResponse(status_code=429, content={"status": "error", "message": f"Очередь расследований заполнена: {e}"})
     except Exception as e:
         logger.error(f"Upload Failed: {e}")
         return {"status": "error", "message": str(e)}
 
+@app.post("/api/v1/forensics/upload/stream")
+async def stream_evidence(request: Request, refresh: bool = False):
+    """
+    Улика телом запроса (CSV как есть, без multipart): куски разбираются по мере
+    прихода, пределы и испорченный заголовок / первые строки отклоняют загрузку
+    сразу (413 / 400), а расследование ставится в очередь в момент прихода последнего байта.
+    """
+    stream = evidence_stream()
+    loop = asyncio.get_running_loop()
+    closed = False
+    try:
+        # Хэш, запись на диск и разбор строк — в пуле потоков: цикл событий не ждет их
+        batch, size = [], 0
+        async for chunk in request.stream():
+            batch.append(chunk)
+            size += len(chunk)
+            if size >= STREAM_BATCH_BYTES:
+                await loop.run_in_executor(None, stream.feed, b"".join(batch))
+                batch, size = [], 0
+        if batch:
+            await loop.run_in_executor(None, stream.feed, b"".join(batch))
+        evidence_id, file_location, death_trade = await loop.run_in_executor(None, stream.close)
+        closed = True
+        return await investigate(evidence_id, file_location, death_trade, refresh)
+    except EvidenceRejected as e:
+        return rejected(e)
+    except QueueFull as e:
+        return JSONResponse(status_code=429, content={"status": "error", "message": f"Очередь расследований заполнена: {e}"})
+    except Exception as e:
+        logger.error(f"Streaming Upload Failed: {e}")
+        return {"status": "error", "message": str(e)}
+    finally:
+        # Отклоненная, упавшая и оборванная клиентом (CancelledError) загрузка не оставляет .part
+        if not closed:
+            stream.abort()
+
+@app.get("/api/v1/forensics/cache")
+async def cache_stats():
+    return evidence.stats()
+
+@app.delete("/api/v1/forensics/cache")
+async def evict_cache(max_age: float = None, max_entries: int = None, stale: bool = False):
+    """Вытеснение вердиктов: не читанных дольше max_age секунд, сверх max_entries, прежних версий конвейера."""
+    return {"evicted": evidence.evict(max_age=max_age, max_entries=max_entries, stale=stale)}
+
+@app.delete("/api/v1/forensics/cache/{evidence_id}")
+async def evict_evidence(evidence_id: str):
+    if len(evidence_id) != 64 or not all(c in "0123456789abcdef" for c in evidence_id):
+        raise HTTPException(status_code=400, detail="evidence_id must be a sha256 hex digest")
+    return {"evicted": evidence.evict(digest=evidence_id)}
+
+@app.get("/api/v1/forensics/jobs/{job_id}")
+async def job_status(job_id: str):
+    job = forensic_jobs.get(job_id)
+    if job is None: raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict(with_result=False)
+
+@app.get("/api/v1/forensics/jobs/{job_id}/result")
+async def job_result(job_id: str):
+    job = forensic_jobs.get(job_id)
+    if job is None: raise HTTPException(status_code=404, detail="Job not found")
+    if not job.done: return JSONResponse(status_code=202, content=job.to_dict(with_result=False))
+    if job.error is not None: return {"status": "error", "message": job.error}
+    return job.result
+
 @app.get("/api/reports/{filename}")
 async def download_report(filename: str):
     file_path = os.path.join(REPORTS_DIR, filename)
@@ -80,19 +232,19 @@ async def list_reports():
 async def ping(): return {}
 @app.get("/api/v3/time")
 async def time():
-    r = await CLIENT.get(f"{REAL_BINANCE_URL}/api/v3/time")
+    r = await http_client().get(f"{REAL_BINANCE_URL}/api/v3/time")
     return r.json()
 
 @app.get("/api/v3/klines")
 async def get_klines(symbol: str, interval: str, limit: int = 500, crash_mode: bool = False):
     active = crash_mode or CHAOS_STATE["active"]
     try:
-        r = await CLIENT.get(f"{REAL_BINANCE_URL}/api/v3/klines", params={"symbol":symbol,"interval":interval,"limit":limit})
+        r = await http_client().get(f"{REAL_BINANCE_URL}/api/v3/klines", params={"symbol":symbol,"interval":interval,"limit":limit})
         data = r.json()
         
         if active:
             original_close = float(data[-1][4])
-            data = chaos.inject_flash_crash(data)
+            data = chaos().inject_flash_crash(data)
             new_close = float(data[-1][4])
             if abs(original_close - new_close) > 0.01:
                 drop = original_close - new_close
@@ -100,7 +252,7 @@ async def get_klines(symbol: str, interval: str, limit: int = 500, crash_mode: b
                 await manager.broadcast({"type": "SYSTEM_LOG", "text": log_msg, "level": "poison"})
 
         lc = data[-1]
-        recorder.log_kline(symbol, lc, is_poisoned=active)
+        recorder().log_kline(symbol, lc, is_poisoned=active)
         
         await manager.broadcast({
             "type": "CANDLE_UPDATE",
@@ -126,7 +278,7 @@ async def set_chaos_params(params: dict):
     new = params.get("active", prev)
     
     CHAOS_STATE.update(params)
-    recorder.log_event("SYSTEM_CONFIG_CHANGE", CHAOS_STATE)
+    recorder().log_event("SYSTEM_CONFIG_CHANGE", CHAOS_STATE)
     
     response = {"status": "ok", "state": CHAOS_STATE}
     
@@ -134,25 +286,19 @@ async def set_chaos_params(params: dict):
     if prev and not new:
         logger.info("Deactivating Chaos. Generating Report...")
         
-        # 1. Экспортируем данные текущей сессии
-        evidence_csv = recorder.export_crash_evidence()
+        # 1. Экспортируем данные текущей сессии (pandas и запись на диск — в пуле потоков)
+        evidence_csv = await asyncio.get_running_loop().run_in_executor(None, recorder().export_crash_evidence)
         
         if evidence_csv:
             try:
-                # 2. Запускаем анализ
-                verdict_data = forensics.run_investigation(evidence_csv)
-                
-                # 3. Если отчет создан, добавляем ссылку в ответ
-                if verdict_data.get("report_path"):
-                    pdf_filename = os.path.basename(verdict_data["report_path"])
-                    response["report_ready"] = True
-                    response["report_url"] = f"/api/reports/{pdf_filename}"
-                    logger.info(f"Report ready: {pdf_filename}")
+                # 2. Ставим анализ в очередь; ссылка на отчет придет по /ws (FORENSIC_JOB_DONE)
+                job = forensic_jobs.submit(evidence_csv, kind="chaos_report")
+                response["report_job"] = job_links(job)
             except Exception as e:
                 logger.error(f"Auto-Forensics Failed: {e}")
         
         # Начинаем новую запись
-        recorder.start_new_session()
+        recorder().start_new_session()
         
     return response
 
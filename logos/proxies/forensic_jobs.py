@@ -0,0 +1,167 @@
+import asyncio
+import itertools
+import multiprocessing
+import os
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Экземпляр ForensicDelegator живет в каждом рабочем процессе и создается один раз.
+# requests, Z3, matplotlib и FPDF импортируются только там, а не в процессе прокси.
+_worker_forensics = None
+
+
+def _init_worker():
+    global _worker_forensics
+    from logos.forensic_delegator import ForensicDelegator
+    _worker_forensics = ForensicDelegator()
+
+
+def run_investigation(payload):
+    """payload — путь к файлу улик или аргументы ForensicDelegator.run_investigation словарем."""
+    if isinstance(payload, dict):
+        return _worker_forensics.run_investigation(**payload)
+    return _worker_forensics.run_investigation(payload)
+
+
+class QueueFull(Exception):
+    """В очереди уже max_pending незавершенных расследований."""
+
+
+class ForensicJob:
+    def __init__(self, job_id, kind, payload):
+        self.job_id = job_id
+        self.kind = kind
+        self.payload = payload
+        self.submitted_at = time.time()
+        self.finished_at = None
+        self.future = None
+        self.executor = None
+        self.result = None
+        self.error = None
+
+    @property
+    def done(self):
+        return self.finished_at is not None
+
+    @property
+    def status(self):
+        if self.done:
+            return "failed" if self.error is not None else "done"
+        return "running" if self.future is not None and self.future.running() else "queued"
+
+    def to_dict(self, with_result=True):
+        data = {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "status": self.status,
+            "submitted_at": self.submitted_at,
+            "finished_at": self.finished_at,
+        }
+        if self.error is not None:
+            data["error"] = self.error
+        if with_result and self.result is not None:
+            data["result"] = self.result
+        return data
+
+
+class ForensicJobQueue:
+    """
+    Ограниченная очередь расследований поверх пула процессов. Обработчики FastAPI
+    только ставят задачу и сразу отвечают job_id; тяжелая работа (сеть, Z3, графики,
+    PDF) идет в рабочих процессах и не блокирует цикл событий прокси.
+
+    target(payload) выполняется в рабочем процессе, on_result(result) — в процессе
+    прокси и превращает результат в ответ API. Слушатели (корутины job -> None)
+    вызываются по завершении каждой задачи, например для рассылки по /ws.
+    """
+    def __init__(self, max_workers=None, max_pending=None, max_finished=256,
+                 target=run_investigation, initializer=_init_worker, on_result=None):
+        self.max_workers = max_workers or int(os.environ.get("LOGOS_FORENSIC_WORKERS", "2"))
+        self.max_pending = max_pending or int(os.environ.get("LOGOS_FORENSIC_QUEUE", "16"))
+        self.max_finished = max_finished
+        self.target = target
+        self.initializer = initializer
+        self.on_result = on_result
+        self.listeners = []
+        self.jobs = OrderedDict()
+        self._executor = None
+        self._watchers = set()
+        self._counter = itertools.count(1)
+
+    def _pool(self):
+        if self._executor is None:
+            # spawn: рабочие не наследуют цикл событий и потоки uvicorn
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=self.initializer,
+            )
+        return self._executor
+
+    def _discard_pool(self, executor):
+        """Закрывает сломанный пул (его управляющий поток и процессы); следующий _pool() создаст новый."""
+        if executor is not None and self._executor is executor:
+            self._executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @property
+    def pending(self):
+        return sum(1 for job in self.jobs.values() if not job.done)
+
+    def submit(self, payload, kind="upload") -> ForensicJob:
+        """Ставит расследование в очередь. Вызывается из работающего цикла событий."""
+        if self.pending >= self.max_pending:
+            raise QueueFull(f"в очереди уже {self.max_pending} расследований")
+
+        job = ForensicJob(f"JOB-{next(self._counter)}-{uuid.uuid4().hex[:8]}", kind, payload)
+        executor = self._pool()
+        try:
+            job.future = executor.submit(self.target, payload)
+        except BrokenProcessPool:
+            # Рабочий процесс упал (например, OOM) — пересоздаем пул один раз
+            self._discard_pool(executor)
+            executor = self._pool()
+            job.future = executor.submit(self.target, payload)
+        job.executor = executor
+
+        self.jobs[job.job_id] = job
+        watcher = asyncio.get_running_loop().create_task(self._watch(job))
+        self._watchers.add(watcher)
+        watcher.add_done_callback(self._watchers.discard)
+        return job
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    async def _watch(self, job):
+        try:
+            result = await asyncio.wrap_future(job.future)
+            job.result = self.on_result(result) if self.on_result else result
+        except BrokenProcessPool as e:
+            # Пул мог быть уже пересоздан другой задачей — закрываем только тот, что сломался
+            self._discard_pool(job.executor)
+            job.error = f"Рабочий процесс расследования аварийно завершился: {e}"
+        except Exception as e:
+            job.error = str(e)
+        job.executor = None
+        job.finished_at = time.time()
+        self._trim()
+        for listener in self.listeners:
+            try:
+                await listener(job)
+            except Exception:
+                pass
+
+    def _trim(self):
+        # Храним только последние max_finished завершенных задач
+        finished = [job_id for job_id, job in self.jobs.items() if job.done]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self.jobs[job_id]
+
+    def shutdown(self, wait=False):
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
@@ -1,7 +1,6 @@
 import json
 import time
 import os
-import pandas as pd
 from datetime import datetime
 
 class BlackBox:
@@ -48,6 +47,7 @@ class BlackBox:
         """
         if not self.session_data:
             return None
+        import pandas as pd
             
         df = pd.DataFrame(self.session_data)
         
@@ -1,8 +1,16 @@
 from fpdf import FPDF
-import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import io
+import numpy as np
 import pandas as pd
 import os
 from datetime import datetime
+from logos.downsample import lttb
+
+# График 10x4 дюйма при 100 dpi: 1000 пикселей по ширине — больше точек ряда не видно
+CHART_SIZE = (10, 4)
+CHART_DPI = 100
 
 class VerdictReport(FPDF):
     def header(self):
@@ -31,94 +39,139 @@ class VerdictReport(FPDF):
         self.multi_cell(0, 5, text)
         self.ln(5)
 
+def chart_series(trades_df, points: int = None):
+    """
+    Время (мс) и цены сделок для графика, прореженные LTTB до points точек (по
+    умолчанию — ширина графика в пикселях). Миллион тиков превращается в тысячу
+    точек той же формы, и в процесс рендера уходят килобайты, а не весь DataFrame.
+    """
+    points = points or CHART_SIZE[0] * CHART_DPI
+    times = trades_df['timestamp']
+    if pd.api.types.is_datetime64_any_dtype(times):
+        if getattr(times.dt, 'tz', None) is not None:
+            times = times.dt.tz_convert(None)
+        times_ms = times.to_numpy(dtype='datetime64[ms]').astype(np.int64)
+    else:
+        times_ms = times.to_numpy(dtype=np.int64)
+    prices = trades_df['price'].to_numpy(dtype=np.float64)
+    if len(times_ms) > 1 and (np.diff(times_ms) < 0).any():
+        order = np.argsort(times_ms, kind='stable')
+        times_ms, prices = times_ms[order], prices[order]
+    keep = lttb(times_ms, prices, points)
+    return times_ms[keep], prices[keep]
+
+
+def render_chart(times_ms, prices, death_trade) -> bytes:
+    """
+    PNG графика в памяти. Figure с холстом Agg вместо pyplot: у каждого графика свое
+    состояние, рендер безопасен в потоках и процессах пула.
+    """
+    fig = Figure(figsize=CHART_SIZE, dpi=CHART_DPI)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    # Вид ggplot без plt.style.use — тот меняет глобальные rcParams
+    ax.set_facecolor('#E5E5E5')
+    ax.grid(color='white', linewidth=1)
+    ax.set_axisbelow(True)
+    for spine in ax.spines.values():
+        spine.set_visible(False)
+
+    # Рисуем цену
+    ax.plot(np.asarray(times_ms, dtype=np.int64).astype('datetime64[ms]'), prices, color='#333333', linewidth=1.5, label='Price Action')
+
+    # Точка смерти: время сделки в мс из LogParser, иначе исходная колонка timestamp
+    death_time = death_trade.get('timestamp_ms', death_trade['timestamp'])
+    death_time = pd.to_datetime(death_time, unit='ms') if isinstance(death_time, (int, float, np.integer, np.floating)) else pd.to_datetime(death_time)
+    ax.scatter([death_time], [death_trade['price']], color='red', s=150, marker='x', zorder=5, label='LIQUIDATION EVENT')
+
+    ax.set_title(f"Asset: {death_trade['symbol']} | Timeframe: Tick Data", fontsize=10)
+    ax.set_ylabel("Price (USDT)")
+    ax.legend()
+    fig.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png')
+    return buffer.getvalue()
+
+
+def render_verdict(output_dir, case_id, trade_data, z3_result, series=None) -> str:
+    """
+    PDF вердикта в output_dir; series — (время мс, цены) из chart_series. График
+    вставляется в PDF из памяти (fpdf2 принимает BytesIO), без промежуточного PNG на диске.
+    """
+    pdf = VerdictReport()
+    pdf.add_page()
+
+    # --- 1. CASE OVERVIEW ---
+    pdf.section_title("1. CASE OVERVIEW")
+    pdf.set_font("Courier", size=11)
+    pdf.cell(40, 8, "CASE ID:", 0, 0); pdf.set_font("Courier", 'B', 11); pdf.cell(0, 8, case_id, 0, 1)
+    pdf.set_font("Courier", size=11)
+    pdf.cell(40, 8, "DATE:", 0, 0); pdf.cell(0, 8, datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC'), 0, 1)
+    pdf.cell(40, 8, "SYMBOL:", 0, 0); pdf.cell(0, 8, f"{trade_data['symbol']} ({trade_data['side']})", 0, 1)
+    pdf.cell(40, 8, "EXEC PRICE:", 0, 0); pdf.set_text_color(200, 0, 0); pdf.cell(0, 8, f"{trade_data['price']}", 0, 1); pdf.set_text_color(0)
+    pdf.ln(5)
+
+    # --- 2. FORENSIC VERDICT ---
+    pdf.section_title("2. FORENSIC VERDICT")
+    verdict = z3_result.get('verdict', 'UNKNOWN')
+    if verdict == 'LIQUIDITY_VOID_DETECTED':
+        status = "CRITICAL FAILURE DETECTED"
+        color = (255, 0, 0)
+    elif verdict == 'UNKNOWN':
+        status = "INCONCLUSIVE: SOLVER BUDGET EXHAUSTED"
+        color = (200, 120, 0)
+    else:
+        status = "CLEAN EXECUTION"
+        color = (0, 128, 0)
+    pdf.set_font("Courier", 'B', 16); pdf.set_text_color(*color); pdf.cell(0, 10, f"[{verdict}]", 0, 1, 'C')
+    pdf.set_font("Courier", 'B', 12); pdf.cell(0, 8, status, 0, 1, 'C'); pdf.set_text_color(0)
+    pdf.ln(5)
+
+    # --- 3. EVIDENCE (CHART) ---
+    pdf.section_title("3. VISUAL EVIDENCE")
+    if series is not None and len(series[0]):
+        pdf.image(io.BytesIO(render_chart(*series, trade_data)), x=10, w=190)
+        pdf.ln(5)
+
+    # --- 4. Z3 PROOF ---
+    pdf.section_title("4. FORMAL VERIFICATION (Z3 SOLVER)")
+    proof_text = "Magnum Ops uses Formal Verification (Microsoft Z3) to prove market conditions.\nLOGIC: Abs(ExecPrice - MarketPrice) <= Spread + Slippage"
+    pdf.body_text(proof_text)
+    pdf.set_font("Courier", '', 10); pdf.set_fill_color(240, 240, 240)
+    details = z3_result.get('details', 'No details.')
+    pdf.multi_cell(0, 5, details, border=1, fill=True)
+    pdf.ln(10)
+
+    # --- 5. CERTIFICATION ---
+    pdf.section_title("5. CERTIFICATION")
+    cert_text = "This document certifies that the trade event has been mathematically analyzed against historical tick data.\nTrustless Auditing Engine: v0.2.0"
+    pdf.body_text(cert_text)
+
+    filename = f"VERDICT_{case_id}.pdf"
+    filepath = os.path.join(output_dir, filename)
+    pdf.output(filepath)
+    print(f"[Reporter] PDF Generated: {filepath}")
+    return filepath
+
+
 class Reporter:
+    """
+    PDF вердиктов в output_dir. Пула процессов у Reporter нет: расследование и его
+    отчет выполняются в рабочем процессе ForensicJobQueue, отчеты разных дел
+    рисуются параллельно в разных процессах очереди.
+    """
     def __init__(self, output_dir="/data/reports"):
         self.output_dir = output_dir
         os.makedirs(self.output_dir, exist_ok=True)
 
     def generate_chart(self, trades_df, death_trade, filename):
-        """Рисует красивый график"""
-        plt.figure(figsize=(10, 4))
-        plt.style.use('ggplot')
-        
-        # FIX: Убеждаемся, что время - это datetime объекты
-        if not pd.api.types.is_datetime64_any_dtype(trades_df['timestamp']):
-            # Если это инты, конвертируем
-            plot_dates = pd.to_datetime(trades_df['timestamp'], unit='ms')
-        else:
-            plot_dates = trades_df['timestamp']
-            
-        # Рисуем цену
-        plt.plot(plot_dates, trades_df['price'], color='#333333', linewidth=1.5, label='Price Action')
-        
-        # Точка смерти (конвертируем её время тоже)
-        death_time = pd.to_datetime(death_trade['timestamp'], unit='ms') if isinstance(death_trade['timestamp'], (int, float)) else death_trade['timestamp']
-        death_price = death_trade['price']
-        
-        plt.scatter([death_time], [death_price], color='red', s=150, marker='x', zorder=5, label='LIQUIDATION EVENT')
-        
-        plt.title(f"Asset: {death_trade['symbol']} | Timeframe: Tick Data", fontsize=10)
-        plt.xlabel("")
-        plt.ylabel("Price (USDT)")
-        plt.legend()
-        plt.tight_layout()
-        
+        """PNG графика в output_dir. PDF он не нужен: render_verdict рисует график в памяти."""
         chart_path = os.path.join(self.output_dir, filename)
-        plt.savefig(chart_path, dpi=100)
-        plt.close()
+        with open(chart_path, 'wb') as f:
+            f.write(render_chart(*chart_series(trades_df), death_trade))
         return chart_path
 
     def create_verdict(self, case_id, trade_data, z3_result, historical_df):
-        pdf = VerdictReport()
-        pdf.add_page()
-        
-        # --- 1. CASE OVERVIEW ---
-        pdf.section_title("1. CASE OVERVIEW")
-        pdf.set_font("Courier", size=11)
-        pdf.cell(40, 8, "CASE ID:", 0, 0); pdf.set_font("Courier", 'B', 11); pdf.cell(0, 8, case_id, 0, 1)
-        pdf.set_font("Courier", size=11)
-        pdf.cell(40, 8, "DATE:", 0, 0); pdf.cell(0, 8, datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC'), 0, 1)
-        pdf.cell(40, 8, "SYMBOL:", 0, 0); pdf.cell(0, 8, f"{trade_data['symbol']} ({trade_data['side']})", 0, 1)
-        pdf.cell(40, 8, "EXEC PRICE:", 0, 0); pdf.set_text_color(200, 0, 0); pdf.cell(0, 8, f"{trade_data['price']}", 0, 1); pdf.set_text_color(0)
-        pdf.ln(5)
-
-        # --- 2. FORENSIC VERDICT ---
-        pdf.section_title("2. FORENSIC VERDICT")
-        verdict = z3_result.get('verdict', 'UNKNOWN')
-        if verdict == 'LIQUIDITY_VOID_DETECTED':
-            status = "CRITICAL FAILURE DETECTED"
-            color = (255, 0, 0)
-        else:
-            status = "CLEAN EXECUTION"
-            color = (0, 128, 0)
-        pdf.set_font("Courier", 'B', 16); pdf.set_text_color(*color); pdf.cell(0, 10, f"[{verdict}]", 0, 1, 'C')
-        pdf.set_font("Courier", 'B', 12); pdf.cell(0, 8, status, 0, 1, 'C'); pdf.set_text_color(0)
-        pdf.ln(5)
-
-        # --- 3. EVIDENCE (CHART) ---
-        pdf.section_title("3. VISUAL EVIDENCE")
-        if not historical_df.empty:
-            chart_file = f"chart_{case_id}.png"
-            chart_path = self.generate_chart(historical_df, trade_data, chart_file)
-            pdf.image(chart_path, x=10, w=190)
-            pdf.ln(5)
-
-        # --- 4. Z3 PROOF ---
-        pdf.section_title("4. FORMAL VERIFICATION (Z3 SOLVER)")
-        proof_text = "Magnum Ops uses Formal Verification (Microsoft Z3) to prove market conditions.\nLOGIC: Abs(ExecPrice - MarketPrice) <= Spread + Slippage"
-        pdf.body_text(proof_text)
-        pdf.set_font("Courier", '', 10); pdf.set_fill_color(240, 240, 240)
-        details = z3_result.get('details', 'No details.')
-        pdf.multi_cell(0, 5, details, border=1, fill=True)
-        pdf.ln(10)
-
-        # --- 5. CERTIFICATION ---
-        pdf.section_title("5. CERTIFICATION")
-        cert_text = "This document certifies that the trade event has been mathematically analyzed against historical tick data.\nTrustless Auditing Engine: v0.2.0"
-        pdf.body_text(cert_text)
-
-        filename = f"VERDICT_{case_id}.pdf"
-        filepath = os.path.join(self.output_dir, filename)
-        pdf.output(filepath)
-        print(f"[Reporter] PDF Generated: {filepath}")
-        return filepath
+        """PDF вердикта; путь к файлу. Ряд прореживается до ширины графика перед рендером."""
+        series = chart_series(historical_df) if not historical_df.empty else None
+        return render_verdict(self.output_dir, case_id, trade_data, z3_result, series)
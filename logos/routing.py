@@ -0,0 +1,98 @@
+# logos/routing.py
+
+# Итоги обработки промпта для метрик
+RESULT_STATUSES = ("verified", "unknown", "error", "skipped", "unlabeled")
+
+
+class Answer(str):
+    """
+    Ответ обработчика: обычная строка плюс итог status из RESULT_STATUSES. Обработчик,
+    вернувший простую строку, попадает в метрики как "unlabeled".
+    """
+    def __new__(cls, text, status="unlabeled"):
+        if status not in RESULT_STATUSES:
+            raise ValueError(f"неизвестный итог '{status}', ожидалось одно из {RESULT_STATUSES}")
+        answer = super().__new__(cls, text)
+        answer.status = status
+        return answer
+
+
+def result_status(answer) -> str:
+    return getattr(answer, "status", "unlabeled")
+
+
+class Route:
+    """
+    Маршрут к обработчику: промпт подходит, если содержит все слова all_of
+    и хотя бы одно из any_of (сравнение без учета регистра, по подстроке).
+    handler — имя метода обработчика (строка) или функция handler(owner, prompt, budget=...),
+    возвращающая Answer или строку.
+    """
+    __slots__ = ("name", "handler", "all_of", "any_of")
+
+    def __init__(self, name, handler, all_of=(), any_of=()):
+        if not all_of and not any_of:
+            raise ValueError(f"маршрут '{name}' должен задавать all_of или any_of")
+        self.name = name
+        self.handler = handler
+        self.all_of = tuple(keyword.lower() for keyword in all_of)
+        self.any_of = tuple(keyword.lower() for keyword in any_of)
+
+    def matches(self, prompt_lower: str) -> bool:
+        if not all(keyword in prompt_lower for keyword in self.all_of):
+            return False
+        return not self.any_of or any(keyword in prompt_lower for keyword in self.any_of)
+
+    def call(self, owner, prompt, **kwargs):
+        if isinstance(self.handler, str):
+            return getattr(owner, self.handler)(prompt, **kwargs)
+        return self.handler(owner, prompt, **kwargs)
+
+    def __repr__(self):
+        return f"Route({self.name!r}, all_of={self.all_of!r}, any_of={self.any_of!r})"
+
+
+class HandlerRegistry:
+    """Упорядоченный список маршрутов: промпт обрабатывает первый подходящий."""
+    def __init__(self, routes=()):
+        self._routes = []
+        for route in routes:
+            self.add(route)
+
+    def add(self, route: Route, before: str = None):
+        """
+        Добавляет маршрут в конец или перед маршрутом before. Маршрут с тем же
+        именем заменяется на месте.
+        """
+        names = self.names()
+        if route.name in names:
+            self._routes[names.index(route.name)] = route
+        elif before is not None:
+            if before not in names:
+                raise KeyError(f"маршрут '{before}' не зарегистрирован")
+            self._routes.insert(names.index(before), route)
+        else:
+            self._routes.append(route)
+        return route
+
+    def register(self, name, handler, all_of=(), any_of=(), before=None):
+        return self.add(Route(name, handler, all_of, any_of), before)
+
+    def unregister(self, name):
+        self._routes = [route for route in self._routes if route.name != name]
+
+    def match(self, prompt: str):
+        prompt_lower = prompt.lower()
+        return next((route for route in self._routes if route.matches(prompt_lower)), None)
+
+    def names(self):
+        return [route.name for route in self._routes]
+
+    def copy(self):
+        return HandlerRegistry(self._routes)
+
+    def __iter__(self):
+        return iter(list(self._routes))
+
+    def __len__(self):
+        return len(self._routes)
@@ -0,0 +1,630 @@
+# logos/rules.py
+
+import ast
+import hashlib
+import json
+import operator
+import threading
+from bisect import bisect_left, bisect_right
+from fractions import Fraction
+from logos import tactics
+from logos.solving import SAT, UNSAT, SolveBudget, SolveOutcome, thread_context
+
+# Допустимые операции в правилах. Всё остальное (вызовы, атрибуты, and/or)
+# отклоняется на этапе компиляции, а не во время запроса.
+_BINARY_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.Pow: operator.pow,
+}
+_UNARY_OPS = {
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+_COMPARE_OPS = {
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+}
+
+
+# Операторы сравнения в записи правил вида 'var op value' (см. Delegator._build_rule_expr)
+RULE_OPERATORS = {
+    '<': operator.lt,
+    '>': operator.gt,
+    '<=': operator.le,
+    '>=': operator.ge,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+# Те же операторы для правил, записанных задом наперед: 'число op var'
+_FLIPPED_OPERATORS = {'<': '>', '>': '<', '<=': '>=', '>=': '<=', '==': '==', '!=': '!='}
+_AST_OPERATORS = {ast.Lt: '<', ast.LtE: '<=', ast.Gt: '>', ast.GtE: '>=', ast.Eq: '==', ast.NotEq: '!='}
+
+# Предел показателя степени, который считаем напрямую, без Z3
+_MAX_EXACT_EXPONENT = 256
+
+
+class _NotGround(Exception):
+    """Выражение нельзя решить прямым вычислением (деление на ноль, 0 ** 0, иррациональная степень) — нужен Z3."""
+
+
+def exact(value) -> Fraction:
+    """
+    Точное рациональное значение числа в той же семантике, что и у Z3:
+    float переводится через str(), как это делает RealVal, а не через двоичное представление.
+    """
+    if isinstance(value, Fraction):
+        return value
+    if isinstance(value, float):
+        return Fraction(str(value))
+    if isinstance(value, int) and not isinstance(value, bool):
+        return Fraction(value)
+    raise TypeError(f"ожидалось число, получено {value!r}")
+
+
+def ruleset_digest(rules) -> str:
+    """Хэш содержимого набора правил: меняется при любом изменении текста или порядка правил."""
+    return hashlib.sha256(json.dumps(list(rules), ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _exact_div(left, right):
+    if right == 0:
+        raise _NotGround()
+    return left / right
+
+
+def _exact_pow(base, exponent):
+    if exponent.denominator != 1 or abs(exponent) > _MAX_EXACT_EXPONENT or (base == 0 and exponent <= 0):
+        raise _NotGround()
+    return base ** int(exponent)
+
+
+_EXACT_BINARY_OPS = dict(_BINARY_OPS)
+_EXACT_BINARY_OPS.update({ast.Div: _exact_div, ast.Pow: _exact_pow})
+
+
+def _has_names(node):
+    return any(isinstance(child, ast.Name) for child in ast.walk(node))
+
+
+def _compile_exact(node):
+    """
+    Компилирует AST в функцию точного вычисления над Fraction.
+    Подвыражения без переменных считаются обычной арифметикой Python, как и при
+    построении Z3-шаблона, и лишь затем переводятся в точные дроби.
+    """
+    if isinstance(node, ast.Compare):
+        compare = _COMPARE_OPS[type(node.ops[0])]
+        left, right = _compile_exact(node.left), _compile_exact(node.comparators[0])
+        return lambda values: compare(left(values), right(values))
+    if not _has_names(node):
+        value = exact(_to_z3(node, {}))
+        return lambda values: value
+    if isinstance(node, ast.Name):
+        name = node.id
+        return lambda values: values[name]
+    if isinstance(node, ast.BinOp):
+        op = _EXACT_BINARY_OPS[type(node.op)]
+        left, right = _compile_exact(node.left), _compile_exact(node.right)
+        return lambda values: op(left(values), right(values))
+    if isinstance(node, ast.UnaryOp):
+        op = _UNARY_OPS[type(node.op)]
+        operand = _compile_exact(node.operand)
+        return lambda values: op(operand(values))
+    raise ValueError(f"недопустимая конструкция '{type(node).__name__}'")
+
+
+# Относительный допуск векторной проверки: строки, где стороны сравнения ближе,
+# чем _VECTOR_TOLERANCE * (оценка ошибки округления), перепроверяются точно.
+_VECTOR_TOLERANCE = 2.0 ** -40
+
+
+def _compile_vector(node, np):
+    """
+    Компилирует AST в функцию над колонками float64 (np — модуль numpy).
+    Возвращает (значение, оценка ошибки): листья точные (оценка 0), каждая операция
+    добавляет свою погрешность округления. Этого хватает, чтобы отличить надежно
+    решенные строки от пограничных.
+    """
+    if not _has_names(node):
+        try:
+            value, error = float(_to_z3(node, {})), 0.0
+        except OverflowError:
+            # Константа вне диапазона float: все строки уходят на точную проверку
+            value, error = np.inf, np.inf
+        return lambda columns: (value, error)
+    if isinstance(node, ast.Name):
+        name = node.id
+        return lambda columns: (columns[name], 0.0)
+    if isinstance(node, ast.UnaryOp):
+        op = _UNARY_OPS[type(node.op)]
+        operand = _compile_vector(node.operand, np)
+        def unary(columns):
+            value, error = operand(columns)
+            return op(value), error
+        return unary
+    if isinstance(node, ast.BinOp):
+        left, right = _compile_vector(node.left, np), _compile_vector(node.right, np)
+        op_type = type(node.op)
+        exponent = None if _has_names(node.right) else _to_z3(node.right, {})
+        if not isinstance(exponent, (int, float)) or abs(exponent) > _MAX_EXACT_EXPONENT or not float(exponent).is_integer():
+            exponent = None
+        def binary(columns):
+            a, err_a = left(columns)
+            b, err_b = right(columns)
+            if op_type in (ast.Add, ast.Sub):
+                result = a + b if op_type is ast.Add else a - b
+                return result, err_a + err_b + np.abs(result)
+            if op_type is ast.Mult:
+                result = a * b
+                return result, err_a * np.abs(b) + np.abs(a) * err_b + np.abs(result)
+            if op_type is ast.Div:
+                result = a / b
+                return result, err_a / np.abs(b) + np.abs(a) * err_b / (b * b) + np.abs(result)
+            # Степень оцениваем только для целого постоянного показателя, иначе все строки пограничные.
+            # 0 ** 0 и 0 ** -n в Z3 не определены — такие строки тоже уходят на точную проверку.
+            if exponent is not None:
+                result = a ** float(exponent)
+                error = abs(exponent) * np.abs(a) ** float(exponent - 1) * err_a + np.abs(result)
+                if exponent <= 0:
+                    error = np.where(a == 0, np.inf, error)
+                return result, error
+            return a ** b, np.inf
+        return binary
+    raise ValueError(f"недопустимая конструкция '{type(node).__name__}'")
+
+
+def _check_node(node, names):
+    """Проверяет, что узел AST входит в поддерживаемое подмножество, и собирает имена переменных."""
+    if isinstance(node, ast.Name):
+        if node.id not in names:
+            names.append(node.id)
+        return
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise ValueError(f"недопустимая константа {node.value!r}")
+        return
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPS:
+        _check_node(node.left, names)
+        _check_node(node.right, names)
+        return
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+        _check_node(node.operand, names)
+        return
+    raise ValueError(f"недопустимая конструкция '{type(node).__name__}'")
+
+
+def _to_z3(node, variables):
+    """Строит Z3-выражение из AST теми же операторами Python, что и прежний eval()."""
+    if isinstance(node, ast.Name):
+        return variables[node.id]
+    if isinstance(node, ast.Constant):
+        return node.value
+    if isinstance(node, ast.BinOp):
+        return _BINARY_OPS[type(node.op)](_to_z3(node.left, variables), _to_z3(node.right, variables))
+    if isinstance(node, ast.UnaryOp):
+        return _UNARY_OPS[type(node.op)](_to_z3(node.operand, variables))
+    if isinstance(node, ast.Compare):
+        return _COMPARE_OPS[type(node.ops[0])](_to_z3(node.left, variables), _to_z3(node.comparators[0], variables))
+    raise ValueError(f"недопустимая конструкция '{type(node).__name__}'")
+
+
+def _threshold_form(tree):
+    """(var, op, Fraction) для правил вида 'var op число' или 'число op var', иначе None."""
+    op = _AST_OPERATORS[type(tree.ops[0])]
+    left, right = tree.left, tree.comparators[0]
+    if isinstance(left, ast.Name) and not _has_names(right):
+        return left.id, op, exact(_to_z3(right, {}))
+    if isinstance(right, ast.Name) and not _has_names(left):
+        return right.id, _FLIPPED_OPERATORS[op], exact(_to_z3(left, {}))
+    return None
+
+
+def _format_fraction(value):
+    if value.denominator == 1:
+        return str(value.numerator)
+    as_float = float(value)
+    return repr(as_float) if Fraction(repr(as_float)) == value else str(value)
+
+
+def _violated_ranges(op, thresholds, x):
+    """Срезы [start, stop) отсортированных порогов, правила которых нарушены значением x."""
+    if op == '<':
+        return ((0, bisect_right(thresholds, x)),)
+    if op == '<=':
+        return ((0, bisect_left(thresholds, x)),)
+    if op == '>':
+        return ((bisect_left(thresholds, x), len(thresholds)),)
+    if op == '>=':
+        return ((bisect_right(thresholds, x), len(thresholds)),)
+    if op == '==':
+        return ((0, bisect_left(thresholds, x)), (bisect_right(thresholds, x), len(thresholds)))
+    return ((bisect_left(thresholds, x), bisect_right(thresholds, x)),)
+
+
+class Interval:
+    """Допустимое множество значений переменной: интервал плюс выколотые точки."""
+    def __init__(self):
+        self.low = None
+        self.low_strict = False
+        self.high = None
+        self.high_strict = False
+        self.excluded = []
+        self.empty = False
+
+    def __str__(self):
+        if self.empty:
+            return "∅"
+        if self.low is not None and self.low == self.high:
+            return f"{{{_format_fraction(self.low)}}}"
+        left = "(" if self.low is None or self.low_strict else "["
+        right = ")" if self.high is None or self.high_strict else "]"
+        low = "-inf" if self.low is None else _format_fraction(self.low)
+        high = "+inf" if self.high is None else _format_fraction(self.high)
+        text = f"{left}{low}, {high}{right}"
+        if self.excluded:
+            text += " \\ {" + ", ".join(_format_fraction(point) for point in self.excluded) + "}"
+        return text
+
+
+class ThresholdIndex:
+    """
+    Индекс пороговых правил 'var op число': для каждой переменной и оператора —
+    отсортированные пороги и номера правил. Проверка записи стоит
+    O(переменных x log правил), нарушенные правила перечисляются срезами.
+    При построении находит дубликаты, поглощенные и противоречивые правила
+    и вычисляет допустимый интервал каждой переменной.
+    """
+    def __init__(self, rules):
+        # complete: все правила набора пороговые, индекс решает набор целиком
+        self.complete = True
+        entries = {}
+        for index, rule in enumerate(rules):
+            if rule.threshold is None:
+                self.complete = False
+                continue
+            var_name, op, value = rule.threshold
+            entries.setdefault(var_name, {}).setdefault(op, []).append((value, index))
+
+        # var -> op -> (отсортированные пороги, номера правил в том же порядке)
+        self.thresholds = {}
+        for var_name, by_op in entries.items():
+            self.thresholds[var_name] = {}
+            for op, pairs in by_op.items():
+                pairs.sort()
+                self.thresholds[var_name][op] = ([value for value, _ in pairs], [index for _, index in pairs])
+
+        self.redundant = []       # (правило, дубликатом какого правила является)
+        self.subsumed = []        # (правило, каким правилом поглощается)
+        self.contradictions = []  # (правило, правило) — несовместимая пара
+        self.intervals = {}
+        for var_name, by_op in entries.items():
+            self.intervals[var_name] = self._analyze(by_op)
+
+    def is_satisfied(self, values: dict) -> bool:
+        """Выполнены ли все правила индекса: по каждому оператору хватает крайнего порога."""
+        for var_name, by_op in self.thresholds.items():
+            x = values[var_name]
+            for op, (thresholds, _) in by_op.items():
+                if op == '<' and thresholds[0] <= x: return False
+                if op == '<=' and thresholds[0] < x: return False
+                if op == '>' and thresholds[-1] >= x: return False
+                if op == '>=' and thresholds[-1] > x: return False
+                if op == '==' and (thresholds[0] != x or thresholds[-1] != x): return False
+                if op == '!=':
+                    position = bisect_left(thresholds, x)
+                    if position < len(thresholds) and thresholds[position] == x: return False
+        return True
+
+    def violated(self, values: dict) -> list:
+        """Номера нарушенных правил индекса по возрастанию."""
+        result = []
+        for var_name, by_op in self.thresholds.items():
+            x = values[var_name]
+            for op, (thresholds, indices) in by_op.items():
+                for start, stop in _violated_ranges(op, thresholds, x):
+                    result.extend(indices[start:stop])
+        result.sort()
+        return result
+
+    def _analyze(self, by_op):
+        interval = Interval()
+        seen = {}
+        for op, pairs in by_op.items():
+            for value, index in pairs:
+                first = seen.setdefault((op, value), index)
+                if first != index:
+                    self.redundant.append((index, first))
+
+        # Самые сильные границы; при равных порогах строгая сильнее
+        lower = max(
+            ((value, op == '>', index) for op in ('>', '>=') for value, index in by_op.get(op, [])),
+            key=lambda item: (item[0], item[1], -item[2]), default=None,
+        )
+        upper = min(
+            ((value, op == '<', index) for op in ('<', '<=') for value, index in by_op.get(op, [])),
+            key=lambda item: (item[0], -item[1], item[2]), default=None,
+        )
+        duplicates = {index for index, _ in self.redundant}
+        if lower is not None:
+            interval.low, interval.low_strict = lower[0], lower[1]
+            for op in ('>', '>='):
+                for _, index in by_op.get(op, []):
+                    if index != lower[2] and index not in duplicates:
+                        self.subsumed.append((index, lower[2]))
+        if upper is not None:
+            interval.high, interval.high_strict = upper[0], upper[1]
+            for op in ('<', '<='):
+                for _, index in by_op.get(op, []):
+                    if index != upper[2] and index not in duplicates:
+                        self.subsumed.append((index, upper[2]))
+
+        if lower is not None and upper is not None and (
+            lower[0] > upper[0] or (lower[0] == upper[0] and (lower[1] or upper[1]))
+        ):
+            self.contradictions.append((lower[2], upper[2]))
+            interval.empty = True
+
+        equalities = by_op.get('==', [])
+        if equalities:
+            value, eq_index = equalities[0]
+            for other_value, other_index in equalities[1:]:
+                if other_value != value:
+                    self.contradictions.append((eq_index, other_index))
+                    interval.empty = True
+            for bound in (lower, upper):
+                if bound is None:
+                    continue
+                bound_value, strict, bound_index = bound
+                if bound is lower:
+                    broken = value < bound_value or (value == bound_value and strict)
+                else:
+                    broken = value > bound_value or (value == bound_value and strict)
+                if broken:
+                    self.contradictions.append((eq_index, bound_index))
+                    interval.empty = True
+                elif bound_index not in duplicates:
+                    self.subsumed = [(index, eq_index if by == bound_index else by) for index, by in self.subsumed]
+                    self.subsumed.append((bound_index, eq_index))
+            if not interval.empty:
+                interval.low = interval.high = value
+                interval.low_strict = interval.high_strict = False
+
+        for value, ne_index in by_op.get('!=', []):
+            if ne_index in duplicates:
+                continue
+            if equalities and not interval.empty:
+                if value == interval.low:
+                    self.contradictions.append((equalities[0][1], ne_index))
+                    interval.empty = True
+                else:
+                    self.subsumed.append((ne_index, equalities[0][1]))
+            elif lower is not None and (value < lower[0] or (value == lower[0] and lower[1])):
+                self.subsumed.append((ne_index, lower[2]))
+            elif upper is not None and (value > upper[0] or (value == upper[0] and upper[1])):
+                self.subsumed.append((ne_index, upper[2]))
+            elif lower is not None and upper is not None and lower[0] == upper[0] == value:
+                self.contradictions.append((ne_index, lower[2]))
+                interval.empty = True
+            elif value not in interval.excluded:
+                interval.excluded.append(value)
+        interval.excluded.sort()
+        return interval
+
+
+class CompiledRule:
+    """
+    Одно правило, разобранное один раз при загрузке набора.
+    Если правило не компилируется, ошибка сохраняется и отдается при проверке,
+    как раньше это делал eval() внутри Client.run.
+    """
+    def __init__(self, source: str):
+        self.source = source
+        self.tree = None
+        self.variables = ()
+        self.error = None
+        self.holds = None
+        self.vector = None
+        # (var, op, порог) для пороговых правил 'var op число', иначе None
+        self.threshold = None
+        try:
+            tree = ast.parse(source.strip(), mode="eval").body
+            if not isinstance(tree, ast.Compare) or len(tree.ops) != 1 or type(tree.ops[0]) not in _COMPARE_OPS:
+                raise ValueError("правило должно быть одним сравнением")
+            names = []
+            _check_node(tree.left, names)
+            _check_node(tree.comparators[0], names)
+            # holds(values) -> bool: точная проверка правила, когда все переменные заданы числами
+            self.holds = _compile_exact(tree)
+            self.threshold = _threshold_form(tree)
+            self.tree = tree
+            self.variables = tuple(names)
+        except (SyntaxError, ValueError, TypeError, ArithmeticError) as e:
+            self.error = e
+
+    def to_z3(self, variables: dict):
+        """Z3-выражение правила над variables (имя -> терм Z3); ошибка компиляции поднимается здесь."""
+        if self.error is not None:
+            raise self.error
+        return _to_z3(self.tree, variables)
+
+    def holds_columns(self, columns: dict):
+        """
+        Векторная проверка правила над колонками float64.
+        Возвращает (holds, undecided): маску выполнения и маску строк, которые нужно перепроверить точно.
+        """
+        import numpy as np
+        if self.vector is None:
+            # Векторная форма собирается при первой колоночной проверке: NumPy не нужен,
+            # пока правила проверяются по одному
+            self.vector = (_COMPARE_OPS[type(self.tree.ops[0])], _compile_vector(self.tree.left, np),
+                           _compile_vector(self.tree.comparators[0], np))
+        compare, left, right = self.vector
+        with np.errstate(all="ignore"):
+            a, err_a = left(columns)
+            b, err_b = right(columns)
+            holds = compare(a, b)
+            error = err_a + err_b
+            # Неконечная оценка ошибки означает inf/nan в промежуточном значении (деление на ноль)
+            undecided = ~np.isfinite(a) | ~np.isfinite(b) | ~np.isfinite(error) | (np.abs(a - b) <= _VECTOR_TOLERANCE * error)
+        return holds, undecided
+
+
+class CompiledRuleset:
+    """
+    Скомпилированный набор правил: AST каждого правила плюс Z3-шаблон.
+    Переменные-заполнители и сами правила добавляются в решатель один раз
+    на поток (у каждого потока свой z3.Context), запрос только привязывает
+    значения (push / x == v / check / pop). Набор можно делить между потоками.
+    Если все переменные заданы числами, набор решается точной арифметикой
+    без обращения к Z3.
+    """
+    def __init__(self, name: str, rules: list):
+        self.name = name
+        self.rules = [CompiledRule(rule_str) for rule_str in rules]
+        self.sources = [rule.source for rule in self.rules]
+        # Версия набора для ключей кэша вердиктов
+        self.digest = ruleset_digest(self.sources)
+        # Имена переменных в порядке появления в правилах
+        self.variables = tuple(dict.fromkeys(name for rule in self.rules for name in rule.variables))
+        self.has_errors = any(rule.error is not None for rule in self.rules)
+        self._rule_solvers = {}
+        self.index = ThresholdIndex(self.rules) if not self.has_errors else None
+        # Z3-шаблон строится лениво и отдельно для каждого потока в его z3.Context
+        self._threads = threading.local()
+
+    def _z3_state(self):
+        """(переменные, решатель с правилами) текущего потока; правила добавляются один раз на поток."""
+        state = getattr(self._threads, "state", None)
+        if state is None:
+            from z3 import Real
+            ctx = thread_context()
+            variables = {name: Real(name, ctx) for name in self.variables}
+            # Класс задачи (обычно линейная вещественная) определяется по правилам без привязок
+            solver = tactics.make_solver(ctx, [rule.to_z3(variables) for rule in self.rules] if not self.has_errors else ())
+            state = self._threads.state = (variables, solver)
+        return state
+
+    def bind(self, bindings: dict):
+        """
+        Возвращает (triggered_rules, error): список правил, которые удалось применить,
+        и первую ошибку (некомпилируемое правило или непривязанная переменная).
+        """
+        if not self.has_errors and all(name in bindings for name in self.variables):
+            return list(self.sources), None
+
+        triggered_rules = []
+        for rule in self.rules:
+            if rule.error is not None:
+                return triggered_rules, rule.error
+            for var_name in rule.variables:
+                if var_name not in bindings:
+                    return triggered_rules, NameError(f"name '{var_name}' is not defined")
+            triggered_rules.append(rule.source)
+        return triggered_rules, None
+
+    def check(self, bindings: dict, fast_path: bool = True) -> bool:
+        """Проверяет выполнимость набора при заданных значениях переменных (unknown — не выполним)."""
+        return self.solve(bindings, fast_path=fast_path).status == SAT
+
+    def solve(self, bindings: dict, budget: SolveBudget = None, fast_path: bool = True, handler: str = "ruleset") -> SolveOutcome:
+        """
+        Как check(), но с бюджетом решателя и структурным результатом: sat / unsat,
+        либо unknown с причиной (timeout / cancelled / rlimit), если Z3 не уложился.
+        """
+        if fast_path and not self.has_errors:
+            try:
+                values = {name: exact(bindings[name]) for name in self.variables}
+                if self.index.complete:
+                    holds = self.index.is_satisfied(values)
+                else:
+                    holds = all(rule.holds(values) for rule in self.rules)
+                return SolveOutcome(SAT if holds else UNSAT, handler)
+            except _NotGround:
+                pass
+        return self._solve_z3(bindings, budget, handler)
+
+    def violated_rules(self, bindings: dict) -> list:
+        """Правила, нарушенные заданными значениями (все переменные должны быть заданы)."""
+        values = {name: exact(bindings[name]) for name in self.variables}
+        if self.index.complete:
+            return [self.sources[index] for index in self.index.violated(values)]
+        violated = []
+        for index, rule in enumerate(self.rules):
+            try:
+                holds = rule.holds(values)
+            except _NotGround:
+                holds = self._rule_solver(index)._check_z3(bindings)
+            if not holds:
+                violated.append(rule.source)
+        return violated
+
+    def problems(self) -> list:
+        """Находки анализа при загрузке: противоречия, дубликаты и поглощенные правила."""
+        if self.index is None:
+            return []
+        lines = [f"противоречие: '{self.sources[a]}' и '{self.sources[b]}'" for a, b in self.index.contradictions]
+        lines += [f"дубликат: '{self.sources[a]}' (правило {a + 1}) повторяет правило {b + 1}" for a, b in self.index.redundant]
+        lines += [f"избыточно: '{self.sources[a]}' следует из '{self.sources[b]}'" for a, b in self.index.subsumed]
+        return lines
+
+    def check_columns(self, columns: dict):
+        """
+        Векторная проверка набора над колонками float64 одинаковой длины.
+        Возвращает (approved, violations, missing): вердикт по записям, матрицу нарушений
+        записи x правила и маску записей, где не хватает значений (NaN).
+        Пограничные строки решаются точной арифметикой, а неразрешимые ею (деление на ноль) — Z3.
+        """
+        import numpy as np
+        n = len(next(iter(columns.values()))) if columns else 0
+        missing = np.zeros(n, dtype=bool)
+        for name in self.variables:
+            missing |= np.isnan(columns[name])
+
+        violations = np.zeros((n, len(self.rules)), dtype=bool)
+        needs_z3 = np.zeros(n, dtype=bool)
+        for i, rule in enumerate(self.rules):
+            holds, undecided = rule.holds_columns(columns)
+            violations[:, i] = ~np.broadcast_to(holds, (n,))
+            for row in np.flatnonzero(np.broadcast_to(undecided, (n,)) & ~missing):
+                bindings = {name: float(columns[name][row]) for name in self.variables}
+                try:
+                    violations[row, i] = not rule.holds({name: exact(value) for name, value in bindings.items()})
+                except _NotGround:
+                    violations[row, i] = not self._rule_solver(i)._check_z3(bindings)
+                    needs_z3[row] = True
+        violations[missing] = False
+
+        approved = ~violations.any(axis=1) & ~missing
+        # Для строк, где понадобился Z3, вердикт по всему набору решает общий решатель
+        for row in np.flatnonzero(needs_z3):
+            approved[row] = self._check_z3({name: float(columns[name][row]) for name in self.variables})
+        return approved, violations, missing
+
+    def _rule_solver(self, index):
+        ruleset = self._rule_solvers.get(index)
+        if ruleset is None:
+            # Гонка потоков здесь безвредна: оба набора равнозначны, остается один
+            ruleset = self._rule_solvers.setdefault(index, CompiledRuleset(self.name, [self.sources[index]]))
+        return ruleset
+
+    def _check_z3(self, bindings: dict) -> bool:
+        return self._solve_z3(bindings).status == SAT
+
+    def _solve_z3(self, bindings: dict, budget: SolveBudget = None, handler: str = "ruleset") -> SolveOutcome:
+        budget = budget or SolveBudget()
+        variables, solver = self._z3_state()
+        solver.push()
+        try:
+            for name, var in variables.items():
+                solver.add(var == bindings[name])
+            return tactics.check(budget, solver, handler)[0]
+        finally:
+            solver.pop()
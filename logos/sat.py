@@ -0,0 +1,148 @@
+# logos/sat.py
+
+# Литерал — ненулевое целое: +i (переменная i истинна) или -i (ложна), i >= 1.
+
+
+def compile_cnf(implications, facts):
+    """
+    Переводит разобранные импликации и факты (литералы (имя, истинность) из PromptScan)
+    в КНФ. Возвращает (имена по алфавиту, клаузы); переменная i соответствует names[i - 1].
+    'Если A, то B' дает клаузу (не A или B), факт — единичную клаузу.
+    """
+    for cond, conclusion in implications:
+        if cond is None or conclusion is None:
+            raise ValueError("в части импликации не найдено имя")
+    names = sorted({name for pair in implications for name, _ in pair} | {name for name, _ in facts})
+    index = {name: i for i, name in enumerate(names, 1)}
+
+    def literal(item):
+        name, positive = item
+        return index[name] if positive else -index[name]
+
+    clauses = [(-literal(cond), literal(conclusion)) for cond, conclusion in implications]
+    clauses.extend((literal(fact),) for fact in facts)
+    return names, clauses
+
+
+class SatSolver:
+    """
+    Небольшой DPLL-решатель в процессе: распространение единичных клауз по двум
+    наблюдаемым литералам и хронологический возврат. Ветвление начинается со
+    значения False, так что первая модель детерминирована. Для КНФ из импликаций
+    и фактов (2-КНФ) распространение полно, и решение идет почти без возвратов.
+    Клаузы можно добавлять между вызовами solve() — так models() блокирует найденные модели.
+    """
+    def __init__(self, num_vars, clauses=()):
+        self.num_vars = num_vars
+        self.clauses = []
+        self.units = []
+        self.watches = {}
+        self.inconsistent = False
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def add_clause(self, clause):
+        clause = list(dict.fromkeys(clause))
+        if any(-lit in clause for lit in clause):
+            return  # тавтология
+        if not clause:
+            self.inconsistent = True
+        elif len(clause) == 1:
+            self.units.append(clause[0])
+        else:
+            index = len(self.clauses)
+            self.clauses.append(clause)
+            self.watches.setdefault(clause[0], []).append(index)
+            self.watches.setdefault(clause[1], []).append(index)
+
+    def solve(self):
+        """Модель как список значений (индекс = переменная, [0] не используется) или None, если КНФ невыполнима."""
+        if self.inconsistent:
+            return None
+        values = [0] * (self.num_vars + 1)  # 1 — истина, -1 — ложь, 0 — не задана
+        trail = []
+
+        def value_of(lit):
+            value = values[abs(lit)]
+            return value if lit > 0 else -value
+
+        def assign(lit):
+            values[abs(lit)] = 1 if lit > 0 else -1
+            trail.append(lit)
+
+        def propagate(start):
+            # Обходит назначения trail[start:]; False — если какая-то клауза стала ложной
+            i = start
+            while i < len(trail):
+                false_lit = -trail[i]
+                i += 1
+                watchers = self.watches.get(false_lit, [])
+                j = 0
+                while j < len(watchers):
+                    clause = self.clauses[watchers[j]]
+                    if clause[0] == false_lit:
+                        clause[0], clause[1] = clause[1], clause[0]
+                    if value_of(clause[0]) == 1:
+                        j += 1
+                        continue
+                    for k in range(2, len(clause)):
+                        if value_of(clause[k]) != -1:
+                            # Новый наблюдаемый литерал вместо ложного
+                            clause[1], clause[k] = clause[k], clause[1]
+                            self.watches.setdefault(clause[1], []).append(watchers[j])
+                            watchers[j] = watchers[-1]
+                            watchers.pop()
+                            break
+                    else:
+                        if value_of(clause[0]) == -1:
+                            return False
+                        assign(clause[0])
+                        j += 1
+            return True
+
+        for lit in self.units:
+            if value_of(lit) == -1:
+                return None
+            if value_of(lit) == 0:
+                assign(lit)
+        if not propagate(0):
+            return None
+
+        decisions = []  # (длина trail до решения, литерал решения, пробована ли вторая ветвь)
+        var = 1
+        while True:
+            while var <= self.num_vars and values[var] != 0:
+                var += 1
+            if var > self.num_vars:
+                return values
+            decisions.append((len(trail), -var, False))
+            assign(-var)
+            consistent = propagate(len(trail) - 1)
+            while not consistent:
+                while decisions and decisions[-1][2]:
+                    decisions.pop()
+                if not decisions:
+                    return None
+                mark, lit, _ = decisions.pop()
+                for undone in trail[mark:]:
+                    values[abs(undone)] = 0
+                del trail[mark:]
+                # Переменные с меньшими номерами были заданы до этого решения и остались заданы
+                var = abs(lit)
+                decisions.append((mark, -lit, True))
+                assign(-lit)
+                consistent = propagate(mark)
+
+    def models(self, limit=None):
+        """
+        Перечисляет модели (списки значений, как у solve()), каждую найденную
+        исключая блокирующей клаузой. Не более limit моделей, если он задан.
+        """
+        found = 0
+        while limit is None or found < limit:
+            values = self.solve()
+            if values is None:
+                return
+            yield values
+            found += 1
+            self.add_clause([-var if values[var] > 0 else var for var in range(1, self.num_vars + 1)])
@@ -0,0 +1,234 @@
+# logos/scanner.py
+
+import re
+
+# Единый предкомпилированный сканер промптов для всех диалектов Delegator и Client.
+# Один проход finditer по тексту дает поток токенов (пробелы пропускает сам поиск),
+# а переменные, числа, операторы сравнения и имя набора правил собираются попутно.
+_TOKEN_PATTERN = re.compile(r"""
+    (?P<ruleset>по\s+набору\s+правил\s+'(?P<ruleset_name>\w+)')
+  | (?P<number>\.?\d[\d.]*)
+  | (?P<word>[^\W\d]\w*)
+  | (?P<op>==|!=|<=|>=|<|>|=|:)
+  | (?P<arith>[-+*/()])
+  | (?P<punct>[,.;!?])
+""", re.VERBOSE)
+
+_ASCII_WORD = re.compile(r"[a-zA-Z0-9]+")
+_ASCII_LETTERS = re.compile(r"[a-zA-Z]+")
+_PERSON_NAME = re.compile(r"[А-ЯЁ][а-яё]+")
+_DECIMAL = re.compile(r"\d\.\d")
+
+COMPARISON_OPERATORS = frozenset(['==', '!=', '<=', '>=', '<', '>'])
+_BOUND_OPERATORS = frozenset(['<', '>', '<=', '>='])
+# Служебные слова, которые не могут быть именами в логических задачах
+_LOGIC_KEYWORDS = frozenset(['если', 'то', 'не'])
+
+# Поля токена: токены — обычные кортежи (kind, text, start, end), без namedtuple,
+# чтобы не платить за конструктор на каждый токен
+KIND, TEXT, START, END = range(4)
+
+
+class PromptScan:
+    """
+    Результат одного прохода сканера по промпту.
+
+    tokens       — кортежи (kind, text, start, end); kind: number / word / op / arith / punct / ruleset
+    numbers      — тексты всех чисел
+    comparisons  — операторы сравнения в порядке появления
+    assignments  — тройки (имя, ':' / '=' / None, число) для записей 'имя [:=] число'
+    ruleset_name — имя из "по набору правил '...'" (первое вхождение) или None
+    """
+    def __init__(self, prompt: str):
+        self.prompt = prompt
+        self.tokens = []
+        self.numbers = []
+        self.comparisons = []
+        self.assignments = []
+        self.ruleset_name = None
+
+        tokens = self.tokens
+        append = tokens.append
+        for match in _TOKEN_PATTERN.finditer(prompt):
+            kind = match.lastgroup
+            start, end = match.span()
+            text = prompt[start:end]
+            if kind == 'number':
+                self.numbers.append(text)
+                # 'имя число' или 'имя : число' / 'имя = число'
+                if tokens and tokens[-1][KIND] == 'word':
+                    self.assignments.append((tokens[-1][TEXT], None, text))
+                elif len(tokens) > 1 and tokens[-1][TEXT] in (':', '=') and tokens[-2][KIND] == 'word':
+                    self.assignments.append((tokens[-2][TEXT], tokens[-1][TEXT], text))
+            elif kind == 'op':
+                if text in COMPARISON_OPERATORS:
+                    self.comparisons.append(text)
+            elif kind == 'ruleset':
+                text = match.group('ruleset_name')
+                if self.ruleset_name is None:
+                    self.ruleset_name = text
+            append((kind, text, start, end))
+
+        self._lowered = None
+        self._positions = None
+
+    def _lower(self):
+        if self._lowered is None:
+            self._lowered = [token[TEXT].lower() for token in self.tokens]
+        return self._lowered
+
+    # --- Движок правил ---
+
+    def value_after(self, aliases) -> str:
+        """
+        Первое число, записанное после любого из псевдонимов ('псевдоним [:=] число'),
+        без учета регистра. Псевдоним может состоять из нескольких слов; при нескольких
+        вхождениях берется самое левое, как у re.search по альтернативе псевдонимов.
+        """
+        tokens = self.tokens
+        lowered = self._lower()
+        positions = self._word_positions()
+        best = None
+        for alias in aliases:
+            words = alias.lower().split()
+            for i in positions.get(words[0], ()):
+                if best is not None and i >= best[0]:
+                    break
+                j = i + len(words)
+                if lowered[i:j] != words:
+                    continue
+                if j < len(tokens) and tokens[j][TEXT] in (':', '='):
+                    j += 1
+                if j < len(tokens) and tokens[j][KIND] == 'number':
+                    best = (i, tokens[j][TEXT])
+                    break
+        return best[1] if best is not None else None
+
+    def _word_positions(self):
+        """Индекс: слово в нижнем регистре -> позиции токенов по возрастанию."""
+        if self._positions is None:
+            self._positions = {}
+            for i, word in enumerate(self._lower()):
+                self._positions.setdefault(word, []).append(i)
+        return self._positions
+
+    # --- Алгебра ---
+
+    def letter_variables(self) -> set:
+        """Однобуквенные латинские имена переменных."""
+        return {token[TEXT] for token in self.tokens if token[KIND] == 'word' and len(token[TEXT]) == 1 and token[TEXT].isascii()}
+
+    def has_decimals(self) -> bool:
+        return any(_DECIMAL.search(number) for number in self.numbers)
+
+    def _in_equation(self, token):
+        if token[KIND] in ('number', 'arith'):
+            return True
+        if token[KIND] == 'word':
+            return _ASCII_WORD.fullmatch(token[TEXT]) is not None
+        return token[TEXT] == '.'
+
+    def constraint_texts(self) -> list:
+        """
+        Тексты ограничений слева направо: уравнения 'выражение == выражение'
+        (латиница, числа и арифметика) и границы 'имя <|>|<=|>= [-]число'.
+        """
+        tokens = self.tokens
+        n = len(tokens)
+        # run_end[i] — конец непрерывного участка "уравненческих" токенов, начиная с i
+        run_end = [0] * (n + 1)
+        run_end[n] = n
+        for i in range(n - 1, -1, -1):
+            run_end[i] = run_end[i + 1] if self._in_equation(tokens[i]) else i
+
+        result = []
+        i = 0
+        while i < n:
+            j = run_end[i]
+            if j > i and j < n and tokens[j][TEXT] == '==' and run_end[j + 1] > j + 1:
+                end = run_end[j + 1]
+                result.append(self.prompt[tokens[i][START]:tokens[end - 1][END]].strip())
+                i = end
+                continue
+            token = tokens[i]
+            if token[KIND] == 'word' and _ASCII_LETTERS.fullmatch(token[TEXT]) and i + 1 < n and tokens[i + 1][TEXT] in _BOUND_OPERATORS:
+                k = i + 2
+                if k < n and tokens[k][TEXT] == '-':
+                    k += 1
+                if k < n and tokens[k][KIND] == 'number' and tokens[k][TEXT][0].isdigit():
+                    result.append(self.prompt[token[START]:tokens[k][END]])
+                    i = k + 1
+                    continue
+            i += 1
+        return result
+
+    # --- Логические задачи ---
+
+    def person_names(self) -> set:
+        """Имена с заглавной кириллической буквы, кроме служебных слов."""
+        return {
+            token[TEXT] for token in self.tokens
+            if token[KIND] == 'word' and token[TEXT].lower() not in _LOGIC_KEYWORDS and _PERSON_NAME.fullmatch(token[TEXT])
+        }
+
+    def _literal(self, start, stop, names):
+        """(имя, истинность) для фразы 'Имя [точно] [не] ...' или None, если имени нет."""
+        lowered = self._lower()
+        for i in range(start, stop):
+            if self.tokens[i][TEXT] in names:
+                following = lowered[i + 1:i + 3]
+                negated = following[:1] == ['не'] or following == ['точно', 'не']
+                return self.tokens[i][TEXT], not negated
+        return None
+
+    def implications(self, names) -> list:
+        """
+        Импликации 'Если A, то B.' как пары литералов ((имя, истинность), (имя, истинность)).
+        Литерал None означает, что в части импликации не нашлось имени.
+        """
+        return [(self._literal(*cond, names), self._literal(*conclusion, names)) for cond, conclusion in self._implication_spans()]
+
+    def facts(self, names) -> list:
+        """
+        Факты вне импликаций. Как и прежде, учитываются только отрицания
+        в форме 'Имя [точно] не глагол.'.
+        """
+        tokens = self.tokens
+        lowered = self._lower()
+        covered = set()
+        for cond, conclusion in self._implication_spans():
+            covered.update(range(cond[0] - 1, conclusion[1] + 1))
+
+        result = []
+        start = 0
+        for i in range(len(tokens) + 1):
+            if i < len(tokens) and not (tokens[i][KIND] == 'punct' and tokens[i][TEXT] == '.'):
+                continue
+            sentence = [k for k in range(start, i) if k not in covered]
+            start = i + 1
+            words = [lowered[k] for k in sentence]
+            if len(sentence) in (3, 4) and tokens[sentence[0]][TEXT] in names and all(tokens[k][KIND] == 'word' for k in sentence):
+                if words[1:-1] in (['не'], ['точно', 'не']):
+                    result.append((tokens[sentence[0]][TEXT], False))
+        return result
+
+    def _implication_spans(self):
+        """Диапазоны токенов (условие, следствие) для каждого 'Если ..., то ... .'."""
+        tokens = self.tokens
+        lowered = self._lower()
+        spans = []
+        i = 0
+        n = len(tokens)
+        while i < n:
+            if lowered[i] != 'если':
+                i += 1
+                continue
+            comma = next((k for k in range(i + 1, n - 1) if tokens[k][TEXT] == ',' and lowered[k + 1] == 'то'), None)
+            if comma is None:
+                break
+            stop = next((k for k in range(comma + 2, n) if tokens[k][KIND] == 'punct' and tokens[k][TEXT] == '.'), None)
+            if stop is None:
+                break
+            spans.append(((i + 1, comma), (comma + 2, stop)))
+            i = stop + 1
+        return spans
@@ -0,0 +1,532 @@
+# logos/scheduling.py
+
+import json
+import re
+from functools import reduce
+from math import gcd
+from logos.profiling import stage
+from logos.solving import SAT, UNSAT, SolveBudget, SolveOutcome, thread_context
+
+# Рабочий день по умолчанию, минуты от полуночи: 9:00-18:00
+DEFAULT_HORIZON = (540, 1080)
+OBJECTIVES = ("earliest_finish", "fewest_conflicts")
+# До стольких встреч комнаты выбирает решатель; в задачах крупнее комнаты закрепляются
+# по жадному расписанию, а Z3 оптимизирует только время — иначе пар "та же комната" O(N^2)
+ROOM_CHOICE_LIMIT = 60
+# До стольких встреч решает Optimize. На крупных задачах он не укладывается в timeout
+# (и не отдает модель), поэтому там граница цели сужается шагами инкрементального Solver
+OPTIMIZE_LIMIT = 80
+
+_MEETING_NAMES = re.compile(r"\b[A-Z]\b")
+# 'A должна быть до B', 'A до B'
+_PRECEDENCE = re.compile(r"\b([A-Z])\b[^.,;:]*?\bдо\s+([A-Z])\b")
+
+
+class SchedulingError(ValueError):
+    """Описание задачи планирования некорректно."""
+
+
+class Meeting:
+    __slots__ = ("name", "duration", "attendees", "window", "after")
+
+    def __init__(self, name, duration, attendees=(), window=None, after=()):
+        self.name = name
+        self.duration = duration
+        self.attendees = tuple(attendees)
+        self.window = window
+        # Встречи, которые должны закончиться до начала этой
+        self.after = tuple(after)
+
+
+class Room:
+    __slots__ = ("name", "capacity")
+
+    def __init__(self, name, capacity):
+        self.name = name
+        self.capacity = capacity
+
+
+class SchedulingProblem:
+    """
+    Встречи (длительность, участники, необязательные окно и предшественники), комнаты
+    с вместимостью и окна доступности участников. Время — целые минуты от начала
+    горизонта (полуночи первого дня); участник без окон доступен весь горизонт.
+    """
+    def __init__(self, meetings, rooms=(), availability=None, horizon=DEFAULT_HORIZON, objective="earliest_finish"):
+        if objective not in OBJECTIVES:
+            raise SchedulingError(f"неизвестная цель '{objective}', ожидалось одно из {OBJECTIVES}")
+        names = [meeting.name for meeting in meetings]
+        if len(set(names)) != len(names):
+            raise SchedulingError("имена встреч должны быть уникальны")
+        for meeting in meetings:
+            if not isinstance(meeting.duration, int) or meeting.duration <= 0:
+                raise SchedulingError(f"длительность встречи '{meeting.name}' должна быть положительным целым числом минут")
+            unknown = [name for name in meeting.after if name not in names]
+            if unknown:
+                raise SchedulingError(f"встреча '{meeting.name}' ссылается на неизвестные встречи {unknown}")
+        # Копии встреч с проверенными окнами: объекты вызывающего не меняются
+        self.meetings = [
+            Meeting(meeting.name, meeting.duration, meeting.attendees,
+                    _window(meeting.window) if meeting.window is not None else None, meeting.after)
+            for meeting in meetings
+        ]
+        self.rooms = list(rooms)
+        self.availability = {person: _merge(windows) for person, windows in (availability or {}).items()}
+        self.horizon = _window(horizon)
+        self.objective = objective
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        try:
+            meetings = [
+                Meeting(str(item["name"]), item["duration"], item.get("attendees", ()), item.get("window"), item.get("after", ()))
+                for item in data["meetings"]
+            ]
+            rooms = [Room(str(item["name"]), int(item["capacity"])) for item in data.get("rooms", ())]
+        except (KeyError, TypeError) as e:
+            raise SchedulingError(f"неполное описание встречи или комнаты: {e}")
+        return cls(
+            meetings, rooms, data.get("availability"),
+            data.get("horizon", DEFAULT_HORIZON), data.get("objective", "earliest_finish"),
+        )
+
+
+def _window(window):
+    try:
+        lo, hi = window
+    except (TypeError, ValueError):
+        raise SchedulingError(f"окно должно быть парой [начало, конец], получено {window!r}")
+    if not isinstance(lo, int) or not isinstance(hi, int) or not 0 <= lo < hi:
+        raise SchedulingError(f"окно [{lo}, {hi}] должно задаваться неотрицательными целыми минутами, начало раньше конца")
+    return lo, hi
+
+
+def _merge(windows):
+    """Окна по возрастанию, пересекающиеся и смежные — слиты."""
+    merged = []
+    for lo, hi in sorted(_window(window) for window in windows):
+        if merged and lo <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], hi))
+        else:
+            merged.append((lo, hi))
+    return merged
+
+
+def parse_scheduling_prompt(prompt: str):
+    """
+    Задача из промпта: JSON-объект в тексте ({"meetings": [...], ...}) или, если его нет,
+    перечисленные однобуквенные встречи ('встречи: A, B и C', 'A должна быть до B')
+    по часу в рабочий день с одним участником — автором запроса. None, если встреч не найдено.
+    """
+    start, end = prompt.find("{"), prompt.rfind("}")
+    if start != -1 and end > start:
+        try:
+            data = json.loads(prompt[start:end + 1])
+        except json.JSONDecodeError as e:
+            raise SchedulingError(f"описание задачи не является корректным JSON: {e}")
+        return SchedulingProblem.from_dict(data)
+    names = list(dict.fromkeys(_MEETING_NAMES.findall(prompt)))
+    if not names:
+        return None
+    after = {}
+    for first, second in _PRECEDENCE.findall(prompt):
+        after.setdefault(second, []).append(first)
+    return SchedulingProblem([Meeting(name, 60, ("организатор",), after=after.get(name, ())) for name in names])
+
+
+def _intersect(left, right):
+    """Пересечение двух отсортированных списков непересекающихся интервалов [lo, hi) за один проход."""
+    result = []
+    i = j = 0
+    while i < len(left) and j < len(right):
+        lo, hi = max(left[i][0], right[j][0]), min(left[i][1], right[j][1])
+        if lo < hi:
+            result.append((lo, hi))
+        if left[i][1] < right[j][1]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+def _overlaps(start_a, end_a, start_b, end_b):
+    return start_a < end_b and start_b < end_a
+
+
+class _Model:
+    """Задача в единицах сетки: домены начал, допустимые комнаты и пары возможных конфликтов."""
+    def __init__(self, problem: SchedulingProblem):
+        values = [problem.horizon[0], problem.horizon[1]]
+        values += [meeting.duration for meeting in problem.meetings]
+        values += [bound for meeting in problem.meetings if meeting.window for bound in meeting.window]
+        values += [bound for windows in problem.availability.values() for window in windows for bound in window]
+        # Шаг сетки — НОД всех длительностей и границ: домены переменных минимальны
+        self.unit = reduce(gcd, values) or 1
+        self.problem = problem
+        unit = self.unit
+
+        horizon = [(problem.horizon[0] // unit, problem.horizon[1] // unit)]
+        self.durations = [meeting.duration // unit for meeting in problem.meetings]
+        self.domains = []  # на встречу: интервалы допустимого начала [lo, hi]
+        for meeting, duration in zip(problem.meetings, self.durations):
+            windows = horizon
+            if meeting.window:
+                windows = _intersect(windows, [(meeting.window[0] // unit, meeting.window[1] // unit)])
+            for person in meeting.attendees:
+                if person in problem.availability:
+                    windows = _intersect(windows, [(a // unit, b // unit) for a, b in problem.availability[person]])
+            self.domains.append(sorted((lo, hi - duration) for lo, hi in windows if hi - lo >= duration))
+
+        self.allowed_rooms = [
+            [k for k, room in enumerate(problem.rooms) if room.capacity >= len(meeting.attendees)]
+            for meeting in problem.meetings
+        ]
+        index = {meeting.name: i for i, meeting in enumerate(problem.meetings)}
+        self.predecessors = [[index[name] for name in meeting.after] for meeting in problem.meetings]
+        self.order = self._priority_order()
+
+        # Пары встреч с общим участником, которые вообще могут пересечься во времени
+        by_person = {}
+        for i, meeting in enumerate(problem.meetings):
+            for person in meeting.attendees:
+                by_person.setdefault(person, []).append(i)
+        pairs = set()
+        for meetings in by_person.values():
+            for a in range(len(meetings)):
+                for b in range(a + 1, len(meetings)):
+                    pairs.add((meetings[a], meetings[b]))
+        self.attendee_pairs = sorted(pair for pair in pairs if self._may_overlap(*pair))
+
+    def infeasible(self):
+        """Встречи без общего окна или без подходящей комнаты."""
+        problems = [meeting.name for meeting, domain in zip(self.problem.meetings, self.domains) if not domain]
+        if self.problem.rooms:
+            problems += [meeting.name for meeting, rooms in zip(self.problem.meetings, self.allowed_rooms) if not rooms]
+        return problems
+
+    def _priority_order(self):
+        """
+        Порядок размещения: по возрастанию раннего начала (при равенстве — встречи
+        с большим числом участников и более длинные раньше), но каждая встреча
+        после своих предшественников.
+        """
+        import heapq
+        meetings = self.problem.meetings
+
+        def key(i):
+            return (self.domains[i][0][0] if self.domains[i] else 0, -len(meetings[i].attendees), -self.durations[i], i)
+
+        waiting = [len(set(predecessors)) for predecessors in self.predecessors]
+        followers = [[] for _ in meetings]
+        for i, predecessors in enumerate(self.predecessors):
+            for j in set(predecessors):
+                followers[j].append(i)
+        ready = [key(i) for i in range(len(meetings)) if not waiting[i]]
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            i = heapq.heappop(ready)[-1]
+            order.append(i)
+            for j in followers[i]:
+                waiting[j] -= 1
+                if not waiting[j]:
+                    heapq.heappush(ready, key(j))
+        if len(order) != len(meetings):
+            raise SchedulingError("порядок встреч (after) содержит цикл")
+        return order
+
+    def _may_overlap(self, i, j, horizon_end=None):
+        if not self.domains[i] or not self.domains[j]:
+            return False
+        lo_i, hi_i = self.domains[i][0][0], self.domains[i][-1][1] + self.durations[i]
+        lo_j, hi_j = self.domains[j][0][0], self.domains[j][-1][1] + self.durations[j]
+        if horizon_end is not None:
+            hi_i, hi_j = min(hi_i, horizon_end), min(hi_j, horizon_end)
+        return _overlaps(lo_i, hi_i, lo_j, hi_j)
+
+    def greedy(self):
+        """
+        Жадное расписание: встречи в порядке _priority_order, каждая — в самое раннее
+        окно после предшественников, где свободны участники и есть комната. Занятость
+        участников и комнат — битовые маски по сетке. Для цели fewest_conflicts встреча
+        может пересечься с занятыми участниками, но выбирается окно с наименьшим их числом.
+        Возвращает (starts, rooms) или None, если не удалось разместить все встречи.
+        """
+        problem = self.problem
+        soft = problem.objective == "fewest_conflicts"
+        busy_people = {}
+        busy_rooms = [0] * len(problem.rooms)
+        starts, rooms = [None] * len(self.order), [None] * len(self.order)
+        for i in self.order:
+            attendees, duration = problem.meetings[i].attendees, self.durations[i]
+            block = (1 << duration) - 1
+            ready = max((starts[j] + self.durations[j] for j in self.predecessors[i]), default=0)
+            best = None
+            for lo, hi in self.domains[i]:
+                for start in range(max(lo, ready), hi + 1):
+                    mask = block << start
+                    conflicts = sum(1 for person in attendees if busy_people.get(person, 0) & mask)
+                    if conflicts and (not soft or (best is not None and conflicts >= best[0])):
+                        continue
+                    room = None
+                    if problem.rooms:
+                        room = next((k for k in self.allowed_rooms[i] if not busy_rooms[k] & mask), None)
+                        if room is None:
+                            continue
+                    best = (conflicts, start, room)
+                    if conflicts == 0:
+                        break
+                if best is not None and best[0] == 0:
+                    break
+            if best is None:
+                return None
+            _, starts[i], rooms[i] = best
+            mask = block << starts[i]
+            for person in attendees:
+                busy_people[person] = busy_people.get(person, 0) | mask
+            if rooms[i] is not None:
+                busy_rooms[rooms[i]] |= mask
+        return starts, rooms
+
+    def valid(self, starts, rooms):
+        """Соблюдены ли жесткие ограничения: окна, порядок, комнаты и (для earliest_finish) участники."""
+        for i, start in enumerate(starts):
+            if not any(lo <= start <= hi for lo, hi in self.domains[i]):
+                return False
+            if any(starts[j] + self.durations[j] > start for j in self.predecessors[i]):
+                return False
+            if self.problem.rooms and rooms[i] not in self.allowed_rooms[i]:
+                return False
+        if self.problem.objective == "earliest_finish" and self.conflicts(starts):
+            return False
+        if self.problem.rooms:
+            booked = {}
+            for i, (start, room) in enumerate(zip(starts, rooms)):
+                mask = ((1 << self.durations[i]) - 1) << start
+                if booked.get(room, 0) & mask:
+                    return False
+                booked[room] = booked.get(room, 0) | mask
+        return True
+
+    def conflicts(self, starts):
+        return sum(
+            1 for i, j in self.attendee_pairs
+            if _overlaps(starts[i], starts[i] + self.durations[i], starts[j], starts[j] + self.durations[j])
+        )
+
+    def objective(self, starts):
+        if self.problem.objective == "fewest_conflicts":
+            return self.conflicts(starts)
+        return self.makespan(starts)
+
+    def lower_bound(self):
+        if self.problem.objective == "fewest_conflicts":
+            return 0
+        return max(domain[0][0] + duration for domain, duration in zip(self.domains, self.durations))
+
+    def score(self, starts):
+        if self.problem.objective == "fewest_conflicts":
+            return self.conflicts(starts), self.makespan(starts)
+        return self.makespan(starts)
+
+    def makespan(self, starts):
+        return max(start + duration for start, duration in zip(starts, self.durations))
+
+
+def _separated(model, i, j):
+    return f"(or (<= (+ s{i} {model.durations[i]}) s{j}) (<= (+ s{j} {model.durations[j]}) s{i}))"
+
+
+def _script(model: _Model, incumbent):
+    """
+    Задача в SMT-LIB для from_string: на сотнях встреч это на порядок быстрее
+    построения тех же выражений через Python API z3. Жадное решение задает верхнюю
+    границу окончания и, для крупных задач, комнаты. Возвращает (script, rooms);
+    rooms — список номеров комнат, если они закреплены, иначе None.
+    """
+    problem = model.problem
+    n = len(problem.meetings)
+    soft = problem.objective == "fewest_conflicts"
+    # Граница окончания по жадному решению верна только для цели earliest_finish
+    bound = model.makespan(incumbent[0]) if incumbent and not soft else None
+    fixed_rooms = incumbent[1] if problem.rooms and incumbent is not None and n > ROOM_CHOICE_LIMIT else None
+    choose_rooms = bool(problem.rooms) and fixed_rooms is None
+    script = [f"(declare-const s{i} Int)" for i in range(n)]
+    if choose_rooms:
+        script.extend(f"(declare-const r{i} Int)" for i in range(n))
+    for i in range(n):
+        duration = model.durations[i]
+        windows = [(lo, hi if bound is None else min(hi, bound - duration)) for lo, hi in model.domains[i]]
+        windows = [f"(and (<= {lo} s{i}) (<= s{i} {hi}))" for lo, hi in windows if lo <= hi]
+        script.append(f"(assert {windows[0] if len(windows) == 1 else '(or ' + ' '.join(windows) + ')'})")
+        for j in model.predecessors[i]:
+            script.append(f"(assert (<= (+ s{j} {model.durations[j]}) s{i}))")
+        if choose_rooms:
+            script.append(f"(assert (or {' '.join(f'(= r{i} {k})' for k in model.allowed_rooms[i])} false))")
+
+    attendee_pairs = set()
+    conflicts = []
+    for i, j in model.attendee_pairs:
+        if not model._may_overlap(i, j, bound):
+            continue
+        attendee_pairs.add((i, j))
+        if soft:
+            conflicts.append(f"(ite {_separated(model, i, j)} 0 1)")
+        else:
+            script.append(f"(assert {_separated(model, i, j)})")
+
+    if problem.rooms:
+        rooms = [set(allowed) for allowed in model.allowed_rooms]
+        for i in range(n):
+            for j in range(i + 1, n):
+                if (i, j) in attendee_pairs and not soft:
+                    continue  # и так не пересекаются по времени
+                if fixed_rooms is not None:
+                    if fixed_rooms[i] == fixed_rooms[j] and model._may_overlap(i, j, bound):
+                        script.append(f"(assert {_separated(model, i, j)})")
+                elif rooms[i] & rooms[j] and model._may_overlap(i, j, bound):
+                    script.append(f"(assert (or (distinct r{i} r{j}) {_separated(model, i, j)}))")
+
+    # objective — минимизируемая величина: время окончания или число конфликтов
+    script.append("(declare-const objective Int)")
+    if soft:
+        script.append(f"(assert (= objective (+ 0 {' '.join(conflicts)})))")
+    else:
+        script.extend(f"(assert (>= objective (+ s{i} {model.durations[i]})))" for i in range(n))
+    return "\n".join(script), fixed_rooms
+
+
+def _read_model(model: _Model, solution, ctx, fixed_rooms):
+    import z3
+
+    def value(name):
+        return solution.eval(z3.Int(name, ctx), model_completion=True).as_long()
+
+    n = len(model.problem.meetings)
+    starts = [value(f"s{i}") for i in range(n)]
+    if not model.problem.rooms:
+        rooms = [None] * n
+    elif fixed_rooms is not None:
+        rooms = list(fixed_rooms)
+    else:
+        rooms = [value(f"r{i}") for i in range(n)]
+    return starts, rooms
+
+
+def _solve_z3(model: _Model, incumbent, budget: SolveBudget, ctx, handler):
+    """
+    Минимизирует цель в Z3. Возвращает (outcome, starts, rooms): outcome SAT — оптимум
+    доказан, UNSAT — расписания нет; при unknown starts — лучшее найденное решением Z3
+    (его проверяет вызывающий) или None.
+    """
+    import z3
+    if incumbent is not None and model.objective(incumbent[0]) <= model.lower_bound():
+        # Жадное решение уже на нижней оценке: оптимум доказан без решателя
+        return (SolveOutcome(SAT, handler),) + tuple(incumbent)
+    with stage("encode"):
+        script, fixed_rooms = _script(model, incumbent)
+    if len(model.problem.meetings) <= OPTIMIZE_LIMIT:
+        opt = z3.Optimize(ctx=ctx)
+        opt.from_string(script)
+        opt.minimize(z3.Int("objective", ctx))
+        outcome = budget.check(opt, handler)
+        if outcome.status == UNSAT:
+            return outcome, None, None
+        try:
+            # По таймауту Optimize хранит лучшую найденную модель
+            solution = opt.model()
+        except z3.Z3Exception:
+            return outcome, None, None
+        return (outcome,) + _read_model(model, solution, ctx, fixed_rooms)
+    return _tighten(model, incumbent, script, fixed_rooms, budget, ctx, handler)
+
+
+def _tighten(model: _Model, incumbent, script, fixed_rooms, budget, ctx, handler):
+    """
+    Двоичный поиск по границе цели инкрементальным Solver: каждая проверка идет в
+    остатке бюджета, каждое найденное решение опускает верхнюю границу. Возвращает
+    то же, что _solve_z3; SAT — когда граница сомкнулась с нижней оценкой.
+    """
+    import z3
+    solver = z3.Solver(ctx=ctx)
+    solver.from_string(script)
+    objective = z3.Int("objective", ctx)
+    best = incumbent
+    lower = model.lower_bound()
+    upper = model.objective(incumbent[0]) if incumbent else None
+    elapsed = 0.0
+    while upper is None or lower < upper:
+        if upper is None:
+            middle = None
+            outcome = budget.check(solver, handler)
+        else:
+            middle = (lower + upper) // 2
+            guard = z3.Bool(f"bound_{middle}", ctx)
+            solver.add(z3.Implies(guard, objective <= middle))
+            outcome = budget.check(solver, handler, guard)
+        elapsed += outcome.elapsed
+        if outcome.status == SAT:
+            solution = solver.model()
+            best = _read_model(model, solution, ctx, fixed_rooms)
+            upper = solution.eval(objective, model_completion=True).as_long()
+        elif outcome.status == UNSAT:
+            if middle is None:
+                return outcome, None, None
+            lower = middle + 1
+        else:
+            return (outcome,) + (best or (None, None))
+    return (SolveOutcome(SAT, handler, elapsed),) + best
+
+
+def schedule(problem: SchedulingProblem, budget: SolveBudget = None, ctx=None, handler="scheduling") -> dict:
+    """
+    Составляет расписание. status: "optimal" — Z3 доказал оптимум цели; "feasible" —
+    бюджет кончился, возвращено лучшее найденное (жадное) расписание; "infeasible" —
+    ограничения несовместны; "unknown" — бюджет кончился раньше, чем нашлось расписание.
+    """
+    budget = budget or SolveBudget.default()
+    with stage("encode"):
+        model = _Model(problem)
+    result = {"status": None, "objective": problem.objective, "assignments": {}, "unit": model.unit}
+    missing = model.infeasible()
+    if missing:
+        result.update(status="infeasible", details=f"нет общего окна участников или подходящей комнаты: {', '.join(missing)}")
+        return result
+
+    with stage("solve"):
+        incumbent = model.greedy()
+        outcome, starts, rooms = _solve_z3(model, incumbent, budget, ctx or thread_context(), handler)
+    result["outcome"] = outcome.to_dict()
+    # Жадное решение первым: при равной цели оно предпочтительнее (встречи плотно
+    # и в порядке объявления), модель Z3 берется, только если она строго лучше
+    candidates = [incumbent] if incumbent is not None else []
+    if starts is not None and (outcome.status == SAT or model.valid(starts, rooms)):
+        candidates.append((starts, rooms))
+    if not candidates:
+        result["status"] = "infeasible" if outcome.status == UNSAT else "unknown"
+        if outcome.unknown:
+            result["reason"] = outcome.reason
+        return result
+    starts, rooms = min(candidates, key=lambda candidate: model.score(candidate[0]))
+    if outcome.status == SAT:
+        result["status"] = "optimal"
+    else:
+        result["status"] = "feasible"
+        result["reason"] = outcome.reason
+
+    unit = model.unit
+    for i, meeting in enumerate(problem.meetings):
+        result["assignments"][meeting.name] = {
+            "start": starts[i] * unit,
+            "end": (starts[i] + model.durations[i]) * unit,
+            "room": problem.rooms[rooms[i]].name if rooms[i] is not None else None,
+        }
+    result["finish"] = model.makespan(starts) * unit
+    result["conflicts"] = model.conflicts(starts)
+    return result
+
+
+def format_time(minutes: int) -> str:
+    day, minute = divmod(minutes, 1440)
+    text = f"{minute // 60}:{minute % 60:02d}"
+    return f"день {day + 1}, {text}" if day else text
@@ -1,27 +1,41 @@
 import z3
+import numpy as np
 import pandas as pd
+from logos import tactics
+from logos.solving import SAT, SolveBudget, thread_context
 
 class ForensicSolver:
     """
     Судья на базе Microsoft Z3.
     Доказывает математическую невозможность честного исполнения сделки.
+    Без явного ctx каждая проверка идет в z3.Context своего потока.
     """
 
-    def verify(self, trade: dict, historical_trades: pd.DataFrame, orderbook: dict):
+    # Допуск на проскальзывание: доля рыночной цены сверх спреда
+    SLIPPAGE = 0.01
+    # Относительный зазор, внутри которого float64 не решает исход: такие сделки проверяет Z3
+    BORDERLINE = 1e-9
+
+    def __init__(self, ctx: z3.Context = None):
+        self.ctx = ctx
+
+    def verify(self, trade: dict, historical_trades: pd.DataFrame, orderbook: dict, budget: SolveBudget = None):
         print("[Solver] Building Z3 Model for Fair Execution...")
         
-        solver = z3.Solver()
+        ctx = self.ctx or thread_context()
+        # Ограничения собираются списком: решатель под их класс выбирает logos.tactics
+        constraints = []
         
         # 1. Переменные (Символы)
         # Цена исполнения сделки (Real number)
-        exec_price = z3.Real('exec_price')
+        exec_price = z3.Real('exec_price', ctx)
         
         # Лучшая цена в стакане (Best Bid/Ask) на момент сделки
-        market_price = z3.Real('market_price')
+        market_price = z3.Real('market_price', ctx)
         
         # Спред и Проскальзывание
-        spread = z3.Real('spread')
-        slippage = z3.Real('slippage')
+        spread = z3.Real('spread', ctx)
+        slippage = z3.Real('slippage', ctx)
         
         # 2. Загрузка фактов (Константы из данных)
         actual_exec_price = float(trade['price'])
@@ -42,9 +56,9 @@ class ForensicSolver:
         # 3. Формируем Z3 утверждения (Constraints)
         
         # Утверждение А: Параметры модели равны фактам
-        solver.add(exec_price == actual_exec_price)
-        solver.add(market_price == best_market_price)
-        solver.add(spread == actual_spread)
+        constraints.append(exec_price == actual_exec_price)
+        constraints.append(market_price == best_market_price)
+        constraints.append(spread == actual_spread)
         
         # Утверждение Б: Модель "Честного Рынка" (Fair Market Invariant)
         # Цена исполнения не должна отклоняться от рыночной больше чем на спред + 1% (допуск на проскальзывание)
@@ -52,15 +66,23 @@ class ForensicSolver:
         
         # Z3 не имеет встроенного Abs, пишем через If
         diff = z3.If(exec_price > market_price, exec_price - market_price, market_price - exec_price)
-        allowed_slippage = spread + (market_price * 0.01)
+        allowed_slippage = spread + (market_price * self.SLIPPAGE)
         
         # ГЛАВНОЕ: Мы просим Z3 проверить, является ли сделка "Честной"
-        solver.add(diff <= allowed_slippage)
+        constraints.append(diff <= allowed_slippage)
         
-        # 4. Суд (Check Satisfiability)
-        result = solver.check()
+        # 4. Суд (Check Satisfiability) в рамках бюджета запроса
+        solver = tactics.make_solver(ctx, constraints)
+        outcome, solver = tactics.check(budget or SolveBudget.default(), solver, "forensic.verify")
         
-        if result == z3.sat:
+        if outcome.unknown:
+            # Нет доказательства ни честности, ни подлога — отдельный вердикт, а не VOID
+            return {
+                "verdict": "UNKNOWN",
+                "details": f"Solver returned no answer within the budget ({outcome.reason}).",
+                "reason": outcome.reason
+            }
+        if outcome.status == SAT:
             return {
                 "verdict": "CLEAN",
                 "details": "Execution is mathematically consistent with market liquidity."
@@ -70,3 +92,103 @@ class ForensicSolver:
                 "verdict": "LIQUIDITY_VOID_DETECTED",
                 "details": f"UNSAT: Execution price {actual_exec_price} is impossible given Best Market Price {best_market_price} and Spread {actual_spread:.2f}."
             }
+
+    def verify_batch(self, trades: pd.DataFrame, orderbook: dict = None, budget: SolveBudget = None) -> pd.DataFrame:
+        """
+        Проверка всех сделок сразу: |exec - market| <= spread + 1% market считается
+        векторно в NumPy. Явно честные сделки получают CLEAN без решателя; нарушения
+        и пограничные случаи (зазор в пределах погрешности float64) получают
+        сертифицированный вердикт Z3 в точной рациональной арифметике.
+
+        Рыночная цена и спред берутся из колонок best_bid / best_ask сделки, если они
+        есть, иначе из снимка orderbook; сделки без цены или котировок получают UNKNOWN.
+        Возвращает таблицу вердиктов по сделкам
+        (индекс исходной таблицы): market_price, spread, deviation, allowed, margin,
+        verdict и method ("numpy" / "z3").
+        """
+        price = trades['price'].to_numpy(dtype=float)
+        buy = trades['side'].astype(str).str.upper().to_numpy() == 'BUY'
+        if 'best_bid' in trades.columns and 'best_ask' in trades.columns:
+            best_bid = trades['best_bid'].to_numpy(dtype=float)
+            best_ask = trades['best_ask'].to_numpy(dtype=float)
+        elif orderbook is not None:
+            best_bid = np.full(len(trades), float(orderbook['bids']['price'].max()))
+            best_ask = np.full(len(trades), float(orderbook['asks']['price'].min()))
+        else:
+            raise ValueError("verify_batch needs best_bid/best_ask columns or an orderbook snapshot")
+
+        market = np.where(buy, best_ask, best_bid)
+        spread = best_ask - best_bid
+        deviation = np.abs(price - market)
+        allowed = spread + market * self.SLIPPAGE
+        margin = allowed - deviation
+        scale = np.abs(price) + np.abs(market) + np.abs(spread) + 1.0
+        # Без цены или котировок (NaN, пустая сторона стакана) сделку нельзя признать честной
+        known = np.isfinite(price) & np.isfinite(market) & np.isfinite(spread)
+        needs_z3 = known & ~(margin > self.BORDERLINE * scale)
+
+        table = pd.DataFrame({
+            'price': price,
+            'side': np.where(buy, 'BUY', 'SELL'),
+            'market_price': market,
+            'spread': spread,
+            'deviation': deviation,
+            'allowed': allowed,
+            'margin': margin,
+            'verdict': np.where(known, 'CLEAN', 'UNKNOWN'),
+            'method': np.where(needs_z3, 'z3', 'numpy'),
+        }, index=trades.index)
+        rows = np.flatnonzero(needs_z3)
+        if len(rows):
+            verdicts = self._certify(price[rows], market[rows], spread[rows], budget or SolveBudget.default())
+            table.iloc[rows, table.columns.get_loc('verdict')] = verdicts
+        return table
+
+    def _certify(self, prices, markets, spreads, budget: SolveBudget) -> list:
+        """
+        Вердикты Z3 для выбранных сделок: один решатель с инвариантом честного рынка,
+        факты сделки добавляются в push / pop. Когда бюджет исчерпан, оставшиеся
+        сделки получают UNKNOWN, а не VOID.
+        """
+        ctx = self.ctx or thread_context()
+        exec_price = z3.Real('exec_price', ctx)
+        market_price = z3.Real('market_price', ctx)
+        spread = z3.Real('spread', ctx)
+        diff = z3.If(exec_price > market_price, exec_price - market_price, market_price - exec_price)
+        solver = tactics.make_solver(ctx, [diff <= spread + market_price * self.SLIPPAGE])
+        verdicts = []
+        for actual_price, actual_market, actual_spread in zip(prices.tolist(), markets.tolist(), spreads.tolist()):
+            solver.push()
+            try:
+                solver.add(exec_price == actual_price, market_price == actual_market, spread == actual_spread)
+                outcome, _ = tactics.check(budget, solver, "forensic.verify_batch")
+            finally:
+                solver.pop()
+            if outcome.unknown:
+                verdicts.append("UNKNOWN")
+            else:
+                verdicts.append("CLEAN" if outcome.status == SAT else "LIQUIDITY_VOID_DETECTED")
+        return verdicts
+
+    @staticmethod
+    def summarize(table: pd.DataFrame) -> dict:
+        """Сводка по таблице verify_batch: число сделок по вердиктам и методам, худшее нарушение."""
+        counts = table['verdict'].value_counts()
+        voids = table[table['verdict'] == 'LIQUIDITY_VOID_DETECTED']
+        summary = {
+            "trades": int(len(table)),
+            "verdicts": {verdict: int(count) for verdict, count in counts.items()},
+            "z3_checks": int((table['method'] == 'z3').sum()),
+            "void_share": round(len(voids) / len(table), 6) if len(table) else 0.0,
+            "max_deviation": float(table['deviation'].max()) if len(table) else 0.0,
+            "worst_trade": None,
+        }
+        if len(voids):
+            worst = voids['margin'].idxmin()
+            summary["worst_trade"] = {
+                "index": worst.item() if hasattr(worst, "item") else worst,
+                "price": float(voids.at[worst, 'price']),
+                "market_price": float(voids.at[worst, 'market_price']),
+                "excess": float(-voids.at[worst, 'margin']),
+            }
+        return summary
@@ -1,5 +1,6 @@
 import z3
 import math
+from logos.solving import SAT, SolveBudget, thread_context
 
 class StopLossHunter:
     """
@@ -8,7 +9,13 @@ class StopLossHunter:
     Цель: Найти минимальное падение цены, которое активирует каскад стоп-лоссов.
     """
     
-    def find_minimal_crash(self, current_price: float, volatility: float = 0.02) -> float:
+    def __init__(self, ctx: z3.Context = None):
+        # Явный z3.Context; по умолчанию — контекст текущего потока
+        self.ctx = ctx
+        # Результат последнего обращения к Optimize (SolveOutcome)
+        self.last_outcome = None
+
+    def find_minimal_crash(self, current_price: float, volatility: float = 0.02, budget: SolveBudget = None) -> float:
         """
         Вычисляет Target Price для атаки.
         Гипотеза: Большинство ботов ставят стопы на круглых уровнях или % от входа.
@@ -19,11 +26,12 @@ class StopLossHunter:
         # Для MVP упростим задачу Z3:
         # Найти dX (падение), такое что (Price - dX) является "Круглым числом" или "Критическим уровнем".
         
-        solver = z3.Optimize() # Используем Optimize для минимизации dX
+        ctx = self.ctx or thread_context()
+        solver = z3.Optimize(ctx=ctx) # Используем Optimize для минимизации dX
         
         # Переменные
-        dX = z3.Real('dX')
-        target_price = z3.Real('target_price')
+        dX = z3.Real('dX', ctx)
+        target_price = z3.Real('target_price', ctx)
         
         # Константы
         curr = float(current_price)
@@ -45,12 +53,13 @@ class StopLossHunter:
         # Мы хотим сбить стопы "малой кровью".
         solver.minimize(dX)
         
-        if solver.check() == z3.sat:
+        self.last_outcome = (budget or SolveBudget.default()).check(solver, "stop_loss_hunter")
+        if self.last_outcome.status == SAT:
             model = solver.model()
             # Конвертируем дробь (Rational) в float
             crash_size = float(model[dX].numerator_as_long()) / float(model[dX].denominator_as_long())
             target = curr - crash_size
             return target
         else:
-            # Если Z3 не нашел решения (странно), просто падаем на 5%
+            # Если Z3 не нашел решения (странно) или не уложился в бюджет, просто падаем на 5%
             return curr * 0.95
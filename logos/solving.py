@@ -0,0 +1,218 @@
+# logos/solving.py
+
+import os
+import threading
+import time
+from logos.profiling import record_solver_call
+
+SAT, UNSAT, UNKNOWN = "sat", "unsat", "unknown"
+
+# z3.Context текущего потока: объекты Z3 разных потоков никогда не делят контекст
+_thread_state = threading.local()
+
+# Значение параметра timeout у Z3 "без ограничения" (UINT_MAX, умолчание решателя)
+_NO_TIMEOUT_MS = 4294967295
+
+
+def thread_context():
+    """
+    Собственный z3.Context текущего потока, создается при первом обращении.
+    Потоки пула (ThreadPoolExecutor, uvicorn, агенты) переиспользуют свой контекст
+    между запросами, поэтому пул потоков — это и пул контекстов.
+    """
+    ctx = getattr(_thread_state, "ctx", None)
+    if ctx is None:
+        import z3
+        ctx = _thread_state.ctx = z3.Context()
+    return ctx
+
+
+class SolveOutcome:
+    """
+    Результат одного обращения к решателю: status ("sat" / "unsat" / "unknown"),
+    для unknown — reason ("timeout" / "cancelled" / "rlimit" / "incomplete")
+    и исходная причина от Z3 в detail.
+    """
+    __slots__ = ("status", "reason", "detail", "elapsed", "handler")
+
+    def __init__(self, status, handler, elapsed=0.0, reason=None, detail=None):
+        self.status = status
+        self.handler = handler
+        self.elapsed = elapsed
+        self.reason = reason
+        self.detail = detail
+
+    @property
+    def unknown(self):
+        return self.status == UNKNOWN
+
+    def to_dict(self):
+        data = {"status": self.status, "handler": self.handler, "elapsed_ms": round(self.elapsed * 1000, 3)}
+        if self.unknown:
+            data["reason"] = self.reason
+            data["detail"] = self.detail
+        return data
+
+    def __repr__(self):
+        suffix = f", reason={self.reason!r}" if self.unknown else ""
+        return f"SolveOutcome({self.status!r}, handler={self.handler!r}{suffix})"
+
+
+class SolveUnknown(Exception):
+    """Решатель не дал ответа в рамках бюджета; outcome содержит причину."""
+    def __init__(self, outcome: SolveOutcome):
+        super().__init__(f"{outcome.handler}: {outcome.reason}")
+        self.outcome = outcome
+
+
+class SolveHistograms:
+    """Гистограммы времени решения Z3 по обработчикам (границы корзин в миллисекундах)."""
+    BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._handlers = {}
+
+    def record(self, outcome: SolveOutcome):
+        elapsed_ms = outcome.elapsed * 1000
+        with self._lock:
+            stats = self._handlers.get(outcome.handler)
+            if stats is None:
+                stats = self._handlers[outcome.handler] = {
+                    "count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                    "buckets": [0] * (len(self.BUCKETS_MS) + 1), "statuses": {},
+                }
+            stats["count"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            index = next((i for i, bound in enumerate(self.BUCKETS_MS) if elapsed_ms <= bound), len(self.BUCKETS_MS))
+            stats["buckets"][index] += 1
+            key = outcome.status if not outcome.unknown else f"{UNKNOWN}:{outcome.reason}"
+            stats["statuses"][key] = stats["statuses"].get(key, 0) + 1
+
+    def snapshot(self) -> dict:
+        labels = [f"<={bound}ms" for bound in self.BUCKETS_MS] + ["+inf"]
+        with self._lock:
+            return {
+                handler: {
+                    "count": stats["count"],
+                    "total_ms": round(stats["total_ms"], 3),
+                    "max_ms": round(stats["max_ms"], 3),
+                    "buckets": dict(zip(labels, stats["buckets"])),
+                    "statuses": dict(stats["statuses"]),
+                }
+                for handler, stats in self._handlers.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._handlers.clear()
+
+
+# Общий реестр гистограмм процесса
+SOLVE_TIMES = SolveHistograms()
+
+
+class SolveBudget:
+    """
+    Бюджет одного запроса к решателю: дедлайн (timeout, секунды от создания) и/или
+    rlimit — детерминированный лимит ресурсов Z3. Один бюджет покрывает все вызовы
+    check() запроса: каждый получает остаток времени. cancel() из другого потока
+    прерывает идущие вызовы (Context.interrupt) и все последующие сразу дают unknown.
+    """
+    def __init__(self, timeout: float = None, rlimit: int = None, histograms: SolveHistograms = SOLVE_TIMES):
+        self.timeout = timeout
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        self.rlimit = rlimit
+        self.histograms = histograms
+        self.cancelled = False
+        self._lock = threading.Lock()
+        self._active = {}  # id(ctx) -> (ctx, число идущих вызовов)
+
+    @classmethod
+    def default(cls):
+        """Бюджет по умолчанию из окружения: LOGOS_SOLVE_TIMEOUT (секунды) и LOGOS_SOLVE_RLIMIT."""
+        timeout = os.environ.get("LOGOS_SOLVE_TIMEOUT", "10")
+        rlimit = os.environ.get("LOGOS_SOLVE_RLIMIT")
+        return cls(float(timeout) if timeout else None, int(rlimit) if rlimit else None)
+
+    def remaining(self):
+        """Оставшееся время в секундах (None — без дедлайна)."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    @property
+    def expired(self):
+        return self.cancelled or (self.deadline is not None and time.monotonic() >= self.deadline)
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            contexts = [ctx for ctx, _ in self._active.values()]
+        for ctx in contexts:
+            ctx.interrupt()
+
+    def configure(self, solver):
+        """Переносит остаток бюджета в параметры решателя (Solver или Optimize)."""
+        remaining = self.remaining()
+        solver.set("timeout", _NO_TIMEOUT_MS if remaining is None else max(1, int(remaining * 1000)))
+        solver.set("rlimit", self.rlimit or 0)
+
+    def check(self, solver, handler: str, *assumptions) -> SolveOutcome:
+        """
+        solver.check() в рамках бюджета; время записывается в гистограмму обработчика,
+        а вызов со статистикой Z3 — в профиль текущего запроса (logos.profiling).
+        """
+        import z3
+        if self.expired:
+            outcome = SolveOutcome(UNKNOWN, handler, reason=self._expired_reason(), detail="бюджет исчерпан до вызова")
+            self.histograms.record(outcome)
+            return outcome
+
+        self.configure(solver)
+        ctx = solver.ctx
+        self._enter(ctx)
+        start = time.perf_counter()
+        try:
+            # Отмена могла прийти между проверкой и регистрацией контекста
+            result = solver.check(*assumptions) if not self.cancelled else z3.unknown
+        finally:
+            elapsed = time.perf_counter() - start
+            self._leave(ctx)
+
+        status = SAT if result == z3.sat else UNSAT if result == z3.unsat else UNKNOWN
+        if status != UNKNOWN:
+            outcome = SolveOutcome(status, handler, elapsed)
+        else:
+            detail = solver.reason_unknown() if not self.cancelled else "canceled"
+            outcome = SolveOutcome(UNKNOWN, handler, elapsed, reason=self._unknown_reason(detail), detail=detail)
+        self.histograms.record(outcome)
+        record_solver_call(solver, outcome)
+        return outcome
+
+    def _expired_reason(self):
+        return "cancelled" if self.cancelled else "timeout"
+
+    def _unknown_reason(self, detail):
+        if self.cancelled:
+            return "cancelled"
+        if "timeout" in detail or (self.deadline is not None and time.monotonic() >= self.deadline):
+            return "timeout"
+        # Исчерпанный rlimit Z3 сообщает как "canceled" или "max. resource limit exceeded"
+        if "resource" in detail or "rlimit" in detail or (self.rlimit and "cancel" in detail):
+            return "rlimit"
+        return "incomplete"
+
+    def _enter(self, ctx):
+        with self._lock:
+            entry = self._active.get(id(ctx))
+            self._active[id(ctx)] = (ctx, entry[1] + 1 if entry else 1)
+
+    def _leave(self, ctx):
+        with self._lock:
+            entry = self._active[id(ctx)]
+            if entry[1] == 1:
+                del self._active[id(ctx)]
+            else:
+                self._active[id(ctx)] = (ctx, entry[1] - 1)
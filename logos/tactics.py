@@ -0,0 +1,97 @@
+# logos/tactics.py
+
+import os
+
+# Классы задач и конвейеры тактик для них. Выбор сделан по корпусу
+# benchmarks/bench_tactics.py: на малых линейных задачах из равенств-фактов
+# (Client.run, ForensicSolver, алгебра) предобработка сокращает задачу до ядра smt.
+# Пропозициональные КНФ и прочие классы (смешанная арифметика, mod / to_int,
+# нелинейность, кванторы) остаются на решателе по умолчанию: выигрыша на корпусе нет.
+PIPELINES = {
+    "linear_real": ("simplify", "propagate-values", "solve-eqs", "smt"),
+    "linear_int": ("simplify", "propagate-values", "solve-eqs", "smt"),
+}
+
+# Проверки (probes) Z3 в порядке приоритета: первая истинная задает класс
+_PROBES = (
+    ("has-quantifiers", "default"),
+    ("is-propositional", "propositional"),
+    ("is-qflra", "linear_real"),
+    ("is-qflia", "linear_int"),
+)
+
+
+def enabled() -> bool:
+    """LOGOS_Z3_TACTICS=0 отключает выбор тактик: все задачи идут в решатель по умолчанию."""
+    return os.environ.get("LOGOS_Z3_TACTICS", "1") != "0"
+
+
+def _raw(assertions, ctx) -> list:
+    """
+    Указатели Z3_ast утверждений (список выражений или AstVector из parse_smt2_string).
+    Goal.add / Solver.add проверяют каждый аргумент в Python — на сотнях клауз это
+    дороже самой проверки, поэтому утверждения передаются через C API напрямую.
+    """
+    import z3
+    if isinstance(assertions, z3.AstVector):
+        return [z3.Z3_ast_vector_get(ctx.ref(), assertions.vector, i) for i in range(len(assertions))]
+    return [assertion.as_ast() for assertion in assertions]
+
+
+def classify(assertions, ctx) -> str:
+    """
+    Класс задачи по построенным ограничениям: "propositional", "linear_real",
+    "linear_int" или "default". Проверяется пробами Z3 на Goal — без обхода AST в Python;
+    пробы is-qflra / is-qflia понимают только нормализованные термы (x + -1*y, а не x - y),
+    поэтому цель сначала проходит simplify.
+    """
+    import z3
+    goal = z3.Goal(ctx=ctx)
+    for ast in _raw(assertions, ctx):
+        z3.Z3_goal_assert(ctx.ref(), goal.goal, ast)
+    goal = z3.Tactic("simplify", ctx)(goal)[0]
+    if goal.size() == 0:
+        return "default"
+    for probe, problem_class in _PROBES:
+        if z3.Probe(probe, ctx)(goal):
+            return problem_class
+    return "default"
+
+
+def make_solver(ctx, assertions=(), problem_class: str = None):
+    """
+    Решатель под класс задачи с уже добавленными assertions. Класс определяется
+    classify(), если не задан явно. У решателя выставлен атрибут logos_class —
+    по нему check() решает, есть ли куда откатываться, а профиль запроса считает классы;
+    классы без конвейера в PIPELINES решает z3.Solver по умолчанию.
+    """
+    import z3
+    if not isinstance(assertions, z3.AstVector):
+        # Правила-константы ("1 < 2") приходят как bool Python
+        assertions = [a if z3.is_expr(a) else z3.BoolVal(a, ctx) for a in assertions]
+    if problem_class is None:
+        problem_class = classify(assertions, ctx) if enabled() and len(assertions) else "default"
+    pipeline = PIPELINES.get(problem_class) if enabled() else None
+    if pipeline is None:
+        solver = z3.Solver(ctx=ctx)
+    else:
+        steps = [z3.Tactic(name, ctx) for name in pipeline]
+        solver = (z3.Then(*steps, ctx=ctx) if len(steps) > 1 else steps[0]).solver()
+    solver.logos_class = problem_class if enabled() else "default"
+    for ast in _raw(assertions, ctx):
+        z3.Z3_solver_assert(ctx.ref(), solver.solver, ast)
+    return solver
+
+
+def check(budget, solver, handler: str, *assumptions):
+    """
+    budget.check() с откатом: если специализированный конвейер сдался
+    (unknown "incomplete" — тактика неприменима), те же ограничения решает
+    решатель по умолчанию в остатке того же бюджета. Возвращает (outcome, solver),
+    модель нужно брать у возвращенного решателя.
+    """
+    outcome = budget.check(solver, handler, *assumptions)
+    if outcome.unknown and outcome.reason == "incomplete" and getattr(solver, "logos_class", "default") in PIPELINES:
+        fallback = make_solver(solver.ctx, solver.assertions(), problem_class="default")
+        return budget.check(fallback, handler, *assumptions), fallback
+    return outcome, solver
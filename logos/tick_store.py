@@ -0,0 +1,188 @@
+# logos/tick_store.py
+
+import json
+import os
+import threading
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: блокировка только между потоками процесса
+    fcntl = None
+
+# Колонки aggTrades на диске: id агрегированной сделки (a), цена (p), объем (q),
+# время (T, мс) и флаг "покупатель — мейкер" (m)
+TICK_COLUMNS = (("trade_id", np.int64), ("price", np.float64), ("qty", np.float64), ("timestamp", np.int64), ("is_buyer_maker", np.bool_))
+DAY_MS = 86_400_000
+
+
+def merge_ranges(ranges):
+    """Объединяет пересекающиеся и смежные отрезки [начало, конец] (мс включительно)."""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def subtract_ranges(start, end, covered):
+    """Части отрезка [start, end], не покрытые отрезками covered (уже объединенными)."""
+    missing, cursor = [], start
+    for lo, hi in covered:
+        if hi < cursor:
+            continue
+        if lo > end:
+            break
+        if lo > cursor:
+            missing.append((cursor, lo - 1))
+        cursor = max(cursor, hi + 1)
+        if cursor > end:
+            break
+    if cursor <= end:
+        missing.append((cursor, end))
+    return missing
+
+
+def split_range(start_ms, end_ms, parts, min_chunk_ms, max_chunk_ms):
+    """Отрезок [start_ms, end_ms] на куски для параллельной загрузки: около parts кусков в пределах длин."""
+    span = end_ms - start_ms + 1
+    size = min(max_chunk_ms, max(min_chunk_ms, -(-span // max(1, parts))))
+    return [(lo, min(lo + size - 1, end_ms)) for lo in range(start_ms, end_ms + 1, size)]
+
+
+def agg_trade_columns(rows) -> dict:
+    """Сырые aggTrades Binance (a, p, q, T, m) в колонки TICK_COLUMNS."""
+    return {
+        "trade_id": [trade["a"] for trade in rows],
+        "price": [float(trade["p"]) for trade in rows],
+        "qty": [float(trade["q"]) for trade in rows],
+        "timestamp": [trade["T"] for trade in rows],
+        "is_buyer_maker": [trade["m"] for trade in rows],
+    }
+
+
+def agg_trades_frame(rows, cached: dict = None) -> pd.DataFrame:
+    """
+    DataFrame сделок окна (trade_id, price, qty, timestamp как datetime, is_buyer_maker):
+    колонки из кэша плюс свежие сырые сделки rows, без дублей и по возрастанию id.
+    """
+    frames = [pd.DataFrame(cached)] if cached is not None else []
+    if rows or not frames:
+        frames.append(pd.DataFrame(agg_trade_columns(rows)))
+    df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+    if len(frames) > 1:
+        df = df.drop_duplicates("trade_id").sort_values("trade_id", ignore_index=True)
+    df['price'] = df['price'].astype(float)
+    df['qty'] = df['qty'].astype(float)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+    return df
+
+
+class TickStore:
+    """
+    Локальный кэш aggTrades: партиции <root>/<SYMBOL>/<YYYY-MM-DD>/<колонка>.npy
+    (TICK_COLUMNS, сделки по возрастанию id, читаются через mmap) и файл
+    <root>/<SYMBOL>/coverage.json — объединенные отрезки времени, скачанные целиком.
+    Повторные и пересекающиеся расследования берут покрытые отрезки с диска,
+    из сети докачиваются только missing().
+
+    Каталог общий для всех рабочих процессов ForensicJobQueue: слияние партиций и
+    coverage.json идут под исключительной блокировкой <root>/<SYMBOL>/.lock (flock),
+    чтение — под разделяемой, так что колонки дня всегда читаются одного поколения.
+    """
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self, symbol, exclusive):
+        directory = os.path.join(self.root, symbol.upper())
+        os.makedirs(directory, exist_ok=True)
+        if fcntl is None:
+            with self._lock:
+                yield
+            return
+        # Свой дескриптор на каждый вход: flock разных open() исключает и потоки одного процесса
+        with open(os.path.join(directory, ".lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def missing(self, symbol: str, start_ms: int, end_ms: int):
+        return subtract_ranges(int(start_ms), int(end_ms), self.coverage(symbol))
+
+    def coverage(self, symbol: str):
+        with self._locked(symbol, exclusive=False):
+            return self._coverage(symbol)
+
+    def _coverage(self, symbol):
+        path = self._coverage_path(symbol)
+        if not os.path.exists(path):
+            return []
+        with open(path) as f:
+            return [tuple(r) for r in json.load(f)]
+
+    def write(self, symbol: str, start_ms: int, end_ms: int, ticks: dict):
+        """
+        Сохраняет сделки отрезка [start_ms, end_ms] (колонки TICK_COLUMNS, массивы одной
+        длины) и отмечает отрезок скачанным. Сделки сливаются с уже лежащими в партициях
+        дня без дублей по trade_id.
+        """
+        columns = {name: np.asarray(ticks[name], dtype=dtype) for name, dtype in TICK_COLUMNS}
+        days = columns["timestamp"] // DAY_MS
+        with self._locked(symbol, exclusive=True):
+            for day in np.unique(days).tolist():
+                selected = days == day
+                self._merge_day(symbol, day, {name: values[selected] for name, values in columns.items()})
+            ranges = merge_ranges(list(self._coverage(symbol)) + [(int(start_ms), int(end_ms))])
+            path = self._coverage_path(symbol)
+            with open(path + ".tmp", "w") as f:
+                json.dump(ranges, f)
+            os.replace(path + ".tmp", path)
+
+    def read(self, symbol: str, start_ms: int, end_ms: int) -> dict:
+        """Сделки с start_ms <= T <= end_ms по возрастанию id: словарь колонок TICK_COLUMNS."""
+        with self._locked(symbol, exclusive=False):
+            return self._read(symbol, start_ms, end_ms)
+
+    def _read(self, symbol, start_ms, end_ms):
+        parts = {name: [] for name, _ in TICK_COLUMNS}
+        for day in range(int(start_ms) // DAY_MS, int(end_ms) // DAY_MS + 1):
+            directory = self._day_dir(symbol, day)
+            if not os.path.isdir(directory):
+                continue
+            times = np.load(os.path.join(directory, "timestamp.npy"), mmap_mode="r")
+            lo = np.searchsorted(times, start_ms, side="left")
+            hi = np.searchsorted(times, end_ms, side="right")
+            if lo == hi:
+                continue
+            for name, _ in TICK_COLUMNS:
+                parts[name].append(np.array(np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")[lo:hi]))
+        return {name: np.concatenate(parts[name]) if parts[name] else np.empty(0, dtype=dtype) for name, dtype in TICK_COLUMNS}
+
+    def _merge_day(self, symbol, day, columns):
+        directory = self._day_dir(symbol, day)
+        if os.path.isdir(directory):
+            columns = {
+                name: np.concatenate([np.load(os.path.join(directory, f"{name}.npy")), values])
+                for name, values in columns.items()
+            }
+        os.makedirs(directory, exist_ok=True)
+        # id aggTrades растут вместе со временем: сортировка по id дает и порядок по T
+        _, unique = np.unique(columns["trade_id"], return_index=True)
+        for name, values in columns.items():
+            path = os.path.join(directory, f"{name}.npy")
+            np.save(path + ".tmp.npy", values[unique])
+            os.replace(path + ".tmp.npy", path)
+
+    def _day_dir(self, symbol, day):
+        return os.path.join(self.root, symbol.upper(), pd.Timestamp(day * DAY_MS, unit="ms").strftime("%Y-%m-%d"))
+
+    def _coverage_path(self, symbol):
+        return os.path.join(self.root, symbol.upper(), "coverage.json")
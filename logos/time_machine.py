@@ -1,69 +1,76 @@
+import logging
 import requests
-import pandas as pd
-import time
-from datetime import datetime, timezone
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from logos.depth_store import book_from_depth
+from logos.trade_history import TradeHistory
 
-class TimeMachine:
-    BASE_URL = "https://api.binance.com"
+logger = logging.getLogger("logos.time_machine")
 
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            "User-Agent": "Logos-Pathologist/0.5"
-        })
+class TimeMachine(TradeHistory):
+    def __init__(self, depth_store=None, tick_store=None, base_url: str = None, workers: int = 4):
+        super().__init__(depth_store=depth_store, tick_store=tick_store, base_url=base_url)
+        self.workers = workers
+        # requests.Session не потокобезопасна: у каждого потока загрузки своя
+        self._sessions = threading.local()
+        self.session = self._session()
+
+    def _session(self):
+        session = getattr(self._sessions, "session", None)
+        if session is None:
+            session = self._sessions.session = requests.Session()
+            session.headers.update({
+                "User-Agent": "Logos-Pathologist/0.5"
+            })
+        return session
 
     def _get(self, endpoint, params=None):
-        url = f"{self.BASE_URL}{endpoint}"
+        url = f"{self.base_url}{endpoint}"
         try:
-            # DEBUG: Print URL being requested
-            print(f"[DEBUG] Requesting: {url} with params: {params}")
-            response = self.session.get(url, params=params, timeout=10)
-            
-            # DEBUG: Print status code
+            logger.debug("Requesting %s with params %s", url, params)
+            response = self._session().get(url, params=params, timeout=10)
             if response.status_code != 200:
-                print(f"[DEBUG] API Error {response.status_code}: {response.text[:200]}")
-            
+                logger.debug("API error %s: %s", response.status_code, response.text[:200])
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
-            print(f"[TimeMachine] CRITICAL NETWORK ERROR: {e}")
+            logger.error("%s %s: %s", endpoint, params, e)
             return None
 
     def get_orderbook_snapshot(self, symbol: str, limit: int = 1000):
         endpoint = "/api/v3/depth"
         params = {"symbol": symbol.upper(), "limit": limit}
-        print(f"[TimeMachine] Downloading Order Book for {symbol}...")
+        logger.debug("Downloading order book for %s", symbol)
         data = self._get(endpoint, params)
         if not data: return None
-        
-        bids = pd.DataFrame(data['bids'], columns=['price', 'qty'], dtype=float)
-        asks = pd.DataFrame(data['asks'], columns=['price', 'qty'], dtype=float)
-        bids['side'] = 'bid'
-        asks['side'] = 'ask'
-        return {"lastUpdateId": data['lastUpdateId'], "bids": bids, "asks": asks}
+        return book_from_depth(data)
 
     def get_historical_agg_trades(self, symbol: str, start_time_ms: int, end_time_ms: int):
-        endpoint = "/api/v3/aggTrades"
-        params = {
-            "symbol": symbol.upper(),
-            "startTime": start_time_ms,
-            "endTime": end_time_ms,
-            "limit": 1000
-        }
-        print(f"[TimeMachine] Fetching trades for {symbol}...")
-        data = self._get(endpoint, params)
-        
-        if not data: 
-            print("[DEBUG] Received empty data or None from _get")
-            return pd.DataFrame()
+        """
+        Все aggTrades окна [start_time_ms, end_time_ms]: окно режется на куски
+        (не длиннее часа, до workers параллельно), каждый кусок листается по fromId
+        до конца, без обрезки на 1000 сделках. С tick_store из сети качаются только
+        непокрытые кэшем отрезки. При ошибке сети — пустой DataFrame, как и раньше.
+        """
+        symbol = symbol.upper()
+        start_time_ms, end_time_ms = int(start_time_ms), int(end_time_ms)
+        logger.debug("Fetching trades for %s", symbol)
+        missing, chunks = self._plan(symbol, start_time_ms, end_time_ms, self.workers)
+        if len(chunks) > 1 and self.workers > 1:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(chunks))) as pool:
+                pages = list(pool.map(lambda item: self._fetch_window(symbol, *item[1]), chunks))
+        else:
+            pages = [self._fetch_window(symbol, *chunk) for _, chunk in chunks]
+        if any(rows is None for rows in pages):
+            logger.debug("%s: no data for part of [%s, %s]", symbol, start_time_ms, end_time_ms)
+        return self._assemble(symbol, start_time_ms, end_time_ms, missing, chunks, pages)
 
-        df = pd.DataFrame(data)
-        if df.empty:
-            print("[DEBUG] DataFrame is empty after parsing JSON")
-            return df
-            
-        df = df.rename(columns={'a': 'trade_id', 'p': 'price', 'q': 'qty', 'T': 'timestamp', 'm': 'is_buyer_maker'})
-        df['price'] = df['price'].astype(float)
-        df['qty'] = df['qty'].astype(float)
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-        return df
+    def _fetch_window(self, symbol, start_ms, end_ms):
+        """Одно окно целиком по _window_requests(): сделки или None при ошибке сети."""
+        pager = self._window_requests(symbol, start_ms, end_ms)
+        try:
+            request = next(pager)
+            while True:
+                request = pager.send(self._get(*request))
+        except StopIteration as done:
+            return done.value
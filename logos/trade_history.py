@@ -0,0 +1,99 @@
+# logos/trade_history.py
+
+import time
+import pandas as pd
+from logos.tick_store import agg_trade_columns, agg_trades_frame, split_range
+
+AGG_TRADES = "/api/v3/aggTrades"
+
+
+class TradeHistory:
+    """
+    Общая часть TimeMachine (requests, потоки) и AsyncTimeMachine (httpx, asyncio):
+    стакан из DepthStore, разбиение окна aggTrades на куски, листание куска по fromId
+    и кэш TickStore. Подклассы задают только транспорт — как выполнить запросы,
+    которые выдает _window_requests(), и как загрузить куски одновременно.
+    """
+    BASE_URL = "https://api.binance.com"
+    # Максимум сделок в ответе /api/v3/aggTrades и максимальное окно startTime..endTime
+    AGG_TRADES_LIMIT = 1000
+    MAX_WINDOW_MS = 3_600_000 - 1
+    # Окно не дробится на куски короче минуты: мелкие запросы дороже параллельности
+    MIN_CHUNK_MS = 60_000
+    # Сделки последних секунд еще могут прийти: такие отрезки не отмечаются в кэше скачанными
+    SETTLE_MS = 60_000
+
+    def __init__(self, depth_store=None, tick_store=None, base_url: str = None):
+        # logos.depth_store.DepthStore: стакан на момент сделки без обращения к сети
+        self.depth_store = depth_store
+        # logos.tick_store.TickStore: скачанные aggTrades, повторные окна не идут в сеть
+        self.tick_store = tick_store
+        self.base_url = base_url or self.BASE_URL
+
+    def get_orderbook_at(self, symbol: str, timestamp_ms: int, limit: int = 1000):
+        """
+        Стакан на момент timestamp_ms из локального хранилища глубины. None — хранилище
+        не подключено или не покрывает этот момент; сеть не используется: текущий
+        /api/v3/depth не описывает ликвидность в прошлом.
+        """
+        if self.depth_store is None:
+            return None
+        coverage = self.depth_store.coverage(symbol)
+        if coverage is None or timestamp_ms < coverage[0]:
+            return None
+        return self.depth_store.book_at(symbol, timestamp_ms, limit=limit)
+
+    def _plan(self, symbol, start_ms, end_ms, parts):
+        """
+        Отрезки окна, которых нет в кэше (все окно без tick_store), и их куски
+        для одновременной загрузки: [(номер отрезка, (начало, конец))].
+        """
+        store = self.tick_store
+        missing = store.missing(symbol, start_ms, end_ms) if store is not None else [(start_ms, end_ms)]
+        chunks = [
+            (index, chunk)
+            for index, (lo, hi) in enumerate(missing)
+            for chunk in split_range(lo, hi, parts, self.MIN_CHUNK_MS, self.MAX_WINDOW_MS)
+        ]
+        return missing, chunks
+
+    def _assemble(self, symbol, start_ms, end_ms, missing, chunks, pages) -> pd.DataFrame:
+        """
+        DataFrame окна из загруженных кусков pages (по порядку chunks): устоявшиеся
+        отрезки пишутся в tick_store, окно читается из него вместе со свежими сделками.
+        Хотя бы один кусок не загрузился (None) — пустой DataFrame, кэш не меняется.
+        """
+        if any(rows is None for rows in pages):
+            return pd.DataFrame()
+        fetched = [[] for _ in missing]
+        for (index, _), rows in zip(chunks, pages):
+            fetched[index].extend(rows)
+        store = self.tick_store
+        if store is None:
+            return agg_trades_frame(fetched[0] if fetched else [])
+
+        settled = int(time.time() * 1000) - self.SETTLE_MS
+        fresh = []
+        for (lo, hi), rows in zip(missing, fetched):
+            if hi <= settled:
+                store.write(symbol, lo, hi, agg_trade_columns(rows))
+            else:
+                fresh.extend(rows)
+        return agg_trades_frame(fresh, store.read(symbol, start_ms, end_ms))
+
+    def _window_requests(self, symbol, start_ms, end_ms):
+        """
+        Листание одного окна без транспорта: генератор выдает (endpoint, params) и
+        получает через send() ответ (список сделок или None). Первая страница — по
+        startTime / endTime, следующие — по fromId последней сделки, пока страница
+        полная и не вышла за end_ms. Возвращает сделки окна или None при ошибке.
+        """
+        limit = self.AGG_TRADES_LIMIT
+        page = yield AGG_TRADES, {"symbol": symbol, "startTime": start_ms, "endTime": end_ms, "limit": limit}
+        rows = []
+        while page is not None:
+            rows.extend(trade for trade in page if trade["T"] <= end_ms)
+            if len(page) < limit or page[-1]["T"] > end_ms:
+                return rows
+            page = yield AGG_TRADES, {"symbol": symbol, "fromId": page[-1]["a"] + 1, "limit": limit}
+        return None
@@ -0,0 +1,221 @@
+# tests/test_async_time_machine.py
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import pytest
+from logos.async_time_machine import AsyncTimeMachine, WeightLimiter, request_weight, retry_after_seconds
+from logos.tick_store import TickStore
+
+pytest.importorskip("httpx")
+
+START = 1_700_000_000_000
+
+
+def make_trades(n, start=START):
+    return [{"a": 100 + i, "p": "100.00", "q": "0.5", "f": 0, "l": 0, "T": start + 2 * i, "m": bool(i % 2)} for i in range(n)]
+
+
+class StubServer(ThreadingHTTPServer):
+    # Очередь accept больше числа соединений пула: иначе лишние SYN ждут повтора ~1 с
+    request_queue_size = 64
+
+
+class BinanceStub:
+    """
+    Локальный сервер с /api/v3/aggTrades и /api/v3/depth: каждый ответ задерживается
+    на delay, несет X-MBX-USED-WEIGHT-1M; failures — очередь статусов (или пар
+    статус, заголовки), которыми отвечают первые запросы (с Retry-After для 429).
+    """
+    def __init__(self, trades, delay=0.0):
+        self.trades = trades
+        self.delay = delay
+        self.failures = []
+        self.requests = []
+        self.peers = []
+        self.used_weight = 0
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = {key: values[0] if key == "symbol" else int(values[0]) for key, values in parse_qs(url.query).items()}
+                with stub.lock:
+                    stub.requests.append((url.path, query, time.perf_counter()))
+                    stub.peers.append(self.client_address)
+                    status = stub.failures.pop(0) if stub.failures else 200
+                    stub.used_weight += request_weight(url.path, query)
+                status, headers = status if isinstance(status, tuple) else (status, {"Retry-After": "0.05"} if status == 429 else {})
+                time.sleep(stub.delay)
+                if status != 200:
+                    return self._reply(status, {"code": -1, "msg": "stub failure"}, headers)
+                if url.path == "/api/v3/depth":
+                    if query["symbol"] == "NOPE":
+                        return self._reply(400, {"code": -1121, "msg": "Invalid symbol."})
+                    return self._reply(200, {"lastUpdateId": 42, "bids": [["99.5", "2"], ["99.0", "1"]], "asks": [["100.5", "3"]]})
+                limit = min(query.get("limit", 500), 1000)
+                if "fromId" in query:
+                    page = [t for t in stub.trades if t["a"] >= query["fromId"]]
+                else:
+                    page = [t for t in stub.trades if query["startTime"] <= t["T"] <= query["endTime"]]
+                self._reply(200, page[:limit])
+
+            def _reply(self, status, payload, headers=()):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("X-MBX-USED-WEIGHT-1M", str(stub.used_weight))
+                for key, value in dict(headers).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = StubServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    server = BinanceStub(make_trades(3000), delay=0.1)
+    yield server
+    server.close()
+
+
+def machine(stub, **kwargs):
+    kwargs.setdefault("limiter", WeightLimiter())
+    return AsyncTimeMachine(base_url=stub.url, backoff=0.01, **kwargs)
+
+
+def test_fetch_context_runs_requests_concurrently(stub, tmp_path):
+    tm = machine(stub, tick_store=TickStore(str(tmp_path)))
+    tm.MIN_CHUNK_MS = 1000
+    stub.delay = 0.2
+    timestamp = START + 5000
+
+    async def scenario():
+        async with tm:
+            started = time.perf_counter()
+            context = await tm.fetch_context("btcusdt", timestamp, before_ms=5000, after_ms=1000)
+            return context, time.perf_counter() - started
+
+    context, elapsed = asyncio.run(scenario())
+    expected = [t["a"] for t in stub.trades if START <= t["T"] <= timestamp + 1000]
+    assert context["trades"]["trade_id"].tolist() == expected
+    assert context["orderbook_source"] == "snapshot" and context["orderbook"]["lastUpdateId"] == 42
+    assert list(context["orderbook"]["bids"]["price"]) == [99.5, 99.0]
+    # Семь секундных кусков окна и стакан: по 0.2 с каждый, но одновременно, а не 1.6 с подряд
+    windows = [query for path, query, _ in stub.requests if "startTime" in query]
+    assert len(windows) == 7 and len(stub.requests) == 8
+    assert elapsed < 0.8
+
+    stats = tm.latency()
+    assert stats["/api/v3/depth"]["requests"] == 1 and stats["/api/v3/depth"]["weight"] == 5
+    assert stats["/api/v3/aggTrades"]["weight"] == 4 * stats["/api/v3/aggTrades"]["requests"]
+    assert 190 <= stats["/api/v3/aggTrades"]["p50_ms"] <= stats["/api/v3/aggTrades"]["max_ms"]
+
+
+def test_retries_server_errors_and_rate_limits(stub):
+    stub.delay = 0.0
+    stub.failures = [503, 429]
+    tm = machine(stub)
+    book = tm.call(tm.get_orderbook_snapshot("BTCUSDT", limit=100))
+    assert book is not None and book["lastUpdateId"] == 42
+    assert [entry["status"] for entry in tm.request_log] == [503, 429, 200]
+    assert [entry["attempt"] for entry in tm.request_log] == [0, 1, 2]
+    # После 429 повтор ждет Retry-After
+    assert stub.requests[2][2] - stub.requests[1][2] >= 0.05
+    assert tm.latency()["/api/v3/depth"]["retries"] == 2
+
+    # Ошибка запроса не повторяется, исчерпанные повторы дают None
+    assert tm.call(tm.get_orderbook_snapshot("NOPE")) is None and tm.request_log[-1]["attempt"] == 0
+    stub.failures = [500] * 4
+    tm.retries = 2
+    assert tm.call(tm.get_orderbook_snapshot("BTCUSDT")) is None
+    assert [entry["status"] for entry in tm.request_log][-3:] == [500, 500, 500]
+
+
+def test_retry_after_http_date(stub):
+    now = 1_445_412_480.0  # Wed, 21 Oct 2015 07:28:00 GMT
+    assert retry_after_seconds("Wed, 21 Oct 2015 07:28:02 GMT", now=now) == 2.0
+    assert retry_after_seconds("Wed, 21 Oct 2015 07:27:00 GMT", now=now) == 0.0
+    assert retry_after_seconds("1.5") == 1.5 and retry_after_seconds("-3") == 0.0
+    assert retry_after_seconds("soon") is None and retry_after_seconds("inf") is None and retry_after_seconds(None) is None
+
+    # Дата в прошлом — повтор сразу, неразборчивое значение — своя пауза; расследование не падает
+    stub.delay = 0.0
+    stub.failures = [(429, {"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}), (503, {"Retry-After": "soon"})]
+    tm = machine(stub)
+    assert tm.call(tm.get_orderbook_snapshot("BTCUSDT", limit=100)) is not None
+    assert [entry["status"] for entry in tm.request_log] == [429, 503, 200]
+    tm.close()
+
+
+def test_call_reuses_connection_between_calls(stub):
+    stub.delay = 0.0
+    tm = machine(stub)
+    for _ in range(3):
+        assert tm.call(tm.get_orderbook_snapshot("BTCUSDT", limit=100)) is not None
+    # Расследования рабочего процесса идут через одно keep-alive соединение
+    assert len(stub.peers) == 3 and len(set(stub.peers)) == 1
+    tm.close()
+    assert tm.call(tm.get_orderbook_snapshot("BTCUSDT", limit=100)) is not None
+    assert len(set(stub.peers)) == 2
+    tm.close()
+
+
+def test_network_error_returns_empty_frame(stub):
+    tm = AsyncTimeMachine(base_url=stub.url, retries=1, backoff=0.01, limiter=WeightLimiter())
+    stub.close()
+    frame = tm.call(tm.get_historical_agg_trades("BTCUSDT", START, START + 100))
+    assert frame.empty and [entry["status"] for entry in tm.request_log] == [None, None]
+
+
+def test_weight_limiter_waits_for_window():
+    limiter = WeightLimiter(limit=20, window=0.3, safety=1.0)
+
+    async def scenario():
+        started = time.perf_counter()
+        waits = await asyncio.gather(*(limiter.acquire(5) for _ in range(6)))
+        return waits, time.perf_counter() - started
+
+    waits, elapsed = asyncio.run(scenario())
+    # Четыре запроса по 5 укладываются в 20, пятый и шестой ждут конца окна
+    assert sum(1 for wait in waits if wait == 0) == 4 and elapsed >= 0.25
+    assert limiter.used() == 10
+
+    # Заголовок биржи учитывает чужой вес: при исчерпанном лимите ждем и без своих запросов
+    limiter = WeightLimiter(limit=20, window=0.2, safety=1.0)
+    limiter.observe("19")
+    started = time.perf_counter()
+    asyncio.run(limiter.acquire(5))
+    assert time.perf_counter() - started >= 0.15
+    assert request_weight("/api/v3/depth", {"limit": 5000}) == 250 and request_weight("/api/v3/depth", {"limit": 500}) == 25
+
+
+def test_shared_limiter_spaces_bulk_requests(stub):
+    stub.delay = 0.0
+    limiter = WeightLimiter(limit=20, window=0.3, safety=1.0)
+    tm = machine(stub, limiter=limiter)
+
+    async def scenario():
+        async with tm:
+            return await asyncio.gather(*(tm.get_orderbook_snapshot("BTCUSDT", limit=100) for _ in range(6)))
+
+    assert all(book is not None for book in asyncio.run(scenario()))
+    times = sorted(moment for _, _, moment in stub.requests)
+    assert times[-1] - times[0] >= 0.25 and tm.latency()["/api/v3/depth"]["waited_ms"] > 0
@@ -0,0 +1,133 @@
+# tests/test_cache.py
+
+import json
+import os
+import pytest
+from logos import cache as cache_module
+from logos.cache import VerdictCache
+from logos.client import Client
+from logos.delegator import Delegator
+
+
+@pytest.fixture
+def ruleset_dir(tmp_path):
+    (tmp_path / "compliance.json").write_text(json.dumps({"rules": ["amount < 10000", "risk_score <= 0.85"]}))
+    return tmp_path
+
+
+def _touch(path, rules):
+    path.write_text(json.dumps({"rules": rules}))
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def test_keys_are_canonical():
+    key = VerdictCache.make_key("run", "compliance", "abc", {"risk_score": 0.7, "amount": 9500})
+    assert key == VerdictCache.make_key("run", "compliance", "abc", {"amount": 9500.0, "risk_score": 0.70})
+    assert key != VerdictCache.make_key("run", "compliance", "abd", {"amount": 9500, "risk_score": 0.7})
+    assert key != VerdictCache.make_key("run", "timing", "abc", {"amount": 9500, "risk_score": 0.7})
+    assert (VerdictCache.make_key("audit", "c", "abc", {"amount": 9500}, typed=True)
+            != VerdictCache.make_key("audit", "c", "abc", {"amount": 9500.0}, typed=True))
+
+
+def test_lru_eviction_and_counters():
+    cache = VerdictCache(maxsize=2)
+    for name in ("a", "b"):
+        cache.put(name, "rs", {"result": name})
+    assert cache.get("a") == {"result": "a"}
+    cache.put("c", "rs", {"result": "c"})  # вытесняет "b" — давно не использовался
+    assert cache.get("b") is None
+    assert cache.get("c") == {"result": "c"}
+    assert cache.stats() == {
+        "hits": 2, "misses": 1, "evictions": 1, "expirations": 0,
+        "invalidations": 0, "disk_hits": 0, "disk_errors": 0, "size": 2,
+    }
+
+
+def test_ttl_expiration(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: now[0])
+    cache = VerdictCache(ttl=10)
+    cache.put("k", "rs", "отчет")
+    now[0] += 5
+    assert cache.get("k") == "отчет"
+    now[0] += 6
+    assert cache.get("k") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_hits_return_copies():
+    cache = VerdictCache()
+    cache.put("k", "rs", {"triggered_rules": ["amount < 10000"]})
+    cache.get("k")["triggered_rules"].append("мусор")
+    assert cache.get("k") == {"triggered_rules": ["amount < 10000"]}
+
+
+def test_client_run_hits_cache(ruleset_dir):
+    client = Client(verdict_cache=VerdictCache())
+    client.load_ruleset(str(ruleset_dir))
+    first = client.run("amount=9500 risk_score=0.7")
+    assert client.run("amount=9500.0 risk_score=0.70") == first
+    assert client.verdict_cache.stats()["hits"] == 1
+    assert client.verdict_cache.stats()["misses"] == 1
+
+
+def test_client_invalidates_when_ruleset_file_changes(ruleset_dir):
+    client = Client(verdict_cache=VerdictCache())
+    client.load_ruleset(str(ruleset_dir))
+    assert client.run("amount=9500 risk_score=0.7")["result"] == "approved"
+
+    _touch(ruleset_dir / "compliance.json", ["amount < 5000", "risk_score <= 0.85"])
+    assert client.run("amount=9500 risk_score=0.7")["result"] == "denied"
+    assert client.rulesets["compliance"][0] == "amount < 5000"
+    assert client.verdict_cache.stats()["invalidations"] == 1
+
+
+def test_delegator_reports_are_cached(ruleset_dir):
+    client = Client(verdict_cache=VerdictCache())
+    client.load_ruleset(str(ruleset_dir))
+    delegator = Delegator(client)
+    prompt = "Проверь транзакцию на сумму 12000 с оценкой риска 0.5 по набору правил 'compliance'"
+    report = delegator.analyze_and_translate(prompt)
+    assert "Обнаружено нарушений: 1" in report
+    assert delegator.analyze_and_translate(prompt) == report
+    assert client.verdict_cache.stats()["hits"] == 1
+
+    _touch(ruleset_dir / "compliance.json", ["amount < 20000"])
+    assert "Проверка пройдена" in delegator.analyze_and_translate(prompt)
+
+
+def test_disk_tier_is_shared_between_caches(tmp_path):
+    path = str(tmp_path / "verdicts.sqlite")
+    writer, reader = VerdictCache(path=path), VerdictCache(path=path)
+    key = VerdictCache.make_key("run", "compliance", "abc", {"amount": 9500})
+    writer.put(key, "compliance", {"result": "approved"})
+    assert reader.get(key) == {"result": "approved"}
+    assert reader.stats()["disk_hits"] == 1
+    assert reader.get(key) == {"result": "approved"}  # уже из памяти
+    assert reader.stats()["disk_hits"] == 1
+
+    writer.invalidate("compliance")
+    assert VerdictCache(path=path).get(key) is None
+
+
+def test_disk_errors_fall_back_to_memory(tmp_path, capsys):
+    cache = VerdictCache(path=str(tmp_path / "missing" / "verdicts.sqlite"))
+    cache.put("k", "rs", "отчет")
+    assert cache.get("k") == "отчет"
+    assert cache.stats()["disk_errors"] >= 1
+    assert "Дисковый кэш вердиктов недоступен" in capsys.readouterr().out
+
+
+def test_disk_tier_is_shared_between_processes(tmp_path):
+    import subprocess
+    import sys
+    path = str(tmp_path / "verdicts.sqlite")
+    key = VerdictCache.make_key("run", "compliance", "abc", {"amount": 9500})
+    VerdictCache(path=path).put(key, "compliance", {"result": "approved"})
+    script = (
+        "import sys; from logos.cache import VerdictCache; "
+        "c = VerdictCache(path=sys.argv[1]); print(c.get(sys.argv[2])['result'], c.stats()['disk_hits'])"
+    )
+    output = subprocess.run([sys.executable, "-c", script, path, key], capture_output=True, text=True, check=True).stdout
+    assert output.split() == ["approved", "1"]
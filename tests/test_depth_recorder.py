@@ -0,0 +1,109 @@
+# tests/test_depth_recorder.py
+
+import asyncio
+import json
+import pandas as pd
+import pytest
+from logos.depth_recorder import DepthRecorder
+from logos.depth_store import DepthStore
+from test_depth_store import as_levels, make_fixture
+
+websockets = pytest.importorskip("websockets")
+
+
+def contiguous(stream):
+    """События фикстуры с U = u предыдущего + 1, как в потоке Binance."""
+    events, previous = [], None
+    for event in stream:
+        event = dict(event)
+        if previous is not None:
+            event["U"] = previous + 1
+        previous = event["u"]
+        events.append(event)
+    return events
+
+
+def book_after(snapshot, stream, update_id):
+    """Эталонный стакан после всех событий с u <= update_id."""
+    _, snapshot_id, bids, asks = snapshot
+    book = {"b": dict(bids), "a": dict(asks)}
+    for event in stream:
+        if snapshot_id < event["u"] <= update_id:
+            for side in ("b", "a"):
+                for price, qty in event[side]:
+                    if float(qty):
+                        book[side][float(price)] = float(qty)
+                    else:
+                        book[side].pop(float(price), None)
+    return book
+
+
+class SnapshotSource:
+    """Вместо AsyncTimeMachine: снимки /api/v3/depth по очереди из lastUpdateId."""
+    def __init__(self, snapshot, stream, update_ids):
+        self.snapshot, self.stream, self.update_ids = snapshot, stream, list(update_ids)
+        self.requests = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    async def get_orderbook_snapshot(self, symbol, limit=1000):
+        update_id = self.update_ids[min(self.requests, len(self.update_ids) - 1)]
+        self.requests += 1
+        book = book_after(self.snapshot, self.stream, update_id)
+        return {
+            "lastUpdateId": update_id,
+            "bids": pd.DataFrame(sorted(book["b"].items(), reverse=True), columns=["price", "qty"]),
+            "asks": pd.DataFrame(sorted(book["a"].items()), columns=["price", "qty"]),
+        }
+
+
+def test_recorder_syncs_stream_with_snapshots_and_resyncs_on_gap(tmp_path):
+    snapshots, stream = make_fixture(seed=5, events=300)
+    stream = contiguous(stream)
+    gap = 150
+    # Сервер теряет одно событие: после разрыва нужен новый снимок
+    sent = stream[:gap] + stream[gap + 1:]
+    resync_id = stream[gap + 20]["u"]
+    source = SnapshotSource(snapshots[0], stream, [snapshots[0][1], resync_id])
+    store = DepthStore(str(tmp_path))
+
+    async def scenario():
+        async def serve(ws):
+            for event in sent:
+                await ws.send(json.dumps({"stream": "btcusdt@depth@100ms", "data": event}))
+            await ws.wait_closed()
+
+        async with websockets.serve(serve, "127.0.0.1", 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            recorder = DepthRecorder(store, ["btcusdt"], time_machine=source, stream_url=f"ws://127.0.0.1:{port}", flush_interval=0.05)
+            task = asyncio.ensure_future(recorder.run())
+            for _ in range(200):
+                await asyncio.sleep(0.05)
+                coverage = store.coverage("BTCUSDT")
+                if source.requests == 2 and coverage and coverage[1] == stream[-1]["E"]:
+                    break
+            recorder.stop()
+            await asyncio.wait_for(task, timeout=10)
+            return recorder
+
+    recorder = asyncio.run(scenario())
+    assert recorder.resyncs == 2 and recorder.snapshots == 2
+
+    # Читает другой экземпляр, как рабочий расследований
+    reader = DepthStore(str(tmp_path))
+    recorded = [entry[:2] for entry in reader._index("BTCUSDT")["snapshots"]]
+    assert [update_id for _, update_id in recorded] == [snapshots[0][1], resync_id]
+    first_after = {update_id: next(e["E"] for e in stream if e["u"] > update_id) for _, update_id in recorded}
+    assert [ts for ts, _ in recorded] == [first_after[update_id] - 1 for _, update_id in recorded]
+
+    # До разрыва и после нового снимка стакан совпадает с эталоном по каждому событию
+    for event in stream[1:gap] + [e for e in stream if e["u"] > resync_id]:
+        if any(other["E"] == event["E"] and other["u"] > event["u"] for other in stream):
+            continue  # несколько событий в одну миллисекунду: сверяем по последнему
+        book = book_after(snapshots[0], stream, event["u"])
+        expected = (sorted(book["b"].items(), reverse=True), sorted(book["a"].items()))
+        assert as_levels(reader.book_at("BTCUSDT", event["E"])) == expected
@@ -0,0 +1,150 @@
+# tests/test_depth_store.py
+
+import random
+import numpy as np
+import pytest
+from logos.depth_store import DepthStore
+
+
+def make_fixture(seed=0, events=400, start=1_700_000_000_000):
+    """
+    Синтетическая глубина: снимок на start с updateId 1000, затем события depthUpdate
+    каждые 0-20 мс (u растет на 1-3), второй снимок посередине. Возвращает
+    (снимки [(ts, u, bids, asks)], события) в формате потока Binance.
+    """
+    rng = random.Random(seed)
+    bids = {round(100 - 0.1 * i, 1): rng.randint(1, 9) for i in range(1, 20)}
+    asks = {round(100 + 0.1 * i, 1): rng.randint(1, 9) for i in range(20)}
+    snapshots = [(start, 1000, sorted(bids.items()), sorted(asks.items()))]
+    ts, update_id, stream = start + 1, 1000, []
+    # Событие, уже учтенное в снимке (u <= lastUpdateId), должно отбрасываться
+    stream.append({"s": "BTCUSDT", "E": ts, "U": 990, "u": 1000, "b": [["99.9", "777"]], "a": []})
+    for step in range(events):
+        ts += rng.randint(0, 20)
+        update_id += rng.randint(1, 3)
+        event = {"s": "BTCUSDT", "E": ts, "U": update_id, "u": update_id, "b": [], "a": []}
+        for _ in range(rng.randint(1, 4)):
+            side, book = rng.choice([("b", bids), ("a", asks)])
+            price = round(100 + (-0.1 if side == "b" else 0.1) * rng.randint(0, 25), 1)
+            qty = 0 if rng.random() < 0.3 else rng.randint(1, 9)
+            event[side].append([f"{price:.1f}", str(qty)])
+            if qty:
+                book[price] = qty
+            else:
+                book.pop(price, None)
+        stream.append(event)
+        if step == events // 2:
+            snapshots.append((ts + 1, update_id, sorted(bids.items()), sorted(asks.items())))
+    return snapshots, stream
+
+
+def replay(snapshots, stream, at):
+    """Эталон: последний снимок до at и все события после него по порядку, словарями."""
+    ts, snapshot_id, bids, asks = [s for s in snapshots if s[0] <= at][-1]
+    book = {"b": dict(bids), "a": dict(asks)}
+    for event in stream:
+        if ts < event["E"] <= at and event["u"] > snapshot_id:
+            for side in ("b", "a"):
+                for price, qty in event[side]:
+                    if float(qty):
+                        book[side][float(price)] = float(qty)
+                    else:
+                        book[side].pop(float(price), None)
+    return (sorted(book["b"].items(), reverse=True), sorted(book["a"].items()))
+
+
+def load(store, snapshots, stream):
+    # Снимки и диффы пишутся независимо: имя символа приводится к верхнему регистру
+    for ts, update_id, bids, asks in snapshots:
+        store.record_snapshot("btcusdt", ts, bids, asks, update_id)
+    for event in stream:
+        store.record_depth_event(event)
+
+
+def as_levels(book):
+    return (list(zip(book["bids"]["price"], book["bids"]["qty"])), list(zip(book["asks"]["price"], book["asks"]["qty"])))
+
+
+def test_book_at_matches_replay_across_segments_and_reopen(tmp_path):
+    snapshots, stream = make_fixture()
+    store = DepthStore(str(tmp_path), segment_rows=64)
+    load(store, snapshots, stream)
+    store.flush()
+    assert len(list((tmp_path / "BTCUSDT" / "diffs").iterdir())) > 5
+
+    reopened = DepthStore(str(tmp_path))
+    first, last = reopened.coverage("BTCUSDT")
+    assert first == snapshots[0][0] and last == stream[-1]["E"]
+    rng = random.Random(1)
+    for at in [first, snapshots[1][0], snapshots[1][0] - 1, last] + [rng.randint(first, last) for _ in range(40)]:
+        for current in (store, reopened):
+            assert as_levels(current.book_at("BTCUSDT", at)) == replay(snapshots, stream, at)
+    assert reopened.book_at("BTCUSDT", first - 1) is None
+
+    book = reopened.book_at("BTCUSDT", last, limit=3)
+    assert len(book["bids"]) == 3 and list(book["bids"]["side"]) == ["bid"] * 3
+    assert book["lastUpdateId"] == stream[-1]["u"]
+
+
+def test_quotes_at_matches_book_at(tmp_path):
+    snapshots, stream = make_fixture(seed=2)
+    store = DepthStore(str(tmp_path), segment_rows=100)
+    load(store, snapshots, stream)
+    rng = np.random.default_rng(0)
+    # Все моменты событий (в том числе удаления лучшего уровня) и случайные, в том числе до снимка
+    times = np.concatenate([[event["E"] for event in stream], rng.integers(snapshots[0][0] - 50, stream[-1]["E"] + 50, 60)])
+    quotes = store.quotes_at("BTCUSDT", times)
+    for ts, best_bid, best_ask in quotes.itertuples(index=False):
+        book = store.book_at("BTCUSDT", int(ts))
+        if book is None:
+            assert np.isnan(best_bid) and np.isnan(best_ask)
+        else:
+            assert best_bid == book["bids"]["price"].iloc[0] and best_ask == book["asks"]["price"].iloc[0]
+
+
+def test_diffs_must_be_recorded_in_time_order(tmp_path):
+    store = DepthStore(str(tmp_path))
+    store.record_diff("ETHUSDT", 2000, bids=[[10.0, 1.0]])
+    with pytest.raises(ValueError):
+        store.record_diff("ETHUSDT", 1999, asks=[[11.0, 1.0]])
+    assert store.book_at("ETHUSDT", 5000) is None and store.coverage("ETHUSDT") is None
+
+
+def test_reader_sees_data_recorded_after_first_read(tmp_path):
+    # Запись и чтение в разных экземплярах — как процесс записи глубины и рабочий расследований
+    snapshots, stream = make_fixture(seed=4)
+    writer = DepthStore(str(tmp_path), segment_rows=50)
+    reader = DepthStore(str(tmp_path))
+    assert reader.coverage("BTCUSDT") is None
+
+    ts, update_id, bids, asks = snapshots[0]
+    writer.record_snapshot("BTCUSDT", ts, bids, asks, update_id)
+    half = len(stream) // 2
+    for event in stream[:half]:
+        writer.record_depth_event(event)
+    writer.flush()
+    assert reader.coverage("BTCUSDT") == (ts, stream[half - 1]["E"])
+
+    for event in stream[half:]:
+        writer.record_depth_event(event)
+    ts, update_id, bids, asks = snapshots[1]
+    writer.record_snapshot("BTCUSDT", ts, bids, asks, update_id)
+    writer.flush()
+    assert reader.coverage("BTCUSDT") == (snapshots[0][0], stream[-1]["E"])
+    for at in (snapshots[1][0], stream[-1]["E"]):
+        assert as_levels(reader.book_at("BTCUSDT", at)) == replay(snapshots, stream, at)
+    # Временные файлы записи в индекс не попадают
+    assert not [path for path in tmp_path.rglob(".*")]
+
+
+def test_writes_do_not_rescan_directories(tmp_path):
+    snapshots, stream = make_fixture(seed=6)
+    store = DepthStore(str(tmp_path), segment_rows=64)
+    calls = []
+    signature = store._signature
+    store._signature = lambda symbol: calls.append(symbol) or signature(symbol)
+    load(store, snapshots, stream)
+    # Индекс писателя загружается с диска один раз, а не на каждое событие потока
+    assert len(calls) == 1 and len(list((tmp_path / "BTCUSDT" / "diffs").iterdir())) > 5
+    at = stream[-1]["E"]
+    assert as_levels(store.book_at("BTCUSDT", at)) == replay(snapshots, stream, at)
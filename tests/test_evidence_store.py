@@ -0,0 +1,97 @@
+# tests/test_evidence_store.py
+
+import io
+import os
+import time
+import numpy as np
+from logos.evidence_store import EvidenceStore, file_digest, pipeline_version
+
+CSV = b"timestamp,symbol,side,price,qty\n1700000000000,BTCUSDT,SELL,98.5,1\n"
+
+
+def test_evidence_is_stored_once_by_content(tmp_path):
+    store = EvidenceStore(str(tmp_path))
+    digest, path = store.put(io.BytesIO(CSV))
+    again, same = store.put(io.BytesIO(CSV))
+    other, _ = store.put(io.BytesIO(CSV + b"1700000000001,BTCUSDT,BUY,99,1\n"))
+    assert digest == again == file_digest(path) and path == same and other != digest
+    assert sorted(os.listdir(tmp_path)) == sorted([f"{digest}.csv", f"{other}.csv"])
+
+
+def test_verdict_roundtrip_by_version_and_report(tmp_path):
+    store = EvidenceStore(str(tmp_path))
+    digest, _ = store.put(io.BytesIO(CSV))
+    report = tmp_path / "VERDICT.pdf"
+    report.write_bytes(b"%PDF")
+    result = {"status": "success", "verdict": "CLEAN", "report_path": str(report), "death_point": {"price": np.float64(98.5)}}
+    assert store.get_verdict(digest) is None
+    store.put_verdict(digest, result)
+    assert store.get_verdict(digest)["death_point"]["price"] == 98.5
+    # Другая версия конвейера — другой ключ
+    assert store.get_verdict(digest, version="000000000000") is None
+    # PDF удален — вердикт пересчитывается
+    report.unlink()
+    assert store.get_verdict(digest) is None
+    assert (store.hits, store.misses) == (1, 3)
+
+
+def test_eviction_controls(tmp_path):
+    store = EvidenceStore(str(tmp_path), max_verdicts=3)
+    digests = [store.put(io.BytesIO(CSV + str(i).encode()))[0] for i in range(5)]
+    for i, digest in enumerate(digests):
+        store.put_verdict(digest, {"verdict": "CLEAN", "n": i})
+        os.utime(os.path.join(tmp_path, "verdicts", f"{digest}.{pipeline_version()}.json"), (time.time() - 100 + i, time.time() - 100 + i))
+    # Предел max_verdicts: остаются три последних, улики вытесненных удалены с ними
+    assert [store.get_verdict(d) is not None for d in digests] == [False, False, True, True, True]
+    assert [os.path.exists(store.evidence_path(d)) for d in digests] == [False, False, True, True, True]
+
+    store.max_verdicts = 0
+    store.put_verdict(digests[0], {"verdict": "CLEAN"}, version="000000000000")
+    assert store.stats()["stale_verdicts"] == 1
+    assert store.evict(stale=True) == 1 and store.stats()["stale_verdicts"] == 0
+
+    assert store.evict(digest=digests[4]) == 1
+    assert store.get_verdict(digests[4]) is None and not os.path.exists(store.evidence_path(digests[4]))
+    old = os.path.join(tmp_path, "verdicts", f"{digests[2]}.{pipeline_version()}.json")
+    os.utime(old, (time.time() - 3600, time.time() - 3600))
+    assert store.evict(max_age=600) == 1 and store.stats()["verdicts"] == 1
+    assert store.evict(max_entries=0) == 1 and store.stats()["evidence_files"] == 0
+
+
+def test_evidence_kept_while_another_version_references_it(tmp_path):
+    store = EvidenceStore(str(tmp_path), max_verdicts=0)
+    digest, path = store.put(io.BytesIO(CSV))
+    pending, pending_path = store.put(io.BytesIO(CSV + b"1"))
+    store.put_verdict(digest, {"verdict": "CLEAN"}, version="000000000000")
+    store.put_verdict(digest, {"verdict": "CLEAN"})
+    assert store.evict(stale=True) == 1 and os.path.exists(path)
+    assert store.evict(max_entries=0) == 1 and not os.path.exists(path)
+    # Улика без вердикта (расследование в очереди) не трогается
+    assert os.path.exists(pending_path)
+
+
+def test_put_verdict_scans_directory_only_over_limit(tmp_path, monkeypatch):
+    store = EvidenceStore(str(tmp_path), max_verdicts=3)
+    scans = []
+    entries = store._entries
+    monkeypatch.setattr(store, "_entries", lambda: scans.append(1) or entries())
+    digests = [store.put(io.BytesIO(CSV + str(i).encode()))[0] for i in range(5)]
+    for digest in digests[:3]:
+        store.put_verdict(digest, {"verdict": "CLEAN"})
+    store.put_verdict(digests[0], {"verdict": "CLEAN"})  # перезапись не меняет число
+    # Один просмотр каталога, чтобы узнать число вердиктов, дальше — счет своих записей
+    assert len(scans) == 1
+    store.put_verdict(digests[3], {"verdict": "CLEAN"})
+    assert len(scans) == 2 and store.stats()["verdicts"] == 3
+    store.put_verdict(digests[4], {"verdict": "CLEAN"})
+    assert store.stats()["verdicts"] == 3
+
+
+def test_stats_skips_evidence_removed_meanwhile(tmp_path, monkeypatch):
+    store = EvidenceStore(str(tmp_path))
+    store.put(io.BytesIO(CSV))
+    listdir = os.listdir
+    # Файл вытеснен другим процессом между listdir и getsize
+    monkeypatch.setattr(os, "listdir", lambda path: listdir(path) + ["0" * 64 + ".csv"])
+    stats = store.stats()
+    assert stats["evidence_files"] == 1 and stats["evidence_bytes"] == len(CSV)
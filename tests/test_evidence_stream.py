@@ -0,0 +1,103 @@
+# tests/test_evidence_stream.py
+
+import os
+import threading
+import time
+import pytest
+from logos.evidence_store import EvidenceStore, file_digest
+from logos.evidence_stream import EvidenceRejected, EvidenceStream, parse_timestamp_ms
+from logos.log_parser import LogParser
+
+
+def make_csv(rows=500, sep=",", header="timestamp,symbol,side,price,qty", stamp=lambda i: str(1_700_000_000_000 + 10 * i)):
+    lines = [header.replace(",", sep)]
+    for i in range(rows):
+        lines.append(sep.join([stamp(i), "BTCUSDT", "buy" if i % 2 else "sell", f"{100 + i % 13 * 0.5:.2f}", "0.25"]))
+    return ("\n".join(lines) + "\n").encode()
+
+
+def ingest(store, data, chunk, **limits):
+    stream = EvidenceStream(store, **limits)
+    for offset in range(0, len(data), chunk):
+        stream.feed(data[offset:offset + chunk])
+    return stream.close()
+
+
+@pytest.mark.parametrize("chunk", [1, 7, 4096, 1 << 20])
+def test_death_trade_matches_log_parser(tmp_path, chunk):
+    store = EvidenceStore(str(tmp_path))
+    data = make_csv(sep=";", header="Time,Pair,Type,Exec_Price,Amount")
+    digest, path, trade = ingest(store, data, chunk)
+    assert path == store.evidence_path(digest) and digest == file_digest(path) and open(path, "rb").read() == data
+    expected = LogParser().last_trade(path)
+    assert {key: trade[key] for key in ("symbol", "side", "price", "qty", "timestamp_ms")} == \
+           {key: expected[key] for key in ("symbol", "side", "price", "qty", "timestamp_ms")}
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".part")]
+
+
+def test_iso_and_unknown_timestamps(tmp_path):
+    store = EvidenceStore(str(tmp_path))
+    data = make_csv(rows=3, stamp=lambda i: f"2023-11-14T22:13:2{i}.125Z")
+    _, path, trade = ingest(store, data, 64)
+    assert trade["timestamp_ms"] == LogParser().last_trade(path)["timestamp_ms"] == 1_700_000_002_125
+    assert parse_timestamp_ms("1700000000.5") == 1_700_000_000_500 and parse_timestamp_ms("14 Nov 2023") is None
+    # Формат, который разбирает только LogParser: сделку найдет рабочий процесс
+    assert ingest(store, make_csv(rows=2, stamp=lambda i: f"14 Nov 2023 22:13:2{i}"), 64)[2] is None
+
+
+def test_limits_reject_early(tmp_path):
+    store = EvidenceStore(str(tmp_path))
+    data = make_csv(rows=5000)
+    for limits in ({"max_bytes": 10_000}, {"max_rows": 100}):
+        stream = EvidenceStream(store, **limits)
+        fed = 0
+        with pytest.raises(EvidenceRejected) as error:
+            for offset in range(0, len(data), 1024):
+                stream.feed(data[offset:offset + 1024])
+                fed += 1024
+        stream.abort()
+        assert error.value.status == 413 and fed < 12_000
+    assert os.listdir(tmp_path) == []
+
+
+def test_abort_waits_for_feed_in_another_thread(tmp_path):
+    # Прокси разбирает куски в пуле потоков, а abort() вызывает отмененный запрос
+    stream = EvidenceStream(EvidenceStore(str(tmp_path)))
+    write, started, errors = stream._out.write, threading.Event(), []
+
+    def slow_write(data):
+        started.set()
+        time.sleep(0.1)
+        return write(data)
+
+    def feed():
+        try:
+            stream.feed(make_csv(rows=50))
+        except Exception as e:
+            errors.append(e)
+
+    stream._out.write = slow_write
+    worker = threading.Thread(target=feed)
+    worker.start()
+    started.wait()
+    stream.abort()
+    worker.join()
+    assert errors == [] and os.listdir(tmp_path) == []
+
+
+@pytest.mark.parametrize("data, message", [
+    (b"timestamp,symbol,price\n1,BTC,2\n", "Missing columns"),
+    (make_csv(rows=5).replace(b"BTCUSDT,buy", b"BTCUSDT", 1), "fields"),
+    (make_csv(rows=5).replace(b"100.50", b"cheap", 1), "price is not a number"),
+    (b"x" * 100_000, "not a CSV"),
+    (b"timestamp,symbol,side,price,qty\n" + bytes(range(128, 256)) + b"\n", "not UTF-8"),
+    (b"", "empty"),
+    (b"timestamp,symbol,side,price,qty\n", "no trades"),
+])
+def test_malformed_files_fail_fast(tmp_path, data, message):
+    store = EvidenceStore(str(tmp_path))
+    with pytest.raises(EvidenceRejected, match=message) as error:
+        # Испорченное начало отклоняется, сколько бы строк ни шло следом
+        tail = make_csv(rows=10_000)[len("timestamp,symbol,side,price,qty\n"):] if message not in ("empty", "no trades") else b""
+        ingest(store, data + tail, 4096)
+    assert error.value.status == 400
@@ -0,0 +1,95 @@
+# tests/test_farm.py
+
+import contextlib
+import io
+import pandas as pd
+import pytest
+from logos.cache import VerdictCache
+from logos.client import Client
+from logos.delegator import Delegator
+from logos.farm import SolverFarm
+
+RULES = '{"rules": ["amount < 10000", "amount / risk_score < 50000", "risk_score <= 0.85"]}'
+
+
+@pytest.fixture(scope="module")
+def ruleset_dir(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("rulesets")
+    (directory / "compliance.json").write_text(RULES)
+    return str(directory)
+
+
+@pytest.fixture(scope="module")
+def farm(ruleset_dir):
+    farm = SolverFarm(ruleset_dir, workers=2).start()
+    yield farm
+    farm.shutdown()
+
+
+@pytest.fixture(scope="module")
+def local(ruleset_dir):
+    client = Client(verdict_cache=VerdictCache(maxsize=0))
+    with contextlib.redirect_stdout(io.StringIO()):
+        client.load_ruleset(ruleset_dir)
+    return client
+
+
+def test_farm_matches_local_client(farm, local):
+    for prompt in ["amount=500 risk_score=0.1", "amount=20000 risk_score=0.1", "amount=5 risk_score=0"]:
+        with contextlib.redirect_stdout(io.StringIO()):
+            expected = local.run(prompt)
+        assert farm.run(prompt) == expected
+    prompt = "Реши уравнение 3*x - y == 5, где x > 0 и y > 0."
+    assert farm.analyze_and_translate(prompt) == Delegator(local).analyze_and_translate(prompt)
+
+
+def test_farm_batch_is_split_and_merged(farm, local):
+    records = pd.DataFrame({"amount": [100.0, 20000.0, 5.0, 700.0, 9000.0], "risk_score": [0.1, 0.1, 0.9, 0.0, 0.5]})
+    expected = local.run_batch(records)
+    response = farm.run_batch(records)
+    assert response["result"] == expected["result"]
+    assert response["details"] == expected["details"]
+    assert response["verdicts"].tolist() == expected["verdicts"].tolist()
+    assert (response["violations"] == expected["violations"]).all()
+    assert farm.run_batch(records.to_dict("records"))["verdicts"].tolist() == expected["verdicts"].tolist()
+
+
+def test_health_reports_warm_workers(farm):
+    health = farm.health()
+    assert health["status"] == "ok"
+    assert health["rulesets"] == ["compliance"]
+    assert health["generation"] >= 1
+    assert all(process["max_rss_kb"] is None or process["max_rss_kb"] > 0 for process in health["processes"].values())
+
+
+def test_workers_are_recycled_after_max_jobs(ruleset_dir):
+    farm = SolverFarm(ruleset_dir, workers=1, max_jobs_per_worker=2)
+    try:
+        results = [farm.run(f"amount={amount} risk_score=0.5")["result"] for amount in (100, 20000, 300, 400, 50000)]
+        assert results == ["approved", "denied", "approved", "approved", "denied"]
+        assert farm.generation == 3
+        assert farm.health()["status"] == "ok"
+    finally:
+        farm.shutdown()
+
+
+def test_broken_pool_is_shut_down_and_replacement_survives(ruleset_dir):
+    import os
+    farm = SolverFarm(ruleset_dir, workers=1).start()
+    try:
+        broken, calls = farm._executor, []
+        shutdown = broken.shutdown
+        broken.shutdown = lambda **kwargs: (calls.append(kwargs), shutdown(**kwargs))
+        # Рабочий процесс убит: обе задачи старого пула завершаются BrokenProcessPool
+        first, second = farm._submit(os._exit, 1), farm._submit(os._exit, 1)
+        assert farm._result(first)[1] is not None
+        assert calls == [{"wait": False, "cancel_futures": True}] and farm._executor is None
+
+        assert farm.run("amount=100 risk_score=0.5")["result"] == "approved"
+        replacement = farm._executor
+        # Поздний сбой задачи старого пула не выбрасывает новый, исправный пул
+        assert farm._result(second)[1] is not None
+        assert farm._executor is replacement and farm.failures == 2 and len(calls) == 1
+        assert farm.run("amount=20000 risk_score=0.5")["result"] == "denied"
+    finally:
+        farm.shutdown()
@@ -0,0 +1,121 @@
+# tests/test_forensic_batch.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from logos.solvers.forensic_solver import ForensicSolver
+from logos.solving import SolveBudget
+
+ORDERBOOK = {"asks": pd.DataFrame({"price": [100.5, 101.0]}), "bids": pd.DataFrame({"price": [100.0, 99.5]})}
+
+
+def test_batch_matches_single_trade_verdicts():
+    rng = np.random.default_rng(3)
+    trades = pd.DataFrame({
+        "price": np.round(rng.uniform(97.0, 104.0, 300), 2),
+        "side": rng.choice(["BUY", "SELL", "buy"], 300),
+    })
+    solver = ForensicSolver()
+    table = solver.verify_batch(trades, ORDERBOOK)
+    assert list(table.index) == list(trades.index)
+    for row, trade in trades.iloc[::7].iterrows():
+        assert table.at[row, "verdict"] == solver.verify({"price": trade["price"], "side": trade["side"].upper()}, None, ORDERBOOK)["verdict"]
+    # Без решателя проходят только явно честные сделки
+    assert (table.loc[table["method"] == "numpy", "verdict"] == "CLEAN").all()
+    assert (table.loc[table["verdict"] != "CLEAN", "method"] == "z3").all()
+
+
+def test_borderline_trades_are_certified_by_z3():
+    # Для BUY: spread 0.5 + 1% от 100.5 = 1.505, граница — ровно 102.005
+    trades = pd.DataFrame({"price": [102.005, 102.0051, 101.0, 80.0], "side": ["BUY"] * 4})
+    table = ForensicSolver().verify_batch(trades, ORDERBOOK)
+    assert list(table["method"]) == ["z3", "z3", "numpy", "z3"]
+    assert list(table["verdict"]) == ["CLEAN", "LIQUIDITY_VOID_DETECTED", "CLEAN", "LIQUIDITY_VOID_DETECTED"]
+
+    summary = ForensicSolver.summarize(table)
+    assert summary["trades"] == 4 and summary["z3_checks"] == 3
+    assert summary["verdicts"] == {"CLEAN": 2, "LIQUIDITY_VOID_DETECTED": 2}
+    assert summary["worst_trade"]["index"] == 3 and summary["worst_trade"]["excess"] == pytest.approx(18.995)
+
+
+def test_per_trade_quotes_and_exhausted_budget():
+    trades = pd.DataFrame({
+        "price": [50.2, 70.0, 100.1],
+        "side": ["SELL", "BUY", "SELL"],
+        "best_bid": [50.0, 60.0, 100.0],
+        "best_ask": [50.5, 60.5, 100.2],
+    })
+    table = ForensicSolver().verify_batch(trades)
+    assert list(table["market_price"]) == [50.0, 60.5, 100.0]
+    assert list(table["verdict"]) == ["CLEAN", "LIQUIDITY_VOID_DETECTED", "CLEAN"]
+
+    table = ForensicSolver().verify_batch(trades, budget=SolveBudget(timeout=0))
+    assert list(table["verdict"]) == ["CLEAN", "UNKNOWN", "CLEAN"]
+    with pytest.raises(ValueError):
+        ForensicSolver().verify_batch(trades[["price", "side"]])
+
+
+def test_missing_prices_and_quotes_are_unknown():
+    nan = float("nan")
+    trades = pd.DataFrame({
+        "price": [nan, 100.1, 100.1, 100.1, 100.1],
+        "side": ["BUY", "SELL", "BUY", "SELL", "SELL"],
+        "best_bid": [100.0, nan, 100.0, nan, 100.0],
+        "best_ask": [100.2, 100.2, nan, nan, 100.2],
+    })
+    table = ForensicSolver().verify_batch(trades)
+    assert list(table["verdict"]) == ["UNKNOWN"] * 4 + ["CLEAN"]
+    assert list(table["method"]) == ["numpy"] * 5
+
+    # Пустая сторона стакана: котировки нет ни у одной сделки
+    empty_bids = {"asks": ORDERBOOK["asks"], "bids": pd.DataFrame({"price": pd.Series([], dtype=float)})}
+    table = ForensicSolver().verify_batch(trades.iloc[[1, 4]][["price", "side"]], empty_bids)
+    assert list(table["verdict"]) == ["UNKNOWN", "UNKNOWN"]
+    assert ForensicSolver.summarize(table)["verdicts"] == {"UNKNOWN": 2}
+
+
+def test_batch_investigation_uses_recorded_quotes_per_trade(tmp_path, monkeypatch):
+    pytest.importorskip("fpdf")
+    from logos import forensic_delegator
+    from logos.depth_store import DepthStore
+    monkeypatch.setenv("LOGOS_DEPTH_STORE", str(tmp_path / "depth"))
+    monkeypatch.setattr(forensic_delegator, "Reporter", lambda **kwargs: None)
+    start = 1_700_000_000_000
+    store = DepthStore(str(tmp_path / "depth"))
+    store.record_snapshot("BTCUSDT", start, [[100.0, 1.0]], [[100.2, 1.0]], 10)
+    store.record_diff("BTCUSDT", start + 50, bids=[[100.0, 0.0], [80.0, 1.0]], final_update_id=11)
+    store.flush()
+    evidence = tmp_path / "trades.csv"
+    evidence.write_text(
+        "timestamp,symbol,side,price,qty\n"
+        f"{start - 10},BTCUSDT,SELL,100.1,1\n"   # до первого снимка: котировок нет
+        f"{start + 10},BTCUSDT,SELL,100.1,1\n"
+        f"{start + 60},BTCUSDT,SELL,130.0,1\n"   # лучший bid уже 80: продажа по 130 невозможна
+    )
+    result = forensic_delegator.ForensicDelegator().run_batch_investigation(str(evidence))
+    assert [trade["verdict"] for trade in result["trades"]] == ["UNKNOWN", "CLEAN", "LIQUIDITY_VOID_DETECTED"]
+    assert result["verdict"] == "LIQUIDITY_VOID_DETECTED"
+
+
+def test_unknown_verdict_is_not_cached(tmp_path, monkeypatch):
+    pytest.importorskip("fpdf")
+    from logos import forensic_delegator
+    monkeypatch.setenv("LOGOS_EVIDENCE_STORE", str(tmp_path / "evidence"))
+    monkeypatch.setattr(forensic_delegator, "Reporter", lambda **kwargs: None)
+    evidence = tmp_path / "trades.csv"
+    evidence.write_text("timestamp,symbol,side,price,qty\n1700000000000,BTCUSDT,SELL,100.1,1\n")
+    trades = pd.DataFrame({"timestamp": pd.to_datetime([1_700_000_000_000], unit="ms"), "price": [100.0]})
+
+    delegator = forensic_delegator.ForensicDelegator()
+    delegator.tm.call = lambda coroutine: coroutine.close() or {"trades": trades, "orderbook": ORDERBOOK, "orderbook_source": "snapshot"}
+    delegator.reporter = type("Reporter", (), {"create_verdict": lambda self, *args: str(tmp_path / "report.pdf")})()
+    verdicts = iter(["UNKNOWN", "CLEAN"])
+    delegator.solver.verify = lambda *args: {"verdict": next(verdicts), "details": ""}
+
+    (tmp_path / "report.pdf").write_bytes(b"%PDF")
+    assert delegator.run_investigation(str(evidence), use_cache=True)["verdict"] == "UNKNOWN"
+    assert delegator.evidence.stats()["verdicts"] == 0
+    # Повтор расследуется заново, окончательный вердикт сохраняется и отдается из кэша
+    assert delegator.run_investigation(str(evidence), use_cache=True)["verdict"] == "CLEAN"
+    assert delegator.run_investigation(str(evidence), use_cache=True)["verdict"] == "CLEAN"
+    assert delegator.evidence.stats()["verdicts"] == 1 and delegator.evidence.hits == 1
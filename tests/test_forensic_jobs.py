@@ -0,0 +1,150 @@
+# tests/test_forensic_jobs.py
+
+import asyncio
+import os
+import time
+import pytest
+from logos.proxies.forensic_jobs import ForensicJobQueue, QueueFull
+
+
+def _investigate(csv_path):
+    return {"verdict": "LIQUIDITY_VOID_DETECTED", "path": csv_path}
+
+
+def _busy(seconds):
+    # CPU-нагрузка вместо Z3 / matplotlib: в процессе прокси такой вызов заморозил бы цикл событий
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+    return {"verdict": "OK"}
+
+
+def _explode(_):
+    raise ValueError("bad evidence")
+
+
+def _crash(_):
+    # Как OOM-kill: процесс пропадает без исключения
+    os._exit(1)
+
+
+def _queue(target, **kwargs):
+    return ForensicJobQueue(max_workers=2, target=target, initializer=None, **kwargs)
+
+
+def test_job_completes_and_notifies_listeners():
+    async def scenario():
+        queue = _queue(_investigate, on_result=lambda result: {"status": "success", **result})
+        finished = asyncio.Event()
+        seen = []
+
+        async def listener(job):
+            seen.append(job.to_dict())
+            finished.set()
+
+        queue.listeners.append(listener)
+        try:
+            job = queue.submit("/data/evidence/case.csv")
+            assert job.status in ("queued", "running")
+            assert queue.get(job.job_id) is job
+            await asyncio.wait_for(finished.wait(), timeout=60)
+        finally:
+            queue.shutdown()
+        return job, seen
+
+    job, seen = asyncio.run(scenario())
+    assert job.status == "done"
+    assert job.result == {"status": "success", "verdict": "LIQUIDITY_VOID_DETECTED", "path": "/data/evidence/case.csv"}
+    assert seen[0]["job_id"] == job.job_id and seen[0]["result"] == job.result
+    assert "result" not in job.to_dict(with_result=False)
+
+
+def test_failed_job_reports_error():
+    async def scenario():
+        queue = _queue(_explode)
+        try:
+            job = queue.submit("broken.csv")
+            await asyncio.wait_for(asyncio.wrap_future(job.future), timeout=60)
+        except ValueError:
+            pass
+        finally:
+            await asyncio.sleep(0.1)
+            queue.shutdown()
+        return job
+
+    job = asyncio.run(scenario())
+    assert job.status == "failed"
+    assert job.error == "bad evidence"
+
+
+def test_broken_pool_is_shut_down_and_replaced():
+    async def scenario():
+        queue = _queue(_crash)
+        try:
+            job = queue.submit("oom.csv")
+            broken, calls = job.executor, []
+            shutdown = broken.shutdown
+            broken.shutdown = lambda **kwargs: (calls.append(kwargs), shutdown(**kwargs))
+            await asyncio.wait_for(asyncio.gather(asyncio.wrap_future(job.future), return_exceptions=True), timeout=60)
+            await asyncio.sleep(0.1)
+            queue.target = _investigate
+            retry = queue.submit("case.csv")
+            await asyncio.wait_for(asyncio.wrap_future(retry.future), timeout=60)
+            await asyncio.sleep(0.1)
+        finally:
+            queue.shutdown()
+        return job, retry, broken, calls
+
+    job, retry, broken, calls = asyncio.run(scenario())
+    assert job.status == "failed" and "аварийно" in job.error
+    assert retry.status == "done" and retry.result["path"] == "case.csv"
+    # Старый пул закрыт, а не просто забыт вместе с управляющим потоком
+    assert calls == [{"wait": False, "cancel_futures": True}] and job.executor is None
+
+
+def test_queue_is_bounded():
+    async def scenario():
+        queue = _queue(_busy, max_pending=2)
+        try:
+            queue.submit(0.5)
+            queue.submit(0.5)
+            with pytest.raises(QueueFull):
+                queue.submit(0.5)
+        finally:
+            queue.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_event_loop_stays_responsive_during_investigations():
+    async def scenario():
+        queue = _queue(_busy)
+        try:
+            # Прогрев: запуск spawn-процессов не должен попасть в замер
+            await asyncio.wrap_future(queue.submit(0.01).future)
+            jobs = [queue.submit(1.0) for _ in range(2)]
+            worst = 0.0
+            while not all(job.future.done() for job in jobs):
+                start = time.perf_counter()
+                await asyncio.sleep(0.01)
+                worst = max(worst, time.perf_counter() - start)
+        finally:
+            queue.shutdown()
+        return worst
+
+    assert asyncio.run(scenario()) < 0.25
+
+
+def test_finished_jobs_are_trimmed():
+    async def scenario():
+        queue = _queue(_investigate, max_finished=2)
+        try:
+            jobs = [queue.submit(f"case{i}.csv") for i in range(4)]
+            await asyncio.gather(*(asyncio.wrap_future(job.future) for job in jobs))
+            await asyncio.sleep(0.1)
+        finally:
+            queue.shutdown()
+        return queue, jobs
+
+    queue, jobs = asyncio.run(scenario())
+    assert list(queue.jobs) == [job.job_id for job in jobs[-2:]]
@@ -0,0 +1,51 @@
+# tests/test_import_budget.py
+#
+# Бюджет холодного старта: каждая публичная точка входа импортируется в чистом
+# процессе под python -X importtime. Тяжелые зависимости (Z3, NumPy, pandas,
+# matplotlib, FPDF, requests, httpx) должны подгружаться при первом использовании,
+# а не при импорте. LOGOS_IMPORT_BUDGET_SCALE растягивает бюджеты на медленных машинах.
+
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import pytest
+
+HEAVY = ("z3", "numpy", "pandas", "matplotlib", "fpdf", "requests", "httpx")
+SCALE = float(os.environ.get("LOGOS_IMPORT_BUDGET_SCALE", "1"))
+
+# модуль -> (бюджет в мс по -X importtime, допустимые тяжелые зависимости, нужный сторонний пакет)
+ENTRY_POINTS = {
+    "logos.client": (150, (), None),
+    "logos.delegator": (150, (), None),
+    "logos.farm": (100, (), None),
+    "logos.proxies.forensic_jobs": (150, (), None),
+    "logos.proxies.binance_proxy": (2000, (), "fastapi"),
+    "logos.integrations.langchain": (5000, ("numpy", "pandas", "requests", "httpx"), "langchain"),
+    "logos.integrations.llamaindex": (5000, ("numpy", "pandas", "requests", "httpx"), "llama_index"),
+}
+
+
+def _cold_import(module):
+    code = f"import sys, json, {module}; print(json.dumps(sorted(m for m in {HEAVY!r} if m in sys.modules)))"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.dirname(__file__)),
+    )
+    cumulative_us = None
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            cumulative_us = int(parts[1])
+    return cumulative_us / 1000, json.loads(result.stdout.splitlines()[-1])
+
+
+@pytest.mark.parametrize("module", sorted(ENTRY_POINTS))
+def test_entry_point_import_budget(module):
+    budget_ms, allowed, requirement = ENTRY_POINTS[module]
+    if requirement and importlib.util.find_spec(requirement) is None:
+        pytest.skip(f"{requirement} не установлен")
+    elapsed_ms, heavy = _cold_import(module)
+    assert set(heavy) <= set(allowed), f"{module} импортирует при загрузке: {heavy}"
+    assert elapsed_ms <= budget_ms * SCALE, f"{module}: {elapsed_ms:.0f} мс при бюджете {budget_ms} мс"
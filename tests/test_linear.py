@@ -0,0 +1,125 @@
+# tests/test_linear.py
+
+import random
+from fractions import Fraction
+import pytest
+import z3
+from logos.client import Client
+from logos.delegator import Delegator
+from logos import tactics
+from logos.linear import NonLinear, affine_solution, format_decimal, parse_constraint, solve_linear
+from logos.solving import SolveBudget
+
+NAMES = {"x", "y", "z", "a", "b"}
+
+
+def _system(*texts, use_reals=False):
+    return [parse_constraint(text, NAMES, use_reals) for text in texts]
+
+
+def test_parse_to_linear_form():
+    constraint = parse_constraint("3*x - (y - 2) / 2.0 == 5", NAMES, False)
+    assert constraint.coeffs == (("x", Fraction(3)), ("y", Fraction(-1, 2)))
+    assert constraint.constant == Fraction(-4)
+    assert constraint.op == "=="
+    # Кэш по нормализованному тексту: пробелы не важны
+    assert parse_constraint("3*x-(y-2)/2.0==5", NAMES, False) is constraint
+
+
+@pytest.mark.parametrize("text, use_reals", [
+    ("x*y == 4", False),
+    ("x*x == 4", True),
+    ("x / 2 == 3", False),  # целочисленное деление Z3
+    ("x / y == 3", True),
+    ("x - x + y == 3", False),
+    ("q == 3", False),
+    ("x ** 2 == 4", True),
+])
+def test_non_linear_constraints_go_to_z3(text, use_reals):
+    with pytest.raises(NonLinear):
+        parse_constraint(text, NAMES, use_reals)
+
+
+def test_exact_elimination():
+    assert solve_linear(_system("x + y == 10", "x - y == 2", "x > 0."), integer=True) == ("sat", {"x": 6, "y": 4})
+    # Переопределенная совместная и несовместная системы
+    assert solve_linear(_system("x + y == 10", "x - y == 2", "2*x == 12"), integer=True)[0] == "sat"
+    assert solve_linear(_system("x + y == 10", "x - y == 2", "x == 5"), integer=True) == ("unsat", None)
+    # Неравенство и целочисленность проверяются подстановкой
+    assert solve_linear(_system("x + y == 10", "x - y == 2", "y > 4"), integer=True) == ("unsat", None)
+    assert solve_linear(_system("2*x == 3"), integer=True) == ("unsat", None)
+    assert solve_linear(_system("2*x == 3", use_reals=True), integer=False) == ("sat", {"x": Fraction(3, 2)})
+    # Свободные переменные остаются решателю
+    assert solve_linear(_system("x + y == 10", "x > 0"), integer=True) == (None, None)
+
+
+def test_format_decimal_matches_z3():
+    rng = random.Random(7)
+    for _ in range(500):
+        value = Fraction(rng.randint(-10**6, 10**6), rng.randint(1, 10**4))
+        assert format_decimal(value) == z3.RealVal(value).as_decimal(4).replace("?", "")
+
+
+def test_fast_path_matches_z3_and_skips_solver():
+    fast, slow = Delegator(Client()), Delegator(Client(), fast_path=False)
+    prompts = [
+        "Реши систему x + y == 10 и x - y == 2, где x > 0.",
+        "Реши систему 2.5*a + b == 10.5 и a - b == 1.",
+        "Реши систему (3*x + y) / 2.0 == 7 и x - 2*y == -7, где y >= 1.",
+        "Реши систему x + y == 10 и x - y == 3.",
+        "Реши систему x + y == 10 и x - y == 2 и x == 5.",
+        "Реши систему 0.1*x + 0.2*y == 0.3 и x - y == 0.5.",
+    ]
+    for prompt in prompts:
+        expected = slow.analyze_and_translate(prompt)
+        # Исчерпанный бюджет не мешает: точный путь не обращается к Z3
+        assert fast.analyze_and_translate(prompt, budget=SolveBudget(timeout=0)) == expected
+
+
+def test_affine_solution_expresses_pivots_through_free_variables():
+    # Ведущие переменные — с коэффициентом ±1: выражения в целых коэффициентах
+    solution = affine_solution(_system("x + y + z == 10", "x - y == 2"))
+    assert solution == {"x": (Fraction(2), (("y", Fraction(1)),)), "z": (Fraction(8), (("y", Fraction(-2)),))}
+    bound = parse_constraint("x + 3*z > 1", NAMES, False).substitute(solution)
+    assert bound.coeffs == (("y", Fraction(-5)),) and bound.constant == Fraction(25) and bound.op == ">"
+    assert affine_solution(_system("2*x + 3*y == 7")) == {"x": (Fraction(7, 2), (("y", Fraction(-3, 2)),))}
+    assert affine_solution(_system("x + y == 10", "x + y == 11")) is False
+
+
+def _capture_solver_input(monkeypatch):
+    sent = []
+    make_solver = tactics.make_solver
+
+    def capture(ctx, assertions=(), *args):
+        sent.append([str(assertion) for assertion in assertions])
+        return make_solver(ctx, assertions, *args)
+
+    monkeypatch.setattr(tactics, "make_solver", capture)
+    return sent
+
+
+@pytest.mark.parametrize("prompt, solution, leftover", [
+    ("Реши систему x + y + z == 10 и x - y == 2 и z*z == 4, где z > 0.", "x = 5, y = 3, z = 2",
+     ["8 + -2*y > 0", "(8 + -2*y)*(8 + -2*y) == 4"]),
+    ("Реши уравнение x + y == 20, где x > 17 и y > 1.", "x = 18, y = 2", ["3 + -1*y > 0", "-1 + 1*y > 0"]),
+    ("Реши систему 2*x + 4*y == 6 и x*y == 2, где y > 0.", None, ["0 + 1*y > 0", "(3 + -2*y)*y == 2"]),
+    ("Реши систему x + 2*y == 10 и x > 20 и y > 0.", None, ["-10 + -2*y > 0", "0 + 1*y > 0"]),
+    # Несовместные равенства — конфликт без Z3
+    ("Реши систему x + y == 10 и x + y == 11 и x*y == 3.", None, None),
+])
+def test_solved_equalities_are_substituted_before_z3(monkeypatch, prompt, solution, leftover):
+    sent = _capture_solver_input(monkeypatch)
+    answer = Delegator(Client()).analyze_and_translate(prompt)
+    assert (solution in answer) if solution else answer.startswith("Не удалось найти решение")
+    # Z3 получает только неравенства и нелинейные ограничения над свободными переменными
+    assert sent == ([leftover] if leftover else [])
+    sent.clear()
+    assert Delegator(Client(), fast_path=False).analyze_and_translate(prompt).startswith(answer[:20])
+
+
+def test_integer_pivot_with_fractional_expression_stays_in_z3(monkeypatch):
+    # x = 7/2 - 3/2 * y: целые x задает только Z3, равенство уходит в целых коэффициентах
+    sent = _capture_solver_input(monkeypatch)
+    answer = Delegator(Client()).analyze_and_translate("Реши систему 2*x + 3*y == 7 и x*y == 2.")
+    assert "x = 2, y = 1" in answer
+    assert sent == [["-7 + 2*x + 3*y == 0", "ToReal(x*y) == 2"]]
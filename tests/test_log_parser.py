@@ -0,0 +1,65 @@
+# tests/test_log_parser.py
+
+import pandas as pd
+import pytest
+from logos.log_parser import LogParser, timestamps_to_ms
+
+
+def parse_time(val):
+    """Прежний построчный разбор времени — эталон для векторного timestamps_to_ms."""
+    try:
+        val_float = float(val)
+        if val_float > 10**12:
+            return int(val_float)
+        if val_float > 10**9:
+            return int(val_float * 1000)
+    except (TypeError, ValueError):
+        pass
+    return int(pd.to_datetime(val).timestamp() * 1000)
+
+
+@pytest.mark.parametrize("values", [
+    [1700000000123, 1700000000456],
+    [1700000000.5, 1700000001.25],
+    ["2023-11-14 22:13:20", "2023-11-14T22:13:20.125", "2023-11-14T22:13:20.125+03:00"],
+    ["1700000000123", "1700000000.5", "2023-11-14 22:13:20.250"],
+    ["14 Nov 2023 22:13:20", "2023/11/14 22:13:21"],
+])
+def test_timestamps_match_row_by_row_parse(values):
+    assert timestamps_to_ms(pd.Series(values)).tolist() == [parse_time(v) for v in values]
+
+
+def write(path, text):
+    path.write_text(text)
+    return str(path)
+
+
+def test_sniffs_delimiter_and_maps_columns(tmp_path):
+    path = write(tmp_path / "bybit.csv", "Time;Pair;Type;Exec_Price;Quantity;Best_Bid\n"
+                                         "2023-11-14 22:13:20;BTCUSDT;buy;100.5;1;100\n"
+                                         "1700000001000;BTCUSDT;sell;99;2.5;98.5\n")
+    df = LogParser().normalize(path)
+    assert list(df.columns) == ["timestamp", "symbol", "side", "price", "qty", "best_bid", "timestamp_ms"]
+    assert df["timestamp_ms"].tolist() == [1700000000000, 1700000001000]
+    assert df["side"].tolist() == ["BUY", "SELL"] and df["price"].dtype == float and df["qty"].tolist() == [1.0, 2.5]
+    assert LogParser().get_death_trade(df)["price"] == 99.0
+
+
+def test_streaming_matches_full_read(tmp_path):
+    lines = "\n".join(f"{1700000000000 + 7 * i}\tETHUSDT\t{'BUY' if i % 3 else 'SELL'}\t{2000 + i % 17}\t0.{i % 9 + 1}" for i in range(2500))
+    path = write(tmp_path / "export.tsv", "timestamp\tsymbol\tside\tprice\tamount\n" + lines + "\n")
+    parser = LogParser()
+    full = parser.normalize(path)
+    chunks = list(parser.iter_normalized(path, chunksize=1000))
+    assert [len(chunk) for chunk in chunks] == [1000, 1000, 500]
+    pd.testing.assert_frame_equal(pd.concat(chunks), full)
+    assert parser.last_trade(path, chunksize=1000) == parser.get_death_trade(full)
+
+
+def test_errors(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        LogParser().normalize(str(tmp_path / "absent.csv"))
+    with pytest.raises(ValueError, match="Missing columns"):
+        LogParser().normalize(write(tmp_path / "bad.csv", "timestamp,symbol,price\n1,BTC,2\n"))
+    with pytest.raises(ValueError, match="Failed to read CSV"):
+        LogParser().normalize(write(tmp_path / "text.csv", "timestamp,symbol,side,price,qty\n1,BTC,BUY,cheap,1\n"))
@@ -0,0 +1,112 @@
+# tests/test_profiling.py
+
+import json
+import logging
+import time
+import pytest
+from logos.client import Client
+from logos.delegator import DEFAULT_ROUTES, Delegator
+from logos.profiling import HANDLER_METRICS, HandlerMetrics, profile_request, stage
+from logos.routing import Answer, Route
+
+
+@pytest.fixture
+def metrics():
+    HANDLER_METRICS.reset()
+    yield HANDLER_METRICS
+    HANDLER_METRICS.reset()
+
+
+def test_registry_routes_in_order_and_is_pluggable():
+    registry = DEFAULT_ROUTES.copy()
+    assert registry.match("Проверь транзакцию amount=1 по набору правил 'compliance'").name == "rule_engine"
+    assert registry.match("Реши уравнение x == 1").name == "algebra"
+    assert registry.match("Если Алиса идет, то Боб идет.").name == "boolean"
+    assert registry.match("привет") is None
+
+    registry.register("echo", lambda owner, prompt, budget=None: f"эхо: {prompt}", any_of=("эхо",), before="algebra")
+    assert registry.names() == ["rule_engine", "scheduling", "echo", "algebra", "boolean"]
+    delegator = Delegator(Client(), registry=registry)
+    assert delegator.analyze_and_translate("ЭХО, где ты?") == "эхо: ЭХО, где ты?"
+    # Реестр по умолчанию и другие экземпляры не меняются
+    assert "echo" not in DEFAULT_ROUTES.names()
+    assert "echo" not in Delegator(Client()).registry.names()
+
+    registry.register("echo", "_handle_algebra", any_of=("эхо",))
+    assert registry.names().index("echo") == 2
+    registry.unregister("echo")
+    assert "echo" not in registry.names()
+    with pytest.raises(KeyError):
+        registry.register("late", "_handle_algebra", any_of=("x",), before="missing")
+    with pytest.raises(ValueError):
+        Route("empty", "_handle_algebra")
+
+
+def test_requests_are_profiled_per_handler(metrics):
+    delegator = Delegator(Client(), fast_path=False)
+    delegator.analyze_and_translate("Реши уравнение 3*x - y == 5, где x > 0 и y > 0.")
+    delegator.analyze_and_translate("Если Алиса идет, то Боб не идет. Алиса точно идет.")
+    delegator.analyze_and_translate("привет")
+
+    snapshot = metrics.snapshot()
+    assert set(snapshot) == {"algebra", "boolean", "none"}
+    algebra = snapshot["algebra"]
+    assert algebra["requests"] == 1 and algebra["results"] == {"verified": 1}
+    assert set(algebra["stages"]) == {"parse", "encode", "solve", "format"}
+    assert algebra["solver_calls"] == 1 and algebra["z3"]["rlimit count"] > 0
+    # Статистика инкрементального решателя учитывается приростом, а не суммой накоплений
+    boolean = snapshot["boolean"]
+    assert boolean["solver_calls"] > 1
+    assert boolean["z3"]["num checks"] <= boolean["solver_calls"]
+    assert abs(algebra["solver_share"] + boolean["solver_share"] - 1) < 1e-3
+    assert snapshot["none"]["results"] == {"skipped": 1} and snapshot["none"]["solver_calls"] == 0
+
+
+def test_result_label_comes_from_handler_status(metrics):
+    registry = DEFAULT_ROUTES.copy()
+    registry.register("echo", lambda owner, prompt, budget=None: f"эхо: {prompt}", any_of=("эхо",), before="rule_engine")
+    # Текст ответа с пометкой проверки не влияет на итог — важен только status
+    registry.register("quote", lambda owner, prompt, budget=None: Answer(f"{prompt} [Проверено Логос]", "error"),
+                      any_of=("цитата",), before="rule_engine")
+    delegator = Delegator(Client(), registry=registry)
+    assert delegator.analyze_and_translate("эхо") == "эхо: эхо"
+    assert delegator.analyze_and_translate("цитата").status == "error"
+    assert delegator.analyze_and_translate("Реши уравнение x == 1 + y, где y == 2.").status == "verified"
+
+    snapshot = metrics.snapshot()
+    assert snapshot["echo"]["results"] == {"unlabeled": 1} and snapshot["quote"]["results"] == {"error": 1}
+    with pytest.raises(ValueError):
+        Answer("текст", "maybe")
+
+
+def test_fast_path_requests_have_no_solver_calls(metrics):
+    delegator = Delegator(Client())
+    delegator.analyze_and_translate("Реши уравнение 3*x - y == 5, где x + y == 3.")
+    algebra = metrics.snapshot()["algebra"]
+    assert algebra["solver_calls"] == 0 and algebra["z3"] == {}
+    assert {"parse", "encode", "solve", "format"} <= set(algebra["stages"])
+
+
+def test_nested_stages_are_exclusive():
+    metrics = HandlerMetrics()
+    with profile_request("nested", metrics) as profile:
+        with stage("solve"):
+            with stage("encode"):
+                time.sleep(0.05)
+            time.sleep(0.01)
+    assert profile.stages["encode"] >= 50
+    assert 10 <= profile.stages["solve"] < 50
+    assert profile.total_ms >= profile.stages["encode"] + profile.stages["solve"]
+    # Вне профиля стадии ничего не делают
+    with stage("parse"):
+        pass
+    assert metrics.snapshot()["nested"]["requests"] == 1
+
+
+def test_structured_log_lines(metrics, caplog):
+    with caplog.at_level(logging.INFO, logger="logos.profiling"):
+        Delegator(Client()).analyze_and_translate("Мне нужно запланировать три встречи: A, B и C")
+    records = [json.loads(record.getMessage()) for record in caplog.records if record.name == "logos.profiling"]
+    assert len(records) == 1
+    assert records[0]["handler"] == "scheduling" and records[0]["result"] == "verified"
+    assert "parse" in records[0]["stages_ms"] and records[0]["total_ms"] > 0
@@ -0,0 +1,60 @@
+# tests/test_reporter.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from logos.downsample import lttb
+
+
+def test_lttb_keeps_shape_and_extremes():
+    rng = np.random.default_rng(0)
+    x = np.arange(100_000) * 10 + 1_700_000_000_000
+    y = 100 + np.cumsum(rng.normal(0, 0.01, len(x)))
+    y[54_321] -= 5  # провал ликвидации в одном тике
+    keep = lttb(x, y, 1000)
+    assert len(keep) == 1000 and keep[0] == 0 and keep[-1] == len(x) - 1
+    assert (np.diff(keep) > 0).all()
+    assert 54_321 in keep and y[keep].min() == y.min() and y[keep].max() > y.max() - 0.05
+
+
+def test_lttb_short_series_unchanged():
+    assert lttb([1, 2, 3], [5, 6, 7], 1000).tolist() == [0, 1, 2]
+    assert lttb(np.arange(10), np.arange(10), 2).tolist() == list(range(10))
+
+
+def make_ticks(n):
+    times = pd.to_datetime(1_700_000_000_000 + np.arange(n) * 5, unit="ms")
+    return pd.DataFrame({"timestamp": times, "price": 100 + np.sin(np.arange(n) / 50)})
+
+
+def test_chart_series_downsamples_to_pixel_width():
+    pytest.importorskip("matplotlib")
+    pytest.importorskip("fpdf")
+    from logos.reporter import CHART_DPI, CHART_SIZE, chart_series
+    times, prices = chart_series(make_ticks(50_000))
+    assert len(times) == CHART_SIZE[0] * CHART_DPI and times[0] == 1_700_000_000_000 and times.dtype == np.int64
+    # Время в мс числами и не по порядку
+    shuffled = make_ticks(100).sample(frac=1, random_state=0)
+    shuffled["timestamp"] = shuffled["timestamp"].astype("datetime64[ms]").astype(np.int64)
+    times, prices = chart_series(shuffled)
+    assert (np.diff(times) > 0).all() and len(times) == 100
+
+
+def test_verdict_pdf_rendered_in_memory(tmp_path):
+    pytest.importorskip("matplotlib")
+    pytest.importorskip("fpdf")
+    from concurrent.futures import ThreadPoolExecutor
+    from logos.reporter import Reporter, render_chart, chart_series
+    trade = {"symbol": "BTCUSDT", "side": "SELL", "price": 98.5, "timestamp": "2023-11-14 22:13:20", "timestamp_ms": 1_700_000_000_000}
+    verdict = {"verdict": "LIQUIDITY_VOID_DETECTED", "details": "UNSAT"}
+    assert render_chart(*chart_series(make_ticks(1000)), trade).startswith(b"\x89PNG")
+
+    reporter = Reporter(output_dir=str(tmp_path))
+    path = reporter.create_verdict("CASE-1", trade, verdict, make_ticks(1000))
+    assert open(path, "rb").read(4) == b"%PDF" and not list(tmp_path.glob("*.png"))
+    assert reporter.create_verdict("CASE-2", trade, verdict, pd.DataFrame()).endswith("VERDICT_CASE-2.pdf")
+
+    # Без глобального pyplot отчеты можно рисовать из нескольких потоков сразу
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        paths = list(pool.map(lambda i: reporter.create_verdict(f"CASE-T{i}", trade, verdict, make_ticks(20_000)), range(3)))
+    assert all(open(path, "rb").read(4) == b"%PDF" for path in paths)
@@ -0,0 +1,281 @@
+# tests/test_rules.py
+
+import pytest
+from logos.client import Client
+from logos.rules import CompiledRuleset, exact
+
+
+@pytest.fixture
+def logos_client():
+    client = Client(llm_provider="openai", api_key="DUMMY_API_KEY")
+    client.load_ruleset("rulesets")
+    return client
+
+
+def test_load_ruleset_compiles_once(logos_client):
+    ruleset = logos_client.compiled_rulesets["compliance"]
+    assert ruleset.sources == logos_client.rulesets["compliance"]
+    assert set(ruleset.variables) == {"amount", "risk_score"}
+
+
+def test_run_approved(logos_client):
+    response = logos_client.run("amount=9500 risk_score=0.7")
+    assert response["result"] == "approved"
+    assert response["triggered_rules"] == ["amount < 10000", "risk_score <= 0.85"]
+
+
+def test_run_denied(logos_client):
+    response = logos_client.run("amount=12000 risk_score=0.5")
+    assert response["result"] == "denied"
+
+
+def test_run_repeated_requests_do_not_leak_bindings(logos_client):
+    assert logos_client.run("amount=12000 risk_score=0.5")["result"] == "denied"
+    assert logos_client.run("amount=9500 risk_score=0.7")["result"] == "approved"
+
+
+def test_run_unbound_variable_reports_partial_rules(logos_client):
+    response = logos_client.run("amount=9500")
+    assert response["result"] == "error"
+    assert "name 'risk_score' is not defined" in response["details"]
+    assert response["triggered_rules"] == ["amount < 10000"]
+
+
+def test_run_unknown_ruleset(logos_client):
+    response = logos_client.run("amount=9500", ruleset_name="missing")
+    assert response["result"] == "error"
+
+
+def test_invalid_rule_is_reported_at_run_time(logos_client):
+    logos_client.compiled_rulesets["broken"] = CompiledRuleset("broken", ["amount < 10000", "__import__('os')"])
+    response = logos_client.run("amount=9500", ruleset_name="broken")
+    assert response["result"] == "error"
+    assert response["triggered_rules"] == ["amount < 10000"]
+
+
+def test_arithmetic_rule():
+    ruleset = CompiledRuleset("arith", ["amount * 2 - risk_score / 4 <= 100"])
+    assert ruleset.check({"amount": 50.0, "risk_score": 0.0})
+    assert not ruleset.check({"amount": 50.5, "risk_score": 1.0})
+
+
+# --- Дифференциальные тесты: точный путь без Z3 против Z3 ---
+
+VARIABLES = ["amount", "risk_score", "hour"]
+CONSTANTS = ["0", "1", "2", "3", "0.1", "0.2", "0.3", "0.85", "10000", "1e-7", "1e20", "2.5"]
+
+
+def _random_term(rng, depth):
+    if depth == 0 or rng.random() < 0.3:
+        return rng.choice(VARIABLES + CONSTANTS)
+    op = rng.choice(["+", "-", "*", "/", "**"])
+    if op == "**":
+        return f"({_random_term(rng, depth - 1)}) ** {rng.choice(['0', '1', '2', '3', '-1', '0.5'])}"
+    return f"({_random_term(rng, depth - 1)} {op} {_random_term(rng, depth - 1)})"
+
+
+def _random_rule(rng):
+    op = rng.choice(["<", "<=", ">", ">=", "==", "!="])
+    return f"{_random_term(rng, 2)} {op} {_random_term(rng, 2)}"
+
+
+def _random_bindings(rng):
+    return {name: rng.choice([0, 1, 2, 0.1, 0.2, 0.3, 0.7, 0.85, 9500, 12000.0, 1e-7, -3]) for name in VARIABLES}
+
+
+def test_ground_fast_path_matches_z3():
+    import random
+    rng = random.Random(20261018)
+    checked = 0
+    for _ in range(300):
+        ruleset = CompiledRuleset("diff", [_random_rule(rng) for _ in range(rng.randint(1, 3))])
+        if ruleset.has_errors:
+            continue
+        for _ in range(3):
+            bindings = _random_bindings(rng)
+            assert ruleset.check(bindings) == ruleset.check(bindings, fast_path=False), (ruleset.sources, bindings)
+            checked += 1
+    assert checked > 500
+
+
+@pytest.mark.parametrize("rule, bindings", [
+    ("risk_score <= 0.85", {"risk_score": 0.85}),
+    ("amount + risk_score <= 0.3", {"amount": 0.1, "risk_score": 0.2}),
+    ("amount / hour < 1", {"amount": 5, "hour": 0}),
+    ("amount ** 0.5 == 3", {"amount": 9}),
+])
+def test_ground_fast_path_boundaries(rule, bindings):
+    ruleset = CompiledRuleset("edge", [rule])
+    assert ruleset.check(bindings) == ruleset.check(bindings, fast_path=False)
+
+
+def test_delegator_exact_audit_matches_z3(tmp_path):
+    import json
+    import random
+    from logos.delegator import Delegator
+
+    class _Client:
+        rulesets = {"diff": str(tmp_path / "diff.json")}
+
+    rng = random.Random(7)
+    fast, slow = Delegator(_Client(), fast_path=True), Delegator(_Client(), fast_path=False)
+    for _ in range(50):
+        rules = [
+            f"{rng.choice(['amount', 'risk_score', 'transaction_hour'])} {rng.choice(['<', '>', '<=', '>=', '==', '!='])} {rng.choice(['10000', '0.85', '9', '18', '0.7', '9500', '12', '-3', '-0.5', '15.0'])}"
+            for _ in range(rng.randint(1, 6))
+        ]
+        (tmp_path / "diff.json").write_text(json.dumps({"rules": rules}))
+        prompt = (
+            f"Проверь транзакцию с amount={rng.choice(['9500', '10000', '12000', '9500.5'])} "
+            f"risk_score={rng.choice(['0.7', '0.85', '0.9'])} час {rng.choice(['9', '12', '18', '23'])} по набору правил 'diff'"
+        )
+        assert fast._handle_rule_engine(prompt) == slow._handle_rule_engine(prompt)
+
+
+# --- Пакетная проверка: Client.run_batch ---
+
+def test_run_batch_records(logos_client):
+    response = logos_client.run_batch([
+        {"amount": 9500, "risk_score": 0.7},
+        {"amount": 12000, "risk_score": 0.9},
+        {"amount": 100},
+    ])
+    assert response["result"] == "denied"
+    assert list(response["verdicts"]) == ["approved", "denied", "error"]
+    assert response["violations"].tolist() == [[False, False], [True, True], [False, False]]
+
+
+def test_run_batch_columns_and_dataframe(logos_client):
+    import numpy as np
+    pd = pytest.importorskip("pandas")
+    columns = {"amount": np.array([9500, 10000]), "risk_score": np.array([0.85, 0.2])}
+    for records in (columns, pd.DataFrame(columns)):
+        response = logos_client.run_batch(records)
+        assert list(response["verdicts"]) == ["approved", "denied"]
+        assert response["violations"][:, 0].tolist() == [False, True]
+
+
+def test_run_batch_missing_column(logos_client):
+    response = logos_client.run_batch({"amount": [1, 2]})
+    assert response["result"] == "error"
+    assert "risk_score" in response["details"]
+
+
+def test_check_columns_matches_row_by_row():
+    import random
+    import numpy as np
+    rng = random.Random(3)
+    for _ in range(150):
+        ruleset = CompiledRuleset("diff", [_random_rule(rng) for _ in range(rng.randint(1, 3))])
+        if ruleset.has_errors:
+            continue
+        rows = [_random_bindings(rng) for _ in range(8)]
+        columns = {name: np.array([row[name] for row in rows], dtype=float) for name in VARIABLES}
+        approved, violations, _ = ruleset.check_columns(columns)
+        for i, row in enumerate(rows):
+            bindings = {name: float(value) for name, value in row.items()}
+            assert approved[i] == ruleset.check(bindings, fast_path=False), (ruleset.sources, row)
+            for j, rule in enumerate(ruleset.rules):
+                single = CompiledRuleset("one", [rule.source])
+                assert violations[i, j] == (not single.check(bindings, fast_path=False)), (rule.source, row)
+
+
+def test_check_columns_constant_beyond_float():
+    import numpy as np
+    ruleset = CompiledRuleset("huge", ["amount < 10 ** 400", "amount * 10 ** 400 > 0"])
+    assert not ruleset.has_errors and all(rule.vector is None for rule in ruleset.rules)
+    approved, violations, _ = ruleset.check_columns({"amount": np.array([5.0, -1.0])})
+    assert approved.tolist() == [True, False] and violations.tolist() == [[False, False], [False, True]]
+
+
+# --- Аудит Delegator: один решатель с литералами-индикаторами ---
+
+def test_delegator_uses_compiled_rulesets(logos_client):
+    from logos.delegator import Delegator
+    prompt = "Проверь транзакцию на сумму 12000 с оценкой риска 0.9 по набору правил 'compliance'"
+    for delegator in (Delegator(logos_client), Delegator(logos_client, fast_path=False)):
+        # Без сброса второй делегатор получил бы отчет первого из кэша вердиктов
+        logos_client.verdict_cache.clear()
+        response = delegator._handle_rule_engine(prompt)
+        assert "Обнаружено нарушений: 2" in response
+        assert "Правило 'amount < 10000': ПРОВАЛЕНО (фактическое значение: amount = 12000)" in response
+        assert "Правило 'risk_score <= 0.85': ПРОВАЛЕНО (фактическое значение: risk_score = 0.9)" in response
+
+
+def test_delegator_duplicate_rules_counted_separately(tmp_path):
+    import json
+    from logos.delegator import Delegator
+
+    class _Client:
+        rulesets = {"dup": str(tmp_path / "dup.json")}
+
+    (tmp_path / "dup.json").write_text(json.dumps({"rules": ["amount < 10", "amount < 10", "amount > 0"]}))
+    response = Delegator(_Client(), fast_path=False)._handle_rule_engine("Проверь транзакцию amount=50 по набору правил 'dup'")
+    assert "Обнаружено нарушений: 2" in response
+    assert response.count("ПРОВАЛЕНО") == 2
+
+
+def test_delegator_reloads_ruleset_file_only_when_changed(tmp_path):
+    import json
+    import os
+    from logos.delegator import Delegator
+
+    class _Client:
+        rulesets = {"live": str(tmp_path / "live.json")}
+
+    path = tmp_path / "live.json"
+    path.write_text(json.dumps({"rules": ["amount < 10000"]}))
+    delegator = Delegator(_Client())
+    prompt = "Проверь транзакцию amount=500 по набору правил 'live'"
+    assert "Проверка пройдена" in delegator._handle_rule_engine(prompt)
+    assert delegator._ruleset_files[str(path)][1] == ["amount < 10000"]
+
+    path.write_text(json.dumps({"rules": ["amount < 100"]}))
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert "Проверка провалена" in delegator._handle_rule_engine(prompt)
+
+
+# --- Индекс пороговых правил ---
+
+def test_threshold_index_matches_linear_scan():
+    import random
+    rng = random.Random(11)
+    for _ in range(200):
+        rules = [
+            f"{rng.choice(['amount', 'risk_score'])} {rng.choice(['<', '<=', '>', '>=', '==', '!='])} {rng.choice(['0', '0.5', '0.85', '1', '9500', '10000'])}"
+            for _ in range(rng.randint(1, 12))
+        ]
+        if rng.random() < 0.3:
+            rules.append(f"{rng.choice(['0.5', '10000'])} {rng.choice(['<', '>='])} amount")
+        ruleset = CompiledRuleset("index", rules)
+        assert ruleset.index.complete
+        for _ in range(5):
+            bindings = {"amount": rng.choice([0, 0.5, 1, 9500, 10000, 12000.0]), "risk_score": rng.choice([0, 0.5, 0.85, 0.9])}
+            values = {name: exact(value) for name, value in bindings.items()}
+            linear = [rule.source for rule in ruleset.rules if not rule.holds(values)]
+            assert ruleset.violated_rules(bindings) == linear
+            assert ruleset.check(bindings) == (not linear) == ruleset.check(bindings, fast_path=False)
+
+
+def test_threshold_index_analysis():
+    ruleset = CompiledRuleset("analysis", [
+        "amount < 10000", "amount < 20000", "amount < 10000", "amount > 0", "amount != 50",
+        "transaction_hour >= 9", "transaction_hour <= 18", "transaction_hour == 12",
+        "risk_score > 0.85", "risk_score <= 0.85",
+    ])
+    index = ruleset.index
+    assert index.redundant == [(2, 0)]
+    assert (1, 0) in index.subsumed
+    assert (5, 7) in index.subsumed and (6, 7) in index.subsumed
+    assert index.contradictions == [(8, 9)]
+    assert str(index.intervals["amount"]) == "(0, 10000) \\ {50}"
+    assert str(index.intervals["transaction_hour"]) == "{12}"
+    assert str(index.intervals["risk_score"]) == "∅"
+    assert any(line.startswith("противоречие") for line in ruleset.problems())
+
+
+def test_mixed_ruleset_is_not_indexed_completely():
+    ruleset = CompiledRuleset("mixed", ["amount < 10000", "amount * risk_score < 5000"])
+    assert not ruleset.index.complete
+    assert ruleset.violated_rules({"amount": 9000, "risk_score": 0.9}) == ["amount * risk_score < 5000"]
@@ -0,0 +1,57 @@
+# tests/test_sat.py
+
+import itertools
+import random
+import pytest
+from logos.client import Client
+from logos.delegator import Delegator
+from logos.sat import SatSolver, compile_cnf
+
+UNIQUE = "Если Алиса идет на вечеринку, то Боб не идет. Если Клара не идет, то Алиса идет. Клара точно не пойдет."
+OPEN = "Если Алиса идет на вечеринку, то Боб не идет. Если Клара не идет, то Алиса идет."
+CONTRADICTION = "Если Алиса не идет, то Боб идет. Если Боб идет, то Алиса идет. Если Алиса идет, то Клара идет. Клара точно не идет."
+
+
+@pytest.fixture(params=[True, False], ids=["dpll", "z3"])
+def delegator(request):
+    return Delegator(Client(), fast_path=request.param)
+
+
+def test_compile_cnf():
+    names, clauses = compile_cnf([(("Алиса", True), ("Боб", False))], [("Клара", False)])
+    assert names == ["Алиса", "Боб", "Клара"]
+    assert clauses == [(-1, -2), (-3,)]
+    with pytest.raises(ValueError):
+        compile_cnf([(None, ("Боб", True))], [])
+
+
+def test_models_match_brute_force():
+    rng = random.Random(11)
+    for _ in range(300):
+        n = rng.randint(1, 7)
+        clauses = [tuple(rng.choice([-1, 1]) * rng.randint(1, n) for _ in range(rng.randint(1, 3))) for _ in range(rng.randint(0, 12))]
+        expected = {
+            bits for bits in itertools.product([False, True], repeat=n)
+            if all(any((lit > 0) == bits[abs(lit) - 1] for lit in clause) for clause in clauses)
+        }
+        models = [tuple(value > 0 for value in values[1:]) for values in SatSolver(n, clauses).models()]
+        assert len(models) == len(expected) and set(models) == expected
+
+
+def test_unique_solution_is_proven(delegator):
+    assert delegator.analyze_and_translate(UNIQUE) == (
+        "Решение найдено: Алиса = True, Боб = False, Клара = False. "
+        "[Проверено Логос: Вывод логически корректен, решение единственно.]"
+    )
+
+
+def test_multiple_solutions_are_counted(delegator):
+    answer = delegator.analyze_and_translate(OPEN)
+    assert answer.endswith("[Проверено Логос: Вывод логически корректен, но решение не единственно (вариантов: 4).]")
+    solutions = {(s["Алиса"], s["Боб"], s["Клара"]) for s in delegator.enumerate_boolean(OPEN)}
+    assert solutions == {(True, False, False), (True, False, True), (False, False, True), (False, True, True)}
+    assert len(delegator.enumerate_boolean(OPEN, limit=2)) == 2
+
+
+def test_contradiction(delegator):
+    assert delegator.analyze_and_translate(CONTRADICTION).startswith("Условия задачи противоречивы")
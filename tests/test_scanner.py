@@ -0,0 +1,122 @@
+# tests/test_scanner.py
+#
+# Эталонные (golden) тесты для форм промптов, которые разбирали прежние регулярные
+# выражения Client и Delegator: переход на общий сканер не должен менять ответы.
+
+import pytest
+from logos.client import Client
+from logos.delegator import Delegator
+from logos.scanner import PromptScan
+
+
+@pytest.fixture
+def delegator():
+    client = Client(llm_provider="openai", api_key="DUMMY_API_KEY")
+    client.load_ruleset("rulesets")
+    return Delegator(client)
+
+
+PASSED = "Проверка пройдена. Все 2 правила из набора '{}' выполнены. [Проверено Логос: Соответствие подтверждено.]"
+FAILED = "Проверка провалена. Обнаружено нарушений: {}. [Проверено Логос: Обнаружено несоответствие.]"
+
+GOLDEN_RULE_ENGINE = [
+    ("Проверь транзакцию на сумму 9500 с оценкой риска 0.7 и в час 15 по набору правил 'compliance'",
+     PASSED.format("compliance")),
+    ("Проверь транзакцию с amount=9500, risk_score: 0.7 и час 15 по набору правил 'compliance'",
+     PASSED.format("compliance")),
+    ("Проверь транзакцию где сумма 9500, риск=0.7, transaction_hour: 15 по набору правил 'compliance'",
+     PASSED.format("compliance")),
+    ("Проверь транзакцию: amount:9500 risk_score=0.7 час=15 по набору правил 'compliance'",
+     PASSED.format("compliance")),
+    ("Проверь транзакцию на сумму 12000 с оценкой риска 0.5 и в час 11 по набору правил 'compliance'",
+     FAILED.format(1) + "\n  - Правило 'amount < 10000': ПРОВАЛЕНО (фактическое значение: amount = 12000)"
+     "\n  - Правило 'risk_score <= 0.85': ВЫПОЛНЕНО"),
+    ("Проверь транзакцию с amount=15000 и risk_score=0.95 по набору правил 'compliance'",
+     FAILED.format(2) + "\n  - Правило 'amount < 10000': ПРОВАЛЕНО (фактическое значение: amount = 15000)"
+     "\n  - Правило 'risk_score <= 0.85': ПРОВАЛЕНО (фактическое значение: risk_score = 0.95)"),
+    ("Проверь транзакцию в час 20 по набору правил 'timing'",
+     FAILED.format(1) + "\n  - Правило 'transaction_hour >= 9': ВЫПОЛНЕНО"
+     "\n  - Правило 'transaction_hour <= 18': ПРОВАЛЕНО (фактическое значение: transaction_hour = 20)"),
+    ("Проверь транзакцию transaction_hour=8.5 по набору правил 'timing'",
+     FAILED.format(1) + "\n  - Правило 'transaction_hour >= 9': ПРОВАЛЕНО (фактическое значение: transaction_hour = 8.5)"
+     "\n  - Правило 'transaction_hour <= 18': ВЫПОЛНЕНО"),
+    ("Проверь транзакцию amount=100 по набору правил 'missing'", "Ошибка: набор правил 'missing' не загружен."),
+    ("Проверь транзакцию без данных по набору правил 'compliance'", "Не удалось найти данные для проверки в промпте."),
+    ("Проверь транзакцию amount=100 по правилам", "Не удалось найти имя набора правил."),
+]
+
+
+@pytest.mark.parametrize("prompt, expected", GOLDEN_RULE_ENGINE)
+def test_rule_engine_golden(delegator, prompt, expected):
+    assert delegator.analyze_and_translate(prompt) == expected
+
+
+@pytest.mark.parametrize("prompt, expected", [
+    ("Реши систему x + y == 10 и x - y == 2, где x > 0.", "x = 6, y = 4"),
+    ("Реши уравнение x == -3, где x < 0.", "x = -3"),
+    ("Реши уравнение x*x == 4, где x > 0.", "x = 2"),
+    ("Если Алиса идет на вечеринку, то Боб не идет. Если Клара не идет, то Алиса идет. Клара точно не пойдет.",
+     "Алиса = True, Боб = False, Клара = False"),
+    ("Если Алиса идет на вечеринку, то Боб не идет. Если Клара не идет, то Алиса идет. Клара точно не пойдет. "
+     "Кто в итоге пойдет на вечеринку?", "Алиса = True, Боб = False, Клара = False"),
+    ("Если Иван работает, то Мария отдыхает. Если Петр не отдыхает, то Иван работает. Петр точно не отдыхает.",
+     "Иван = True, Мария = True, Петр = False"),
+])
+def test_unique_solutions_golden(delegator, prompt, expected):
+    assert delegator.analyze_and_translate(prompt).startswith(f"Решение найдено: {expected}. [Проверено Логос:")
+
+
+# Как и у прежнего findall, граница в конце предложения захватывает точку
+@pytest.mark.parametrize("prompt, constraints", [
+    ("Реши уравнение 3*x - y == 5, где x > 0 и y > 0.", ["3*x - y == 5", "x > 0", "y > 0."]),
+    ("Реши 2.5*a + b == 10.5, где a > 1 и b > 1.", ["2.5*a + b == 10.5", "a > 1", "b > 1."]),
+    ("Реши систему x + y == 10 и x - y == 2, где x > 0.", ["x + y == 10", "x - y == 2", "x > 0."]),
+    ("Реши уравнение 2*x + 3*y == 12, где x >= 1 и y >= 1.", ["2*x + 3*y == 12", "x >= 1", "y >= 1."]),
+    ("Реши уравнение x == -3, где x < 0.", ["x == -3", "x < 0."]),
+])
+def test_algebra_constraints(prompt, constraints):
+    assert PromptScan(prompt).constraint_texts() == constraints
+
+
+def test_algebra_variables_and_types():
+    assert PromptScan("Реши 2.5*a + b == 10.5, где a > 1").letter_variables() == {"a", "b"}
+    assert PromptScan("Реши 2.5*a + b == 10.5").has_decimals()
+    assert not PromptScan("Реши уравнение 3*x - y == 5.").has_decimals()
+
+
+def test_boolean_implications_and_facts():
+    scan = PromptScan("Если Иван работает, то Мария не отдыхает. Если Мария не отдыхает, то Иван не работает. "
+                      "Иван точно не работает.")
+    names = scan.person_names()
+    assert names == {"Иван", "Мария"}
+    assert scan.implications(names) == [(("Иван", True), ("Мария", False)), (("Мария", False), ("Иван", False))]
+    assert scan.facts(names) == [("Иван", False)]
+
+
+def test_boolean_lowercase_if_and_positive_facts_are_ignored():
+    # Как и прежде: 'если' без учета регистра, утвердительные факты не учитываются
+    scan = PromptScan("если Олег поет, то Анна танцует. Олег точно не поет. Анна танцует.")
+    names = scan.person_names()
+    assert scan.implications(names) == [(("Олег", True), ("Анна", True))]
+    assert scan.facts(names) == [("Олег", False)]
+
+
+@pytest.mark.parametrize("prompt, expected", [
+    ("amount=9500 risk_score=0.7", {"amount": 9500.0, "risk_score": 0.7}),
+    ("Проверь транзакцию: amount:9500 risk_score=0.7 час=15", {"risk_score": 0.7, "час": 15.0}),
+    ("где сумма 9500, риск=0.7, transaction_hour: 15", {"риск": 0.7}),
+    ("amount = 15000 и risk_score =0.5", {"amount": 15000.0, "risk_score": 0.5}),
+    ("version=1.2.3 amount=5", {"amount": 5.0}),
+    ("Какая сегодня погода?", {}),
+])
+def test_client_parse_prompt_golden(prompt, expected):
+    assert Client()._parse_prompt(prompt) == expected
+
+
+def test_value_after_aliases():
+    scan = PromptScan("Проверь транзакцию на сумму 9500 с оценкой риска 0.7 и в час 15 по набору правил 'compliance'")
+    assert scan.ruleset_name == "compliance"
+    assert scan.value_after(['amount', 'сумма', 'на сумму']) == "9500"
+    assert scan.value_after(['risk_score', 'риск', 'с оценкой риска']) == "0.7"
+    assert scan.value_after(['transaction_hour', 'час', 'в час']) == "15"
+    assert PromptScan("Сумма: 100").value_after(['сумма']) == "100"
@@ -0,0 +1,177 @@
+# tests/test_scheduling.py
+
+import itertools
+import random
+import time
+import pytest
+from logos import scheduling
+from logos.client import Client
+from logos.delegator import Delegator
+from logos.scheduling import Meeting, Room, SchedulingError, SchedulingProblem, parse_scheduling_prompt, schedule
+from logos.solving import SolveBudget
+
+
+def make_problem(n, seed=0, objective="earliest_finish"):
+    """n встреч по 2-4 участника из n // 2 + 4 человек, окна 9-13 и 14-18 на n // 10 + 1 дней, комнаты на 4-10 мест."""
+    rng = random.Random(seed)
+    people = [f"p{i}" for i in range(n // 2 + 4)]
+    days = n // 10 + 1
+    windows = [window for day in range(days) for window in ([day * 1440 + 540, day * 1440 + 780], [day * 1440 + 840, day * 1440 + 1080])]
+    return SchedulingProblem.from_dict({
+        "meetings": [
+            {"name": f"M{i}", "duration": rng.choice([30, 60, 90]), "attendees": rng.sample(people, rng.randint(2, 4))}
+            for i in range(n)
+        ],
+        "rooms": [{"name": f"R{k}", "capacity": capacity} for k, capacity in enumerate([4, 6, 8, 10])],
+        "availability": {person: windows for person in people},
+        "horizon": [0, days * 1440],
+        "objective": objective,
+    })
+
+
+def check_assignments(problem, result):
+    """Проверка расписания независимо от модели решателя; возвращает число пересечений участников."""
+    assignments = result["assignments"]
+    assert set(assignments) == {meeting.name for meeting in problem.meetings}
+    rooms = {room.name: room.capacity for room in problem.rooms}
+    for meeting in problem.meetings:
+        slot = assignments[meeting.name]
+        assert slot["end"] - slot["start"] == meeting.duration
+        assert problem.horizon[0] <= slot["start"] and slot["end"] <= problem.horizon[1]
+        for person in meeting.attendees:
+            if person in problem.availability:
+                assert any(lo <= slot["start"] and slot["end"] <= hi for lo, hi in problem.availability[person])
+        for name in meeting.after:
+            assert assignments[name]["end"] <= slot["start"]
+        if rooms:
+            assert rooms[slot["room"]] >= len(meeting.attendees)
+    conflicts = 0
+    for a, b in itertools.combinations(problem.meetings, 2):
+        first, second = assignments[a.name], assignments[b.name]
+        if first["start"] < second["end"] and second["start"] < first["end"]:
+            assert not rooms or first["room"] != second["room"]
+            conflicts += bool(set(a.attendees) & set(b.attendees))
+    assert conflicts == result["conflicts"]
+    return conflicts
+
+
+def test_prompt_without_json_keeps_listed_meetings_and_order():
+    problem = parse_scheduling_prompt("Мне нужно запланировать три встречи: A, B и C. C должна быть до A.")
+    assert [meeting.name for meeting in problem.meetings] == ["A", "B", "C"]
+    assert problem.meetings[0].after == ("C",)
+    result = schedule(problem)
+    assert result["status"] == "optimal" and result["finish"] == 720
+    assert result["assignments"]["C"]["end"] <= result["assignments"]["A"]["start"]
+    assert parse_scheduling_prompt("запланировать встречи на завтра") is None
+
+
+def test_structured_prompt_respects_availability_and_rooms():
+    delegator = Delegator(Client())
+    prompt = (
+        'Составь расписание: {"meetings": ['
+        '{"name": "Sync", "duration": 30, "attendees": ["ann", "bob", "eve"]},'
+        '{"name": "Review", "duration": 60, "attendees": ["ann"]}],'
+        '"rooms": [{"name": "small", "capacity": 1}, {"name": "big", "capacity": 3}],'
+        '"availability": {"bob": [[600, 720]]}}'
+    )
+    answer = delegator.analyze_and_translate(prompt)
+    assert answer.startswith("Возможное расписание: Sync в 10:00 (big), Review в 9:00 (small).")
+    assert "удовлетворяет всем ограничениям" in answer
+
+
+def test_infeasible_and_invalid_problems():
+    no_window = SchedulingProblem(
+        [Meeting("X", 60, ["ann", "bob"])],
+        availability={"ann": [(540, 600)], "bob": [(600, 660)]},
+    )
+    result = schedule(no_window)
+    assert result["status"] == "infeasible" and "X" in result["details"]
+
+    # Трем часовым встречам одного человека не хватает двух часов
+    crowded = SchedulingProblem([Meeting(name, 60, ["ann"]) for name in "ABC"], horizon=(540, 660))
+    assert schedule(crowded)["status"] == "infeasible"
+
+    with pytest.raises(SchedulingError):
+        SchedulingProblem([Meeting("X", 0)])
+    with pytest.raises(SchedulingError):
+        SchedulingProblem([Meeting("X", 30, after=["Y"])])
+    with pytest.raises(SchedulingError):
+        SchedulingProblem([Meeting("X", 30)], objective="cheapest")
+    with pytest.raises(SchedulingError):
+        schedule(SchedulingProblem([Meeting("X", 30, after=["Y"]), Meeting("Y", 30, after=["X"])]))
+    answer = Delegator(Client()).analyze_and_translate('расписание {"meetings": [{"name": "X"}]}')
+    assert "Ошибка в описании задачи планирования" in answer
+
+
+def test_problem_does_not_modify_callers_meetings():
+    meeting = Meeting("X", 30, ["ann"], window=[600, 720])
+    problem = SchedulingProblem([meeting])
+    assert meeting.window == [600, 720] and problem.meetings[0].window == (600, 720)
+    assert schedule(problem)["assignments"]["X"]["start"] == 600
+
+
+def test_fewest_conflicts_relaxes_only_attendee_overlaps():
+    # Три часовые встречи ann в двух часах: одно пересечение неизбежно
+    problem = SchedulingProblem(
+        [Meeting("A", 60, ["ann", "bob"]), Meeting("B", 60, ["ann"]), Meeting("C", 60, ["ann", "eve"])],
+        rooms=[Room("R1", 2), Room("R2", 2)],
+        horizon=(540, 660),
+        objective="fewest_conflicts",
+    )
+    result = schedule(problem)
+    assert result["status"] == "optimal"
+    assert check_assignments(problem, result) == 1
+    answer = Delegator(Client()).schedule(problem)
+    assert answer["conflicts"] == 1
+
+
+@pytest.mark.parametrize("optimize_limit", [scheduling.OPTIMIZE_LIMIT, 0], ids=["optimize", "tighten"])
+def test_earliest_finish_matches_brute_force(monkeypatch, optimize_limit):
+    monkeypatch.setattr(scheduling, "OPTIMIZE_LIMIT", optimize_limit)
+    rng = random.Random(5)
+    for _ in range(15):
+        people = ["ann", "bob", "eve"]
+        meetings = [Meeting(f"M{i}", rng.choice([30, 60]), rng.sample(people, rng.randint(1, 2))) for i in range(rng.randint(2, 4))]
+        availability = {person: [(540, 540 + 30 * rng.randint(3, 6))] for person in people}
+        problem = SchedulingProblem(meetings, rooms=[Room("R1", 2)], availability=availability, horizon=(540, 720))
+        result = schedule(problem)
+
+        best = None
+        for starts in itertools.product(range(540, 720, 30), repeat=len(meetings)):
+            candidate = {
+                "assignments": {m.name: {"start": s, "end": s + m.duration, "room": "R1"} for m, s in zip(meetings, starts)},
+                "conflicts": 0,
+            }
+            try:
+                check_assignments(problem, candidate)
+            except AssertionError:
+                continue
+            finish = max(s + m.duration for m, s in zip(meetings, starts))
+            best = finish if best is None else min(best, finish)
+
+        if best is None:
+            assert result["status"] == "infeasible"
+        else:
+            assert result["status"] == "optimal" and result["finish"] == best
+            check_assignments(problem, result)
+
+
+@pytest.mark.parametrize("n, timeout", [(10, 5.0), (100, 3.0), (500, 3.0)])
+def test_schedule_scales_within_budget(n, timeout):
+    problem = make_problem(n, seed=n)
+    start = time.perf_counter()
+    result = schedule(problem, SolveBudget(timeout=timeout))
+    elapsed = time.perf_counter() - start
+    # Разбор и жадное решение идут до вызова решателя; Z3 получает остаток бюджета
+    assert elapsed < timeout + 2.0
+    assert result["status"] in ("optimal", "feasible")
+    assert check_assignments(problem, result) == 0
+    if n == 10:
+        assert result["status"] == "optimal"
+
+
+def test_fewest_conflicts_at_scale():
+    problem = make_problem(200, seed=3, objective="fewest_conflicts")
+    result = schedule(problem, SolveBudget(timeout=3.0))
+    assert result["status"] in ("optimal", "feasible")
+    check_assignments(problem, result)
@@ -0,0 +1,124 @@
+# tests/test_solving.py
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import z3
+from logos.cache import VerdictCache
+from logos.client import Client
+from logos.delegator import Delegator
+from logos.solvers.forensic_solver import ForensicSolver
+from logos.solvers.stop_loss_hunter import StopLossHunter
+from logos.solving import SolveBudget, SolveHistograms
+
+HARD_PROMPT = "Реши уравнение x*x*x + y*y*y == z*z*z, где x > 1 и y > 1 и z > 1."
+
+
+def _hard_solver():
+    # Контрпример к теореме Ферма для n = 3: Z3 не решает это за разумное время
+    x, y, z = z3.Ints("x y z")
+    solver = z3.Solver()
+    solver.add(x > 1, y > 1, z > 1, x * x * x + y * y * y == z * z * z)
+    return solver
+
+
+def test_timeout_yields_structured_unknown():
+    histograms = SolveHistograms()
+    start = time.perf_counter()
+    outcome = SolveBudget(timeout=0.3, histograms=histograms).check(_hard_solver(), "hard")
+    assert time.perf_counter() - start < 2
+    assert outcome.unknown and outcome.reason == "timeout"
+    assert outcome.to_dict()["reason"] == "timeout"
+    snapshot = histograms.snapshot()["hard"]
+    assert snapshot["count"] == 1
+    assert snapshot["statuses"] == {"unknown:timeout": 1}
+    assert sum(snapshot["buckets"].values()) == 1
+
+
+def test_cancel_from_another_thread():
+    budget = SolveBudget(histograms=SolveHistograms())
+    threading.Timer(0.2, budget.cancel).start()
+    start = time.perf_counter()
+    outcome = budget.check(_hard_solver(), "hard")
+    assert time.perf_counter() - start < 2
+    assert outcome.reason == "cancelled"
+    # После отмены бюджет не запускает решатель вовсе
+    assert budget.check(_hard_solver(), "hard").reason == "cancelled"
+
+
+def test_rlimit_yields_unknown():
+    outcome = SolveBudget(rlimit=50000, histograms=SolveHistograms()).check(_hard_solver(), "hard")
+    assert outcome.unknown and outcome.reason == "rlimit"
+
+
+def test_budget_does_not_change_decidable_answers():
+    histograms = SolveHistograms()
+    x = z3.Int("x")
+    solver = z3.Solver()
+    solver.add(x > 1, x < 3)
+    assert SolveBudget(timeout=5, histograms=histograms).check(solver, "easy").status == "sat"
+    solver.add(x > 2)
+    assert SolveBudget(timeout=5, histograms=histograms).check(solver, "easy").status == "unsat"
+    assert histograms.snapshot()["easy"]["statuses"] == {"sat": 1, "unsat": 1}
+
+
+def test_client_run_reports_unknown_and_does_not_cache_it(tmp_path):
+    (tmp_path / "ratio.json").write_text('{"rules": ["amount / risk_score < 10"]}')
+    client = Client(verdict_cache=VerdictCache())
+    client.load_ruleset(str(tmp_path))
+    # risk_score = 0: точная арифметика отказывается, нужен Z3, а бюджет уже исчерпан
+    response = client.run("amount=5 risk_score=0", ruleset_name="ratio", budget=SolveBudget(timeout=0))
+    assert response["result"] == "unknown"
+    assert response["reason"] == "timeout"
+    assert response["triggered_rules"] == ["amount / risk_score < 10"]
+    assert len(client.verdict_cache) == 0
+    assert client.run("amount=5 risk_score=0", ruleset_name="ratio")["result"] in ("approved", "denied")
+
+
+def test_delegator_handlers_respect_budget():
+    delegator = Delegator(Client())
+    response = delegator.analyze_and_translate(HARD_PROMPT, budget=SolveBudget(timeout=0.3))
+    assert response == "Решатель не уложился в бюджет (timeout). [Проверка Логос: результат неизвестен.]"
+    response = delegator.analyze_and_translate("Реши уравнение x == -3, где x < 0.", budget=SolveBudget(timeout=5))
+    assert response.startswith("Решение найдено: x = -3.")
+
+
+def test_forensic_and_hunter_verdicts_on_exhausted_budget():
+    orderbook = {"asks": pd.DataFrame({"price": [100.5]}), "bids": pd.DataFrame({"price": [100.0]})}
+    trade = {"price": 90.0, "side": "SELL"}
+    result = ForensicSolver().verify(trade, pd.DataFrame(), orderbook, budget=SolveBudget(timeout=0))
+    assert result["verdict"] == "UNKNOWN" and result["reason"] == "timeout"
+    assert ForensicSolver().verify(trade, pd.DataFrame(), orderbook)["verdict"] == "LIQUIDITY_VOID_DETECTED"
+
+    hunter = StopLossHunter()
+    assert hunter.find_minimal_crash(1000.0, budget=SolveBudget(timeout=0)) == 950.0
+    assert hunter.last_outcome.reason == "timeout"
+
+
+def test_concurrent_solving_matches_sequential(tmp_path):
+    # Деление на переменную: точная арифметика отказывается при нуле, проверка идет в Z3
+    (tmp_path / "ratio.json").write_text('{"rules": ["amount / risk_score < 10", "amount < 1000"]}')
+    client = Client(verdict_cache=VerdictCache(maxsize=0))
+    client.load_ruleset(str(tmp_path))
+    delegator = Delegator(client)
+    prompts = [f"amount={amount} risk_score=0" for amount in range(0, 1200, 50)]
+    algebra = [f"Реши уравнение x + y == {n}, где x > {n - 3} и y > 1." for n in range(10, 34)]
+
+    def work(i):
+        return (client.run(prompts[i], ruleset_name="ratio")["result"],
+                delegator.analyze_and_translate(algebra[i]))
+
+    sequential = [work(i) for i in range(len(prompts))]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        for _ in range(3):
+            assert list(pool.map(work, range(len(prompts)))) == sequential
+
+
+def test_explicit_context_is_used():
+    ctx = z3.Context()
+    orderbook = {"asks": pd.DataFrame({"price": [100.5]}), "bids": pd.DataFrame({"price": [100.0]})}
+    result = ForensicSolver(ctx=ctx).verify({"price": 100.2, "side": "BUY"}, pd.DataFrame(), orderbook)
+    assert result["verdict"] == "CLEAN"
+    assert 1000.0 <= StopLossHunter(ctx=ctx).find_minimal_crash(1050.0) < 1001.0
+    assert Delegator(Client(), ctx=ctx).analyze_and_translate("Реши уравнение x == 4, где x > 0.").startswith("Решение найдено: x = 4.")
@@ -0,0 +1,79 @@
+# tests/test_tactics.py
+
+import random
+import z3
+import pytest
+from logos import tactics
+from logos.client import Client
+from logos.delegator import Delegator
+from logos.profiling import HANDLER_METRICS
+from logos.solving import SAT, SolveBudget
+
+
+def test_classify_problem_classes():
+    ctx = z3.Context()
+    x, y = z3.Ints("x y", ctx)
+    r, q = z3.Reals("r q", ctx)
+    a, b = z3.Bools("a b", ctx)
+    assert tactics.classify([z3.Or(a, z3.Not(b)), a], ctx) == "propositional"
+    assert tactics.classify([3 * x - y == 5, x + y > 0], ctx) == "linear_int"
+    assert tactics.classify([r == 1.5, z3.If(r > q, r - q, q - r) <= 0.25], ctx) == "linear_real"
+    # Нелинейность, смешанная арифметика, to_int / mod и кванторы — решатель по умолчанию
+    assert tactics.classify([x * y == 6], ctx) == "default"
+    assert tactics.classify([r + x > 1], ctx) == "default"
+    assert tactics.classify([z3.ToInt(r) % 100 == 0], ctx) == "default"
+    assert tactics.classify([z3.ForAll([x], x + y >= y - 1)], ctx) == "default"
+    assert tactics.classify([], ctx) == "default"
+
+
+@pytest.mark.parametrize("sort", ["int", "real"])
+def test_selected_solver_agrees_with_default(sort):
+    rng = random.Random(7)
+    ctx = z3.Context()
+    make = z3.Int if sort == "int" else z3.Real
+    variables = [make(f"v{i}", ctx) for i in range(4)]
+    for _ in range(40):
+        constraints = []
+        for _ in range(rng.randint(2, 6)):
+            term = z3.Sum([rng.randint(-3, 3) * var for var in variables])
+            bound = rng.randint(-10, 10)
+            constraints.append(rng.choice([term == bound, term <= bound, term > bound]))
+        selected = tactics.make_solver(ctx, constraints)
+        assert selected.logos_class == ("linear_int" if sort == "int" else "linear_real")
+        reference = z3.Solver(ctx=ctx)
+        reference.add(constraints)
+        outcome, selected = tactics.check(SolveBudget(timeout=5), selected, "test.tactics")
+        assert outcome.status == str(reference.check())
+        if outcome.status == SAT:
+            model = selected.model()
+            assert all(z3.is_true(model.eval(c, model_completion=True)) for c in constraints)
+
+
+def test_disabled_and_fallback(monkeypatch):
+    ctx = z3.Context()
+    x = z3.Int("x", ctx)
+    monkeypatch.setenv("LOGOS_Z3_TACTICS", "0")
+    assert tactics.make_solver(ctx, [x > 1]).logos_class == "default"
+    monkeypatch.delenv("LOGOS_Z3_TACTICS")
+
+    # Конвейер, который сдается на любой задаче: ответ дает решатель по умолчанию
+    monkeypatch.setitem(tactics.PIPELINES, "linear_int", ("fail",))
+    solver = tactics.make_solver(ctx, [x > 1, x < 3])
+    assert solver.logos_class == "linear_int"
+    outcome, solver = tactics.check(SolveBudget(timeout=5), solver, "test.tactics")
+    assert outcome.status == SAT and solver.logos_class == "default"
+    assert solver.model()[x].as_long() == 2
+
+
+def test_handlers_record_problem_class():
+    HANDLER_METRICS.reset()
+    try:
+        delegator = Delegator(Client(), fast_path=False)
+        answer = delegator.analyze_and_translate("Реши уравнение 3*x - y == 5, где x > 0 и y > 0")
+        assert answer.startswith("Решение найдено")
+        delegator.analyze_and_translate("Если Алиса идет, то Боб не идет. Алиса точно идет.")
+        snapshot = HANDLER_METRICS.snapshot()
+        assert snapshot["algebra"]["solver_classes"] == {"linear_int": 1}
+        assert set(snapshot["boolean"]["solver_classes"]) == {"propositional"}
+    finally:
+        HANDLER_METRICS.reset()
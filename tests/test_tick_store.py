@@ -0,0 +1,164 @@
+# tests/test_tick_store.py
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import numpy as np
+import pytest
+from logos.tick_store import TickStore, merge_ranges, subtract_ranges
+
+DAY = 86_400_000
+START = 1_700_000_000_000
+
+
+def make_trades(n, start=START, seed=0):
+    """n aggTrades от start: по 0-3 мс между сделками, чтобы много сделок делили миллисекунду."""
+    rng = np.random.default_rng(seed)
+    times = start + np.cumsum(rng.integers(0, 4, n))
+    return [
+        {"a": 5000 + i, "p": f"{100 + 0.01 * (i % 50):.2f}", "q": "0.5", "f": 0, "l": 0, "T": int(t), "m": bool(i % 2)}
+        for i, t in enumerate(times)
+    ]
+
+
+class AggTradesStub:
+    """Локальный HTTP-сервер с /api/v3/aggTrades: startTime / endTime / fromId / limit как у Binance."""
+    def __init__(self, trades):
+        self.trades = trades
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = {key: int(values[0]) if key != "symbol" else values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+                stub.requests.append(query)
+                limit = min(query.get("limit", 500), 1000)
+                if "fromId" in query:
+                    page = [t for t in stub.trades if t["a"] >= query["fromId"]]
+                else:
+                    if query["endTime"] - query["startTime"] >= 3_600_000:
+                        self.send_error(400, "window longer than one hour")
+                        return
+                    page = [t for t in stub.trades if query["startTime"] <= t["T"] <= query["endTime"]]
+                body = json.dumps(page[:limit]).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    server = AggTradesStub(make_trades(5000))
+    yield server
+    server.close()
+
+
+def expected_ids(trades, lo, hi):
+    return [t["a"] for t in trades if lo <= t["T"] <= hi]
+
+
+def test_range_arithmetic():
+    assert merge_ranges([(10, 20), (0, 5), (6, 8), (19, 30), (40, 50)]) == [[0, 8], [10, 30], [40, 50]]
+    assert subtract_ranges(0, 100, [[10, 20], [30, 40]]) == [(0, 9), (21, 29), (41, 100)]
+    assert subtract_ranges(15, 35, [[10, 20], [30, 40]]) == [(21, 29)]
+    assert subtract_ranges(0, 5, []) == [(0, 5)]
+    assert subtract_ranges(12, 18, [[10, 20]]) == []
+
+
+def test_store_merges_days_and_coverage(tmp_path):
+    store = TickStore(str(tmp_path))
+    ids = np.arange(10)
+    times = START - START % DAY + DAY - 5 + ids  # пять сделок до полуночи, пять после
+    ticks = {"trade_id": ids, "price": ids * 1.0, "qty": np.ones(10), "timestamp": times, "is_buyer_maker": ids % 2 == 0}
+    store.write("btcusdt", int(times[0]), int(times[6]), {k: v[:7] for k, v in ticks.items()})
+    store.write("BTCUSDT", int(times[5]), int(times[9]), {k: v[5:] for k, v in ticks.items()})
+    assert len(list((tmp_path / "BTCUSDT").glob("*-*-*"))) == 2
+    assert store.coverage("BTCUSDT") == [(int(times[0]), int(times[9]))]
+    read = store.read("BTCUSDT", int(times[2]), int(times[8]))
+    assert read["trade_id"].tolist() == list(range(2, 9)) and read["is_buyer_maker"].dtype == np.bool_
+    assert store.missing("BTCUSDT", int(times[0]) - 10, int(times[9]) + 10) == [(int(times[0]) - 10, int(times[0]) - 1), (int(times[9]) + 1, int(times[9]) + 10)]
+
+
+def _write_batches(root, worker, workers, batches):
+    # Рабочий процесс очереди расследований: свой TickStore на общем каталоге
+    store = TickStore(root)
+    for batch in range(worker, batches, workers):
+        ids = np.arange(batch * 10, batch * 10 + 10)
+        ticks = {"trade_id": ids, "price": ids * 1.0, "qty": np.ones(10), "timestamp": START + ids, "is_buyer_maker": ids % 2 == 0}
+        store.write("BTCUSDT", START + batch * 10, START + batch * 10 + 9, ticks)
+        read = store.read("BTCUSDT", START, START + batches * 10)
+        # Колонки одного поколения: время всегда соответствует id
+        assert (read["timestamp"] - read["trade_id"] == START).all()
+
+
+def test_concurrent_writers_keep_every_trade(tmp_path):
+    import multiprocessing
+    workers, batches = 4, 80
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=_write_batches, args=(str(tmp_path), worker, workers, batches)) for worker in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+    assert [process.exitcode for process in processes] == [0] * workers
+    store = TickStore(str(tmp_path))
+    assert store.read("BTCUSDT", START, START + batches * 10)["trade_id"].tolist() == list(range(batches * 10))
+    assert store.coverage("BTCUSDT") == [(START, START + batches * 10 - 1)]
+
+
+def test_time_machine_pages_splits_and_serves_repeats_locally(tmp_path, stub):
+    pytest.importorskip("requests")
+    from logos.time_machine import TimeMachine
+    trades = stub.trades
+    end = trades[-1]["T"]
+    lo, hi = START + 100, end - 100
+
+    # Без кэша: одно окно листается по fromId, без обрезки на 1000 сделках
+    machine = TimeMachine(base_url=stub.url, workers=1)
+    frame = machine.get_historical_agg_trades("btcusdt", lo, hi)
+    assert frame["trade_id"].tolist() == expected_ids(trades, lo, hi) and len(frame) > 3000
+    assert any("fromId" in query for query in stub.requests)
+    assert frame["timestamp"].dtype.kind == "M"
+
+    # Параллельные куски: окна не длиннее часа и не пересекаются
+    stub.requests.clear()
+    machine = TimeMachine(base_url=stub.url, tick_store=TickStore(str(tmp_path)), workers=4)
+    machine.MIN_CHUNK_MS = 1000
+    frame = machine.get_historical_agg_trades("BTCUSDT", lo, hi)
+    assert frame["trade_id"].tolist() == expected_ids(trades, lo, hi)
+    windows = [(query["startTime"], query["endTime"]) for query in stub.requests if "startTime" in query]
+    assert len(windows) == 4 and merge_ranges(windows) == [[lo, hi]]
+
+    # Повтор того же окна — без сети; пересекающееся — только недостающие края
+    stub.requests.clear()
+    assert machine.get_historical_agg_trades("BTCUSDT", lo, hi)["trade_id"].tolist() == expected_ids(trades, lo, hi)
+    assert stub.requests == []
+    frame = machine.get_historical_agg_trades("BTCUSDT", START, end)
+    assert frame["trade_id"].tolist() == [t["a"] for t in trades]
+    windows = merge_ranges([(query["startTime"], query["endTime"]) for query in stub.requests if "startTime" in query])
+    assert windows == [[START, lo - 1], [hi + 1, end]]
+
+
+def test_network_error_returns_empty_and_caches_nothing(tmp_path):
+    pytest.importorskip("requests")
+    from logos.time_machine import TimeMachine
+    server = AggTradesStub(make_trades(10))
+    url = server.url
+    server.close()
+    store = TickStore(str(tmp_path))
+    frame = TimeMachine(base_url=url, tick_store=store).get_historical_agg_trades("BTCUSDT", START, START + 1000)
+    assert frame.empty and store.coverage("BTCUSDT") == []